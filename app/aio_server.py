@@ -0,0 +1,389 @@
+"""
+Servidor HTTP/1.1 baseado em asyncio
+
+Alternativa ao modo threaded para muitas conexões keep-alive ociosas: cada
+conexão é uma corrotina (e não uma thread), e só as requisições em
+processamento ocupam uma thread do executor, onde o Router, os controllers e
+o SQLite rodam sem bloquear o event loop.
+
+- Pipelining: requisições enviadas em sequência na mesma conexão ficam no
+  buffer do StreamReader e são respondidas na ordem de chegada.
+- Backpressure: o número de requisições em processamento é limitado por um
+  semáforo; enquanto uma conexão espera, ela não lê novas requisições. As
+  escritas aguardam `drain()` quando o buffer de saída do transporte enche.
+- Respostas adiadas: um endpoint pode enviar os cabeçalhos e registrar com
+  request.defer() uma corrotina que termina a resposta no event loop (long-poll
+  e SSE do feed de alterações), liberando a thread do executor durante a espera.
+"""
+import asyncio
+import email.parser
+import email.utils
+import http.client
+import signal
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from app import config
+from app.database.backend import close_storage
+from app.routes import Router
+from app.utils.request import BODY_READ_CHUNK_SIZE, body_length, parse_json_body
+from app.utils.response import ResponseBuilder
+
+SERVER_VERSION = "TodoAPI/2.0 asyncio"
+MAX_HEADER_BYTES = 64 * 1024
+
+# Acima deste tamanho a saída de uma resposta é enviada ao event loop
+# durante o processamento (streaming), em vez de só ao final
+WRITE_FLUSH_THRESHOLD = 64 * 1024
+
+
+class _LoopWriter:
+    """
+    Arquivo de saída usado pelos controllers a partir da thread do executor.
+
+    Acumula os bytes localmente e, quando o buffer passa do limite, entrega os
+    dados ao event loop e aguarda o `drain()` do transporte (backpressure).
+    O restante é enviado pela corrotina da conexão ao fim da requisição.
+    """
+
+    def __init__(self, loop, writer):
+        self._loop = loop
+        self._writer = writer
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer += data
+        if len(self._buffer) >= WRITE_FLUSH_THRESHOLD:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if not self._buffer:
+            return
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        asyncio.run_coroutine_threadsafe(self._send(data), self._loop).result()
+
+    async def _send(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def take(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+class AsyncRequest:
+    """
+    Requisição com a mesma interface de BaseHTTPRequestHandler usada pelo
+    Router, controllers e ResponseBuilder (send_response, send_header,
+    end_headers, wfile, headers, ...).
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def __init__(self, command, path, request_version, headers, client_address, wfile):
+        self.command = command
+        self.path = path
+        self.request_version = request_version
+        self.headers = headers
+        self.client_address = client_address
+        self.wfile = wfile
+        self.close_connection = not self._wants_keep_alive()
+        self.status_code = None
+        self.server = None
+        self.deferred = None
+        self._headers_buffer = []
+
+    def _wants_keep_alive(self):
+        connection = (self.headers.get("Connection") or "").lower()
+        if self.request_version == "HTTP/1.1":
+            return connection != "close"
+        return connection == "keep-alive"
+
+    def defer(self, continuation):
+        """
+        Registra uma corrotina continuation(request, flush) que termina a
+        resposta no event loop depois que o endpoint retornar. Ela escreve em
+        request.wfile (um buffer) e aguarda flush() para enviar o que já escreveu.
+        """
+        self.deferred = continuation
+
+    def send_response(self, code, message=None):
+        self.status_code = code
+        if message is None:
+            try:
+                message = HTTPStatus(code).phrase
+            except ValueError:
+                message = ""
+        self._headers_buffer.append(
+            f"{self.protocol_version} {code} {message}\r\n".encode("latin-1")
+        )
+        self.send_header("Server", SERVER_VERSION)
+        self.send_header("Date", email.utils.formatdate(usegmt=True))
+
+    def send_header(self, keyword, value):
+        self._headers_buffer.append(f"{keyword}: {value}\r\n".encode("latin-1"))
+        if keyword.lower() == "connection" and value.lower() == "close":
+            self.close_connection = True
+
+    def end_headers(self):
+        if self.close_connection and not any(
+            line.lower().startswith(b"connection:") for line in self._headers_buffer
+        ):
+            self._headers_buffer.append(b"Connection: close\r\n")
+        self._headers_buffer.append(b"\r\n")
+        self.wfile.write(b"".join(self._headers_buffer))
+        self._headers_buffer = []
+
+
+class AsyncHTTPServer:
+    """Servidor asyncio que despacha as requisições para o Router em um executor limitado"""
+
+    def __init__(self, host, port, workers=16, max_inflight=None, keepalive_timeout=15.0,
+                 backlog=128, sock=None):
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+        self.keepalive_timeout = keepalive_timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="aio-worker")
+        self._max_inflight = max_inflight or workers * 2
+        self._sock = sock
+        self._server = None
+        self._inflight = None
+        self._connections = set()
+        self._idle = set()
+        self.draining = False
+
+    async def start(self):
+        self._inflight = asyncio.Semaphore(self._max_inflight)
+        if self._sock is not None:
+            self._server = await asyncio.start_server(
+                self._handle_connection, sock=self._sock, limit=MAX_HEADER_BYTES,
+                backlog=self.backlog
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES,
+                backlog=self.backlog, reuse_address=True
+            )
+        return self._server.sockets[0].getsockname()
+
+    async def stop(self, drain_timeout):
+        """Para de aceitar conexões, fecha as ociosas e aguarda as que estão em andamento"""
+        self.draining = True
+        self._server.close()
+        for task in list(self._idle):
+            task.cancel()
+
+        pending = [task for task in self._connections if not task.done()]
+        if pending:
+            _, pending = await asyncio.wait(pending, timeout=drain_timeout)
+            if pending:
+                print(f"Tempo de drenagem esgotado, encerrando {len(pending)} conexões restantes")
+            for task in pending:
+                task.cancel()
+        await self._server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        client_address = writer.get_extra_info("peername")
+        try:
+            while not self.draining:
+                self._idle.add(task)
+                try:
+                    head = await asyncio.wait_for(
+                        reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout
+                    )
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError,
+                        asyncio.CancelledError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._write_simple_error(writer, 431, "Cabeçalhos muito grandes")
+                    break
+                finally:
+                    self._idle.discard(task)
+
+                keep_alive = await self._handle_request(head, reader, writer, client_address)
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, asyncio.CancelledError):
+                pass
+
+    async def _handle_request(self, head, reader, writer, client_address):
+        """
+        Processa uma requisição já com os cabeçalhos lidos
+        Retorna: True se a conexão deve continuar aberta
+        """
+        request_line, _, header_block = head.partition(b"\r\n")
+        try:
+            command, path, version = request_line.decode("latin-1").split()
+            if not version.startswith("HTTP/1."):
+                raise ValueError
+        except ValueError:
+            await self._write_simple_error(writer, 400, "Linha de requisição inválida")
+            return False
+
+        headers = email.parser.BytesParser(_class=http.client.HTTPMessage).parsebytes(header_block)
+
+        # Corpo ausente de tamanho conhecido, inválido ou acima do limite é
+        # rejeitado antes de qualquer leitura
+        length, status_code, error_msg = body_length(headers)
+        if error_msg:
+            await self._write_simple_error(writer, status_code, error_msg)
+            return False
+
+        if length and (headers.get("Expect") or "").lower() == "100-continue":
+            writer.write(b"HTTP/1.1 100 Continue\r\n\r\n")
+            await writer.drain()
+
+        raw_body = await self._read_body(reader, length)
+        if raw_body is None:
+            return False
+
+        wfile = _LoopWriter(asyncio.get_running_loop(), writer)
+        request = AsyncRequest(command, path, version, headers, client_address, wfile)
+        request.server = self
+        if self.draining:
+            request.close_connection = True
+
+        body = None
+        if command in ("POST", "PUT", "PATCH", "DELETE"):
+            body, error_msg = parse_json_body(raw_body, headers.get("Content-Type"))
+            if error_msg:
+                ResponseBuilder.bad_request(request, error_msg)
+                writer.write(wfile.take())
+                await writer.drain()
+                return not request.close_connection
+
+        async with self._inflight:
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(
+                    self.executor, Router.dispatch, request, command, path, body
+                )
+            except Exception as e:
+                print(f"Erro ao processar requisição: {e}")
+                if request.status_code is None:
+                    ResponseBuilder.internal_error(request)
+                else:
+                    request.close_connection = True
+
+        writer.write(wfile.take())
+        await writer.drain()
+        if request.deferred is not None:
+            return await self._finish_deferred(request, writer)
+        return not request.close_connection
+
+    async def _finish_deferred(self, request, writer):
+        """
+        Executa a continuação registrada com request.defer(), fora do semáforo
+        de requisições em processamento
+        Retorna: True se a conexão deve continuar aberta
+        """
+        request.wfile = _BufferWriter()
+
+        async def flush():
+            writer.write(request.wfile.take())
+            await writer.drain()
+
+        try:
+            await request.deferred(request, flush)
+            await flush()
+        except ConnectionError:
+            return False
+        except Exception as e:
+            # Cabeçalhos já enviados: resta encerrar a conexão
+            print(f"Erro ao concluir resposta adiada: {e}")
+            return False
+        return not request.close_connection
+
+    async def _read_body(self, reader, length):
+        """
+        Lê o corpo em blocos de BODY_READ_CHUNK_SIZE; cada bloco precisa chegar
+        dentro do timeout de keep-alive, para que um cliente lento não prenda a conexão
+        Retorna: bytes ou None se a conexão caiu ou expirou antes do fim do corpo
+        """
+        buffer = bytearray()
+        try:
+            while len(buffer) < length:
+                buffer += await asyncio.wait_for(
+                    reader.readexactly(min(BODY_READ_CHUNK_SIZE, length - len(buffer))),
+                    self.keepalive_timeout,
+                )
+        except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+            return None
+        return bytes(buffer)
+
+    @staticmethod
+    async def _write_simple_error(writer, status_code, message):
+        request = AsyncRequest("GET", "/", "HTTP/1.1", http.client.HTTPMessage(), None, _BufferWriter())
+        request.close_connection = True
+        ResponseBuilder.error(request, message, status_code)
+        try:
+            writer.write(request.wfile.take())
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+class _BufferWriter:
+    """Buffer simples para respostas montadas dentro do próprio event loop"""
+
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data):
+        self._buffer += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+async def serve(sock=None):
+    """
+    Executa o servidor asyncio até receber SIGTERM/SIGINT
+    Args:
+        sock: socket de escuta já aberto (modo prefork) ou None
+    """
+    server = AsyncHTTPServer(
+        config.SERVER_HOST,
+        config.SERVER_PORT,
+        workers=config.SERVER_THREADS,
+        max_inflight=config.AIO_MAX_INFLIGHT,
+        keepalive_timeout=config.SERVER_KEEPALIVE_TIMEOUT,
+        backlog=config.SERVER_BACKLOG,
+        sock=sock,
+    )
+    host, port = (await server.start())[:2]
+    if sock is None:
+        print(f"✓ Servidor (asyncio, {config.SERVER_THREADS} threads de banco) em http://{host}:{port}")
+
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, stop.set)
+
+    await stop.wait()
+    await server.stop(config.SERVER_DRAIN_TIMEOUT)
+    close_storage()
+
+
+def run(sock=None):
+    asyncio.run(serve(sock))
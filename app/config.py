@@ -0,0 +1,212 @@
+"""
+Configurações da aplicação
+
+Os valores padrão podem ser sobrescritos por variáveis de ambiente (prefixo TODO_)
+ou diretamente pelo ponto de entrada do servidor antes da inicialização, por isso
+os módulos devem ler `config.NOME` no momento do uso e não copiar o valor no import.
+"""
+import os
+
+
+def _env_str(name, default):
+    return os.environ.get(name, default)
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value not in (None, "") else default
+
+
+def _env_bool(name, default):
+    value = os.environ.get(name)
+    if value in (None, ""):
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+# Backend de armazenamento do TaskRepository: "sqlite", "memory" ou "sharded"
+STORAGE_BACKEND = _env_str("TODO_STORAGE_BACKEND", "sqlite")
+
+# Backend em memória (STORAGE_BACKEND = "memory")
+# - SNAPSHOT_PATH: arquivo do snapshot; None = sem persistência (os dados
+#   somem quando o processo termina)
+# - SNAPSHOT_INTERVAL: segundos entre snapshots (0 = apenas no desligamento)
+# - AOF_ENABLED: grava cada escrita em <SNAPSHOT_PATH>.aof, reaplicado na
+#   partida sobre o último snapshot
+# - AOF_FSYNC: "always" (fsync a cada escrita), "everysec" (fsync a cada
+#   segundo) ou "no" (o sistema operacional decide)
+MEMORY_SNAPSHOT_PATH = _env_str("TODO_MEMORY_SNAPSHOT_PATH", None)
+MEMORY_SNAPSHOT_INTERVAL = _env_float("TODO_MEMORY_SNAPSHOT_INTERVAL", 300.0)
+MEMORY_AOF_ENABLED = _env_bool("TODO_MEMORY_AOF_ENABLED", True)
+MEMORY_AOF_FSYNC = _env_str("TODO_MEMORY_AOF_FSYNC", "everysec")
+
+# Banco de dados
+DB_PATH = _env_str("TODO_DB_PATH", "tasks.db")
+
+# Backend particionado (STORAGE_BACKEND = "sharded")
+# - SHARDS: quantidade de arquivos SQLite; o shard de cada tarefa é id % SHARDS,
+#   então o valor não pode mudar depois que os shards têm dados
+# - SHARD_PATHS: caminhos dos shards separados por vírgula (ex.: um por disco);
+#   vazio = derivados de DB_PATH (tasks.shard0.db, tasks.shard1.db, ...). O log
+#   unificado de alterações fica em tasks.catalog.db
+DB_SHARDS = _env_int("TODO_DB_SHARDS", 4)
+DB_SHARD_PATHS = _env_str("TODO_DB_SHARD_PATHS", "")
+
+# Pool de conexões
+DB_POOL_SIZE = _env_int("TODO_DB_POOL_SIZE", 8)
+DB_POOL_TIMEOUT = _env_float("TODO_DB_POOL_TIMEOUT", 5.0)
+DB_POOL_HEALTH_CHECK_INTERVAL = _env_float("TODO_DB_POOL_HEALTH_CHECK_INTERVAL", 30.0)
+DB_STATEMENT_CACHE_SIZE = _env_int("TODO_DB_STATEMENT_CACHE_SIZE", 128)
+
+# Perfil de armazenamento SQLite: "safe", "balanced", "fast" ou "legacy".
+# Cada PRAGMA pode ser sobrescrito individualmente; None mantém o valor do perfil.
+DB_STORAGE_PROFILE = _env_str("TODO_DB_STORAGE_PROFILE", "balanced")
+DB_JOURNAL_MODE = _env_str("TODO_DB_JOURNAL_MODE", None)
+DB_SYNCHRONOUS = _env_str("TODO_DB_SYNCHRONOUS", None)
+DB_MMAP_SIZE = _env_int("TODO_DB_MMAP_SIZE", None)
+DB_CACHE_SIZE = _env_int("TODO_DB_CACHE_SIZE", None)
+DB_BUSY_TIMEOUT = _env_int("TODO_DB_BUSY_TIMEOUT", None)
+
+# Thread escritora única com group commit
+DB_WRITER_ENABLED = _env_bool("TODO_DB_WRITER_ENABLED", True)
+DB_WRITER_MAX_BATCH = _env_int("TODO_DB_WRITER_MAX_BATCH", 256)
+DB_WRITER_QUEUE_SIZE = _env_int("TODO_DB_WRITER_QUEUE_SIZE", 10000)
+DB_WRITER_TIMEOUT = _env_float("TODO_DB_WRITER_TIMEOUT", 30.0)
+
+# Paginação de GET /tasks
+TASKS_PAGE_DEFAULT_LIMIT = _env_int("TODO_TASKS_PAGE_DEFAULT_LIMIT", 100)
+TASKS_PAGE_MAX_LIMIT = _env_int("TODO_TASKS_PAGE_MAX_LIMIT", 1000)
+
+# Busca textual (GET /tasks/search, FTS5)
+SEARCH_PAGE_DEFAULT_LIMIT = _env_int("TODO_SEARCH_PAGE_DEFAULT_LIMIT", 20)
+SEARCH_PAGE_MAX_LIMIT = _env_int("TODO_SEARCH_PAGE_MAX_LIMIT", 100)
+SEARCH_QUERY_MAX_LENGTH = _env_int("TODO_SEARCH_QUERY_MAX_LENGTH", 200)
+SEARCH_SNIPPET_TOKENS = _env_int("TODO_SEARCH_SNIPPET_TOKENS", 12)
+
+# Estatísticas (GET /tasks/stats): dias do histograma de criação
+STATS_DEFAULT_DAYS = _env_int("TODO_STATS_DEFAULT_DAYS", 30)
+STATS_MAX_DAYS = _env_int("TODO_STATS_MAX_DAYS", 366)
+
+# Exportação em streaming (GET /tasks/export)
+EXPORT_BATCH_SIZE = _env_int("TODO_EXPORT_BATCH_SIZE", 500)
+
+# Feed de alterações (GET /tasks/changes e /tasks/changes/stream)
+# - BUFFER_SIZE: últimas alterações mantidas em memória e compartilhadas pelos assinantes
+# - RETENTION: linhas mantidas em task_changes (0 = sem poda), podadas a cada
+#   PRUNE_INTERVAL escritas do processo
+# - POLL_INTERVAL: intervalo em que o log é relido para ver escritas de outros processos
+# - HEARTBEAT: comentário enviado no SSE após esse tempo sem eventos
+# - MAX_BLOCKING_SUBSCRIBERS: esperas simultâneas no modo threaded (cada uma
+#   ocupa uma thread); MAX_SUBSCRIBERS: esperas no event loop (asyncio)
+CHANGES_BUFFER_SIZE = _env_int("TODO_CHANGES_BUFFER_SIZE", 10000)
+CHANGES_RETENTION = _env_int("TODO_CHANGES_RETENTION", 100000)
+CHANGES_PRUNE_INTERVAL = _env_int("TODO_CHANGES_PRUNE_INTERVAL", 1000)
+CHANGES_PAGE_DEFAULT_LIMIT = _env_int("TODO_CHANGES_PAGE_DEFAULT_LIMIT", 100)
+CHANGES_PAGE_MAX_LIMIT = _env_int("TODO_CHANGES_PAGE_MAX_LIMIT", 1000)
+CHANGES_MAX_WAIT = _env_float("TODO_CHANGES_MAX_WAIT", 30.0)
+CHANGES_POLL_INTERVAL = _env_float("TODO_CHANGES_POLL_INTERVAL", 1.0)
+CHANGES_HEARTBEAT = _env_float("TODO_CHANGES_HEARTBEAT", 15.0)
+CHANGES_MAX_BLOCKING_SUBSCRIBERS = _env_int("TODO_CHANGES_MAX_BLOCKING_SUBSCRIBERS", 8)
+CHANGES_MAX_SUBSCRIBERS = _env_int("TODO_CHANGES_MAX_SUBSCRIBERS", 10000)
+
+# Servidor HTTP
+SERVER_HOST = _env_str("TODO_SERVER_HOST", "127.0.0.1")
+SERVER_PORT = _env_int("TODO_SERVER_PORT", 8000)
+SERVER_MODE = _env_str("TODO_SERVER_MODE", "threaded")
+SERVER_ENGINE = _env_str("TODO_SERVER_ENGINE", "threaded")
+SERVER_PROCESSES = _env_int("TODO_SERVER_PROCESSES", os.cpu_count() or 1)
+SERVER_THREADS = _env_int("TODO_SERVER_THREADS", 16)
+SERVER_MAX_PENDING = _env_int("TODO_SERVER_MAX_PENDING", 256)
+SERVER_BACKLOG = _env_int("TODO_SERVER_BACKLOG", 128)
+SERVER_KEEPALIVE_TIMEOUT = _env_float("TODO_SERVER_KEEPALIVE_TIMEOUT", 15.0)
+SERVER_DRAIN_TIMEOUT = _env_float("TODO_SERVER_DRAIN_TIMEOUT", 10.0)
+SERVER_ACCESS_LOG = _env_bool("TODO_SERVER_ACCESS_LOG", False)
+# Tamanho máximo do corpo de uma requisição (bytes); acima dele a resposta é
+# 413 sem ler o corpo
+SERVER_MAX_BODY_SIZE = _env_int("TODO_SERVER_MAX_BODY_SIZE", 4 * 1024 * 1024)
+
+# Réplicas de leitura (modo prefork com STORAGE_BACKEND = "sqlite"): processos
+# que atendem só GET/HEAD em REPLICA_PORT; escritas recebem 307 para o primário
+# - REPLICAS: quantidade de processos de leitura (0 desativa)
+# - PORT: porta das réplicas (0 = SERVER_PORT + 1)
+# - MODE: "readonly" (conexões mode=ro no próprio banco, sempre atualizadas) ou
+#   "snapshot" (cópia local do banco via API de backup, renovada em segundo plano)
+# - MAX_STALENESS: atraso máximo (s) de um snapshot; uma requisição que encontra
+#   o snapshot mais velho que isso espera a renovação (0 = confere a cada requisição)
+# - SNAPSHOT_DIR: diretório das cópias (vazio = diretório temporário do sistema)
+# - PRIMARY_URL: destino dos redirecionamentos de escrita (vazio = mesmo host
+#   da requisição na porta SERVER_PORT)
+SERVER_REPLICAS = _env_int("TODO_SERVER_REPLICAS", 0)
+REPLICA_PORT = _env_int("TODO_REPLICA_PORT", 0)
+REPLICA_MODE = _env_str("TODO_REPLICA_MODE", "snapshot")
+REPLICA_MAX_STALENESS = _env_float("TODO_REPLICA_MAX_STALENESS", 1.0)
+REPLICA_SNAPSHOT_DIR = _env_str("TODO_REPLICA_SNAPSHOT_DIR", "")
+REPLICA_PRIMARY_URL = _env_str("TODO_REPLICA_PRIMARY_URL", "")
+
+# Servidor asyncio: máximo de requisições em processamento simultâneo
+# (None = 2x o número de threads do executor)
+AIO_MAX_INFLIGHT = _env_int("TODO_AIO_MAX_INFLIGHT", None)
+
+# Compressão das respostas (Accept-Encoding: gzip/deflate). Corpos menores que
+# COMPRESSION_MIN_SIZE bytes são enviados sem compressão; nível de 1 (rápido) a 9
+COMPRESSION_ENABLED = _env_bool("TODO_COMPRESSION_ENABLED", True)
+COMPRESSION_MIN_SIZE = _env_int("TODO_COMPRESSION_MIN_SIZE", 1024)
+COMPRESSION_LEVEL = _env_int("TODO_COMPRESSION_LEVEL", 6)
+
+# Métricas por requisição expostas em GET /metrics (formato Prometheus)
+METRICS_ENABLED = _env_bool("TODO_METRICS_ENABLED", True)
+
+# Perfil dos statements SQL (opt-in): agregados em GET /status e log de queries
+# lentas em JSON por linha ("-" = stderr), com o EXPLAIN QUERY PLAN de cada statement
+DB_PROFILE_ENABLED = _env_bool("TODO_DB_PROFILE_ENABLED", False)
+DB_SLOW_QUERY_MS = _env_float("TODO_DB_SLOW_QUERY_MS", 100.0)
+DB_SLOW_QUERY_LOG = _env_str("TODO_DB_SLOW_QUERY_LOG", "slow_queries.log")
+DB_SLOW_QUERY_EXPLAIN = _env_bool("TODO_DB_SLOW_QUERY_EXPLAIN", True)
+
+# Amostragem de requisições com cProfile (opt-in): fração das requisições
+# perfiladas e quantos perfis (.prof) das mais lentas são mantidos em disco
+PROFILE_SAMPLE_RATE = _env_float("TODO_PROFILE_SAMPLE_RATE", 0.0)
+PROFILE_DIR = _env_str("TODO_PROFILE_DIR", "profiles")
+PROFILE_KEEP = _env_int("TODO_PROFILE_KEEP", 10)
+
+# Limite por cliente (token bucket): requisições por segundo e rajada máxima,
+# separados para leituras (GET/HEAD) e escritas. A chave é o IP do cliente ou,
+# se RATE_LIMIT_KEY_HEADER for definido e presente, o valor desse header
+# (só habilite atrás de um gateway que autentique a chave)
+RATE_LIMIT_ENABLED = _env_bool("TODO_RATE_LIMIT_ENABLED", False)
+RATE_LIMIT_READ_RATE = _env_float("TODO_RATE_LIMIT_READ_RATE", 50.0)
+RATE_LIMIT_READ_BURST = _env_int("TODO_RATE_LIMIT_READ_BURST", 100)
+RATE_LIMIT_WRITE_RATE = _env_float("TODO_RATE_LIMIT_WRITE_RATE", 10.0)
+RATE_LIMIT_WRITE_BURST = _env_int("TODO_RATE_LIMIT_WRITE_BURST", 20)
+RATE_LIMIT_KEY_HEADER = _env_str("TODO_RATE_LIMIT_KEY_HEADER", "")
+RATE_LIMIT_MAX_CLIENTS = _env_int("TODO_RATE_LIMIT_MAX_CLIENTS", 10000)
+
+# Limite de requisições em execução por processo (0 desativa); as excedentes
+# esperam até ADMISSION_QUEUE_TIMEOUT segundos e então recebem 503
+ADMISSION_MAX_INFLIGHT = _env_int("TODO_ADMISSION_MAX_INFLIGHT", 0)
+ADMISSION_QUEUE_TIMEOUT = _env_float("TODO_ADMISSION_QUEUE_TIMEOUT", 1.0)
+ADMISSION_RETRY_AFTER = _env_int("TODO_ADMISSION_RETRY_AFTER", 1)
+
+# Idempotency-Key em POST /tasks: respostas guardadas por IDEMPOTENCY_TTL
+# segundos, no máximo IDEMPOTENCY_MAX_KEYS chaves (as mais antigas saem primeiro)
+IDEMPOTENCY_ENABLED = _env_bool("TODO_IDEMPOTENCY_ENABLED", True)
+IDEMPOTENCY_TTL = _env_float("TODO_IDEMPOTENCY_TTL", 24 * 3600.0)
+IDEMPOTENCY_MAX_KEYS = _env_int("TODO_IDEMPOTENCY_MAX_KEYS", 100000)
+IDEMPOTENCY_KEY_MAX_LENGTH = _env_int("TODO_IDEMPOTENCY_KEY_MAX_LENGTH", 255)
+
+# Operações em lote (/tasks/batch)
+BATCH_MAX_SIZE = _env_int("TODO_BATCH_MAX_SIZE", 1000)
+
+# Cache de leitura de GET /tasks/<id> (JSON já serializado).
+# Em modo prefork cada processo tem seu cache e só invalida as próprias escritas,
+# então uma escrita feita em outro processo pode ficar invisível até o TTL. Por isso
+# None (padrão) liga o cache em todos os modos exceto o prefork, onde só é usado se
+# habilitado explicitamente.
+TASK_CACHE_ENABLED = _env_bool("TODO_TASK_CACHE_ENABLED", None)
+TASK_CACHE_SIZE = _env_int("TODO_TASK_CACHE_SIZE", 10000)
+TASK_CACHE_TTL = _env_float("TODO_TASK_CACHE_TTL", 10.0)
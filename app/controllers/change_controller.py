@@ -0,0 +1,221 @@
+import time
+
+from app import config
+from app.utils.change_feed import ChangesExpired, get_change_feed
+from app.utils.response import ResponseBuilder
+from app.validators.task_validator import TaskValidator
+
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+SSE_CONTENT_TYPE = "text/event-stream; charset=utf-8"
+
+SSE_HEARTBEAT = b": keep-alive\n\n"
+
+class ChangeController:
+    """Controlador do feed de alterações - long-poll (JSON) e Server-Sent Events"""
+    
+    @staticmethod
+    def list(handler, query=None):
+        """
+        Alterações posteriores a `since` (GET /tasks/changes)
+        Args:
+            handler: HTTPRequestHandler
+            query: since (última seq recebida; ausente = a partir de agora),
+                   wait (segundos de espera se ainda não houver alterações) e limit
+        """
+        try:
+            params, error_msg = TaskValidator.parse_changes_params(query)
+            if error_msg:
+                return ResponseBuilder.bad_request(handler, error_msg)
+            
+            feed = get_change_feed()
+            since = params["since"] if params["since"] is not None else feed.last_seq()
+            result = feed.read(since, params["limit"])
+            wait = params["wait"] if handler.command != "HEAD" else 0
+            if result[0] or not wait:
+                return ChangeController._send_changes(handler, result)
+            
+            # Com o servidor asyncio a espera roda no event loop, sem ocupar o executor
+            defer = getattr(handler, "defer", None)
+            if not feed.subscribe(blocking=defer is None):
+                # Sem vaga para esperar: responde vazio e o cliente repete a consulta
+                return ChangeController._send_changes(handler, result)
+            if defer is not None:
+                return ChangeController._defer_changes(handler, feed, since, params["limit"], wait)
+            try:
+                result = feed.wait(since, params["limit"], wait)
+            finally:
+                feed.unsubscribe()
+            return ChangeController._send_changes(handler, result)
+        
+        except ChangesExpired as e:
+            return ChangeController._expired(handler, e)
+        
+        except Exception as e:
+            print(f"Erro ao listar alterações: {e}")
+            return ResponseBuilder.internal_error(handler)
+    
+    @staticmethod
+    def stream(handler, query=None):
+        """
+        Alterações como Server-Sent Events (GET /tasks/changes/stream)
+        Args:
+            handler: HTTPRequestHandler
+            query: since e limit (eventos por envio); na reconexão o header
+                   Last-Event-ID substitui since
+        """
+        try:
+            params, error_msg = TaskValidator.parse_changes_params(
+                query, handler.headers.get("Last-Event-ID")
+            )
+            if error_msg:
+                return ResponseBuilder.bad_request(handler, error_msg)
+            
+            feed = get_change_feed()
+            since = params["since"] if params["since"] is not None else feed.last_seq()
+            # Posição expirada é rejeitada antes dos cabeçalhos do stream
+            feed.read(since, 1)
+            
+            head = handler.command == "HEAD"
+            defer = getattr(handler, "defer", None)
+            if not head and not feed.subscribe(blocking=defer is None):
+                return ResponseBuilder.service_unavailable(
+                    handler, config.ADMISSION_RETRY_AFTER, "Limite de assinantes do feed atingido"
+                )
+            
+            chunked, _ = ResponseBuilder.start_stream(
+                handler, SSE_CONTENT_TYPE, compress=False, headers={"Cache-Control": "no-cache"}
+            )
+            if head:
+                return ResponseBuilder.end_stream(handler, chunked)
+            
+            if defer is not None:
+                async def events(request, flush):
+                    await ChangeController._stream_async(
+                        request, flush, feed, since, params["limit"], chunked
+                    )
+                return defer(events)
+            
+            try:
+                ChangeController._stream_events(handler, feed, since, params["limit"], chunked)
+            finally:
+                feed.unsubscribe()
+        
+        except ChangesExpired as e:
+            return ChangeController._expired(handler, e)
+        
+        except Exception as e:
+            print(f"Erro no stream de alterações: {e}")
+            if handler.status_code is None:
+                return ResponseBuilder.internal_error(handler)
+            handler.close_connection = True
+    
+    @staticmethod
+    def _stream_events(handler, feed, since, limit, chunked):
+        """Laço do SSE no modo threaded: a thread espera no feed entre os envios"""
+        last_write = time.monotonic()
+        try:
+            # Cabeçalhos saem já: sem isso ficariam no buffer até o primeiro evento ou heartbeat
+            handler.wfile.flush()
+            while not ChangeController._draining(handler):
+                try:
+                    entries, since, _ = feed.wait(since, limit, config.CHANGES_POLL_INTERVAL)
+                except ChangesExpired as e:
+                    ResponseBuilder.write_chunk(handler, ChangeController._reset_event(e), chunked)
+                    break
+                
+                chunk = ChangeController._next_chunk(entries, time.monotonic() - last_write)
+                if chunk is not None:
+                    ResponseBuilder.write_chunk(handler, chunk, chunked)
+                    handler.wfile.flush()
+                    last_write = time.monotonic()
+            
+            ResponseBuilder.end_stream(handler, chunked)
+        except OSError:
+            # Cliente desconectou
+            handler.close_connection = True
+    
+    @staticmethod
+    async def _stream_async(request, flush, feed, since, limit, chunked):
+        """Laço do SSE no servidor asyncio: uma corrotina por assinante"""
+        last_write = time.monotonic()
+        try:
+            while not ChangeController._draining(request):
+                try:
+                    entries, since, _ = await feed.wait_async(since, limit, config.CHANGES_POLL_INTERVAL)
+                except ChangesExpired as e:
+                    ResponseBuilder.write_chunk(request, ChangeController._reset_event(e), chunked)
+                    break
+                
+                chunk = ChangeController._next_chunk(entries, time.monotonic() - last_write)
+                if chunk is not None:
+                    ResponseBuilder.write_chunk(request, chunk, chunked)
+                    await flush()
+                    last_write = time.monotonic()
+            
+            ResponseBuilder.end_stream(request, chunked)
+        finally:
+            feed.unsubscribe()
+    
+    @staticmethod
+    def _defer_changes(handler, feed, since, limit, wait):
+        """
+        Long-poll no servidor asyncio: os cabeçalhos saem agora (chunked) e o
+        corpo é escrito pela corrotina quando houver alterações ou o tempo acabar
+        """
+        chunked, _ = ResponseBuilder.start_stream(
+            handler, JSON_CONTENT_TYPE, compress=False, headers={"Cache-Control": "no-store"}
+        )
+        
+        async def respond(request, flush):
+            try:
+                result = await feed.wait_async(since, limit, wait)
+            finally:
+                feed.unsubscribe()
+            ResponseBuilder.write_chunk(request, ChangeController._encode_changes(result), chunked)
+            ResponseBuilder.end_stream(request, chunked)
+        
+        return handler.defer(respond)
+    
+    @staticmethod
+    def _encode_changes(result):
+        entries, last_seq, has_more = result
+        return ResponseBuilder.encode_fragments(
+            "changes", [fragment for _, fragment in entries], last_seq=last_seq, has_more=has_more
+        )
+    
+    @staticmethod
+    def _send_changes(handler, result):
+        return ResponseBuilder.send_json_bytes(
+            handler, ChangeController._encode_changes(result), headers={"Cache-Control": "no-store"}
+        )
+    
+    @staticmethod
+    def _next_chunk(entries, idle):
+        """Eventos das alterações, um comentário de heartbeat ou None (nada a enviar)"""
+        if entries:
+            return b"".join(
+                b"id: %d\nevent: change\ndata: %s\n\n" % (seq, fragment.encode("utf-8"))
+                for seq, fragment in entries
+            )
+        if idle >= config.CHANGES_HEARTBEAT:
+            return SSE_HEARTBEAT
+        return None
+    
+    @staticmethod
+    def _reset_event(expired):
+        """Evento final quando o assinante ficou para trás da retenção do log"""
+        data = ResponseBuilder.encode({"oldest_seq": expired.oldest_seq, "last_seq": expired.last_seq})
+        return b"event: reset\ndata: %s\n\n" % data
+    
+    @staticmethod
+    def _expired(handler, expired):
+        return ResponseBuilder.gone(
+            handler,
+            "Posição fora do log de alterações; recarregue GET /tasks e continue de last_seq",
+            {"oldest_seq": expired.oldest_seq, "last_seq": expired.last_seq},
+        )
+    
+    @staticmethod
+    def _draining(handler):
+        """O servidor está desligando: streams abertos devem terminar"""
+        return getattr(getattr(handler, "server", None), "draining", False)
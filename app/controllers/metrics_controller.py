@@ -0,0 +1,19 @@
+from app.utils.metrics import CONTENT_TYPE, get_registry
+from app.utils.response import ResponseBuilder
+
+class MetricsController:
+    """Controlador de métricas - exposição no formato texto do Prometheus"""
+    
+    @staticmethod
+    def show(handler):
+        """
+        Retorna contadores e histogramas das requisições do processo
+        Args:
+            handler: HTTPRequestHandler
+        """
+        try:
+            return ResponseBuilder.text(handler, get_registry().render(), CONTENT_TYPE)
+        
+        except Exception as e:
+            print(f"Erro ao gerar métricas: {e}")
+            return ResponseBuilder.internal_error(handler)
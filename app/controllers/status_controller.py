@@ -0,0 +1,46 @@
+from app import config
+from app.database.backend import get_backend
+from app.database.query_log import get_query_log
+from app.utils.admission import get_admission
+from app.utils.cache import get_task_cache
+from app.utils.change_feed import get_change_feed
+from app.utils.profiler import get_profiler
+from app.utils.response import ResponseBuilder
+
+class StatusController:
+    """Controlador de status - expõe métricas internas do serviço"""
+    
+    @staticmethod
+    def show(handler):
+        """
+        Retorna métricas de uso dos recursos do servidor
+        Args:
+            handler: HTTPRequestHandler
+        """
+        try:
+            backend = get_backend()
+            status = {"storage_backend": backend.name}
+            status.update(backend.stats())
+            
+            cache = get_task_cache()
+            if cache is not None:
+                status["task_cache"] = cache.stats()
+            
+            status["change_feed"] = get_change_feed().stats()
+            
+            if config.DB_PROFILE_ENABLED:
+                status["db_queries"] = get_query_log().stats()
+            
+            admission = get_admission()
+            if admission is not None:
+                status["admission"] = admission.stats()
+            
+            request_profiler = get_profiler()
+            if request_profiler is not None:
+                status["request_profiles"] = request_profiler.stats()
+            
+            return ResponseBuilder.success(handler, status)
+        
+        except Exception as e:
+            print(f"Erro ao obter status: {e}")
+            return ResponseBuilder.internal_error(handler)
@@ -1,7 +1,17 @@
+from datetime import datetime, timedelta, timezone
+
+from app import config
 from app.models.task import Task
-from app.database.task_repository import TaskRepository
-from app.validators.task_validator import TaskValidator
-from app.utils.response import ResponseBuilder
+from app.database.task_repository import (
+    TaskRepository, PreconditionFailed, SearchUnavailable, IdempotencyKeyReused
+)
+from app.validators.task_validator import TaskValidator, VALID_STATUSES
+from app.utils.cache import get_task_cache
+from app.utils.conditional import (
+    http_date, is_not_modified, list_etag, parse_if_match, task_etag, validator_headers
+)
+from app.utils.idempotency import IDEMPOTENCY_HEADER, REPLAYED_HEADER, request_fingerprint
+from app.utils.response import ResponseBuilder, StreamAborted
 
 class TaskController:
     """Controlador de tarefas - gerencia lógica de negócio"""
@@ -20,34 +30,370 @@ class TaskController:
             if not is_valid:
                 return ResponseBuilder.bad_request(handler, error_msg)
             
+            idempotency_key = handler.headers.get(IDEMPOTENCY_HEADER)
+            if idempotency_key is not None and config.IDEMPOTENCY_ENABLED:
+                return TaskController._create_idempotent(handler, body, idempotency_key)
+            
             # Criar tarefa
             task = Task.from_dict(body)
             created_task = TaskRepository.create(task)
             
             # Retornar sucesso
-            return ResponseBuilder.created(handler, created_task.to_dict())
+            return ResponseBuilder.created(
+                handler, created_task.to_dict(), TaskController._task_headers(created_task)
+            )
         
         except Exception as e:
             print(f"Erro ao criar tarefa: {e}")
             return ResponseBuilder.internal_error(handler)
     
     @staticmethod
-    def list_all(handler):
+    def _create_idempotent(handler, body, key):
+        """
+        POST /tasks com Idempotency-Key: executa a criação uma única vez e
+        responde às repetições com a resposta gravada
+        """
+        is_valid, error_msg = TaskValidator.validate_idempotency_key(key)
+        if not is_valid:
+            return ResponseBuilder.bad_request(handler, error_msg)
+        
+        fingerprint = request_fingerprint("POST", "/tasks", body)
+        try:
+            # Repetições de uma criação já concluída não passam pela thread escritora
+            stored = TaskRepository.find_idempotent_response(key, fingerprint)
+            replayed = stored is not None
+            if not replayed:
+                stored, replayed = TaskRepository.create_idempotent(
+                    Task.from_dict(body), key, fingerprint, TaskController._created_response
+                )
+        except IdempotencyKeyReused:
+            return ResponseBuilder.error(
+                handler, "Idempotency-Key já utilizada com outro corpo de requisição", 422
+            )
+        
+        status_code, headers, response_body = stored
+        if replayed:
+            headers = {**headers, REPLAYED_HEADER: "true"}
+        return ResponseBuilder.send_json_bytes(handler, response_body, status_code, headers)
+    
+    @staticmethod
+    def _created_response(task):
+        """Resposta de POST /tasks gravada junto com a Idempotency-Key"""
+        return 201, TaskController._task_headers(task), ResponseBuilder.encode(task.to_dict())
+    
+    @staticmethod
+    def create_batch(handler, body):
+        """
+        Cria tarefas em lote (POST /tasks/batch)
+        Args:
+            handler: HTTPRequestHandler
+            body: lista de tarefas (JSON ou NDJSON) ou {"tasks": [...]}
+        """
+        try:
+            items, _ = TaskController._batch_items(handler, body, "tasks")
+            if items is None:
+                return
+            
+            errors = TaskValidator.validate_batch(items, TaskValidator.validate_create)
+            valid = [i for i, error in enumerate(errors) if error is None]
+            
+            created = TaskRepository.create_many([Task.from_dict(items[i]) for i in valid]) if valid else []
+            created_by_index = dict(zip(valid, created))
+            
+            results = []
+            for index, error in enumerate(errors):
+                if error is not None:
+                    results.append({"index": index, "status": 400, "error": error})
+                else:
+                    results.append({"index": index, "status": 201, "task": created_by_index[index].to_dict()})
+            
+            return TaskController._batch_response(handler, results, 201)
+        
+        except Exception as e:
+            print(f"Erro ao criar tarefas em lote: {e}")
+            return ResponseBuilder.internal_error(handler)
+    
+    @staticmethod
+    def update_batch(handler, body):
+        """
+        Atualiza tarefas em lote (PATCH /tasks/batch)
+        Args:
+            handler: HTTPRequestHandler
+            body: lista de {"id": ..., campos} (JSON ou NDJSON) ou {"tasks": [...]}
+        """
+        try:
+            items, _ = TaskController._batch_items(handler, body, "tasks")
+            if items is None:
+                return
+            
+            errors = TaskValidator.validate_batch(items, TaskValidator.validate_batch_update)
+            valid_items = [item for item, error in zip(items, errors) if error is None]
+            
+            updated = TaskRepository.update_many(valid_items) if valid_items else {}
+            
+            results = []
+            for index, (item, error) in enumerate(zip(items, errors)):
+                if error is not None:
+                    results.append({"index": index, "status": 400, "error": error})
+                elif item["id"] not in updated:
+                    results.append({"index": index, "id": item["id"], "status": 404, "error": "Tarefa não encontrada"})
+                else:
+                    results.append({"index": index, "status": 200, "task": updated[item["id"]].to_dict()})
+            
+            return TaskController._batch_response(handler, results, 200)
+        
+        except Exception as e:
+            print(f"Erro ao atualizar tarefas em lote: {e}")
+            return ResponseBuilder.internal_error(handler)
+    
+    @staticmethod
+    def delete_batch(handler, body):
         """
-        Lista todas as tarefas
+        Deleta tarefas em lote (DELETE /tasks/batch)
         Args:
             handler: HTTPRequestHandler
+            body: lista de IDs ou de {"id": ...} (JSON ou NDJSON) ou {"ids": [...]}
         """
         try:
-            tasks = TaskRepository.find_all()
-            tasks_data = [task.to_dict() for task in tasks]
+            items, _ = TaskController._batch_items(handler, body, "ids")
+            if items is None:
+                return
+            
+            parsed = [TaskValidator.parse_batch_id(item) for item in items]
+            valid_ids = [task_id for task_id, error in parsed if error is None]
             
-            return ResponseBuilder.success(handler, {"tasks": tasks_data})
+            deleted = TaskRepository.delete_many(valid_ids) if valid_ids else set()
+            
+            results = []
+            reported = set()
+            for index, (task_id, error) in enumerate(parsed):
+                if error is not None:
+                    results.append({"index": index, "status": 400, "error": error})
+                elif task_id in deleted and task_id not in reported:
+                    reported.add(task_id)
+                    results.append({"index": index, "id": task_id, "status": 204})
+                else:
+                    results.append({"index": index, "id": task_id, "status": 404, "error": "Tarefa não encontrada"})
+            
+            return TaskController._batch_response(handler, results, 200)
+        
+        except Exception as e:
+            print(f"Erro ao deletar tarefas em lote: {e}")
+            return ResponseBuilder.internal_error(handler)
+    
+    @staticmethod
+    def _batch_items(handler, body, key):
+        """
+        Extrai os itens do lote e aplica o limite de tamanho,
+        enviando 400/413 quando inválido
+        Retorna: (list, str) - (itens ou None, mensagem_erro)
+        """
+        items, error_msg = TaskValidator.extract_batch(body, key)
+        if error_msg:
+            ResponseBuilder.bad_request(handler, error_msg)
+            return None, error_msg
+        
+        if len(items) > config.BATCH_MAX_SIZE:
+            error_msg = f"Lote excede o máximo de {config.BATCH_MAX_SIZE} itens"
+            ResponseBuilder.error(handler, error_msg, 413)
+            return None, error_msg
+        
+        return items, None
+    
+    @staticmethod
+    def _batch_response(handler, results, success_status):
+        """
+        Envia o resultado por item. Usa success_status quando todos os itens
+        tiveram sucesso e 207 (Multi-Status) em caso de falha parcial
+        """
+        failed = sum(1 for result in results if result["status"] >= 400)
+        status_code = success_status if failed == 0 else 207
+        
+        return ResponseBuilder.success(handler, {
+            "results": results,
+            "succeeded": len(results) - failed,
+            "failed": failed,
+        }, status_code)
+    
+    @staticmethod
+    def list_all(handler, query=None):
+        """
+        Lista tarefas com paginação por cursor e filtros
+        Args:
+            handler: HTTPRequestHandler
+            query: parâmetros da query string (limit, after_id, status,
+                   created_from, created_to)
+        """
+        try:
+            # Validar parâmetros
+            filters, error_msg = TaskValidator.parse_list_params(query)
+            if not error_msg:
+                error_msg = TaskRepository.check_cursor(filters["after_id"])
+            if error_msg:
+                return ResponseBuilder.bad_request(handler, error_msg)
+            
+            # A versão da tabela é lida antes da página: se uma escrita ocorrer
+            # entre as duas leituras, o ETag fica mais antigo que o conteúdo e o
+            # cliente apenas baixa a lista de novo, nunca recebe 304 indevido
+            table_version, changed_at = TaskRepository.get_table_version()
+            headers = validator_headers(list_etag(table_version), http_date(changed_at))
+            if is_not_modified(handler, headers["ETag"], headers.get("Last-Modified")):
+                return ResponseBuilder.not_modified(handler, headers)
+            
+            # Cada tarefa já vem em JSON do banco: sem Task/dict por linha
+            tasks_json, next_cursor = TaskRepository.find_page_json(**filters)
+            response_body = ResponseBuilder.encode_fragments(
+                "tasks", tasks_json, next_cursor=next_cursor, limit=filters["limit"]
+            )
+            
+            return ResponseBuilder.send_json_bytes(handler, response_body, headers=headers)
         
         except Exception as e:
             print(f"Erro ao listar tarefas: {e}")
             return ResponseBuilder.internal_error(handler)
     
+    @staticmethod
+    def search(handler, query=None):
+        """
+        Busca textual em título e descrição (FTS5), ordenada por relevância
+        Args:
+            handler: HTTPRequestHandler
+            query: parâmetros da query string (q, limit, offset, status)
+        """
+        try:
+            filters, error_msg = TaskValidator.parse_search_params(query)
+            if error_msg:
+                return ResponseBuilder.bad_request(handler, error_msg)
+            
+            # Os resultados só mudam quando a tabela muda: mesmo ETag das listagens
+            table_version, changed_at = TaskRepository.get_table_version()
+            headers = validator_headers(list_etag(table_version), http_date(changed_at))
+            if is_not_modified(handler, headers["ETag"], headers.get("Last-Modified")):
+                return ResponseBuilder.not_modified(handler, headers)
+            
+            results, next_offset = TaskRepository.search(**filters)
+            
+            tasks_data = []
+            for task, score, title_highlight, snippet in results:
+                task_data = task.to_dict()
+                task_data["score"] = round(-score, 6)
+                task_data["highlight"] = {"title": title_highlight, "description": snippet}
+                tasks_data.append(task_data)
+            
+            return ResponseBuilder.success(handler, {
+                "tasks": tasks_data,
+                "next_offset": next_offset,
+                "limit": filters["limit"],
+            }, headers=headers)
+        
+        except SearchUnavailable:
+            return ResponseBuilder.error(handler, "Busca textual indisponível neste banco", 501)
+        
+        except Exception as e:
+            print(f"Erro ao buscar tarefas: {e}")
+            return ResponseBuilder.internal_error(handler)
+    
+    @staticmethod
+    def stats(handler, query=None):
+        """
+        Estatísticas agregadas: total por status, taxa de conclusão e
+        histograma de criação por dia, lidos das tabelas de resumo
+        Args:
+            handler: HTTPRequestHandler
+            query: parâmetros da query string (days)
+        """
+        try:
+            filters, error_msg = TaskValidator.parse_stats_params(query)
+            if error_msg:
+                return ResponseBuilder.bad_request(handler, error_msg)
+            
+            table_version, changed_at = TaskRepository.get_table_version()
+            headers = validator_headers(list_etag(table_version), http_date(changed_at))
+            if is_not_modified(handler, headers["ETag"], headers.get("Last-Modified")):
+                return ResponseBuilder.not_modified(handler, headers)
+            
+            by_status, daily = TaskRepository.get_stats(filters["days"])
+            total = sum(by_status.values())
+            
+            # Dias sem tarefas aparecem com zero para o histograma ser contínuo
+            daily = {day: (created, completed) for day, created, completed in daily}
+            today = datetime.now(timezone.utc).date()
+            histogram = []
+            for offset in range(filters["days"] - 1, -1, -1):
+                day = (today - timedelta(days=offset)).isoformat()
+                created, completed = daily.get(day, (0, 0))
+                histogram.append({
+                    "date": day,
+                    "created": created,
+                    "completed": completed,
+                    "completion_rate": TaskController._rate(completed, created),
+                })
+            
+            return ResponseBuilder.success(handler, {
+                "total": total,
+                "by_status": {status: by_status.get(status, 0) for status in VALID_STATUSES},
+                "completion_rate": TaskController._rate(by_status.get("completo", 0), total),
+                "created_per_day": histogram,
+                "days": filters["days"],
+            }, headers=headers)
+        
+        except Exception as e:
+            print(f"Erro ao calcular estatísticas: {e}")
+            return ResponseBuilder.internal_error(handler)
+    
+    @staticmethod
+    def _rate(part, total):
+        return round(part / total, 4) if total else None
+    
+    @staticmethod
+    def export(handler, query=None):
+        """
+        Exporta todas as tarefas em streaming (JSON ou NDJSON)
+        Args:
+            handler: HTTPRequestHandler
+            query: filtros da listagem (exceto limit) e format=json|ndjson
+        """
+        try:
+            filters, error_msg = TaskValidator.parse_export_params(query)
+            if not error_msg:
+                error_msg = TaskRepository.check_cursor(filters["after_id"])
+            if error_msg:
+                return ResponseBuilder.bad_request(handler, error_msg)
+            
+            export_format = filters.pop("format")
+            batches = TaskRepository.iter_json(config.EXPORT_BATCH_SIZE, **filters)
+            
+            if export_format == "ndjson":
+                return ResponseBuilder.stream(
+                    handler,
+                    TaskController._encode_ndjson(batches),
+                    "application/x-ndjson; charset=utf-8"
+                )
+            return ResponseBuilder.stream(handler, TaskController._encode_json(batches))
+        
+        except StreamAborted as e:
+            print(f"Exportação interrompida: {e}")
+        
+        except Exception as e:
+            print(f"Erro ao exportar tarefas: {e}")
+            return ResponseBuilder.internal_error(handler)
+    
+    @staticmethod
+    def _encode_ndjson(batches):
+        """Junta cada lote de tarefas já serializadas como um pedaço NDJSON"""
+        for items in batches:
+            yield ("\n".join(items) + "\n").encode("utf-8")
+    
+    @staticmethod
+    def _encode_json(batches):
+        """Junta os lotes em um único documento {"tasks": [...]}"""
+        yield b'{"tasks": ['
+        separator = ""
+        for items in batches:
+            yield (separator + ", ".join(items)).encode("utf-8")
+            separator = ", "
+        yield b"]}"
+    
     @staticmethod
     def get_by_id(handler, task_id):
         """
@@ -62,18 +408,75 @@ class TaskController:
             if not is_valid:
                 return ResponseBuilder.bad_request(handler, error_msg)
             
+            # Servir do cache sem tocar no banco nem no json.dumps
+            cache = get_task_cache()
+            if cache is not None:
+                cached = cache.get(task_id)
+                if cached is not None:
+                    return TaskController._send_task_body(handler, *cached)
+                fill_token = cache.fill_token()
+            
             # Buscar tarefa
             task = TaskRepository.find_by_id(task_id)
             
             if not task:
                 return ResponseBuilder.not_found(handler, "Tarefa não encontrada")
             
-            return ResponseBuilder.success(handler, task.to_dict())
+            headers = TaskController._task_headers(task)
+            if is_not_modified(handler, headers["ETag"], headers.get("Last-Modified")):
+                return ResponseBuilder.not_modified(handler, headers)
+            
+            response_body = ResponseBuilder.encode(task.to_dict())
+            if cache is not None:
+                cache.set(task_id, (response_body, headers), fill_token)
+            
+            return ResponseBuilder.send_json_bytes(handler, response_body, headers=headers)
         
         except Exception as e:
             print(f"Erro ao buscar tarefa: {e}")
             return ResponseBuilder.internal_error(handler)
     
+    @staticmethod
+    def _send_task_body(handler, response_body, headers):
+        """Envia uma tarefa já serializada, ou 304 se o cliente já tem esta versão"""
+        if is_not_modified(handler, headers["ETag"], headers.get("Last-Modified")):
+            return ResponseBuilder.not_modified(handler, headers)
+        return ResponseBuilder.send_json_bytes(handler, response_body, headers=headers)
+    
+    @staticmethod
+    def _task_headers(task):
+        """ETag e Last-Modified de uma tarefa"""
+        return validator_headers(task_etag(task), http_date(task.updated_at))
+    
+    @staticmethod
+    def _expected_version(handler, task_id):
+        """
+        Converte o If-Match de PUT/DELETE na versão esperada pelo repositório
+        Retorna: (bool, int) - (pré-condição pode ser satisfeita, versão ou None)
+        """
+        present, any_version, versions = parse_if_match(handler, task_id)
+        if not present or any_version:
+            return True, None
+        if len(versions) == 1:
+            return True, versions.pop()
+        if versions:
+            # Várias versões aceitas: usa a atual se estiver entre elas
+            # (a escrita condicional continua protegendo contra corrida)
+            task = TaskRepository.find_by_id(task_id)
+            if task and task.version in versions:
+                return True, task.version
+        return False, None
+    
+    @staticmethod
+    def _missing_task(handler):
+        """
+        Tarefa inexistente: com If-Match a pré-condição é falsa (412),
+        sem ele a resposta é 404
+        """
+        if handler.headers.get("If-Match") is not None:
+            return ResponseBuilder.precondition_failed(handler, "Tarefa não encontrada")
+        return ResponseBuilder.not_found(handler, "Tarefa não encontrada")
+    
     @staticmethod
     def update(handler, task_id, body):
         """
@@ -94,13 +497,23 @@ class TaskController:
             if not is_valid:
                 return ResponseBuilder.bad_request(handler, error_msg)
             
+            # Concorrência otimista via If-Match
+            can_match, expected_version = TaskController._expected_version(handler, task_id)
+            if not can_match:
+                return ResponseBuilder.precondition_failed(handler)
+            
             # Atualizar tarefa
-            updated_task = TaskRepository.update(task_id, body)
+            updated_task = TaskRepository.update(task_id, body, expected_version)
             
             if not updated_task:
-                return ResponseBuilder.not_found(handler, "Tarefa não encontrada")
+                return TaskController._missing_task(handler)
             
-            return ResponseBuilder.success(handler, updated_task.to_dict())
+            return ResponseBuilder.success(
+                handler, updated_task.to_dict(), headers=TaskController._task_headers(updated_task)
+            )
+        
+        except PreconditionFailed:
+            return ResponseBuilder.precondition_failed(handler)
         
         except Exception as e:
             print(f"Erro ao atualizar tarefa: {e}")
@@ -120,14 +533,22 @@ class TaskController:
             if not is_valid:
                 return ResponseBuilder.bad_request(handler, error_msg)
             
+            # Concorrência otimista via If-Match
+            can_match, expected_version = TaskController._expected_version(handler, task_id)
+            if not can_match:
+                return ResponseBuilder.precondition_failed(handler)
+            
             # Deletar tarefa
-            deleted = TaskRepository.delete(task_id)
+            deleted = TaskRepository.delete(task_id, expected_version)
             
             if not deleted:
-                return ResponseBuilder.not_found(handler, "Tarefa não encontrada")
+                return TaskController._missing_task(handler)
             
             return ResponseBuilder.no_content(handler)
         
+        except PreconditionFailed:
+            return ResponseBuilder.precondition_failed(handler)
+        
         except Exception as e:
             print(f"Erro ao deletar tarefa: {e}")
             return ResponseBuilder.internal_error(handler)
\ No newline at end of file
@@ -1,43 +1,57 @@
-__version__ = "2.0.0"
-__author__ = "Jamylle Santana"
-
-# app/models/__init__.py
-"""
-Models da aplicação
-"""
-from app.models.task import Task
-
-__all__ = ["Task"]
-
-# app/controllers/__init__.py
-"""
-Controllers da aplicação
-"""
-from app.controllers.task_controller import TaskController
-
-__all__ = ["TaskController"]
-
-# app/database/__init__.py
 """
 Camada de acesso a dados
 """
-from app.database.connection import init_database, get_connection
-from app.database.task_repository import TaskRepository
-
-__all__ = ["init_database", "get_connection", "TaskRepository"]
-
-# app/validators/__init__.py
-"""
-Validadores da aplicação
-"""
-from app.validators.task_validator import TaskValidator
-
-__all__ = ["TaskValidator"]
-
-# app/utils/__init__.py
-"""
-Utilitários da aplicação
-"""
-from app.utils.response import ResponseBuilder
-
-__all__ = ["ResponseBuilder"]
\ No newline at end of file
+from app.database.backend import (
+    TaskRepositoryBackend,
+    STORAGE_BACKENDS,
+    get_backend,
+    init_storage,
+    close_storage,
+)
+from app.database.connection import (
+    init_database,
+    get_connection,
+    get_pool,
+    close_pool,
+    get_writer,
+    close_writer,
+    run_write,
+    ShardMismatch,
+)
+from app.database.pool import ConnectionPool, PoolTimeout
+from app.database.writer import WriteQueue, WriterQueueFull
+from app.database.task_repository import (
+    TaskRepository, SQLiteTaskRepository, PreconditionFailed, SearchUnavailable, IdempotencyKeyReused
+)
+from app.database.memory_repository import MemoryTaskRepository
+from app.database.sharded_repository import ShardedTaskRepository
+from app.database.replica_repository import ReplicaTaskRepository, ReplicaUnavailable
+
+__all__ = [
+    "TaskRepositoryBackend",
+    "STORAGE_BACKENDS",
+    "get_backend",
+    "init_storage",
+    "close_storage",
+    "init_database",
+    "get_connection",
+    "get_pool",
+    "close_pool",
+    "get_writer",
+    "close_writer",
+    "run_write",
+    "ShardMismatch",
+    "ConnectionPool",
+    "PoolTimeout",
+    "WriteQueue",
+    "WriterQueueFull",
+    "TaskRepository",
+    "SQLiteTaskRepository",
+    "MemoryTaskRepository",
+    "ShardedTaskRepository",
+    "ReplicaTaskRepository",
+    "ReplicaUnavailable",
+    "PreconditionFailed",
+    "SearchUnavailable",
+    "IdempotencyKeyReused",
+]
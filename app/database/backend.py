@@ -0,0 +1,189 @@
+"""
+Backends de armazenamento do TaskRepository
+
+O TaskRepository (app/database/task_repository.py) é só o ponto de acesso:
+cada chamada é encaminhada ao backend escolhido na partida por
+config.STORAGE_BACKEND (TODO_STORAGE_BACKEND ou --backend no servidor):
+
+- sqlite: SQLiteTaskRepository, o banco em disco com pool de conexões e
+  thread escritora (padrão)
+- memory: MemoryTaskRepository (app/database/memory_repository.py), dados no
+  próprio processo, com snapshot e log append-only opcionais em disco
+- sharded: ShardedTaskRepository (app/database/sharded_repository.py), tarefas
+  particionadas entre vários arquivos SQLite, cada um com sua thread escritora
+
+Os três implementam a interface TaskRepositoryBackend e têm o mesmo
+comportamento visto pelos controllers: versões, ETags, log de alterações,
+estatísticas, busca e Idempotency-Key.
+
+Há ainda o ReplicaTaskRepository (app/database/replica_repository.py), que não
+é escolhido por config.STORAGE_BACKEND: start_replica() o instala com
+use_backend() nos processos de réplica do modo prefork. Ele implementa só as
+leituras da interface, sobre conexões somente leitura ou snapshots do banco
+SQLite do primário; as escritas nem chegam a ele, pois o Router responde 307
+para o primário.
+"""
+import threading
+
+from app import config
+
+STORAGE_BACKENDS = ("sqlite", "memory", "sharded")
+
+
+class TaskRepositoryBackend:
+    """
+    Interface de um backend de tarefas. Os formatos de argumentos e retornos
+    são os documentados em SQLiteTaskRepository.
+    """
+
+    # Nome do backend em config.STORAGE_BACKEND e em GET /status
+    name = None
+
+    # Ciclo de vida
+
+    def init(self):
+        """Prepara o armazenamento na partida do processo (tabelas, carga do disco)"""
+        raise NotImplementedError
+
+    def close(self):
+        """Libera os recursos no desligamento (conexões, arquivos, threads)"""
+        raise NotImplementedError
+
+    def stats(self):
+        """Métricas do backend exibidas em GET /status (dict)"""
+        raise NotImplementedError
+
+    # Tarefas
+
+    def check_cursor(self, after_id):
+        """
+        Confere o after_id de GET /tasks e /tasks/export. Cursores compostos
+        (tupla com uma posição por shard) só existem no backend particionado.
+        Retorna: mensagem de erro ou None
+        """
+        if isinstance(after_id, tuple):
+            return "Parâmetro 'after_id' não é um cursor deste armazenamento"
+        return None
+
+    def create(self, task):
+        raise NotImplementedError
+
+    def create_idempotent(self, task, key, fingerprint, render):
+        raise NotImplementedError
+
+    def find_idempotent_response(self, key, fingerprint):
+        raise NotImplementedError
+
+    def find_all(self):
+        raise NotImplementedError
+
+    def find_page(self, limit, after_id=None, status=None, created_from=None, created_to=None):
+        raise NotImplementedError
+
+    def find_page_json(self, limit, after_id=None, status=None, created_from=None, created_to=None):
+        raise NotImplementedError
+
+    def search(self, text, limit, offset=0, status=None):
+        raise NotImplementedError
+
+    def rebuild_search_index(self):
+        raise NotImplementedError
+
+    def get_stats(self, days):
+        raise NotImplementedError
+
+    def rebuild_stats(self):
+        raise NotImplementedError
+
+    def iter_json(self, batch_size, after_id=None, status=None, created_from=None, created_to=None):
+        raise NotImplementedError
+
+    def iter_rows(self, batch_size, after_id=None, status=None, created_from=None, created_to=None):
+        raise NotImplementedError
+
+    def find_by_id(self, task_id):
+        raise NotImplementedError
+
+    def update(self, task_id, updates, expected_version=None):
+        raise NotImplementedError
+
+    def delete(self, task_id, expected_version=None):
+        raise NotImplementedError
+
+    def create_many(self, tasks):
+        raise NotImplementedError
+
+    def update_many(self, items):
+        raise NotImplementedError
+
+    def delete_many(self, task_ids):
+        raise NotImplementedError
+
+    def get_table_version(self):
+        raise NotImplementedError
+
+    def exists(self, task_id):
+        raise NotImplementedError
+
+    # Log de alterações
+
+    def prune_changes(self, keep):
+        raise NotImplementedError
+
+    def find_changes(self, since, limit):
+        raise NotImplementedError
+
+    def get_change_bounds(self):
+        raise NotImplementedError
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def create_backend(name):
+    """Instancia o backend `name` com a configuração atual"""
+    # Imports tardios: os backends importam o módulo do TaskRepository
+    if name == "sqlite":
+        from app.database.task_repository import SQLiteTaskRepository
+        return SQLiteTaskRepository()
+    if name == "memory":
+        from app.database.memory_repository import MemoryTaskRepository
+        return MemoryTaskRepository.from_config()
+    if name == "sharded":
+        from app.database.sharded_repository import ShardedTaskRepository
+        return ShardedTaskRepository.from_config()
+    raise ValueError(f"Backend de armazenamento desconhecido: {name} (use {', '.join(STORAGE_BACKENDS)})")
+
+
+def get_backend():
+    """Retorna o backend do processo, criando-o a partir de config.STORAGE_BACKEND"""
+    global _backend
+
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_backend(config.STORAGE_BACKEND)
+    return _backend
+
+
+def use_backend(backend):
+    """
+    Troca o backend do processo por `backend`, já inicializado (processos de
+    leitura do modo com réplicas, criados por fork depois de init_storage)
+    """
+    global _backend
+
+    with _backend_lock:
+        _backend = backend
+
+
+def init_storage():
+    """Inicializa o backend configurado (chamado uma vez na partida)"""
+    get_backend().init()
+
+
+def close_storage():
+    """Fecha o backend do processo, se já foi criado"""
+    if _backend is not None:
+        _backend.close()
@@ -1,7 +1,15 @@
+import os
 import sqlite3
+import threading
 from contextlib import contextmanager
+from urllib.parse import quote
 
-DB_PATH = "tasks.db"
+from app import config
+from app.database.pool import ConnectionPool
+from app.database.query_log import profiling_connect_kwargs
+from app.database.storage import apply_storage_profile
+from app.database.writer import WriteQueue
+from app.utils.metrics import phase
 
 CREATE_TABLE_SQL = """
 CREATE TABLE IF NOT EXISTS tasks (
@@ -9,36 +17,447 @@ CREATE TABLE IF NOT EXISTS tasks (
     title TEXT NOT NULL,
     description TEXT,
     status TEXT NOT NULL DEFAULT 'pendente',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1
 );
+
+CREATE INDEX IF NOT EXISTS idx_tasks_status_id ON tasks (status, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at);
+
+-- Contador de alterações por tabela, incrementado pelo TaskRepository
+-- na mesma transação de cada escrita (usado nos ETags de listagem)
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT OR IGNORE INTO table_versions (name, version) VALUES ('tasks', 0);
 """
 
-def init_database():
-    """Inicializa o banco de dados criando as tabelas necessárias"""
-    conn = sqlite3.connect(DB_PATH)
+# Índice de busca textual (FTS5) com conteúdo externo: o texto fica só em
+# tasks e os triggers mantêm o índice sincronizado na mesma transação.
+# Alterações apenas de status/versão não tocam o índice (UPDATE OF).
+SEARCH_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    title,
+    description,
+    content='tasks',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO tasks_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+"""
+
+REBUILD_SEARCH_SQL = "INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild')"
+
+# Tabelas de resumo de GET /tasks/stats, mantidas por triggers na mesma
+# transação de cada escrita. Equivalem a:
+#   task_status_counts: SELECT status, COUNT(*) FROM tasks GROUP BY status
+#   task_daily_counts:  SELECT date(created_at), COUNT(*), SUM(status = 'completo')
+#                       FROM tasks GROUP BY date(created_at)
+STATS_SQL = """
+CREATE TABLE IF NOT EXISTS task_status_counts (
+    status TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS task_daily_counts (
+    day TEXT PRIMARY KEY,
+    created INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_stats_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO task_status_counts (status, count) VALUES (new.status, 1)
+    ON CONFLICT (status) DO UPDATE SET count = count + 1;
+    INSERT INTO task_daily_counts (day, created, completed)
+    VALUES (date(new.created_at), 1, new.status = 'completo')
+    ON CONFLICT (day) DO UPDATE SET
+        created = created + 1,
+        completed = completed + excluded.completed;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_stats_delete AFTER DELETE ON tasks BEGIN
+    UPDATE task_status_counts SET count = count - 1 WHERE status = old.status;
+    UPDATE task_daily_counts SET
+        created = created - 1,
+        completed = completed - (old.status = 'completo')
+    WHERE day = date(old.created_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_stats_update AFTER UPDATE OF status ON tasks
+WHEN old.status IS NOT new.status BEGIN
+    UPDATE task_status_counts SET count = count - 1 WHERE status = old.status;
+    INSERT INTO task_status_counts (status, count) VALUES (new.status, 1)
+    ON CONFLICT (status) DO UPDATE SET count = count + 1;
+    UPDATE task_daily_counts SET
+        completed = completed - (old.status = 'completo') + (new.status = 'completo')
+    WHERE day = date(old.created_at);
+END;
+"""
+
+# Log de alterações (GET /tasks/changes): uma linha por tarefa criada,
+# alterada ou removida, gravada pelos triggers na mesma transação da escrita.
+# AUTOINCREMENT garante uma sequência crescente que nunca reaproveita valores,
+# mesmo depois da poda das linhas antigas. O backend particionado usa a mesma
+# tabela, sem os triggers, para o log unificado dos shards.
+CHANGES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS task_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    version INTEGER,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+CHANGES_SQL = CHANGES_TABLE_SQL + """
+CREATE TRIGGER IF NOT EXISTS tasks_changes_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO task_changes (task_id, op, version) VALUES (new.id, 'create', new.version);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_changes_update AFTER UPDATE ON tasks BEGIN
+    INSERT INTO task_changes (task_id, op, version) VALUES (new.id, 'update', new.version);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_changes_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO task_changes (task_id, op, version) VALUES (old.id, 'delete', old.version);
+END;
+"""
+
+# Respostas de POST /tasks por Idempotency-Key (app/utils/idempotency.py).
+# Tempos em segundos desde a época; a poda usa expires_at e a ordem de rowid.
+IDEMPOTENCY_SQL = """
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status INTEGER,
+    headers TEXT,
+    body BLOB,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at);
+"""
+
+# Recalcula os resumos com uma varredura completa (migração e manutenção)
+REBUILD_STATS_STATEMENTS = [
+    "DELETE FROM task_status_counts",
+    "DELETE FROM task_daily_counts",
+    "INSERT INTO task_status_counts (status, count) "
+    "SELECT status, COUNT(*) FROM tasks GROUP BY status",
+    "INSERT INTO task_daily_counts (day, created, completed) "
+    "SELECT date(created_at), COUNT(*), SUM(status = 'completo') "
+    "FROM tasks GROUP BY date(created_at)",
+]
+
+# Colunas adicionadas depois da primeira versão do schema, aplicadas em bancos
+# existentes. ALTER TABLE não aceita DEFAULT CURRENT_TIMESTAMP, por isso
+# updated_at é preenchido a partir de created_at.
+MIGRATIONS = [
+    ("tasks", "updated_at", [
+        "ALTER TABLE tasks ADD COLUMN updated_at TIMESTAMP",
+        "UPDATE tasks SET updated_at = created_at WHERE updated_at IS NULL",
+    ]),
+    ("tasks", "version", [
+        "ALTER TABLE tasks ADD COLUMN version INTEGER NOT NULL DEFAULT 1",
+    ]),
+]
+
+# Posição do arquivo em um banco particionado (backend "sharded"), gravada na
+# criação e conferida a cada inicialização
+SHARD_INFO_SQL = """
+CREATE TABLE IF NOT EXISTS shard_info (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    shard_index INTEGER NOT NULL,
+    shard_count INTEGER NOT NULL
+);
+"""
+
+class ShardMismatch(Exception):
+    """O arquivo pertence a outro shard ou a um banco com outra quantidade de shards"""
+
+# Pools e threads escritoras por arquivo de banco (um por shard no backend
+# particionado), descartados após um fork
+_pools = {}
+_pools_pid = None
+_pool_lock = threading.Lock()
+
+_writers = {}
+_writers_pid = None
+_writer_lock = threading.Lock()
+
+def init_database(path=None, shard=None):
+    """
+    Inicializa o banco de dados criando as tabelas necessárias
+    Args:
+        path: arquivo do banco (padrão: config.DB_PATH)
+        shard: (índice, quantidade de shards) quando o arquivo é um shard
+    Lança: ShardMismatch se o arquivo já foi criado como outro shard
+    """
+    path = path or config.DB_PATH
+    conn = sqlite3.connect(path)
+    profile = apply_storage_profile(conn, include_journal_mode=True)
     cur = conn.cursor()
-    cur.executescript(CREATE_TABLE_SQL)
-    conn.commit()
-    conn.close()
-    print(f"✓ Banco de dados inicializado: {DB_PATH}")
+    try:
+        if shard is not None:
+            _check_shard(cur, path, shard)
+        _apply_migrations(cur)
+        cur.executescript(CREATE_TABLE_SQL)
+        _init_stats(cur)
+        cur.executescript(CHANGES_SQL)
+        cur.executescript(IDEMPOTENCY_SQL)
+        search = _init_search(cur)
+        conn.commit()
+    finally:
+        conn.close()
+    print(f"✓ Banco de dados inicializado: {path} "
+          f"(journal_mode={profile['journal_mode']}, synchronous={profile['synchronous']})")
+    if not search:
+        print("⚠ SQLite sem FTS5: GET /tasks/search ficará indisponível")
+
+def _check_shard(cur, path, shard):
+    """
+    Registra a posição do shard em um arquivo novo ou confere a já registrada.
+    Um arquivo com tarefas e sem registro não foi criado como shard: os ids
+    dele não seguem a regra id % quantidade de shards.
+    """
+    index, count = shard
+    tables = {row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    row = None
+    if "shard_info" in tables:
+        row = cur.execute("SELECT shard_index, shard_count FROM shard_info").fetchone()
+    if row is None:
+        if "tasks" in tables and cur.execute("SELECT 1 FROM tasks LIMIT 1").fetchone():
+            raise ShardMismatch(f"{path} já tem tarefas e não foi criado como shard")
+        cur.executescript(SHARD_INFO_SQL)
+        cur.execute(
+            "INSERT INTO shard_info (id, shard_index, shard_count) VALUES (1, ?, ?)", (index, count)
+        )
+    elif tuple(row) != (index, count):
+        raise ShardMismatch(
+            f"{path} é o shard {row[0]} de {row[1]}, mas foi configurado como shard {index} de {count}"
+        )
+
+def _init_stats(cur):
+    """
+    Cria as tabelas de resumo e seus triggers. Se ainda não existiam
+    (banco anterior às estatísticas), calcula os totais a partir de tasks.
+    """
+    existed = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'task_status_counts'"
+    ).fetchone()
+    cur.executescript(STATS_SQL)
+    if not existed:
+        for statement in REBUILD_STATS_STATEMENTS:
+            cur.execute(statement)
+
+def fts5_available(conn):
+    """Verifica se o SQLite foi compilado com o módulo FTS5"""
+    return any(row[0] == "ENABLE_FTS5" for row in conn.execute("PRAGMA compile_options"))
+
+def _init_search(cur):
+    """
+    Cria o índice FTS5 e seus triggers. Se o índice ainda não existia
+    (banco anterior à busca), indexa as tarefas já cadastradas.
+    Retorna: False se o SQLite não suporta FTS5
+    """
+    if not fts5_available(cur.connection):
+        return False
+    existed = cur.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'tasks_fts'"
+    ).fetchone()
+    cur.executescript(SEARCH_SQL)
+    if not existed:
+        cur.execute(REBUILD_SEARCH_SQL)
+    return True
+
+def _apply_migrations(cur):
+    """Adiciona em bancos existentes as colunas que ainda não existem"""
+    tables = {row[0] for row in cur.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    for table, column, statements in MIGRATIONS:
+        if table not in tables:
+            continue
+        columns = {row[1] for row in cur.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            for statement in statements:
+                cur.execute(statement)
+
+def configure_connection(conn):
+    """
+    Configuração aplicada uma única vez a cada conexão nova do pool,
+    em vez de a cada requisição.
+    """
+    apply_storage_profile(conn)
+
+def configure_writer_connection(conn):
+    """Configuração da conexão exclusiva da thread escritora"""
+    apply_storage_profile(conn, include_journal_mode=True)
+
+def configure_readonly_connection(conn):
+    """Conexões somente leitura (réplicas): query_only recusa qualquer escrita"""
+    apply_storage_profile(conn)
+    conn.execute("PRAGMA query_only = 1")
+
+def readonly_uri(path, immutable=False):
+    """
+    URI que abre o arquivo somente para leitura (mode=ro), aceita como `path`
+    em get_pool/get_connection. immutable=1 dispensa locks e a leitura do WAL
+    e só vale para arquivos que não mudam mais (cópias das réplicas).
+    """
+    uri = "file:" + quote(os.path.abspath(path)) + "?mode=ro"
+    if immutable:
+        uri += "&immutable=1"
+    return uri
+
+def get_pool(path=None):
+    """
+    Retorna o pool de conexões do processo para o arquivo `path` (padrão:
+    config.DB_PATH), criando-o na primeira chamada. Um `path` de readonly_uri()
+    abre conexões somente leitura.
+    Após um fork os pools herdados são descartados, pois conexões SQLite não
+    podem ser compartilhadas entre processos.
+    """
+    global _pools_pid
+
+    path = path or config.DB_PATH
+    pid = os.getpid()
+    if _pools_pid == pid:
+        pool = _pools.get(path)
+        if pool is not None:
+            return pool
+
+    with _pool_lock:
+        if _pools_pid != pid:
+            _pools.clear()
+            _pools_pid = pid
+        pool = _pools.get(path)
+        if pool is None:
+            readonly = path.startswith("file:")
+            pool = _pools[path] = ConnectionPool(
+                path,
+                max_size=config.DB_POOL_SIZE,
+                timeout=config.DB_POOL_TIMEOUT,
+                health_check_interval=config.DB_POOL_HEALTH_CHECK_INTERVAL,
+                configure=configure_readonly_connection if readonly else configure_connection,
+                connect_kwargs={
+                    "cached_statements": config.DB_STATEMENT_CACHE_SIZE,
+                    "uri": readonly,
+                    **profiling_connect_kwargs(),
+                },
+            )
+        return pool
+
+def close_pool(path=None):
+    """Fecha o pool do arquivo no processo atual (usado no desligamento do servidor)"""
+    with _pool_lock:
+        if _pools_pid != os.getpid():
+            # Pools herdados de outro processo: só são esquecidos
+            _pools.clear()
+            return
+        pool = _pools.pop(path or config.DB_PATH, None)
+        if pool is not None:
+            pool.close()
 
 @contextmanager
-def get_connection():
+def get_connection(path=None):
     """
     Context manager para conexão com banco de dados.
-    Garante que a conexão será fechada após o uso.
-    
+    A conexão é emprestada do pool e devolvida ao final do bloco,
+    com commit em caso de sucesso e rollback em caso de erro.
+
     Uso:
         with get_connection() as conn:
             cur = conn.cursor()
             cur.execute(...)
     """
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        yield conn
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
\ No newline at end of file
+    with phase("repository"):
+        pool = get_pool(path)
+        conn = pool.acquire()
+        discard = False
+        try:
+            yield conn
+            conn.commit()
+        except Exception as e:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+            raise e
+        finally:
+            pool.release(conn, discard=discard)
+
+def get_writer(path=None):
+    """
+    Retorna a thread escritora do processo para o arquivo `path` (padrão:
+    config.DB_PATH), criando-a na primeira chamada.
+    Assim como o pool, é recriada após um fork.
+    """
+    global _writers_pid
+
+    path = path or config.DB_PATH
+    pid = os.getpid()
+    if _writers_pid == pid:
+        writer = _writers.get(path)
+        if writer is not None:
+            return writer
+
+    with _writer_lock:
+        if _writers_pid != pid:
+            _writers.clear()
+            _writers_pid = pid
+        writer = _writers.get(path)
+        if writer is None:
+            writer = WriteQueue(
+                path,
+                configure=configure_writer_connection,
+                max_batch=config.DB_WRITER_MAX_BATCH,
+                max_queue=config.DB_WRITER_QUEUE_SIZE,
+                connect_kwargs=profiling_connect_kwargs(),
+            )
+            writer.start()
+            _writers[path] = writer
+        return writer
+
+def close_writer(path=None):
+    """Drena as escritas pendentes e encerra a thread escritora do arquivo no processo atual"""
+    with _writer_lock:
+        if _writers_pid != os.getpid():
+            _writers.clear()
+            return
+        writer = _writers.pop(path or config.DB_PATH, None)
+        if writer is not None:
+            writer.close()
+
+def run_write(fn, path=None):
+    """
+    Executa uma escrita fn(conn) no arquivo `path` (padrão: config.DB_PATH) e
+    retorna seu resultado após o commit.
+    Com a thread escritora habilitada, a escrita é enfileirada e agrupada com
+    as demais; caso contrário roda em uma conexão do pool.
+    """
+    with phase("repository"):
+        if config.DB_WRITER_ENABLED:
+            return get_writer(path).execute(fn, timeout=config.DB_WRITER_TIMEOUT)
+
+        with get_connection(path) as conn:
+            return fn(conn)
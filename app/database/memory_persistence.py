@@ -0,0 +1,233 @@
+"""
+Persistência opcional do backend em memória: snapshot + log append-only
+
+- snapshot (<path>): JSON com o estado completo e o número `n` da última
+  escrita incluída. É gravado em um arquivo temporário, com fsync, e trocado
+  com os.replace, então nunca fica pela metade.
+- log (<path>.aof): uma linha JSON por escrita (n, horário, linhas gravadas e
+  ids removidos), anexada antes de a escrita ser aplicada e confirmada ao
+  cliente. Com fsync "always" a escrita só termina depois do fsync; com
+  "everysec" uma queda do sistema (não do processo) perde até ~1 s de escritas.
+
+A cada snapshot o log é rotacionado para <path>.aof.prev sob o lock de escrita
+do repositório (o snapshot inclui tudo até ali) e o .prev é removido depois
+que o snapshot foi gravado. Na partida são lidos o snapshot e depois o .prev e
+o .aof, ignorando as escritas já incluídas no snapshot. Uma linha final
+incompleta (queda no meio da gravação) é descartada e o arquivo truncado.
+"""
+import json
+import os
+import threading
+import time
+
+FSYNC_POLICIES = ("always", "everysec", "no")
+
+SNAPSHOT_FORMAT = 1
+
+
+class MemoryPersistence:
+    """Arquivos de snapshot e log de um MemoryTaskRepository"""
+
+    def __init__(self, path, aof=True, fsync="everysec", snapshot_interval=300.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Política de fsync inválida: {fsync} (use {', '.join(FSYNC_POLICIES)})")
+        self.path = path
+        self.log_path = path + ".aof" if aof else None
+        self.prev_path = self.log_path + ".prev" if aof else None
+        self.fsync = fsync
+        self.snapshot_interval = snapshot_interval
+        self._log = None
+        self._log_lock = threading.Lock()
+        self._dirty = False
+        # Serializa os snapshots (thread periódica e desligamento)
+        self.snapshot_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.snapshots = 0
+        self.last_snapshot_at = None
+        self.last_snapshot_seconds = None
+        self.snapshot_errors = 0
+        self.log_records = 0
+        self.log_bytes = 0
+        self.fsyncs = 0
+
+    def read_snapshot(self):
+        """Retorna: estado gravado pelo último snapshot (dict) ou None"""
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        if state.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Formato de snapshot não suportado em {self.path}: {state.get('format')}")
+        return state
+
+    def read_log(self):
+        """Registros dos logs (.prev e depois .aof), na ordem em que foram gravados"""
+        if self.log_path is None:
+            return
+        for path in (self.prev_path, self.log_path):
+            yield from self._read_records(path)
+
+    def _read_records(self, path):
+        try:
+            f = open(path, "r+b")
+        except FileNotFoundError:
+            return
+        with f:
+            valid = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                valid += len(line)
+                yield record
+            if valid < os.fstat(f.fileno()).st_size:
+                print(f"⚠ Registro incompleto no fim de {path} descartado")
+                f.truncate(valid)
+
+    def start(self, snapshot):
+        """
+        Abre o log para novas escritas e inicia a thread de fsync/snapshots
+        Args:
+            snapshot: função sem argumentos que grava um snapshot do repositório
+        """
+        if self.log_path is not None:
+            self._log = open(self.log_path, "ab")
+        if (self._log is not None and self.fsync == "everysec") or self.snapshot_interval > 0:
+            self._thread = threading.Thread(
+                target=self._run, args=(snapshot,), name="memory-persistence", daemon=True
+            )
+            self._thread.start()
+
+    def append(self, record):
+        """Anexa uma escrita ao log (chamado com o lock de escrita do repositório)"""
+        if self._log is None:
+            return
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        with self._log_lock:
+            self._log.write(line)
+            self._log.flush()
+            if self.fsync == "always":
+                os.fsync(self._log.fileno())
+                self.fsyncs += 1
+            else:
+                self._dirty = True
+            self.log_records += 1
+            self.log_bytes += len(line)
+
+    def rotate_log(self):
+        """
+        Separa o log atual em .prev para o snapshot que está começando
+        (chamado com o lock de escrita do repositório)
+        """
+        if self._log is None:
+            return
+        with self._log_lock:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._log.close()
+            if os.path.exists(self.prev_path):
+                # O snapshot anterior falhou: o .prev ainda é necessário
+                with open(self.log_path, "rb") as current, open(self.prev_path, "ab") as prev:
+                    prev.write(current.read())
+                    prev.flush()
+                    os.fsync(prev.fileno())
+                os.remove(self.log_path)
+            else:
+                os.replace(self.log_path, self.prev_path)
+            self._log = open(self.log_path, "ab")
+            self._dirty = False
+
+    def write_snapshot(self, state):
+        """
+        Grava o snapshot de forma atômica e descarta o log já incluído nele
+        (chamado com snapshot_lock, depois de rotate_log)
+        """
+        started = time.perf_counter()
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f, ensure_ascii=False, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+            _fsync_directory(self.path)
+        except OSError:
+            self.snapshot_errors += 1
+            raise
+        if self.prev_path is not None and os.path.exists(self.prev_path):
+            os.remove(self.prev_path)
+        self.snapshots += 1
+        self.last_snapshot_at = time.time()
+        self.last_snapshot_seconds = round(time.perf_counter() - started, 4)
+
+    def _run(self, snapshot):
+        last_snapshot = time.monotonic()
+        while not self._stop.wait(1.0):
+            self._sync()
+            if self.snapshot_interval > 0 and time.monotonic() - last_snapshot >= self.snapshot_interval:
+                last_snapshot = time.monotonic()
+                try:
+                    snapshot()
+                except Exception as e:
+                    print(f"Erro ao gravar snapshot do armazenamento em memória: {e}")
+
+    def _sync(self):
+        """fsync do log fora do lock de escrita, em uma cópia do descritor"""
+        with self._log_lock:
+            if self._log is None or not self._dirty or self.fsync != "everysec":
+                return
+            self._dirty = False
+            fd = os.dup(self._log.fileno())
+        try:
+            os.fsync(fd)
+            self.fsyncs += 1
+        finally:
+            os.close(fd)
+
+    def close(self):
+        """Para a thread e fecha o log com fsync (depois do snapshot final)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._log_lock:
+            if self._log is not None:
+                self._log.flush()
+                os.fsync(self._log.fileno())
+                self._log.close()
+                self._log = None
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "aof": self.log_path is not None,
+            "fsync": self.fsync,
+            "snapshot_interval_seconds": self.snapshot_interval,
+            "snapshots": self.snapshots,
+            "snapshot_errors": self.snapshot_errors,
+            "last_snapshot_at": self.last_snapshot_at,
+            "last_snapshot_seconds": self.last_snapshot_seconds,
+            "log_records": self.log_records,
+            "log_bytes": self.log_bytes,
+            "fsyncs": self.fsyncs,
+        }
+
+
+def _fsync_directory(path):
+    """Torna durável a troca de nome do arquivo (sem efeito onde não é suportado)"""
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
@@ -0,0 +1,614 @@
+"""
+Backend em memória do TaskRepository (TODO_STORAGE_BACKEND=memory)
+
+As tarefas ficam em estruturas do próprio processo, sem SQLite:
+
+- dict id -> Task. Os Task guardados nunca são alterados: cada escrita grava
+  um objeto novo, então quem recebeu uma tarefa não a vê mudar e as leituras
+  por id não precisam de lock
+- índice de ids em ordem crescente (lista + bisect) para a paginação por
+  cursor, e um índice igual por status, equivalente a tasks(status, id)
+- contadores por status e por dia de criação (GET /tasks/stats), índice de
+  busca textual (app/database/memory_search.py), log de alterações e chaves
+  de idempotência, atualizados na mesma seção crítica de cada escrita
+- JSON de cada tarefa serializado uma vez e reaproveitado nas listagens até
+  a próxima alteração dela
+
+Um único lock serializa as escritas (como a thread escritora do SQLite) e as
+leituras de faixas. Com ele adquirido só há E/S quando a persistência está
+ligada (app/database/memory_persistence.py): o append de cada escrita no log e
+a rotação do log no início de um snapshot.
+
+Os dados são do processo: o backend não pode ser usado no modo prefork.
+"""
+import base64
+import json
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from app import config
+from app.database.backend import TaskRepositoryBackend
+from app.database.memory_persistence import MemoryPersistence, SNAPSHOT_FORMAT
+from app.database.memory_search import MemorySearchIndex, highlight, occurrences, snippet
+from app.database.task_repository import (
+    PreconditionFailed, IdempotencyKeyReused, UPDATABLE_FIELDS, SEARCH_WEIGHTS,
+    SEARCH_MARK_OPEN, SEARCH_MARK_CLOSE, SEARCH_ELLIPSIS, parse_search_terms
+)
+from app.models.task import DEFAULT_STATUS, Task
+from app.utils.cache import invalidate_tasks
+from app.utils.change_feed import notify_changes
+from app.utils.metrics import timed
+
+COMPLETED_STATUS = "completo"
+
+
+def _now():
+    """Horário no mesmo formato de CURRENT_TIMESTAMP do SQLite (UTC)"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime())
+
+
+def _row(task):
+    return (task.id, task.title, task.description, task.status, task.created_at, task.updated_at, task.version)
+
+
+def _index_add(index, task_id):
+    # Ids novos são sempre os maiores: o caso comum é um append
+    if not index or task_id > index[-1]:
+        index.append(task_id)
+    else:
+        insort(index, task_id)
+
+
+def _index_remove(index, task_id):
+    position = bisect_left(index, task_id)
+    if position < len(index) and index[position] == task_id:
+        del index[position]
+
+
+class MemoryTaskRepository(TaskRepositoryBackend):
+    """Backend em memória, com persistência opcional em snapshot + log append-only"""
+
+    name = "memory"
+
+    def __init__(self, persistence=None):
+        self._lock = threading.Lock()
+        self._tasks = {}
+        self._json = {}
+        self._ids = []
+        self._by_status = {}
+        self._search = MemorySearchIndex(SEARCH_WEIGHTS)
+        self._status_counts = {}
+        self._daily = {}          # dia -> [criadas, concluídas]
+        self._next_id = 1
+        # (versão, horário da última escrita), trocados juntos em uma atribuição
+        self._table_version = (0, _now())
+        self._changes = []        # (seq, task_id, op, version, changed_at), seqs consecutivas
+        self._last_seq = 0
+        self._idempotency = OrderedDict()   # chave -> (fingerprint, status, headers, corpo, expira em)
+        self._writes = 0          # número da última escrita, gravado no log e no snapshot
+        self._persistence = persistence
+        self._started = False
+        self.loaded = 0
+        self.replayed = 0
+
+    @classmethod
+    def from_config(cls):
+        persistence = None
+        if config.MEMORY_SNAPSHOT_PATH:
+            persistence = MemoryPersistence(
+                config.MEMORY_SNAPSHOT_PATH,
+                aof=config.MEMORY_AOF_ENABLED,
+                fsync=config.MEMORY_AOF_FSYNC,
+                snapshot_interval=config.MEMORY_SNAPSHOT_INTERVAL,
+            )
+        return cls(persistence)
+
+    # Ciclo de vida
+
+    def init(self):
+        """Carrega o snapshot e reaplica o log; sem persistência começa vazio"""
+        if self._started:
+            return
+        self._started = True
+        if self._persistence is None:
+            print("✓ Armazenamento em memória inicializado (sem persistência)")
+            return
+
+        with self._lock:
+            state = self._persistence.read_snapshot()
+            if state is not None:
+                self._restore(state)
+            for record in self._persistence.read_log():
+                if record["n"] > self._writes:
+                    self._apply_record(record)
+                    self.replayed += 1
+            self._trim_changes()
+        self._persistence.start(self.snapshot)
+        print(f"✓ Armazenamento em memória inicializado: {len(self._tasks)} tarefas de "
+              f"{self._persistence.path} ({self.replayed} escritas reaplicadas do log)")
+
+    def close(self):
+        """Grava o snapshot final e fecha o log"""
+        if self._persistence is None or not self._started:
+            return
+        self._started = False
+        try:
+            self.snapshot()
+        finally:
+            self._persistence.close()
+
+    def snapshot(self):
+        """
+        Grava o estado atual em disco. A cópia e a rotação do log acontecem sob
+        o lock de escrita; a serialização e o fsync, fora dele.
+        """
+        if self._persistence is None:
+            return
+        with self._persistence.snapshot_lock:
+            with self._lock:
+                state = self._state()
+                self._persistence.rotate_log()
+            state["tasks"] = [_row(task) for task in state["tasks"]]
+            state["idempotency"] = [
+                [key, fingerprint, status, headers, base64.b64encode(body).decode("ascii"), expires_at]
+                for key, (fingerprint, status, headers, body, expires_at) in state["idempotency"]
+            ]
+            self._persistence.write_snapshot(state)
+
+    def stats(self):
+        with self._lock:
+            store = {
+                "tasks": len(self._tasks),
+                "by_status": {status: len(index) for status, index in self._by_status.items() if index},
+                "serialized": len(self._json),
+                "search_documents": len(self._search),
+                "changes": len(self._changes),
+                "last_seq": self._last_seq,
+                "idempotency_keys": len(self._idempotency),
+                "table_version": self._table_version[0],
+                "writes": self._writes,
+                "loaded": self.loaded,
+                "replayed": self.replayed,
+            }
+        store["persistence"] = self._persistence.stats() if self._persistence is not None else None
+        return {"memory_store": store}
+
+    # Estado e aplicação das escritas (chamados com self._lock adquirido)
+
+    def _state(self):
+        """Cópia rasa e consistente do estado a ser gravado no snapshot"""
+        now = time.time()
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "n": self._writes,
+            "next_id": self._next_id,
+            "last_seq": self._last_seq,
+            "table_version": self._table_version[0],
+            "changed_at": self._table_version[1],
+            "tasks": [self._tasks[task_id] for task_id in self._ids],
+            "idempotency": [item for item in self._idempotency.items() if item[1][4] > now],
+        }
+
+    def _restore(self, state):
+        for row in state["tasks"]:
+            self._put(Task.from_db_row(row), None)
+        self._changes.clear()
+        self._writes = state["n"]
+        self._next_id = max(self._next_id, state["next_id"])
+        self._last_seq = state["last_seq"]
+        self._table_version = (state["table_version"], state["changed_at"])
+        for key, fingerprint, status, headers, body, expires_at in state["idempotency"]:
+            self._idempotency[key] = (fingerprint, status, headers, base64.b64decode(body), expires_at)
+        self.loaded = len(self._tasks)
+
+    def _apply_record(self, record):
+        """Reaplica uma escrita lida do log"""
+        key = record.get("key")
+        if key is not None:
+            name, fingerprint, status, headers, body, expires_at = key
+            key = (name, (fingerprint, status, headers, base64.b64decode(body), expires_at))
+        self._apply(
+            record["at"],
+            [Task.from_db_row(row) for row in record.get("put", ())],
+            record.get("del", ()),
+            key,
+        )
+        self._writes = record["n"]
+
+    def _write(self, at, puts=(), deletes=(), key=None):
+        """
+        Confirma uma escrita: grava no log (se houver persistência) e aplica.
+        Se a gravação falhar nada é alterado.
+        """
+        if self._persistence is not None:
+            record = {"n": self._writes + 1, "at": at}
+            if puts:
+                record["put"] = [_row(task) for task in puts]
+            if deletes:
+                record["del"] = list(deletes)
+            if key is not None:
+                name, (fingerprint, status, headers, body, expires_at) = key
+                record["key"] = [name, fingerprint, status, headers, base64.b64encode(body).decode("ascii"), expires_at]
+            self._persistence.append(record)
+        self._writes += 1
+        self._apply(at, puts, deletes, key)
+        self._trim_changes()
+
+    def _trim_changes(self):
+        """Mantém as CHANGES_RETENTION alterações mais recentes, podando em blocos"""
+        retention = config.CHANGES_RETENTION
+        if retention > 0 and len(self._changes) >= retention + config.CHANGES_PRUNE_INTERVAL:
+            del self._changes[:len(self._changes) - retention]
+
+    def _apply(self, at, puts, deletes, key):
+        for task in puts:
+            self._put(task, at)
+        for task_id in deletes:
+            self._remove(task_id, at)
+        if key is not None:
+            name, entry = key
+            self._idempotency.pop(name, None)
+            self._idempotency[name] = entry
+        self._table_version = (self._table_version[0] + 1, at)
+
+    def _put(self, task, at):
+        """Grava uma tarefa nova ou alterada, atualizando índices e resumos"""
+        old = self._tasks.get(task.id)
+        self._tasks[task.id] = task
+        self._json.pop(task.id, None)
+
+        if old is None:
+            _index_add(self._ids, task.id)
+            _index_add(self._by_status.setdefault(task.status, []), task.id)
+            self._count(task.status, task.created_at, 1)
+            self._search.add(task)
+            self._next_id = max(self._next_id, task.id + 1)
+            op = "create"
+        else:
+            if old.status != task.status:
+                _index_remove(self._by_status[old.status], task.id)
+                _index_add(self._by_status.setdefault(task.status, []), task.id)
+                self._count(old.status, old.created_at, -1, created=False)
+                self._count(task.status, task.created_at, 1, created=False)
+            if old.title != task.title or old.description != task.description:
+                self._search.remove(task.id)
+                self._search.add(task)
+            op = "update"
+
+        if at is not None:
+            self._record_change(task.id, op, task.version, at)
+
+    def _remove(self, task_id, at):
+        task = self._tasks.pop(task_id, None)
+        if task is None:
+            return
+        self._json.pop(task_id, None)
+        _index_remove(self._ids, task_id)
+        _index_remove(self._by_status[task.status], task_id)
+        self._count(task.status, task.created_at, -1)
+        self._search.remove(task_id)
+        self._record_change(task_id, "delete", task.version, at)
+
+    def _count(self, status, created_at, delta, created=True):
+        """Mesmas contas dos triggers de task_status_counts/task_daily_counts"""
+        self._status_counts[status] = self._status_counts.get(status, 0) + delta
+        day = self._daily.setdefault(str(created_at)[:10], [0, 0])
+        if created:
+            day[0] += delta
+        if status == COMPLETED_STATUS:
+            day[1] += delta
+
+    def _record_change(self, task_id, op, version, at):
+        self._last_seq += 1
+        self._changes.append((self._last_seq, task_id, op, version, at))
+
+    def _new_task(self, task, task_id, at):
+        return Task(
+            id=task_id, title=task.title, description=task.description,
+            # Status nulo/vazio vale o padrão, como o INSERT do SQLite
+            status=task.status or DEFAULT_STATUS,
+            created_at=at, updated_at=at, version=1
+        )
+
+    def _changed_task(self, task, fields, at):
+        values = {field: getattr(task, field) for field in UPDATABLE_FIELDS}
+        values.update(fields)
+        return Task(
+            id=task.id, created_at=task.created_at, updated_at=at, version=task.version + 1, **values
+        )
+
+    # Escritas
+
+    @timed("repository")
+    def create(self, task):
+        with self._lock:
+            at = _now()
+            created = self._new_task(task, self._next_id, at)
+            self._write(at, puts=[created])
+        invalidate_tasks(created.id)
+        notify_changes()
+        return created
+
+    @timed("repository")
+    def create_idempotent(self, task, key, fingerprint, render):
+        """
+        Como no SQLite, a verificação da chave e a criação acontecem na mesma
+        seção crítica: repetições simultâneas recebem a resposta da primeira
+        """
+        now = time.time()
+        with self._lock:
+            stored = self._stored_response(key, fingerprint, now)
+            if stored is not None:
+                return stored, True
+            at = _now()
+            created = self._new_task(task, self._next_id, at)
+            status, headers, body = render(created)
+            entry = (fingerprint, status, headers, body, now + config.IDEMPOTENCY_TTL)
+            self._write(at, puts=[created], key=(key, entry))
+            self._prune_idempotency_keys(now)
+        invalidate_tasks(created.id)
+        notify_changes()
+        return (status, dict(headers), body), False
+
+    def find_idempotent_response(self, key, fingerprint):
+        return self._stored_response(key, fingerprint, time.time())
+
+    def _stored_response(self, key, fingerprint, now):
+        entry = self._idempotency.get(key)
+        if entry is None or entry[4] <= now:
+            return None
+        if entry[0] != fingerprint:
+            raise IdempotencyKeyReused(key)
+        return entry[1], dict(entry[2]), entry[3]
+
+    def _prune_idempotency_keys(self, now):
+        """Remove as chaves expiradas e as mais antigas além de IDEMPOTENCY_MAX_KEYS"""
+        keys = self._idempotency
+        while keys:
+            key, entry = next(iter(keys.items()))
+            if entry[4] > now and len(keys) <= config.IDEMPOTENCY_MAX_KEYS:
+                break
+            del keys[key]
+
+    @timed("repository")
+    def update(self, task_id, updates, expected_version=None):
+        fields = {k: v for k, v in updates.items() if k in UPDATABLE_FIELDS}
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return None
+            if expected_version is not None and task.version != expected_version:
+                raise PreconditionFailed(task_id)
+            if not fields:
+                return task
+            at = _now()
+            updated = self._changed_task(task, fields, at)
+            self._write(at, puts=[updated])
+        invalidate_tasks(task_id)
+        notify_changes()
+        return updated
+
+    @timed("repository")
+    def delete(self, task_id, expected_version=None):
+        with self._lock:
+            task = self._tasks.get(task_id)
+            if task is None:
+                return False
+            if expected_version is not None and task.version != expected_version:
+                raise PreconditionFailed(task_id)
+            self._write(_now(), deletes=[task_id])
+        invalidate_tasks(task_id)
+        notify_changes()
+        return True
+
+    @timed("repository")
+    def create_many(self, tasks):
+        if not tasks:
+            return []
+        with self._lock:
+            at = _now()
+            created = [self._new_task(task, self._next_id + i, at) for i, task in enumerate(tasks)]
+            self._write(at, puts=created)
+        invalidate_tasks(*[task.id for task in created])
+        notify_changes()
+        return created
+
+    @timed("repository")
+    def update_many(self, items):
+        with self._lock:
+            at = _now()
+            current = {}
+            puts = []
+            for item in items:
+                task = current.get(item["id"]) or self._tasks.get(item["id"])
+                if task is None:
+                    continue
+                fields = {f: item[f] for f in UPDATABLE_FIELDS if f in item}
+                if fields:
+                    task = self._changed_task(task, fields, at)
+                    puts.append(task)
+                current[task.id] = task
+            if not current:
+                return {}
+            self._write(at, puts=puts)
+        invalidate_tasks(*current.keys())
+        notify_changes()
+        return current
+
+    @timed("repository")
+    def delete_many(self, task_ids):
+        with self._lock:
+            existing = {task_id for task_id in task_ids if task_id in self._tasks}
+            if not existing:
+                return existing
+            self._write(_now(), deletes=sorted(existing))
+        invalidate_tasks(*existing)
+        notify_changes()
+        return existing
+
+    # Leituras
+
+    def find_by_id(self, task_id):
+        return self._tasks.get(task_id)
+
+    def exists(self, task_id):
+        return task_id in self._tasks
+
+    @timed("repository")
+    def find_all(self):
+        with self._lock:
+            return [self._tasks[task_id] for task_id in self._ids]
+
+    @timed("repository")
+    def find_page(self, limit, after_id=None, status=None, created_from=None, created_to=None):
+        with self._lock:
+            tasks = self._scan(limit + 1, after_id, status, created_from, created_to)
+        next_cursor = tasks[limit - 1].id if len(tasks) > limit else None
+        return tasks[:limit], next_cursor
+
+    @timed("repository")
+    def find_page_json(self, limit, after_id=None, status=None, created_from=None, created_to=None):
+        with self._lock:
+            tasks = self._scan(limit + 1, after_id, status, created_from, created_to)
+            fragments = [self._task_json(task) for task in tasks[:limit]]
+        next_cursor = tasks[limit - 1].id if len(tasks) > limit else None
+        return fragments, next_cursor
+
+    def iter_json(self, batch_size, after_id=None, status=None, created_from=None, created_to=None):
+        for tasks in self._iter_tasks(batch_size, after_id, status, created_from, created_to, True):
+            yield tasks
+
+    def iter_rows(self, batch_size, after_id=None, status=None, created_from=None, created_to=None):
+        for tasks in self._iter_tasks(batch_size, after_id, status, created_from, created_to, False):
+            yield [_row(task) for task in tasks]
+
+    def _iter_tasks(self, batch_size, after_id, status, created_from, created_to, serialize):
+        """
+        Lotes por cursor: o lock é adquirido a cada lote e liberado entre
+        eles, então uma exportação longa não bloqueia as escritas
+        """
+        while True:
+            with self._lock:
+                tasks = self._scan(batch_size, after_id, status, created_from, created_to)
+                batch = [self._task_json(task) for task in tasks] if serialize else tasks
+            if not tasks:
+                return
+            yield batch
+            if len(tasks) < batch_size:
+                return
+            after_id = tasks[-1].id
+
+    def _scan(self, count, after_id, status, created_from, created_to):
+        """Até `count` tarefas em ordem de id, pelo índice do status quando filtrado"""
+        index = self._ids if status is None else self._by_status.get(status, [])
+        position = bisect_right(index, after_id) if after_id is not None else 0
+        tasks = self._tasks
+        if created_from is None and created_to is None:
+            return [tasks[task_id] for task_id in index[position:position + count]]
+
+        found = []
+        for i in range(position, len(index)):
+            task = tasks[index[i]]
+            if created_from is not None and task.created_at < created_from:
+                continue
+            if created_to is not None and task.created_at >= created_to:
+                continue
+            found.append(task)
+            if len(found) == count:
+                break
+        return found
+
+    def _task_json(self, task):
+        """JSON da tarefa, igual ao json_object do SQLite, serializado uma vez por versão"""
+        fragment = self._json.get(task.id)
+        if fragment is None:
+            fragment = self._json[task.id] = json.dumps(
+                task.to_dict(), ensure_ascii=False, separators=(",", ":")
+            )
+        return fragment
+
+    @timed("repository")
+    def search(self, text, limit, offset=0, status=None):
+        terms = parse_search_terms(text)
+        if not terms:
+            return [], None
+
+        with self._lock:
+            accept = None
+            if status is not None:
+                accept = lambda task_id: self._tasks[task_id].status == status
+            scored, _, matches = self._search.search(terms, offset + limit + 1, accept)
+            page = [
+                (self._tasks[task_id], score, occurrences(matches, task_id))
+                for score, task_id in scored[offset:]
+            ]
+
+        results = [
+            (
+                task,
+                score,
+                highlight(task.title, occurrences[0], SEARCH_MARK_OPEN, SEARCH_MARK_CLOSE),
+                snippet(
+                    task.description, occurrences[1], SEARCH_MARK_OPEN, SEARCH_MARK_CLOSE,
+                    SEARCH_ELLIPSIS, int(config.SEARCH_SNIPPET_TOKENS)
+                ) or None,
+            )
+            for task, score, occurrences in page[:limit]
+        ]
+        next_offset = offset + limit if len(page) > limit else None
+        return results, next_offset
+
+    @timed("repository")
+    def rebuild_search_index(self):
+        with self._lock:
+            self._search.clear()
+            for task_id in self._ids:
+                self._search.add(self._tasks[task_id])
+            return len(self._ids)
+
+    @timed("repository")
+    def get_stats(self, days):
+        cutoff = (datetime.now(timezone.utc).date() - timedelta(days=int(days))).isoformat()
+        with self._lock:
+            by_status = {status: count for status, count in self._status_counts.items() if count > 0}
+            daily = sorted(
+                (day, created, completed)
+                for day, (created, completed) in self._daily.items()
+                if day > cutoff and created > 0
+            )
+        return by_status, daily
+
+    @timed("repository")
+    def rebuild_stats(self):
+        with self._lock:
+            self._status_counts.clear()
+            self._daily.clear()
+            for task in self._tasks.values():
+                self._count(task.status, task.created_at, 1)
+            return len(self._tasks)
+
+    def get_table_version(self):
+        return self._table_version
+
+    # Log de alterações
+
+    def prune_changes(self, keep):
+        with self._lock:
+            excess = max(0, len(self._changes) - keep)
+            del self._changes[:excess]
+            return excess
+
+    def find_changes(self, since, limit):
+        with self._lock:
+            if not self._changes:
+                return []
+            start = max(0, since + 1 - self._changes[0][0])
+            return self._changes[start:start + limit]
+
+    def get_change_bounds(self):
+        with self._lock:
+            oldest = self._changes[0][0] if self._changes else None
+            return oldest, self._last_seq
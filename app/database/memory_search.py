@@ -0,0 +1,325 @@
+"""
+Índice de busca textual do backend em memória (GET /tasks/search)
+
+Reproduz o comportamento da tabela FTS5 do backend SQLite:
+
+- tokenização equivalente à unicode61 com remove_diacritics: sequências de
+  letras e dígitos, sem acentos e sem diferenciar maiúsculas
+- cada termo é uma frase (tokens consecutivos na mesma coluna), com prefixo
+  opcional no último token, e todos os termos são obrigatórios
+- relevância bm25 com os mesmos pesos por coluna (SEARCH_WEIGHTS), destaque
+  do título e trecho da descrição com os mesmos marcadores
+
+O índice invertido guarda as posições de cada token por tarefa: termos de uma
+palavra usam a lista de ocorrências diretamente, frases conferem as posições
+consecutivas, e os destaques são montados só para a página retornada.
+"""
+import heapq
+import math
+import re
+import unicodedata
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+
+# Parâmetros do bm25, os mesmos do FTS5
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def fold(text):
+    """Remove acentos e diferenças de caixa de um token ou texto"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def tokenize(text):
+    """Tokens normalizados de um texto (lista vazia para None)"""
+    if not text:
+        return []
+    return [fold(match.group()) for match in TOKEN_RE.finditer(text)]
+
+
+class MemorySearchIndex:
+    """
+    Índice invertido posicional das colunas title e description. Não é
+    thread-safe: o MemoryTaskRepository chama os métodos com o seu lock adquirido.
+    """
+
+    def __init__(self, weights):
+        self.weights = weights
+        # token -> {id: (posições no título, posições na descrição)}
+        self._postings = {}
+        # id -> (tokens do título, tokens da descrição, tokens distintos)
+        self._docs = {}
+        self._total_tokens = 0
+
+    def __len__(self):
+        return len(self._docs)
+
+    def tokens(self):
+        return len(self._postings)
+
+    def add(self, task):
+        columns = (tokenize(task.title), tokenize(task.description))
+        positions = {}
+        for column, tokens in enumerate(columns):
+            for position, token in enumerate(tokens):
+                entry = positions.get(token)
+                if entry is None:
+                    entry = positions[token] = ([], [])
+                entry[column].append(position)
+        for token, (title, description) in positions.items():
+            posting = self._postings.get(token)
+            if posting is None:
+                posting = self._postings[token] = {}
+            posting[task.id] = (tuple(title), tuple(description))
+        self._docs[task.id] = (len(columns[0]), len(columns[1]), tuple(positions))
+        self._total_tokens += len(columns[0]) + len(columns[1])
+
+    def remove(self, task_id):
+        doc = self._docs.pop(task_id, None)
+        if doc is None:
+            return
+        for token in doc[2]:
+            posting = self._postings[token]
+            del posting[task_id]
+            if not posting:
+                del self._postings[token]
+        self._total_tokens -= doc[0] + doc[1]
+
+    def clear(self):
+        self._postings.clear()
+        self._docs.clear()
+        self._total_tokens = 0
+
+    def search(self, terms, limit, accept=None):
+        """
+        As `limit` tarefas mais relevantes que contêm todos os termos
+        Args:
+            terms: lista de (frase, prefixo) de parse_search_terms
+            limit: quantidade de resultados (offset + página + 1)
+            accept: função id -> bool para filtrar os resultados (ex.: status)
+        Retorna: (lista de (score bm25, id) em ordem de relevância e id,
+                  quantidade de resultados, ocorrências) - ocorrências é a
+                 lista de (tamanho, dict id -> posições) de cada termo, para
+                 occurrences()
+        """
+        phrases = []
+        for phrase, prefix in terms:
+            tokens = tokenize(phrase)
+            if tokens:
+                phrases.append((tokens, prefix))
+        if not phrases:
+            return [], 0, []
+
+        matches = [(len(tokens), self._match_phrase(tokens, prefix)) for tokens, prefix in phrases]
+        if not all(found for _, found in matches):
+            return [], 0, []
+
+        # nHit do bm25 conta todas as linhas com a frase, não só as que têm os demais termos
+        rows = len(self._docs)
+        idfs = []
+        for _, found in matches:
+            idf = math.log((rows - len(found) + 0.5) / (len(found) + 0.5))
+            idfs.append(idf if idf > 0 else 1e-6)
+
+        smallest = min((found for _, found in matches), key=len)
+        others = [found for _, found in matches if found is not smallest]
+        candidates = [task_id for task_id in smallest if all(task_id in found for found in others)]
+        if accept is not None:
+            candidates = [task_id for task_id in candidates if accept(task_id)]
+
+        title_weight, description_weight = self.weights
+        average = self._total_tokens / rows
+        scored = []
+        for task_id in candidates:
+            doc = self._docs[task_id]
+            normalized = BM25_K1 * (1 - BM25_B + BM25_B * (doc[0] + doc[1]) / average)
+            score = 0.0
+            for idf, (_, found) in zip(idfs, matches):
+                title, description = found[task_id]
+                frequency = title_weight * len(title) + description_weight * len(description)
+                score += idf * (frequency * (BM25_K1 + 1)) / (frequency + normalized)
+            scored.append((-score, task_id))
+        return heapq.nsmallest(limit, scored), len(scored), matches
+
+    def _match_phrase(self, tokens, prefix):
+        """
+        Retorna: dict {id: (posições no título, posições na descrição)} com as
+        posições em que a frase começa, para as tarefas que a contêm.
+        Para um único token sem prefixo é a própria lista de ocorrências do
+        índice (não deve ser alterada).
+        """
+        last = tokens[-1]
+        if prefix:
+            final = {}
+            for token, posting in self._postings.items():
+                if token.startswith(last):
+                    for task_id, (title, description) in posting.items():
+                        entry = final.get(task_id)
+                        if entry is None:
+                            final[task_id] = (list(title), list(description))
+                        else:
+                            entry[0].extend(title)
+                            entry[1].extend(description)
+            for title, description in final.values():
+                title.sort()
+                description.sort()
+        else:
+            final = self._postings.get(last, {})
+        if len(tokens) == 1:
+            return final
+
+        postings = [self._postings.get(token, {}) for token in tokens[:-1]] + [final]
+        smallest = min(postings, key=len)
+        found = {}
+        for task_id in smallest:
+            if not all(task_id in posting for posting in postings):
+                continue
+            starts = tuple(
+                tuple(
+                    position for position in postings[0][task_id][column]
+                    if all(position + offset in postings[offset][task_id][column]
+                           for offset in range(1, len(tokens)))
+                )
+                for column in (0, 1)
+            )
+            if starts[0] or starts[1]:
+                found[task_id] = starts
+        return found
+
+
+def occurrences(matches, task_id):
+    """
+    Ocorrências dos termos em uma tarefa do resultado de search()
+    Retorna: (ocorrências no título, na descrição), cada uma uma lista de
+             (posição inicial, quantidade de tokens, índice do termo) em ordem
+    """
+    columns = ([], [])
+    for index, (size, found) in enumerate(matches):
+        for column, positions in enumerate(found[task_id]):
+            columns[column].extend((position, size, index) for position in positions)
+    columns[0].sort()
+    columns[1].sort()
+    return columns
+
+
+def _spans(text):
+    return [match.span() for match in TOKEN_RE.finditer(text)]
+
+
+def _mark(text, spans, instances, start, end, open_mark, close_mark):
+    """
+    Trecho do texto do token `start` ao token `end` (exclusivo) com as
+    ocorrências envolvidas pelos marcadores; ocorrências sobrepostas viram
+    um único destaque, adjacentes não
+    """
+    ranges = []
+    for position, size, _ in instances:
+        if ranges and position < ranges[-1][1]:
+            ranges[-1][1] = max(ranges[-1][1], position + size)
+        else:
+            ranges.append([position, position + size])
+
+    begin = spans[start][0] if start > 0 else 0
+    finish = spans[end - 1][1] if end < len(spans) else len(text)
+    parts = []
+    cursor = begin
+    for first, last in ranges:
+        # Como no FTS5, uma ocorrência que começa antes da janela não é destacada
+        if first < start or first >= end:
+            continue
+        last = min(last, end)
+        parts.append(text[cursor:spans[first][0]])
+        parts.append(open_mark)
+        parts.append(text[spans[first][0]:spans[last - 1][1]])
+        parts.append(close_mark)
+        cursor = spans[last - 1][1]
+    parts.append(text[cursor:finish])
+    return "".join(parts)
+
+
+def highlight(text, instances, open_mark, close_mark):
+    """Texto completo com as ocorrências destacadas (highlight() do FTS5)"""
+    if not text:
+        return text
+    spans = _spans(text)
+    if not spans:
+        return text
+    return _mark(text, spans, instances, 0, len(spans), open_mark, close_mark)
+
+
+def snippet(text, instances, open_mark, close_mark, ellipsis, size):
+    """
+    Janela de até `size` tokens com as ocorrências destacadas e reticências
+    onde o texto foi cortado, escolhida como no snippet() do FTS5: vale mais
+    a janela com mais termos distintos, com preferência por começar no início
+    de uma frase
+    Retorna: str ("" sem texto)
+    """
+    if not text:
+        return ""
+    spans = _spans(text)
+    if not spans:
+        return text
+    size = max(1, size)
+    total = len(spans)
+    sentences = _sentence_starts(text, spans)
+
+    best, start = 0, 0
+    for position, _, _ in instances:
+        score, adjusted = _window_score(instances, position, size, total)
+        if score > best:
+            best, start = score, adjusted
+        if total > size:
+            sentence = 0
+            while sentence < len(sentences) - 1 and sentences[sentence + 1] <= position:
+                sentence += 1
+            first = sentences[sentence]
+            if first < position:
+                score, _ = _window_score(instances, first, size, total)
+                score += 120 if first == 0 else 100
+                if score > best:
+                    best, start = score, first
+
+    end = min(total, start + size)
+    result = _mark(text, spans, instances, start, end, open_mark, close_mark)
+    if start > 0:
+        result = ellipsis + result
+    if end < total:
+        result += ellipsis
+    return result
+
+
+def _window_score(instances, start, size, total):
+    """
+    Pontuação da janela [start, start + size): 1000 por termo distinto e 1 por
+    repetição. Retorna também o início que centraliza as ocorrências da janela.
+    """
+    seen = set()
+    score = 0
+    first = last = None
+    for position, length, term in instances:
+        if start <= position < start + size:
+            score += 1 if term in seen else 1000
+            seen.add(term)
+            if first is None:
+                first = position
+            last = position + length
+    if first is None:
+        return score, start
+    adjusted = first - int((size - (last - first)) / 2)
+    if adjusted + size > total:
+        adjusted = total - size
+    return score, max(0, adjusted)
+
+
+def _sentence_starts(text, spans):
+    """Tokens que começam uma frase: o primeiro e os precedidos por '.' ou ':' e espaço"""
+    starts = [0]
+    for index in range(1, len(spans)):
+        offset = spans[index][0]
+        before = text[:offset].rstrip(" \t\n\r")
+        if len(before) < offset and before[-1:] in (".", ":"):
+            starts.append(index)
+    return starts
@@ -0,0 +1,213 @@
+import sqlite3
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    """Nenhuma conexão ficou disponível dentro do tempo limite"""
+
+
+class PoolClosed(Exception):
+    """O pool foi fechado e não entrega mais conexões"""
+
+
+class ConnectionPool:
+    """
+    Pool limitado e thread-safe de conexões SQLite.
+
+    As conexões são abertas sob demanda até `max_size`, configuradas uma única vez
+    (callback `configure`) e reutilizadas em ordem LIFO, mantendo quentes as
+    conexões mais recentes. Conexões ociosas por mais de `health_check_interval`
+    segundos passam por um `SELECT 1` antes de serem entregues.
+    """
+
+    def __init__(self, db_path, max_size=8, timeout=5.0, health_check_interval=30.0,
+                 configure=None, connect_kwargs=None):
+        if max_size < 1:
+            raise ValueError("max_size deve ser maior que zero")
+
+        self.db_path = db_path
+        self.max_size = max_size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self._configure = configure
+        self._connect_kwargs = connect_kwargs or {}
+
+        self._cond = threading.Condition()
+        self._idle = deque()
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        self._created = 0
+        self._discarded = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._timeouts = 0
+        self._health_checks = 0
+        self._health_check_failures = 0
+        self._peak_in_use = 0
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, **self._connect_kwargs)
+        try:
+            if self._configure:
+                self._configure(conn)
+        except Exception:
+            conn.close()
+            raise
+        return conn
+
+    def _is_healthy(self, conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self):
+        """
+        Retira uma conexão do pool, abrindo uma nova se houver espaço
+        Retorna: sqlite3.Connection
+        Lança: PoolTimeout se nenhuma conexão ficar livre a tempo
+        """
+        deadline = time.monotonic() + self.timeout
+        waited = False
+        wait_started = None
+        conn = None
+        last_used = None
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolClosed("Pool de conexões fechado")
+
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    break
+
+                if not waited:
+                    waited = True
+                    wait_started = time.monotonic()
+                    self._waits += 1
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    self._wait_time += time.monotonic() - wait_started
+                    raise PoolTimeout(
+                        f"Nenhuma conexão disponível após {self.timeout:.1f}s "
+                        f"(max_size={self.max_size})"
+                    )
+                self._cond.wait(remaining)
+
+            if waited:
+                self._wait_time += time.monotonic() - wait_started
+            self._in_use += 1
+            self._checkouts += 1
+            self._peak_in_use = max(self._peak_in_use, self._in_use)
+
+        try:
+            if conn is not None and time.monotonic() - last_used > self.health_check_interval:
+                healthy = self._is_healthy(conn)
+                with self._cond:
+                    self._health_checks += 1
+                    if not healthy:
+                        self._health_check_failures += 1
+                        self._discarded += 1
+                if not healthy:
+                    self._close_quietly(conn)
+                    conn = None
+
+            if conn is None:
+                conn = self._connect()
+                with self._cond:
+                    self._created += 1
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._size -= 1
+                self._cond.notify()
+            raise
+
+        return conn
+
+    def release(self, conn, discard=False):
+        """
+        Devolve uma conexão ao pool
+        Args:
+            conn: conexão obtida via acquire()
+            discard: fecha a conexão em vez de reaproveitá-la
+        """
+        if not discard and conn.in_transaction:
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                discard = True
+
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+                self._discarded += 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+
+        if conn is not None:
+            self._close_quietly(conn)
+
+    @contextmanager
+    def connection(self):
+        """Context manager que devolve a conexão ao pool ao final do bloco"""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """Fecha todas as conexões ociosas e impede novos checkouts"""
+        with self._cond:
+            self._closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self):
+        """Retorna métricas de uso do pool"""
+        with self._cond:
+            return {
+                "max_size": self.max_size,
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "peak_in_use": self._peak_in_use,
+                "created": self._created,
+                "discarded": self._discarded,
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_time_seconds": round(self._wait_time, 6),
+                "timeouts": self._timeouts,
+                "health_checks": self._health_checks,
+                "health_check_failures": self._health_check_failures,
+            }
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
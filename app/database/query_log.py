@@ -0,0 +1,229 @@
+"""
+Perfil dos statements SQL (opt-in, TODO_DB_PROFILE_ENABLED)
+
+Com o perfil habilitado, as conexões do pool e da thread escritora são abertas
+com ProfiledConnection, cujo cursor mede cada execute/executemany/executescript.
+Para cada statement ficam registrados o texto, o formato dos parâmetros (tipos
+e quantidade de linhas, nunca os valores) e a duração. O tempo medido vai até a
+primeira linha do resultado; o consumo posterior com fetch* não é incluído.
+
+- Agregados por statement (contagem, tempo total e máximo) aparecem em GET /status.
+- Statements acima de TODO_DB_SLOW_QUERY_MS são gravados como uma linha JSON no
+  arquivo TODO_DB_SLOW_QUERY_LOG, com o EXPLAIN QUERY PLAN do statement
+  (capturado uma vez por texto de SQL).
+"""
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+
+from app import config
+from app.utils.metrics import current_route
+
+# Listas IN (?, ?, ...) de tamanho variável são agrupadas em um único
+# statement nos agregados
+_IN_LIST_RE = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)+\s*\)", re.IGNORECASE)
+
+# Statements que aceitam EXPLAIN QUERY PLAN
+_EXPLAINABLE = ("SELECT", "INSERT", "UPDATE", "DELETE", "REPLACE", "WITH")
+
+# Máximo de statements distintos nos agregados e planos guardados
+MAX_TRACKED_STATEMENTS = 500
+
+
+def normalize_sql(sql):
+    """Texto do statement em uma linha, com listas IN (?, ...) colapsadas"""
+    return _IN_LIST_RE.sub("IN (?, ...)", " ".join(sql.split()))
+
+
+def params_shape(parameters, many=False):
+    """
+    Formato dos parâmetros sem os valores
+    Retorna: lista de tipos (execute) ou {"rows": n, "types": [...]} (executemany)
+    """
+    if many:
+        first = parameters[0] if parameters else ()
+        return {"rows": len(parameters), "types": params_shape(first)}
+    if isinstance(parameters, dict):
+        return {name: type(value).__name__ for name, value in parameters.items()}
+    return [type(value).__name__ for value in parameters]
+
+
+class QueryLog:
+    """Agregados por statement e log estruturado de statements lentos"""
+
+    def __init__(self, slow_threshold_ms=100.0, log_path=None, explain=True):
+        self.slow_threshold = slow_threshold_ms / 1000.0
+        self.log_path = log_path
+        self.explain = explain
+        self._lock = threading.Lock()
+        self._statements = {}  # sql normalizado -> [contagem, total, máximo, formato]
+        self._plans = {}
+        self._file = None
+        self._statements_count = 0
+        self._slow_count = 0
+
+    def record(self, conn, sql, parameters, elapsed, many=False):
+        """Registra uma execução; se for lenta, grava no log com o plano"""
+        key = normalize_sql(sql)
+        with self._lock:
+            self._statements_count += 1
+            entry = self._statements.get(key)
+            if entry is None:
+                if len(self._statements) >= MAX_TRACKED_STATEMENTS:
+                    entry = None
+                else:
+                    entry = self._statements[key] = [0, 0.0, 0.0, None]
+            if entry is not None:
+                entry[0] += 1
+                entry[1] += elapsed
+                if elapsed > entry[2]:
+                    entry[2] = elapsed
+                    entry[3] = params_shape(parameters, many)
+
+        if elapsed >= self.slow_threshold:
+            self._log_slow(conn, key, sql, parameters, elapsed, many)
+
+    def _log_slow(self, conn, key, sql, parameters, elapsed, many):
+        entry = {
+            "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "duration_ms": round(elapsed * 1000, 3),
+            "sql": key,
+            "params": params_shape(parameters, many),
+            "route": current_route(),
+            "thread": threading.current_thread().name,
+            "pid": os.getpid(),
+        }
+        if self.explain:
+            first = (parameters[0] if parameters else ()) if many else parameters
+            entry["plan"] = self._query_plan(conn, key, sql, first)
+
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._slow_count += 1
+            try:
+                self._output().write(line)
+            except OSError as e:
+                print(f"Erro ao gravar log de queries lentas: {e}")
+
+    def _query_plan(self, conn, key, sql, parameters):
+        """EXPLAIN QUERY PLAN do statement, capturado uma vez por texto de SQL"""
+        with self._lock:
+            plan = self._plans.get(key)
+        if plan is not None:
+            return plan
+
+        if not sql.lstrip().upper().startswith(_EXPLAINABLE):
+            return None
+        try:
+            # Cursor comum: o EXPLAIN não deve ser medido nem registrado
+            cur = sqlite3.Connection.cursor(conn, sqlite3.Cursor)
+            rows = cur.execute("EXPLAIN QUERY PLAN " + sql, parameters).fetchall()
+            plan = [row[3] for row in rows]
+        except sqlite3.Error as e:
+            plan = [f"indisponível: {e}"]
+
+        with self._lock:
+            if len(self._plans) < MAX_TRACKED_STATEMENTS:
+                self._plans[key] = plan
+        return plan
+
+    def _output(self):
+        if self.log_path in (None, "", "-"):
+            return sys.stderr
+        if self._file is None:
+            self._file = open(self.log_path, "a", encoding="utf-8", buffering=1)
+        return self._file
+
+    def stats(self, top=20):
+        """Statements com maior tempo total e contadores gerais"""
+        with self._lock:
+            statements = sorted(self._statements.items(), key=lambda item: item[1][1], reverse=True)
+            return {
+                "slow_threshold_ms": self.slow_threshold * 1000,
+                "statements": self._statements_count,
+                "slow_statements": self._slow_count,
+                "top": [
+                    {
+                        "sql": sql,
+                        "count": count,
+                        "total_ms": round(total * 1000, 3),
+                        "avg_ms": round(total * 1000 / count, 3),
+                        "max_ms": round(maximum * 1000, 3),
+                        "max_params": shape,
+                    }
+                    for sql, (count, total, maximum, shape) in statements[:top]
+                ],
+            }
+
+
+class ProfiledCursor(sqlite3.Cursor):
+    """Cursor que mede cada statement e o registra no QueryLog do processo"""
+
+    def execute(self, sql, parameters=()):
+        started = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            get_query_log().record(self.connection, sql, parameters, time.perf_counter() - started)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not isinstance(seq_of_parameters, (list, tuple)):
+            seq_of_parameters = list(seq_of_parameters)
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            get_query_log().record(
+                self.connection, sql, seq_of_parameters, time.perf_counter() - started, many=True
+            )
+
+    def executescript(self, sql_script):
+        started = time.perf_counter()
+        try:
+            return super().executescript(sql_script)
+        finally:
+            get_query_log().record(self.connection, sql_script, (), time.perf_counter() - started)
+
+
+class ProfiledConnection(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive os atalhos conn.execute*) são ProfiledCursor"""
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+_query_log = None
+_query_log_lock = threading.Lock()
+
+
+def get_query_log():
+    """Retorna o QueryLog do processo, criando-o com a configuração atual"""
+    global _query_log
+
+    if _query_log is None:
+        with _query_log_lock:
+            if _query_log is None:
+                _query_log = QueryLog(
+                    slow_threshold_ms=config.DB_SLOW_QUERY_MS,
+                    log_path=config.DB_SLOW_QUERY_LOG,
+                    explain=config.DB_SLOW_QUERY_EXPLAIN,
+                )
+    return _query_log
+
+
+def profiling_connect_kwargs():
+    """Argumentos extras de sqlite3.connect: a fábrica de conexões com perfil, se habilitado"""
+    return {"factory": ProfiledConnection} if config.DB_PROFILE_ENABLED else {}
@@ -0,0 +1,379 @@
+"""
+Réplicas de leitura do backend SQLite (servidor com --replicas)
+
+No modo prefork com réplicas, os processos primários atendem todas as rotas e
+são os únicos que escrevem; os processos de leitura atendem GET/HEAD em outra
+porta (REPLICA_PORT) e respondem 307 às escritas, apontando para o primário.
+Cada réplica troca o backend do processo por um ReplicaTaskRepository, que lê
+de um dos dois modos (REPLICA_MODE):
+
+- readonly: conexões mode=ro com query_only no próprio banco. No modo WAL os
+  leitores não bloqueiam a thread escritora do primário e veem cada escrita
+  assim que ela é confirmada.
+- snapshot: cópia completa do banco feita pela API de backup do SQLite para um
+  arquivo local da réplica, aberto com immutable=1 (sem locks nem leitura do
+  WAL). Uma thread confere a versão da tabela no primário a cada metade de
+  REPLICA_MAX_STALENESS e só copia o banco quando ela mudou; cada cópia é um
+  arquivo novo, e o anterior é apagado quando a última requisição que o usava
+  termina. Se a thread atrasar, a requisição que encontra o snapshot mais
+  velho que o limite renova a cópia antes de ser atendida (503 se falhar).
+
+Cada requisição fica presa a um snapshot do início ao fim (mesmo que outro
+fique pronto no meio, como em uma exportação longa), e a resposta informa a
+versão da tabela servida (X-Snapshot-Version) e há quanto tempo ela foi
+conferida no primário (X-Snapshot-Age, em segundos). No modo readonly a versão
+é a do início da requisição: as leituras seguintes podem ver escritas mais novas.
+
+A cópia do modo snapshot lê o banco inteiro a cada mudança: serve para bancos
+de até algumas centenas de MB ou limites de atraso de alguns segundos; acima
+disso, use o modo readonly. As réplicas não usam o cache de GET /tasks/<id>,
+que poderia devolver dados mais antigos que o limite de atraso.
+"""
+import itertools
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from app import config
+from app.database.backend import TaskRepositoryBackend, use_backend
+from app.database.connection import close_pool, configure_readonly_connection, get_pool, readonly_uri
+from app.database.storage import resolve_profile
+from app.database.task_repository import SQLiteTaskRepository
+from app.utils.change_feed import notify_changes
+
+REPLICA_MODES = ("readonly", "snapshot")
+
+TABLE_VERSION_SQL = "SELECT version, updated_at FROM table_versions WHERE name = 'tasks'"
+
+
+class ReplicaUnavailable(Exception):
+    """O snapshot passou do atraso máximo e não pôde ser renovado"""
+
+
+class Snapshot:
+    """
+    Banco servido pela réplica: uma cópia (modo snapshot) ou o próprio banco
+    do primário aberto somente para leitura (modo readonly)
+    """
+
+    __slots__ = ("file", "repository", "version", "checked_at", "users", "retired")
+
+    def __init__(self, file, uri, version, checked_at):
+        # file: cópia a ser apagada quando o snapshot sair de uso (None no modo readonly)
+        self.file = file
+        self.repository = SQLiteTaskRepository(uri)
+        self.version = version
+        self.checked_at = checked_at
+        self.users = 0
+        self.retired = False
+
+
+class Pin:
+    """Snapshot de uma requisição e a versão informada nos cabeçalhos"""
+
+    __slots__ = ("snapshot", "version", "checked_at")
+
+    def __init__(self, snapshot, version, checked_at):
+        self.snapshot = snapshot
+        self.version = version
+        self.checked_at = checked_at
+
+    def headers(self):
+        return {
+            "X-Snapshot-Version": str(self.version),
+            "X-Snapshot-Age": f"{max(0.0, time.monotonic() - self.checked_at):.3f}",
+        }
+
+
+class ReplicaTaskRepository(TaskRepositoryBackend):
+    """Backend somente leitura dos processos de réplica"""
+
+    name = "replica"
+
+    def __init__(self, primary, mode="snapshot", max_staleness=1.0, snapshot_dir=None):
+        if mode not in REPLICA_MODES:
+            raise ValueError(f"Modo de réplica inválido: {mode} (use {', '.join(REPLICA_MODES)})")
+        self.primary = primary
+        self.mode = mode
+        self.max_staleness = max(0.0, max_staleness)
+        self.snapshot_dir = snapshot_dir or None
+        self._snapshot = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._local = threading.local()
+        self._source = None
+        self._directory = None
+        self._generations = itertools.count(1)
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.checks = 0
+        self.copies = 0
+        self.copy_errors = 0
+        self.last_copy_seconds = None
+        self.forced_refreshes = 0
+
+    @classmethod
+    def from_config(cls):
+        return cls(
+            config.DB_PATH,
+            mode=config.REPLICA_MODE,
+            max_staleness=config.REPLICA_MAX_STALENESS,
+            snapshot_dir=config.REPLICA_SNAPSHOT_DIR,
+        )
+
+    # Ciclo de vida
+
+    def init(self):
+        """Abre o banco do primário somente para leitura e faz a primeira cópia"""
+        if self.mode == "readonly":
+            self._snapshot = Snapshot(None, readonly_uri(self.primary), None, time.monotonic())
+            return
+
+        # Conexão usada só pela renovação (sob _refresh_lock)
+        self._source = sqlite3.connect(readonly_uri(self.primary), uri=True, check_same_thread=False)
+        configure_readonly_connection(self._source)
+        self._directory = tempfile.mkdtemp(prefix="todo-replica-", dir=self.snapshot_dir)
+        self.refresh()
+        if self.max_staleness > 0:
+            self._thread = threading.Thread(target=self._run, name="replica-refresh", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            snapshot, self._snapshot = self._snapshot, None
+        if snapshot is not None:
+            close_pool(snapshot.repository.path)
+        if self._source is not None:
+            self._source.close()
+            self._source = None
+        if self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory = None
+
+    def stats(self):
+        snapshot = self._snapshot
+        stats = {
+            "storage_profile": resolve_profile(),
+            "replica": {
+                "mode": self.mode,
+                "primary": self.primary,
+                "max_staleness_seconds": self.max_staleness,
+                "checks": self.checks,
+                "copies": self.copies,
+                "copy_errors": self.copy_errors,
+                "last_copy_seconds": self.last_copy_seconds,
+                "forced_refreshes": self.forced_refreshes,
+            },
+        }
+        if snapshot is not None:
+            if snapshot.file is not None:
+                stats["replica"]["snapshot_version"] = snapshot.version
+                stats["replica"]["snapshot_age_seconds"] = round(time.monotonic() - snapshot.checked_at, 3)
+            stats["db_pool"] = get_pool(snapshot.repository.path).stats()
+        return stats
+
+    # Snapshots
+
+    def refresh(self, max_age=None):
+        """
+        Confere a versão da tabela no primário e copia o banco se ela mudou
+        Args:
+            max_age: não faz nada se o snapshot atual foi conferido há no máximo
+                     `max_age` segundos (outra thread acabou de renová-lo)
+        Retorna: o Snapshot atual
+        """
+        with self._refresh_lock:
+            current = self._snapshot
+            started = time.monotonic()
+            if current is not None and max_age is not None and started - current.checked_at <= max_age:
+                return current
+
+            self.checks += 1
+            version = self._source.execute(TABLE_VERSION_SQL).fetchone()[0]
+            if current is not None and version == current.version:
+                current.checked_at = started
+                return current
+
+            snapshot = self._copy(started)
+            with self._lock:
+                self._snapshot = snapshot
+                dispose = current is not None and current.users == 0
+                if current is not None:
+                    current.retired = True
+            if dispose:
+                self._dispose(current)
+        # Esperas do feed de alterações veem as escritas copiadas sem aguardar o polling
+        notify_changes()
+        return snapshot
+
+    def _copy(self, started):
+        """Copia o banco do primário para um arquivo novo (API de backup, em uma só etapa)"""
+        path = os.path.join(self._directory, f"tasks.{next(self._generations)}.db")
+        target = sqlite3.connect(path)
+        try:
+            self._source.backup(target)
+            # O arquivo copiado herda o modo WAL; sem journal ele pode ser aberto como immutable
+            target.execute("PRAGMA journal_mode = DELETE")
+            version = target.execute(TABLE_VERSION_SQL).fetchone()[0]
+        except (sqlite3.Error, OSError):
+            self.copy_errors += 1
+            target.close()
+            os.remove(path)
+            raise
+        target.close()
+        self.copies += 1
+        self.last_copy_seconds = round(time.monotonic() - started, 4)
+        # A cópia é consistente com um instante posterior a `started`
+        return Snapshot(path, readonly_uri(path, immutable=True), version, started)
+
+    def _dispose(self, snapshot):
+        close_pool(snapshot.repository.path)
+        try:
+            os.remove(snapshot.file)
+        except OSError:
+            pass
+
+    def _run(self):
+        interval = max(0.05, self.max_staleness / 2)
+        while not self._stop.wait(interval):
+            try:
+                self.refresh(max_age=interval / 2)
+            except (sqlite3.Error, OSError) as e:
+                print(f"Erro ao renovar o snapshot da réplica: {e}")
+
+    def pin(self):
+        """
+        Prende o snapshot atual à requisição da thread até unpin(), renovando-o
+        antes se passou do atraso máximo
+        Retorna: Pin
+        Lança: ReplicaUnavailable se o snapshot não pôde ser renovado
+        """
+        if self.mode == "readonly":
+            snapshot = self._snapshot
+            version = snapshot.repository.get_table_version()[0]
+            pin = Pin(snapshot, version, time.monotonic())
+        else:
+            if time.monotonic() - self._snapshot.checked_at > self.max_staleness:
+                self.forced_refreshes += 1
+                try:
+                    self.refresh(max_age=self.max_staleness)
+                except (sqlite3.Error, OSError) as e:
+                    raise ReplicaUnavailable(f"Snapshot com mais de {self.max_staleness}s: {e}") from e
+            snapshot = self._acquire()
+            pin = Pin(snapshot, snapshot.version, snapshot.checked_at)
+        self._local.pin = pin
+        return pin
+
+    def unpin(self, pin):
+        self._local.pin = None
+        if pin.snapshot.file is not None:
+            self._release(pin.snapshot)
+
+    def _acquire(self):
+        """Snapshot atual, marcado como em uso (não é apagado até _release)"""
+        with self._lock:
+            snapshot = self._snapshot
+            snapshot.users += 1
+        return snapshot
+
+    def _release(self, snapshot):
+        with self._lock:
+            snapshot.users -= 1
+            dispose = snapshot.retired and snapshot.users == 0
+        if dispose:
+            self._dispose(snapshot)
+
+    def _lease(self):
+        """
+        Snapshot de uma leitura: o da requisição (pin) ou, fora dela, o atual
+        Retorna: (Snapshot, se a leitura deve devolvê-lo com _release)
+        """
+        pin = getattr(self._local, "pin", None)
+        if pin is not None:
+            return pin.snapshot, False
+        return self._acquire(), True
+
+    def _read(self, name, *args):
+        snapshot, leased = self._lease()
+        try:
+            return getattr(snapshot.repository, name)(*args)
+        finally:
+            if leased:
+                self._release(snapshot)
+
+    def _iterate(self, name, *args):
+        snapshot, leased = self._lease()
+        try:
+            yield from getattr(snapshot.repository, name)(*args)
+        finally:
+            if leased:
+                self._release(snapshot)
+
+    # Leituras
+
+    def find_all(self):
+        return self._read("find_all")
+
+    def find_page(self, limit, after_id=None, status=None, created_from=None, created_to=None):
+        return self._read("find_page", limit, after_id, status, created_from, created_to)
+
+    def find_page_json(self, limit, after_id=None, status=None, created_from=None, created_to=None):
+        return self._read("find_page_json", limit, after_id, status, created_from, created_to)
+
+    def search(self, text, limit, offset=0, status=None):
+        return self._read("search", text, limit, offset, status)
+
+    def get_stats(self, days):
+        return self._read("get_stats", days)
+
+    def iter_json(self, batch_size, after_id=None, status=None, created_from=None, created_to=None):
+        return self._iterate("iter_json", batch_size, after_id, status, created_from, created_to)
+
+    def iter_rows(self, batch_size, after_id=None, status=None, created_from=None, created_to=None):
+        return self._iterate("iter_rows", batch_size, after_id, status, created_from, created_to)
+
+    def find_by_id(self, task_id):
+        return self._read("find_by_id", task_id)
+
+    def get_table_version(self):
+        return self._read("get_table_version")
+
+    def exists(self, task_id):
+        return self._read("exists", task_id)
+
+    def find_changes(self, since, limit):
+        return self._read("find_changes", since, limit)
+
+    def get_change_bounds(self):
+        return self._read("get_change_bounds")
+
+
+_replica = None
+
+
+def get_replica():
+    """Retorna o ReplicaTaskRepository se o processo é uma réplica, senão None"""
+    return _replica
+
+
+def start_replica():
+    """
+    Transforma o processo atual (filho do fork) em réplica de leitura: troca o
+    backend pelo ReplicaTaskRepository e desativa o cache de GET /tasks/<id>
+    """
+    global _replica
+
+    config.TASK_CACHE_ENABLED = False
+    replica = ReplicaTaskRepository.from_config()
+    replica.init()
+    use_backend(replica)
+    _replica = replica
+    return replica
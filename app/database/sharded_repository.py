@@ -0,0 +1,499 @@
+"""
+Backend particionado do TaskRepository (TODO_STORAGE_BACKEND=sharded)
+
+As tarefas são distribuídas entre DB_SHARDS arquivos SQLite. Cada shard é um
+banco completo (busca, resumos, log de alterações e chaves de idempotência
+mantidos pelos mesmos triggers) com pool de conexões e thread escritora
+próprios, então escritas em shards diferentes não disputam o mesmo lock:
+
+- o id identifica o shard: id % DB_SHARDS. Cada shard gera ids com passo
+  DB_SHARDS (SQLiteTaskRepository com shard=...), e find_by_id, update e
+  delete vão direto ao shard dono, sem consultar os demais
+- tarefas novas são distribuídas em rodízio; com Idempotency-Key o shard vem
+  do hash da chave, para a chave e a tarefa ficarem na mesma transação
+- listagens, busca e estatísticas consultam todos os shards em paralelo
+  (scatter-gather) e combinam os resultados: intercalação por id na paginação
+  por cursor e na exportação, por (score, id) na busca, soma dos contadores
+  nas estatísticas
+- lotes de /tasks/batch são separados por shard e aplicados em paralelo: cada
+  shard confirma a sua parte em uma transação, mas o lote não é atômico entre
+  shards
+
+Os ids são únicos e crescem na ordem de criação dentro de cada shard, mas não
+entre shards (um id novo pode ser menor que um já existente em outro shard).
+Um cursor de id único pularia as tarefas criadas durante a paginação, então o
+next_cursor de GET /tasks é composto, com a posição de cada shard
+("120.57.33"), e cada shard continua da sua; um after_id inteiro vale como
+"id > N" em todos os shards. A versão da tabela (ETag das listagens) é a soma
+das versões dos shards, que cresce a cada escrita em qualquer um deles. O bm25
+da busca usa as estatísticas de cada shard, então os scores de shards
+diferentes são aproximadamente, não exatamente, comparáveis.
+
+GET /tasks/changes precisa de uma única sequência: as alterações de cada shard
+são copiadas, na ordem do shard, para o log unificado do catálogo
+(<DB_PATH sem extensão>.catalog.db), que atribui a seq global. A cópia acontece
+quando o feed é lido e guarda a posição de cada shard na mesma transação, então
+cada alteração recebe uma seq maior que todas as já copiadas e aparece uma
+única vez: quem segue `since` não perde nem repete alterações. A seq segue a
+ordem da cópia, não a de confirmação: as alterações de uma tarefa (sempre do
+mesmo shard) vêm na ordem em que foram feitas, mas entre shards a ordem é
+aproximada (intercalação pelo horário, com resolução de segundos). Se um shard
+podar alterações ainda não copiadas (mais de CHANGES_RETENTION escritas sem
+ninguém ler o feed), o log unificado recomeça e quem estava em uma posição
+anterior recebe 410 Gone.
+"""
+import heapq
+import itertools
+import os
+import sqlite3
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+
+from app import config
+from app.database.backend import TaskRepositoryBackend
+from app.database.connection import (
+    CHANGES_TABLE_SQL, close_pool, close_writer, get_connection, get_pool, get_writer, run_write
+)
+from app.database.storage import apply_storage_profile, resolve_profile
+from app.database.task_repository import CHANGE_COLUMNS, SQLiteTaskRepository
+from app.utils.metrics import timed
+
+# Posição de cada shard no log unificado: última seq local já copiada
+CATALOG_SQL = CHANGES_TABLE_SQL + """
+CREATE TABLE IF NOT EXISTS shard_positions (
+    shard INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+"""
+
+
+def shard_paths():
+    """
+    Arquivos dos shards: DB_SHARD_PATHS (separados por vírgula) ou, sem ele,
+    DB_SHARDS arquivos derivados de DB_PATH (tasks.shard0.db, tasks.shard1.db, ...)
+    """
+    if config.DB_SHARD_PATHS:
+        return [path.strip() for path in config.DB_SHARD_PATHS.split(",") if path.strip()]
+    root, ext = os.path.splitext(config.DB_PATH)
+    return [f"{root}.shard{index}{ext or '.db'}" for index in range(config.DB_SHARDS)]
+
+
+def catalog_path():
+    """Arquivo do log unificado de alterações (tasks.catalog.db)"""
+    root, ext = os.path.splitext(config.DB_PATH)
+    return f"{root}.catalog{ext or '.db'}"
+
+
+def _merged_batches(streams, batch_size):
+    """
+    Intercala pelo id (primeira coluna) os lotes em ordem de id de cada shard
+    e os devolve em novos lotes de `batch_size` linhas
+    """
+    try:
+        rows = heapq.merge(*(itertools.chain.from_iterable(stream) for stream in streams), key=itemgetter(0))
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            yield batch
+    finally:
+        # Devolve as conexões dos shards se a exportação for interrompida
+        for stream in streams:
+            stream.close()
+
+
+class ShardedTaskRepository(TaskRepositoryBackend):
+    """Backend com as tarefas particionadas entre vários arquivos SQLite"""
+
+    name = "sharded"
+
+    def __init__(self, paths, catalog):
+        if not paths:
+            raise ValueError("O backend particionado precisa de pelo menos um shard")
+        count = len(paths)
+        self.shards = [SQLiteTaskRepository(path, shard=(index, count)) for index, path in enumerate(paths)]
+        self.catalog = catalog
+        self._placement = itertools.count()
+        self._executor = None
+        self._executor_pid = None
+        self._executor_lock = threading.Lock()
+        self.log_resets = 0
+
+    @classmethod
+    def from_config(cls):
+        return cls(shard_paths(), catalog_path())
+
+    # Ciclo de vida
+
+    def init(self):
+        """Cria ou confere os shards e o catálogo do log unificado"""
+        for shard in self.shards:
+            shard.init()
+
+        conn = sqlite3.connect(self.catalog)
+        try:
+            apply_storage_profile(conn, include_journal_mode=True)
+            conn.executescript(CATALOG_SQL)
+            known = {row[0] for row in conn.execute("SELECT shard FROM shard_positions")}
+            # Shards novos no catálogo entram a partir da posição atual do log deles
+            for index, shard in enumerate(self.shards):
+                if index not in known:
+                    _, last_seq = shard.get_change_bounds()
+                    conn.execute("INSERT INTO shard_positions (shard, seq) VALUES (?, ?)", (index, last_seq))
+            conn.commit()
+        finally:
+            conn.close()
+        print(f"✓ Armazenamento particionado: {len(self.shards)} shards, log de alterações em {self.catalog}")
+
+    def close(self):
+        with self._executor_lock:
+            if self._executor is not None and self._executor_pid == os.getpid():
+                self._executor.shutdown(wait=True)
+            self._executor = None
+        for shard in self.shards:
+            shard.close()
+        close_writer(self.catalog)
+        close_pool(self.catalog)
+
+    def stats(self):
+        shards = []
+        for index, shard in enumerate(self.shards):
+            shard_stats = {"shard": index, "path": shard.path, "db_pool": get_pool(shard.path).stats()}
+            if config.DB_WRITER_ENABLED:
+                shard_stats["db_writer"] = get_writer(shard.path).stats()
+            shards.append(shard_stats)
+        return {
+            "storage_profile": resolve_profile(),
+            "shards": shards,
+            "changes_catalog": {
+                "path": self.catalog,
+                "db_pool": get_pool(self.catalog).stats(),
+                "log_resets": self.log_resets,
+            },
+        }
+
+    # Roteamento e scatter-gather
+
+    def _shard_for(self, task_id):
+        """Shard dono do id"""
+        return self.shards[task_id % len(self.shards)]
+
+    def _shard_for_key(self, key):
+        """Shard de uma Idempotency-Key (estável entre processos, ao contrário de hash())"""
+        return self.shards[zlib.crc32(key.encode("utf-8")) % len(self.shards)]
+
+    def _get_executor(self):
+        # Recriado após um fork: as threads do executor não passam para o filho
+        pid = os.getpid()
+        if self._executor is None or self._executor_pid != pid:
+            with self._executor_lock:
+                if self._executor is None or self._executor_pid != pid:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=max(1, (len(self.shards) - 1) * config.DB_POOL_SIZE),
+                        thread_name_prefix="shard-query",
+                    )
+                    self._executor_pid = pid
+        return self._executor
+
+    def _run(self, calls):
+        """
+        Executa as funções sem argumentos em paralelo: a primeira na thread atual
+        e as demais no executor
+        Retorna: lista com os resultados, na ordem de `calls`
+        """
+        if len(calls) == 1:
+            return [calls[0]()]
+        executor = self._get_executor()
+        futures = [executor.submit(call) for call in calls[1:]]
+        first = calls[0]()
+        return [first] + [future.result() for future in futures]
+
+    def _gather(self, fn):
+        """fn(shard) em todos os shards em paralelo; resultados na ordem dos shards"""
+        return self._run([lambda shard=shard: fn(shard) for shard in self.shards])
+
+    def _positions(self, after_id):
+        """
+        Cursor de cada shard: um after_id inteiro vale para todos; o composto
+        (tupla do next_cursor) traz a posição de cada um
+        """
+        if isinstance(after_id, tuple):
+            return list(after_id)
+        return [after_id] * len(self.shards)
+
+    def _next_cursor(self, positions, ids):
+        """
+        Cursor composto da próxima página: o último id devolvido de cada shard,
+        ou a posição anterior dele. Com um único shard é o próprio id.
+        """
+        positions = [position or 0 for position in positions]
+        for task_id in ids:
+            positions[task_id % len(self.shards)] = task_id
+        if len(positions) == 1:
+            return positions[0]
+        return ".".join(str(position) for position in positions)
+
+    def _group_by_shard(self, ids):
+        """Retorna: dict {índice do shard: lista de posições em `ids`}, na ordem recebida"""
+        groups = {}
+        for position, task_id in enumerate(ids):
+            groups.setdefault(task_id % len(self.shards), []).append(position)
+        return groups
+
+    # Escritas
+
+    @timed("repository")
+    def create(self, task):
+        return self.shards[next(self._placement) % len(self.shards)].create(task)
+
+    @timed("repository")
+    def create_idempotent(self, task, key, fingerprint, render):
+        return self._shard_for_key(key).create_idempotent(task, key, fingerprint, render)
+
+    @timed("repository")
+    def find_idempotent_response(self, key, fingerprint):
+        return self._shard_for_key(key).find_idempotent_response(key, fingerprint)
+
+    @timed("repository")
+    def update(self, task_id, updates, expected_version=None):
+        return self._shard_for(task_id).update(task_id, updates, expected_version)
+
+    @timed("repository")
+    def delete(self, task_id, expected_version=None):
+        return self._shard_for(task_id).delete(task_id, expected_version)
+
+    @timed("repository")
+    def create_many(self, tasks):
+        """Distribui o lote em rodízio entre os shards; retorna as tarefas na ordem recebida"""
+        count = len(self.shards)
+        start = next(self._placement)
+        groups = {}
+        for position in range(len(tasks)):
+            groups.setdefault((start + position) % count, []).append(position)
+
+        indexes = list(groups)
+        results = self._run([
+            lambda index=index: self.shards[index].create_many([tasks[p] for p in groups[index]])
+            for index in indexes
+        ])
+        created = [None] * len(tasks)
+        for index, shard_created in zip(indexes, results):
+            for position, task in zip(groups[index], shard_created):
+                created[position] = task
+        return created
+
+    @timed("repository")
+    def update_many(self, items):
+        groups = self._group_by_shard([item["id"] for item in items])
+        results = self._run([
+            lambda index=index, positions=positions: self.shards[index].update_many([items[p] for p in positions])
+            for index, positions in groups.items()
+        ])
+        updated = {}
+        for shard_updated in results:
+            updated.update(shard_updated)
+        return updated
+
+    @timed("repository")
+    def delete_many(self, task_ids):
+        groups = self._group_by_shard(task_ids)
+        results = self._run([
+            lambda index=index, positions=positions: self.shards[index].delete_many([task_ids[p] for p in positions])
+            for index, positions in groups.items()
+        ])
+        return set().union(*results)
+
+    # Leituras
+
+    @timed("repository")
+    def find_by_id(self, task_id):
+        return self._shard_for(task_id).find_by_id(task_id)
+
+    @timed("repository")
+    def exists(self, task_id):
+        return self._shard_for(task_id).exists(task_id)
+
+    @timed("repository")
+    def find_all(self):
+        return list(heapq.merge(*self._gather(lambda shard: shard.find_all()), key=lambda task: task.id))
+
+    def check_cursor(self, after_id):
+        if isinstance(after_id, tuple) and len(after_id) != len(self.shards):
+            return "Parâmetro 'after_id' não é um cursor deste armazenamento"
+        return None
+
+    @timed("repository")
+    def find_page(self, limit, after_id=None, status=None, created_from=None, created_to=None):
+        """
+        Cada shard devolve a sua página após a sua posição do cursor; as `limit`
+        menores ids entre todas são a página global
+        """
+        positions = self._positions(after_id)
+        pages = self._run([
+            lambda shard=shard, position=position: shard.find_page(limit, position, status, created_from, created_to)
+            for shard, position in zip(self.shards, positions)
+        ])
+        tasks = list(itertools.islice(
+            heapq.merge(*(tasks for tasks, _ in pages), key=lambda task: task.id), limit + 1
+        ))
+        has_more = len(tasks) > limit or any(cursor is not None for _, cursor in pages)
+        tasks = tasks[:limit]
+        next_cursor = self._next_cursor(positions, (task.id for task in tasks)) if has_more and tasks else None
+        return tasks, next_cursor
+
+    @timed("repository")
+    def find_page_json(self, limit, after_id=None, status=None, created_from=None, created_to=None):
+        positions = self._positions(after_id)
+        pages = self._run([
+            lambda shard=shard, position=position: shard.find_page_rows(
+                limit + 1, position, status, created_from, created_to
+            )
+            for shard, position in zip(self.shards, positions)
+        ])
+        rows = list(itertools.islice(heapq.merge(*pages, key=itemgetter(0)), limit + 1))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = self._next_cursor(positions, (row[0] for row in rows)) if has_more else None
+        return SQLiteTaskRepository._rows_to_json(rows), next_cursor
+
+    def iter_json(self, batch_size, after_id=None, status=None, created_from=None, created_to=None):
+        streams = [
+            shard.iter_json_rows(batch_size, position, status, created_from, created_to)
+            for shard, position in zip(self.shards, self._positions(after_id))
+        ]
+        for rows in _merged_batches(streams, batch_size):
+            yield SQLiteTaskRepository._rows_to_json(rows)
+
+    def iter_rows(self, batch_size, after_id=None, status=None, created_from=None, created_to=None):
+        streams = [
+            shard.iter_rows(batch_size, position, status, created_from, created_to)
+            for shard, position in zip(self.shards, self._positions(after_id))
+        ]
+        return _merged_batches(streams, batch_size)
+
+    @timed("repository")
+    def search(self, text, limit, offset=0, status=None):
+        """
+        Cada shard devolve os seus `offset + limit` melhores resultados; a
+        página global sai da intercalação por (score, id)
+        """
+        window = offset + limit
+        pages = self._gather(lambda shard: shard.search(text, window, 0, status))
+        merged = list(itertools.islice(
+            heapq.merge(*(results for results, _ in pages), key=lambda result: (result[1], result[0].id)),
+            window + 1
+        ))
+        has_more = len(merged) > window or any(next_offset is not None for _, next_offset in pages)
+        return merged[offset:window], window if has_more else None
+
+    @timed("repository")
+    def get_stats(self, days):
+        by_status = {}
+        daily = {}
+        for shard_status, shard_daily in self._gather(lambda shard: shard.get_stats(days)):
+            for status, count in shard_status.items():
+                by_status[status] = by_status.get(status, 0) + count
+            for day, created, completed in shard_daily:
+                totals = daily.setdefault(day, [0, 0])
+                totals[0] += created
+                totals[1] += completed
+        return by_status, [(day, created, completed) for day, (created, completed) in sorted(daily.items())]
+
+    @timed("repository")
+    def get_table_version(self):
+        """
+        Soma das versões dos shards e a alteração mais recente entre eles. As
+        consultas são pontuais e rodam em sequência, sem passar pelo executor.
+        """
+        versions = [shard.get_table_version() for shard in self.shards]
+        changed_at = max((changed_at for _, changed_at in versions if changed_at), default=None)
+        return sum(version for version, _ in versions), changed_at
+
+    # Manutenção
+
+    def rebuild_search_index(self):
+        return sum(self._gather(lambda shard: shard.rebuild_search_index()))
+
+    def rebuild_stats(self):
+        return sum(self._gather(lambda shard: shard.rebuild_stats()))
+
+    # Log de alterações unificado
+
+    @timed("repository")
+    def find_changes(self, since, limit):
+        self._sync_changes()
+        with get_connection(self.catalog) as conn:
+            return conn.execute(
+                f"SELECT {CHANGE_COLUMNS} FROM task_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                (since, limit)
+            ).fetchall()
+
+    @timed("repository")
+    def get_change_bounds(self):
+        self._sync_changes()
+        with get_connection(self.catalog) as conn:
+            oldest = conn.execute("SELECT MIN(seq) FROM task_changes").fetchone()[0]
+            row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'task_changes'").fetchone()
+        return oldest, row[0] if row else 0
+
+    def prune_changes(self, keep):
+        """Poda o log unificado e o de cada shard; retorna as linhas removidas do unificado"""
+        self._sync_changes()
+        self._gather(lambda shard: shard.prune_changes(keep))
+        return run_write(lambda conn: SQLiteTaskRepository._prune_changes(conn.cursor(), keep), self.catalog)
+
+    def _sync_changes(self):
+        """
+        Copia para o log unificado as alterações dos shards ainda não copiadas.
+        Sem alterações novas só há leituras, sem transação de escrita no catálogo.
+        """
+        with get_connection(self.catalog) as conn:
+            positions = dict(conn.execute("SELECT shard, seq FROM shard_positions").fetchall())
+        pending = any(
+            shard.get_change_bounds()[1] > positions.get(index, 0)
+            for index, shard in enumerate(self.shards)
+        )
+        # Cada cópia traz até CHANGES_BUFFER_SIZE alterações por shard
+        while pending:
+            pending = run_write(self._copy_changes, self.catalog)
+
+    def _copy_changes(self, conn):
+        """
+        Escrita no catálogo (BEGIN IMMEDIATE da thread escritora, então dois
+        processos não copiam as mesmas alterações)
+        Retorna: True se algum shard ainda tem alterações a copiar
+        """
+        cur = conn.cursor()
+        positions = dict(cur.execute("SELECT shard, seq FROM shard_positions").fetchall())
+        batch = max(1, config.CHANGES_BUFFER_SIZE)
+        per_shard = []
+        reset = False
+        for index, shard in enumerate(self.shards):
+            since = positions.get(index, 0)
+            rows = shard.find_changes(since, batch)
+            if rows and rows[0][0] > since + 1:
+                # O shard podou alterações que nunca chegaram ao log unificado
+                reset = True
+            per_shard.append(rows)
+
+        if reset:
+            cur.execute("DELETE FROM task_changes")
+            self.log_resets += 1
+            print("⚠ Alterações podadas nos shards antes da cópia: log unificado recomeçado")
+
+        # Intercala pelo horário, mantendo a ordem de cada shard
+        merged = heapq.merge(*per_shard, key=itemgetter(4))
+        cur.executemany(
+            "INSERT INTO task_changes (task_id, op, version, changed_at) VALUES (?, ?, ?, ?)",
+            [row[1:] for row in merged]
+        )
+        cur.executemany(
+            "INSERT INTO shard_positions (shard, seq) VALUES (?, ?) "
+            "ON CONFLICT (shard) DO UPDATE SET seq = excluded.seq",
+            [(index, rows[-1][0]) for index, rows in enumerate(per_shard) if rows]
+        )
+        if config.CHANGES_RETENTION > 0:
+            SQLiteTaskRepository._prune_changes(cur, config.CHANGES_RETENTION)
+        return any(len(rows) == batch for rows in per_shard)
@@ -0,0 +1,89 @@
+from app import config
+
+# Perfis pré-definidos. cache_size negativo é em KiB (convenção do SQLite),
+# busy_timeout em milissegundos e mmap_size em bytes.
+STORAGE_PROFILES = {
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -8000,
+        "busy_timeout": 5000,
+    },
+    "balanced": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -16000,
+        "busy_timeout": 5000,
+    },
+    "fast": {
+        "journal_mode": "WAL",
+        "synchronous": "OFF",
+        "mmap_size": 1024 * 1024 * 1024,
+        "cache_size": -64000,
+        "busy_timeout": 10000,
+    },
+    "legacy": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "mmap_size": 0,
+        "cache_size": -2000,
+        "busy_timeout": 5000,
+    },
+}
+
+VALID_JOURNAL_MODES = {"DELETE", "TRUNCATE", "PERSIST", "MEMORY", "WAL", "OFF"}
+VALID_SYNCHRONOUS = {"OFF", "NORMAL", "FULL", "EXTRA"}
+
+def resolve_profile():
+    """
+    Monta o perfil efetivo a partir de config.DB_STORAGE_PROFILE
+    e dos overrides individuais de PRAGMA.
+    Retorna: dict com journal_mode, synchronous, mmap_size, cache_size, busy_timeout
+    """
+    name = config.DB_STORAGE_PROFILE
+    if name not in STORAGE_PROFILES:
+        raise ValueError(
+            f"Perfil de armazenamento inválido: {name}. Use: {', '.join(STORAGE_PROFILES)}"
+        )
+
+    profile = dict(STORAGE_PROFILES[name])
+    overrides = {
+        "journal_mode": config.DB_JOURNAL_MODE,
+        "synchronous": config.DB_SYNCHRONOUS,
+        "mmap_size": config.DB_MMAP_SIZE,
+        "cache_size": config.DB_CACHE_SIZE,
+        "busy_timeout": config.DB_BUSY_TIMEOUT,
+    }
+    for key, value in overrides.items():
+        if value is not None:
+            profile[key] = value
+
+    profile["journal_mode"] = str(profile["journal_mode"]).upper()
+    profile["synchronous"] = str(profile["synchronous"]).upper()
+    if profile["journal_mode"] not in VALID_JOURNAL_MODES:
+        raise ValueError(f"journal_mode inválido: {profile['journal_mode']}")
+    if profile["synchronous"] not in VALID_SYNCHRONOUS:
+        raise ValueError(f"synchronous inválido: {profile['synchronous']}")
+
+    return profile
+
+def apply_storage_profile(conn, include_journal_mode=False):
+    """
+    Aplica os PRAGMAs do perfil a uma conexão.
+    journal_mode é persistente no arquivo, então só precisa ser aplicado
+    na inicialização do banco e na conexão da thread escritora.
+    """
+    profile = resolve_profile()
+
+    # busy_timeout primeiro, para que os PRAGMAs seguintes também esperem por locks
+    conn.execute(f"PRAGMA busy_timeout = {int(profile['busy_timeout'])}")
+    if include_journal_mode:
+        conn.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+    conn.execute(f"PRAGMA synchronous = {profile['synchronous']}")
+    conn.execute(f"PRAGMA cache_size = {int(profile['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(profile['mmap_size'])}")
+    conn.execute("PRAGMA temp_store = MEMORY")
+
+    return profile
@@ -1,117 +1,810 @@
-from app.database.connection import get_connection
-from app.models.task import Task
+import itertools
+import json
+import re
+import sqlite3
+import time
 
-class TaskRepository:
-    """Responsável por todas as operações de banco de dados relacionadas a tarefas"""
+from app import config
+from app.database.backend import TaskRepositoryBackend, get_backend
+from app.database.connection import (
+    init_database, get_connection, get_pool, close_pool, get_writer, close_writer, run_write,
+    REBUILD_SEARCH_SQL, REBUILD_STATS_STATEMENTS
+)
+from app.database.storage import resolve_profile
+from app.models.task import DEFAULT_STATUS, Task
+from app.utils.cache import invalidate_tasks
+from app.utils.change_feed import notify_changes
+
+# INSERT/UPDATE ... RETURNING está disponível a partir do SQLite 3.35
+SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# A partir do 3.38 as funções JSON fazem parte do SQLite por padrão
+SUPPORTS_JSON = sqlite3.sqlite_version_info >= (3, 38, 0)
+
+TASK_COLUMNS = "id, title, description, status, created_at, updated_at, version"
+TASK_FIELDS = tuple(TASK_COLUMNS.split(", "))
+
+# Objeto JSON da tarefa montado pelo próprio SQLite, sem Task/dict no Python
+TASK_JSON = "json_object(" + ", ".join(f"'{field}', {field}" for field in TASK_FIELDS) + ")"
+UPDATABLE_FIELDS = ("title", "description", "status")
+
+# Toda alteração de linha incrementa a versão e atualiza updated_at
+VERSION_BUMP = "version = version + 1, updated_at = CURRENT_TIMESTAMP"
+
+# Termos da busca: "frase entre aspas" ou palavra (com * final para prefixo)
+SEARCH_TERM_RE = re.compile(r'"([^"]*)"|(\S+)')
+
+# Marcadores de destaque em highlight()/snippet()
+SEARCH_MARK_OPEN = "<mark>"
+SEARCH_MARK_CLOSE = "</mark>"
+SEARCH_ELLIPSIS = "…"
+
+# Pesos do bm25 por coluna do índice (title, description)
+SEARCH_WEIGHTS = (10.0, 1.0)
+
+CHANGE_COLUMNS = "seq, task_id, op, version, changed_at"
+
+INSERT_TASK_SQL = "INSERT INTO tasks (title, description, status) VALUES (?, ?, ?)"
+
+# Escritas do processo, para podar o log de alterações a cada CHANGES_PRUNE_INTERVAL
+_write_counter = itertools.count(1)
+
+# Chaves de idempotência registradas entre podas da tabela idempotency_keys
+IDEMPOTENCY_PRUNE_INTERVAL = 100
+_idempotency_counter = itertools.count(1)
+
+class PreconditionFailed(Exception):
+    """A versão informada (If-Match) não corresponde à versão atual da tarefa"""
+
+class SearchUnavailable(Exception):
+    """O índice de busca textual (FTS5) não existe neste banco"""
+
+class IdempotencyKeyReused(Exception):
+    """A Idempotency-Key já foi usada em uma requisição com outro corpo"""
+
+def parse_search_terms(text):
+    """
+    Separa o texto digitado pelo usuário em termos de busca: cada
+    "frase entre aspas" ou palavra é um termo, e palavras terminadas em *
+    são buscadas por prefixo
+    Retorna: lista de (frase, prefixo)
+    """
+    terms = []
+    for phrase, word in SEARCH_TERM_RE.findall(text):
+        prefix = False
+        if word:
+            prefix = word.endswith("*")
+            phrase = word.rstrip("*")
+        if phrase.strip():
+            terms.append((phrase, prefix))
+    return terms
+
+def build_match_query(text):
+    """
+    Converte o texto digitado pelo usuário em uma expressão MATCH do FTS5
+    sem expor a sintaxe do FTS5 (operadores, colunas, parênteses):
+    cada termo vira uma frase entre aspas e todos são obrigatórios (AND).
+    Palavras terminadas em * são buscadas por prefixo.
+    Retorna: str ou None se não houver termos
+    """
+    terms = [
+        '"' + phrase.replace('"', '""') + '"' + ("*" if prefix else "")
+        for phrase, prefix in parse_search_terms(text)
+    ]
+    return " ".join(terms) or None
+
+class SQLiteTaskRepository(TaskRepositoryBackend):
+    """Backend SQLite: todas as operações de banco de dados relacionadas a tarefas"""
     
-    @staticmethod
-    def create(task):
+    name = "sqlite"
+    
+    def __init__(self, path=None, shard=None):
+        """
+        Args:
+            path: arquivo do banco (None = config.DB_PATH no momento do uso)
+            shard: (índice, quantidade de shards) quando o arquivo é um shard do
+                   ShardedTaskRepository: os ids criados aqui têm id % quantidade == índice
+        """
+        self.path = path
+        self.shard = shard
+        self._insert_sql = INSERT_TASK_SQL
+        if shard is not None:
+            index, count = shard
+            # AUTOINCREMENT com passo: o próximo id é o último gerado (sqlite_sequence)
+            # mais a quantidade de shards, começando em `index` (ou `count` no shard 0)
+            first = index or count
+            self._insert_sql = (
+                "INSERT INTO tasks (id, title, description, status) VALUES ("
+                f"COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'tasks'), {first - count}) "
+                f"+ {count}, ?, ?, ?)"
+            )
+    
+    def init(self):
+        init_database(self.path, self.shard)
+    
+    def close(self):
+        close_writer(self.path)
+        close_pool(self.path)
+    
+    def stats(self):
+        stats = {
+            "storage_profile": resolve_profile(),
+            "db_pool": get_pool(self.path).stats(),
+        }
+        if config.DB_WRITER_ENABLED:
+            stats["db_writer"] = get_writer(self.path).stats()
+        return stats
+    
+    def create(self, task):
         """
         Cria uma nova tarefa no banco de dados
         Retorna: Task com ID preenchido
         """
-        with get_connection() as conn:
+        def _insert(conn):
             cur = conn.cursor()
+            created = self._insert_task(cur, task)
+            SQLiteTaskRepository._bump_table_version(cur)
+            return created
+        
+        created = run_write(_insert, self.path)
+        invalidate_tasks(created.id)
+        notify_changes()
+        return created
+    
+    def _insert_task(self, cur, task):
+        """INSERT de uma tarefa, retornando-a com id, datas e versão preenchidos"""
+        # Status nulo/vazio vale o padrão da coluna, como no backend em memória
+        values = (task.title, task.description, task.status or DEFAULT_STATUS)
+        if SUPPORTS_RETURNING:
+            cur.execute(f"{self._insert_sql} RETURNING {TASK_COLUMNS}", values)
+            row = cur.fetchone()
+        else:
+            cur.execute(self._insert_sql, values)
+            cur.execute(f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?", (cur.lastrowid,))
+            row = cur.fetchone()
+        return Task.from_db_row(row)
+    
+    def create_idempotent(self, task, key, fingerprint, render):
+        """
+        Cria a tarefa uma única vez por Idempotency-Key. A chave é reservada com
+        o primeiro statement da transação, então requisições repetidas (inclusive
+        simultâneas ou em outro processo) esperam a primeira terminar e recebem a
+        resposta que ela gravou, sem inserir de novo.
+        Args:
+            task: Task a criar
+            key: valor do header Idempotency-Key
+            fingerprint: hash da requisição (request_fingerprint)
+            render: função Task -> (status, headers, corpo) da resposta a gravar
+        Retorna: ((status, headers, corpo), repetida)
+        Lança: IdempotencyKeyReused se a chave foi usada com outro corpo
+        """
+        def _insert(conn):
+            cur = conn.cursor()
+            now = time.time()
             cur.execute(
-                "INSERT INTO tasks (title, description, status) VALUES (?, ?, ?)",
-                (task.title, task.description, task.status)
+                "INSERT INTO idempotency_keys (key, fingerprint, created_at, expires_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT (key) DO NOTHING",
+                (key, fingerprint, now, now + config.IDEMPOTENCY_TTL)
             )
-            task_id = cur.lastrowid
+            if cur.rowcount == 0:
+                stored = SQLiteTaskRepository._stored_response(cur, key, fingerprint, now)
+                if stored is not None:
+                    return stored, None
+                # Chave expirada: passa a valer para esta requisição
+                cur.execute(
+                    "UPDATE idempotency_keys SET fingerprint = ?, created_at = ?, expires_at = ? "
+                    "WHERE key = ?",
+                    (fingerprint, now, now + config.IDEMPOTENCY_TTL, key)
+                )
             
-            # Buscar tarefa criada
+            created = self._insert_task(cur, task)
+            SQLiteTaskRepository._bump_table_version(cur)
+            status, headers, body = render(created)
             cur.execute(
-                "SELECT id, title, description, status, created_at FROM tasks WHERE id = ?",
-                (task_id,)
+                "UPDATE idempotency_keys SET status = ?, headers = ?, body = ? WHERE key = ?",
+                (status, json.dumps(headers), body, key)
             )
-            row = cur.fetchone()
-            
-            return Task.from_db_row(row)
+            if next(_idempotency_counter) % IDEMPOTENCY_PRUNE_INTERVAL == 0:
+                SQLiteTaskRepository._prune_idempotency_keys(cur, now)
+            return (status, headers, body), created.id
+        
+        response, created_id = run_write(_insert, self.path)
+        if created_id is None:
+            return response, True
+        invalidate_tasks(created_id)
+        notify_changes()
+        return response, False
+    
+    def find_idempotent_response(self, key, fingerprint):
+        """
+        Resposta já gravada para a chave, lida pelo pool sem passar pela thread escritora
+        Retorna: (status, headers, corpo) ou None
+        Lança: IdempotencyKeyReused se a chave foi usada com outro corpo
+        """
+        with get_connection(self.path) as conn:
+            return SQLiteTaskRepository._stored_response(conn.cursor(), key, fingerprint, time.time())
     
     @staticmethod
-    def find_all():
+    def _stored_response(cur, key, fingerprint, now):
+        cur.execute(
+            "SELECT fingerprint, status, headers, body FROM idempotency_keys "
+            "WHERE key = ? AND expires_at > ?",
+            (key, now)
+        )
+        row = cur.fetchone()
+        if row is None or row[1] is None:
+            return None
+        if row[0] != fingerprint:
+            raise IdempotencyKeyReused(key)
+        return row[1], json.loads(row[2]), row[3]
+    
+    @staticmethod
+    def _prune_idempotency_keys(cur, now):
+        """Remove as chaves expiradas e as mais antigas além de IDEMPOTENCY_MAX_KEYS"""
+        cur.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+        cur.execute(
+            "DELETE FROM idempotency_keys WHERE rowid <= (SELECT MAX(rowid) FROM idempotency_keys) - ?",
+            (config.IDEMPOTENCY_MAX_KEYS,)
+        )
+    
+    def find_all(self):
         """
         Retorna todas as tarefas
         Retorna: Lista de Task
         """
-        with get_connection() as conn:
+        with get_connection(self.path) as conn:
             cur = conn.cursor()
             cur.execute(
-                "SELECT id, title, description, status, created_at FROM tasks ORDER BY id"
+                f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY id"
             )
             rows = cur.fetchall()
             
             return [Task.from_db_row(row) for row in rows]
     
+    def find_page(self, limit, after_id=None, status=None, created_from=None, created_to=None):
+        """
+        Busca uma página de tarefas usando paginação por cursor (keyset)
+        Args:
+            limit: quantidade máxima de tarefas
+            after_id: cursor - retorna apenas tarefas com id maior que este
+            status: filtra por status (usa o índice tasks(status, id))
+            created_from: filtra created_at >= valor (inclusive)
+            created_to: filtra created_at < valor (exclusivo)
+        Retorna: (lista de Task, próximo cursor ou None)
+        """
+        where_clause, params = SQLiteTaskRepository._build_filters(
+            after_id, status, created_from, created_to
+        )
+        
+        with get_connection(self.path) as conn:
+            cur = conn.cursor()
+            # Busca um registro a mais para saber se existe próxima página
+            cur.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks "
+                f"{where_clause}ORDER BY id LIMIT ?",
+                params + [limit + 1]
+            )
+            rows = cur.fetchall()
+        
+        has_more = len(rows) > limit
+        tasks = [Task.from_db_row(row) for row in rows[:limit]]
+        next_cursor = tasks[-1].id if has_more else None
+        
+        return tasks, next_cursor
+    
+    def find_page_json(self, limit, after_id=None, status=None, created_from=None, created_to=None):
+        """
+        Mesma busca de find_page, mas cada tarefa já vem serializada em JSON
+        Retorna: (lista de str, próximo cursor ou None)
+        """
+        rows = self.find_page_rows(limit + 1, after_id, status, created_from, created_to)
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        next_cursor = rows[-1][0] if has_more else None
+        
+        return SQLiteTaskRepository._rows_to_json(rows), next_cursor
+    
+    def find_page_rows(self, limit, after_id=None, status=None, created_from=None, created_to=None):
+        """
+        Até `limit` linhas da listagem em ordem de id, no formato aceito por
+        _rows_to_json (id na primeira coluna). Usado por find_page_json e pelo
+        ShardedTaskRepository, que intercala as linhas dos shards pelo id.
+        """
+        where_clause, params = SQLiteTaskRepository._build_filters(
+            after_id, status, created_from, created_to
+        )
+        columns = f"id, {TASK_JSON}" if SUPPORTS_JSON else TASK_COLUMNS
+        
+        with get_connection(self.path) as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT {columns} FROM tasks "
+                f"{where_clause}ORDER BY id LIMIT ?",
+                params + [limit]
+            )
+            return cur.fetchall()
+    
+    def search(self, text, limit, offset=0, status=None):
+        """
+        Busca textual em título e descrição, ordenada por relevância (bm25)
+        Args:
+            text: termos de busca (ver build_match_query)
+            limit: quantidade máxima de resultados
+            offset: resultados a pular (paginação)
+            status: filtra por status
+        Retorna: (lista de (Task, score, título destacado, trecho da descrição),
+                  próximo offset ou None)
+        Lança: SearchUnavailable se o índice FTS5 não existir
+        """
+        match = build_match_query(text)
+        if match is None:
+            return [], None
+        
+        weights = ", ".join(str(weight) for weight in SEARCH_WEIGHTS)
+        marks = f"'{SEARCH_MARK_OPEN}', '{SEARCH_MARK_CLOSE}'"
+        columns = ", ".join(f"t.{field}" for field in TASK_FIELDS)
+        params = [match]
+        status_clause = ""
+        if status is not None:
+            status_clause = "AND t.status = ? "
+            params.append(status)
+        
+        try:
+            with get_connection(self.path) as conn:
+                cur = conn.cursor()
+                # Busca um registro a mais para saber se existe próxima página
+                cur.execute(
+                    f"SELECT {columns}, bm25(tasks_fts, {weights}) AS score, "
+                    f"highlight(tasks_fts, 0, {marks}), "
+                    f"snippet(tasks_fts, 1, {marks}, '{SEARCH_ELLIPSIS}', {int(config.SEARCH_SNIPPET_TOKENS)}) "
+                    "FROM tasks_fts JOIN tasks t ON t.id = tasks_fts.rowid "
+                    f"WHERE tasks_fts MATCH ? {status_clause}"
+                    "ORDER BY score, t.id LIMIT ? OFFSET ?",
+                    params + [limit + 1, offset]
+                )
+                rows = cur.fetchall()
+        except sqlite3.OperationalError as e:
+            if "no such table: tasks_fts" in str(e):
+                raise SearchUnavailable(str(e)) from e
+            raise
+        
+        fields = len(TASK_FIELDS)
+        results = [
+            (Task.from_db_row(row[:fields]), row[fields], row[fields + 1], row[fields + 2] or None)
+            for row in rows[:limit]
+        ]
+        next_offset = offset + limit if len(rows) > limit else None
+        
+        return results, next_offset
+    
+    def rebuild_search_index(self):
+        """
+        Reconstrói o índice de busca a partir da tabela tasks e o compacta
+        (usado em bancos existentes ou após importações feitas sem os triggers)
+        Retorna: quantidade de tarefas indexadas
+        """
+        def _rebuild(conn):
+            cur = conn.cursor()
+            cur.execute(REBUILD_SEARCH_SQL)
+            cur.execute("INSERT INTO tasks_fts (tasks_fts) VALUES ('optimize')")
+            cur.execute("SELECT COUNT(*) FROM tasks")
+            return cur.fetchone()[0]
+        
+        try:
+            return run_write(_rebuild, self.path)
+        except sqlite3.OperationalError as e:
+            if "no such table: tasks_fts" in str(e):
+                raise SearchUnavailable(str(e)) from e
+            raise
+    
+    def get_stats(self, days):
+        """
+        Lê as tabelas de resumo mantidas pelos triggers, sem varrer tasks:
+        o custo depende só do número de status e de dias pedidos
+        Args:
+            days: dias do histograma, contando a partir de hoje (UTC)
+        Retorna: (dict {status: quantidade},
+                  lista de (dia, criadas, concluídas) em ordem crescente de dia)
+        """
+        with get_connection(self.path) as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT status, count FROM task_status_counts WHERE count > 0")
+            by_status = dict(cur.fetchall())
+            cur.execute(
+                "SELECT day, created, completed FROM task_daily_counts "
+                "WHERE day > date('now', ?) AND created > 0 ORDER BY day",
+                (f"-{int(days)} days",)
+            )
+            daily = cur.fetchall()
+        
+        return by_status, daily
+    
+    def rebuild_stats(self):
+        """
+        Recalcula as tabelas de resumo com uma varredura completa de tasks
+        Retorna: quantidade de tarefas contabilizadas
+        """
+        def _rebuild(conn):
+            cur = conn.cursor()
+            for statement in REBUILD_STATS_STATEMENTS:
+                cur.execute(statement)
+            cur.execute("SELECT COALESCE(SUM(count), 0) FROM task_status_counts")
+            return cur.fetchone()[0]
+        
+        return run_write(_rebuild, self.path)
+    
+    def iter_json(self, batch_size, after_id=None, status=None, created_from=None, created_to=None):
+        """
+        Mesma varredura de iter_rows, mas cada lote é uma lista de tarefas
+        já serializadas em JSON (str)
+        """
+        for rows in self.iter_json_rows(batch_size, after_id, status, created_from, created_to):
+            yield SQLiteTaskRepository._rows_to_json(rows)
+    
+    def iter_json_rows(self, batch_size, after_id=None, status=None, created_from=None, created_to=None):
+        """
+        Lotes de iter_json antes da serialização, no formato de _rows_to_json
+        (id na primeira coluna), para o ShardedTaskRepository intercalar os shards
+        """
+        columns = f"id, {TASK_JSON}" if SUPPORTS_JSON else TASK_COLUMNS
+        return self._iter_select(columns, batch_size, after_id, status, created_from, created_to)
+    
     @staticmethod
-    def find_by_id(task_id):
+    def _rows_to_json(rows):
+        """Extrai o JSON gerado pelo SQLite ou, sem suporte a JSON, serializa as linhas"""
+        if SUPPORTS_JSON:
+            return [row[1] for row in rows]
+        return [json.dumps(dict(zip(TASK_FIELDS, row)), ensure_ascii=False) for row in rows]
+    
+    def iter_rows(self, batch_size, after_id=None, status=None, created_from=None, created_to=None):
+        """
+        Percorre as tarefas em lotes com um cursor no servidor (fetchmany),
+        mantendo o consumo de memória constante independente do tamanho da tabela.
+        A conexão fica emprestada do pool até o gerador ser consumido ou fechado.
+        Args:
+            batch_size: linhas lidas por vez
+            demais: mesmos filtros de find_page
+        Retorna: gerador de listas de linhas (id, title, description, status, created_at, updated_at, version)
+        """
+        return self._iter_select(
+            TASK_COLUMNS, batch_size, after_id, status, created_from, created_to
+        )
+    
+    def _iter_select(self, columns, batch_size, after_id, status, created_from, created_to):
+        where_clause, params = SQLiteTaskRepository._build_filters(
+            after_id, status, created_from, created_to
+        )
+        
+        with get_connection(self.path) as conn:
+            cur = conn.cursor()
+            cur.execute(
+                f"SELECT {columns} FROM tasks "
+                f"{where_clause}ORDER BY id",
+                params
+            )
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+    
+    @staticmethod
+    def _build_filters(after_id=None, status=None, created_from=None, created_to=None):
+        """
+        Monta a cláusula WHERE dos filtros de listagem
+        Retorna: (str, list) - (cláusula WHERE ou "", parâmetros)
+        """
+        conditions = []
+        params = []
+        
+        if after_id is not None:
+            conditions.append("id > ?")
+            params.append(after_id)
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        if created_from is not None:
+            conditions.append("created_at >= ?")
+            params.append(created_from)
+        if created_to is not None:
+            conditions.append("created_at < ?")
+            params.append(created_to)
+        
+        where_clause = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        return where_clause, params
+    
+    def find_by_id(self, task_id):
         """
         Busca uma tarefa por ID
         Retorna: Task ou None se não encontrado
         """
-        with get_connection() as conn:
+        with get_connection(self.path) as conn:
             cur = conn.cursor()
             cur.execute(
-                "SELECT id, title, description, status, created_at FROM tasks WHERE id = ?",
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?",
                 (task_id,)
             )
             row = cur.fetchone()
             
             return Task.from_db_row(row)
     
-    @staticmethod
-    def update(task_id, updates):
+    def update(self, task_id, updates, expected_version=None):
         """
         Atualiza uma tarefa
         Args:
             task_id: ID da tarefa
             updates: dict com campos a atualizar (title, description, status)
+            expected_version: se informado, só atualiza se a versão atual for esta
         Retorna: Task atualizado ou None se não encontrado
+        Lança: PreconditionFailed se a versão não corresponder
         """
-        # Verificar se tarefa existe
-        if not TaskRepository.find_by_id(task_id):
-            return None
+        fields_to_update = {k: v for k, v in updates.items() if k in UPDATABLE_FIELDS}
+        select_sql = f"SELECT {TASK_COLUMNS} FROM tasks WHERE id = ?"
         
-        with get_connection() as conn:
+        if not fields_to_update:
+            with get_connection(self.path) as conn:
+                task = Task.from_db_row(conn.execute(select_sql, (task_id,)).fetchone())
+            if task and expected_version is not None and task.version != expected_version:
+                raise PreconditionFailed(task_id)
+            return task
+        
+        # Construir query dinâmica
+        set_clause = ", ".join([f"{field} = ?" for field in fields_to_update.keys()])
+        where_clause, params = SQLiteTaskRepository._version_filter(task_id, expected_version)
+        values = list(fields_to_update.values()) + params
+        
+        def _update(conn):
             cur = conn.cursor()
+            if SUPPORTS_RETURNING:
+                # Um único statement: None se a tarefa não existir
+                cur.execute(
+                    f"UPDATE tasks SET {set_clause}, {VERSION_BUMP} "
+                    f"WHERE {where_clause} RETURNING {TASK_COLUMNS}",
+                    values
+                )
+                row = cur.fetchone()
+            else:
+                cur.execute(f"UPDATE tasks SET {set_clause}, {VERSION_BUMP} WHERE {where_clause}", values)
+                row = None
+                if cur.rowcount > 0:
+                    cur.execute(select_sql, (task_id,))
+                    row = cur.fetchone()
             
-            # Construir query dinâmica
-            allowed_fields = {"title", "description", "status"}
-            fields_to_update = {k: v for k, v in updates.items() if k in allowed_fields}
-            
-            if not fields_to_update:
-                return TaskRepository.find_by_id(task_id)
-            
-            set_clause = ", ".join([f"{field} = ?" for field in fields_to_update.keys()])
-            values = list(fields_to_update.values()) + [task_id]
-            
-            cur.execute(
-                f"UPDATE tasks SET {set_clause} WHERE id = ?",
-                values
-            )
-            
-            # Retornar tarefa atualizada
-            return TaskRepository.find_by_id(task_id)
+            if row is None:
+                SQLiteTaskRepository._check_precondition(cur, task_id, expected_version)
+                return None
+            SQLiteTaskRepository._bump_table_version(cur)
+            return Task.from_db_row(row)
+        
+        updated = run_write(_update, self.path)
+        invalidate_tasks(task_id)
+        notify_changes()
+        return updated
     
-    @staticmethod
-    def delete(task_id):
+    def delete(self, task_id, expected_version=None):
         """
         Deleta uma tarefa
+        Args:
+            task_id: ID da tarefa
+            expected_version: se informado, só deleta se a versão atual for esta
         Retorna: True se deletado, False se não encontrado
+        Lança: PreconditionFailed se a versão não corresponder
         """
-        # Verificar se tarefa existe
-        if not TaskRepository.find_by_id(task_id):
-            return False
+        where_clause, params = SQLiteTaskRepository._version_filter(task_id, expected_version)
         
-        with get_connection() as conn:
+        def _delete(conn):
             cur = conn.cursor()
-            cur.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            cur.execute(f"DELETE FROM tasks WHERE {where_clause}", params)
             
+            if cur.rowcount == 0:
+                SQLiteTaskRepository._check_precondition(cur, task_id, expected_version)
+                return False
+            SQLiteTaskRepository._bump_table_version(cur)
             return True
+        
+        deleted = run_write(_delete, self.path)
+        invalidate_tasks(task_id)
+        notify_changes()
+        return deleted
+    
+    def create_many(self, tasks):
+        """
+        Cria várias tarefas na mesma transação
+        Retorna: lista de Task com ID preenchido, na ordem recebida
+        """
+        def _insert_many(conn):
+            cur = conn.cursor()
+            # Cada INSERT devolve a própria linha (RETURNING ou lastrowid), então
+            # o resultado não depende de outra conexão não estar gravando ao mesmo
+            # tempo (ex.: sem a thread escritora ou com outros processos)
+            created = [self._insert_task(cur, task) for task in tasks]
+            if created:
+                SQLiteTaskRepository._bump_table_version(cur)
+            return created
+        
+        created = run_write(_insert_many, self.path)
+        invalidate_tasks(*[task.id for task in created])
+        notify_changes()
+        return created
+    
+    def update_many(self, items):
+        """
+        Atualiza várias tarefas na mesma transação. Itens consecutivos com o
+        mesmo conjunto de campos são aplicados com um único executemany.
+        Args:
+            items: lista de dicts {"id": ..., campos a atualizar}
+        Retorna: dict {id: Task atualizado} apenas com as tarefas existentes
+        """
+        def _update_many(conn):
+            cur = conn.cursor()
+            ids = sorted({item["id"] for item in items})
+            existing = SQLiteTaskRepository._existing_ids(cur, ids)
+            
+            group_fields = None
+            group_values = []
+            for item in items:
+                if item["id"] not in existing:
+                    continue
+                fields = tuple(f for f in UPDATABLE_FIELDS if f in item)
+                if fields != group_fields and group_values:
+                    SQLiteTaskRepository._execute_update_group(cur, group_fields, group_values)
+                    group_values = []
+                group_fields = fields
+                group_values.append([item[f] for f in fields] + [item["id"]])
+            if group_values:
+                SQLiteTaskRepository._execute_update_group(cur, group_fields, group_values)
+            
+            if not existing:
+                return {}
+            SQLiteTaskRepository._bump_table_version(cur)
+            placeholders = ", ".join("?" * len(existing))
+            cur.execute(
+                f"SELECT {TASK_COLUMNS} FROM tasks WHERE id IN ({placeholders})",
+                sorted(existing)
+            )
+            return {row[0]: Task.from_db_row(row) for row in cur.fetchall()}
+        
+        updated = run_write(_update_many, self.path)
+        invalidate_tasks(*updated.keys())
+        notify_changes()
+        return updated
+    
+    def delete_many(self, task_ids):
+        """
+        Deleta várias tarefas com um único executemany na mesma transação
+        Retorna: set com os IDs efetivamente removidos
+        """
+        def _delete_many(conn):
+            cur = conn.cursor()
+            existing = SQLiteTaskRepository._existing_ids(cur, sorted(set(task_ids)))
+            cur.executemany(
+                "DELETE FROM tasks WHERE id = ?",
+                [(task_id,) for task_id in sorted(existing)]
+            )
+            if existing:
+                SQLiteTaskRepository._bump_table_version(cur)
+            return existing
+        
+        deleted = run_write(_delete_many, self.path)
+        invalidate_tasks(*deleted)
+        notify_changes()
+        return deleted
+    
+    @staticmethod
+    def _existing_ids(cur, ids):
+        """Retorna o subconjunto de ids que existe na tabela"""
+        if not ids:
+            return set()
+        placeholders = ", ".join("?" * len(ids))
+        cur.execute(f"SELECT id FROM tasks WHERE id IN ({placeholders})", ids)
+        return {row[0] for row in cur.fetchall()}
+    
+    @staticmethod
+    def _execute_update_group(cur, fields, values):
+        if not fields:
+            return
+        set_clause = ", ".join([f"{field} = ?" for field in fields])
+        cur.executemany(f"UPDATE tasks SET {set_clause}, {VERSION_BUMP} WHERE id = ?", values)
+    
+    @staticmethod
+    def _version_filter(task_id, expected_version):
+        """Monta o WHERE por id, com a versão esperada quando informada"""
+        if expected_version is None:
+            return "id = ?", [task_id]
+        return "id = ? AND version = ?", [task_id, expected_version]
+    
+    @staticmethod
+    def _check_precondition(cur, task_id, expected_version):
+        """
+        Chamado quando o UPDATE/DELETE condicional não afetou nenhuma linha:
+        se a tarefa existe, a falha foi da versão e não da ausência do registro
+        """
+        if expected_version is None:
+            return
+        cur.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,))
+        if cur.fetchone() is not None:
+            raise PreconditionFailed(task_id)
+    
+    @staticmethod
+    def _bump_table_version(cur):
+        """Incrementa o contador de alterações da tabela na mesma transação da escrita"""
+        cur.execute(
+            "UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP "
+            "WHERE name = 'tasks'"
+        )
+        if config.CHANGES_RETENTION > 0 and next(_write_counter) % config.CHANGES_PRUNE_INTERVAL == 0:
+            SQLiteTaskRepository._prune_changes(cur, config.CHANGES_RETENTION)
     
     @staticmethod
-    def exists(task_id):
+    def _prune_changes(cur, keep):
+        """Remove do log de alterações tudo além das `keep` mais recentes"""
+        cur.execute(
+            "DELETE FROM task_changes WHERE seq <= (SELECT MAX(seq) FROM task_changes) - ?",
+            (keep,)
+        )
+        return cur.rowcount
+    
+    def prune_changes(self, keep):
+        """
+        Poda o log de alterações mantendo as `keep` mais recentes
+        Retorna: quantidade de linhas removidas
+        """
+        return run_write(lambda conn: SQLiteTaskRepository._prune_changes(conn.cursor(), keep), self.path)
+    
+    def find_changes(self, since, limit):
+        """
+        Alterações com seq > since, em ordem crescente
+        Retorna: lista de (seq, task_id, op, version, changed_at)
+        """
+        with get_connection(self.path) as conn:
+            return conn.execute(
+                f"SELECT {CHANGE_COLUMNS} FROM task_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                (since, limit)
+            ).fetchall()
+    
+    def get_change_bounds(self):
+        """
+        Retorna: (menor seq ainda no log, última seq atribuída); (None, 0) se
+        o log está vazio. A última vem de sqlite_sequence, que continua valendo
+        depois que as linhas são podadas.
+        """
+        with get_connection(self.path) as conn:
+            oldest = conn.execute("SELECT MIN(seq) FROM task_changes").fetchone()[0]
+            row = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'task_changes'"
+            ).fetchone()
+        return oldest, row[0] if row else 0
+    
+    def get_table_version(self):
+        """
+        Retorna o contador de alterações da tabela tasks
+        Retorna: (versão, updated_at) - usados no ETag/Last-Modified das listagens
+        """
+        with get_connection(self.path) as conn:
+            row = conn.execute(
+                "SELECT version, updated_at FROM table_versions WHERE name = 'tasks'"
+            ).fetchone()
+        return (row[0], row[1]) if row else (0, None)
+    
+    def exists(self, task_id):
         """
         Verifica se uma tarefa existe
         Retorna: bool
         """
-        return TaskRepository.find_by_id(task_id) is not None
\ No newline at end of file
+        with get_connection(self.path) as conn:
+            row = conn.execute("SELECT 1 FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            return row is not None
+
+class _BackendProxy(type):
+    """Encaminha os atributos de TaskRepository ao backend do processo"""
+    
+    def __getattr__(cls, name):
+        return getattr(get_backend(), name)
+
+class TaskRepository(metaclass=_BackendProxy):
+    """
+    Responsável por todas as operações de armazenamento relacionadas a tarefas.
+    As chamadas (TaskRepository.create, TaskRepository.find_page, ...) vão para
+    o backend escolhido em config.STORAGE_BACKEND (ver app/database/backend.py).
+    """
@@ -0,0 +1,233 @@
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+
+
+class WriterClosed(Exception):
+    """A thread escritora foi encerrada e não aceita novas escritas"""
+
+
+class WriterQueueFull(Exception):
+    """A fila de escrita atingiu o limite configurado"""
+
+
+class _WriteJob:
+    __slots__ = ("fn", "future")
+
+    def __init__(self, fn):
+        self.fn = fn
+        self.future = Future()
+
+
+_STOP = object()
+
+
+class WriteQueue:
+    """
+    Thread única dona de todos os INSERT/UPDATE/DELETE.
+
+    As escritas enfileiradas são agrupadas (group commit): a thread retira até
+    `max_batch` jobs da fila e executa todos em uma única transação
+    `BEGIN IMMEDIATE ... COMMIT`. Cada job roda dentro de um SAVEPOINT próprio,
+    então a falha de um job desfaz só as alterações dele sem derrubar o lote.
+    As leituras continuam pelo pool e, em modo WAL, não são bloqueadas.
+
+    Os jobs são funções `fn(conn)` que usam a conexão recebida e não devem
+    chamar commit/rollback.
+    """
+
+    def __init__(self, db_path, configure=None, max_batch=256, max_queue=10000, connect_kwargs=None):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self._configure = configure
+        self._connect_kwargs = connect_kwargs or {}
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = None
+        self._conn = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+        self._jobs = 0
+        self._failed_jobs = 0
+        self._batches = 0
+        self._failed_batches = 0
+        self._largest_batch = 0
+        self._busy_time = 0.0
+
+    def start(self):
+        """Abre a conexão de escrita e inicia a thread"""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._conn = sqlite3.connect(
+                self.db_path, check_same_thread=False, isolation_level=None, **self._connect_kwargs
+            )
+            if self._configure:
+                self._configure(self._conn)
+            self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+            self._thread.start()
+
+    def submit(self, fn):
+        """
+        Enfileira uma escrita
+        Retorna: concurrent.futures.Future com o retorno de fn(conn)
+        """
+        if self._closed:
+            raise WriterClosed("Thread escritora encerrada")
+        if self._thread is None:
+            self.start()
+
+        job = _WriteJob(fn)
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            raise WriterQueueFull("Fila de escrita cheia")
+        return job.future
+
+    def execute(self, fn, timeout=None):
+        """
+        Enfileira uma escrita e aguarda o resultado (após o commit).
+        Se o tempo esgotar com o job ainda na fila, ele é cancelado e nunca será
+        aplicado (a repetição do cliente não duplica a escrita); se já estiver
+        em execução, espera o resultado dele.
+        """
+        future = self.submit(fn)
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            if future.cancel():
+                raise
+            return future.result()
+
+    def close(self, timeout=None):
+        """Processa as escritas pendentes e encerra a thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def stats(self):
+        """Retorna métricas da thread escritora"""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "jobs": self._jobs,
+            "failed_jobs": self._failed_jobs,
+            "batches": self._batches,
+            "failed_batches": self._failed_batches,
+            "largest_batch": self._largest_batch,
+            "avg_batch_size": round(self._jobs / self._batches, 2) if self._batches else 0,
+            "busy_time_seconds": round(self._busy_time, 6),
+        }
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is _STOP:
+            return None, True
+
+        batch = [first]
+        stop = False
+        while len(batch) < self.max_batch:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is _STOP:
+                stop = True
+                break
+            batch.append(job)
+        return batch, stop
+
+    def _run(self):
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    try:
+                        self._run_batch(batch)
+                    except Exception as e:
+                        # Um erro inesperado falha o lote, não a thread: sem ela
+                        # todas as escritas seguintes esperariam até o timeout
+                        self._abort(self._conn)
+                        self._fail_batch(batch, e)
+                if stop:
+                    break
+        finally:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _run_batch(self, batch):
+        conn = self._conn
+        started = time.perf_counter()
+        results = []
+
+        batch = [job for job in batch if job.future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error as e:
+            self._fail_batch(batch, e)
+            return
+
+        for job in batch:
+            try:
+                conn.execute("SAVEPOINT write_job")
+                result = job.fn(conn)
+                conn.execute("RELEASE write_job")
+                results.append((job, result, None))
+            except Exception as e:
+                try:
+                    conn.execute("ROLLBACK TO write_job")
+                    conn.execute("RELEASE write_job")
+                except sqlite3.Error as rollback_error:
+                    self._abort(conn)
+                    self._fail_batch(batch, rollback_error)
+                    return
+                results.append((job, None, e))
+
+        try:
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            self._abort(conn)
+            self._fail_batch(batch, e)
+            return
+
+        self._batches += 1
+        self._jobs += len(batch)
+        self._largest_batch = max(self._largest_batch, len(batch))
+        self._busy_time += time.perf_counter() - started
+
+        for job, result, error in results:
+            if error is not None:
+                self._failed_jobs += 1
+                job.future.set_exception(error)
+            else:
+                job.future.set_result(result)
+
+    def _fail_batch(self, batch, error):
+        self._batches += 1
+        self._failed_batches += 1
+        self._jobs += len(batch)
+        self._failed_jobs += len(batch)
+        for job in batch:
+            # Jobs cancelados ou já resolvidos antes da falha ficam como estão
+            if not job.future.done():
+                job.future.set_exception(error)
+
+    @staticmethod
+    def _abort(conn):
+        if conn.in_transaction:
+            try:
+                conn.execute("ROLLBACK")
+            except sqlite3.Error:
+                pass
@@ -0,0 +1,86 @@
+"""
+Comandos de manutenção do banco
+
+Uso:
+    python -m app.manage init-db
+    python -m app.manage --db tasks.db rebuild-search
+    python -m app.manage --db tasks.db rebuild-stats
+    python -m app.manage --db tasks.db prune-changes
+    python -m app.manage --backend sharded --shards 4 --db tasks.db rebuild-search
+"""
+import argparse
+import sys
+
+from app import config
+from app.database.backend import close_storage, init_storage
+from app.database.task_repository import TaskRepository, SearchUnavailable
+
+# O backend em memória só existe dentro do processo do servidor
+MANAGE_BACKENDS = ("sqlite", "sharded")
+
+
+def init_db(args):
+    init_storage()
+
+
+def rebuild_search(args):
+    init_storage()
+    try:
+        indexed = TaskRepository.rebuild_search_index()
+    except SearchUnavailable:
+        print("✗ Índice de busca indisponível: o SQLite não tem suporte a FTS5")
+        return 1
+    print(f"✓ Índice de busca reconstruído: {indexed} tarefas")
+
+
+def rebuild_stats(args):
+    init_storage()
+    counted = TaskRepository.rebuild_stats()
+    print(f"✓ Estatísticas recalculadas: {counted} tarefas")
+
+
+def prune_changes(args):
+    init_storage()
+    removed = TaskRepository.prune_changes(config.CHANGES_RETENTION)
+    print(f"✓ Log de alterações podado: {removed} linhas removidas "
+          f"(mantidas as {config.CHANGES_RETENTION} mais recentes)")
+
+
+COMMANDS = {
+    "init-db": (init_db, "Cria as tabelas e aplica as migrações"),
+    "rebuild-search": (rebuild_search, "Reconstrói o índice de busca textual (FTS5)"),
+    "rebuild-stats": (rebuild_stats, "Recalcula as tabelas de resumo de GET /tasks/stats"),
+    "prune-changes": (prune_changes, "Remove do log de alterações o que excede TODO_CHANGES_RETENTION"),
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Manutenção do banco da To-Do API")
+    default_backend = config.STORAGE_BACKEND if config.STORAGE_BACKEND in MANAGE_BACKENDS else "sqlite"
+    parser.add_argument("--backend", choices=MANAGE_BACKENDS, default=default_backend,
+                        help="Backend cujos arquivos serão mantidos")
+    parser.add_argument("--db", default=config.DB_PATH, help="Caminho do banco SQLite")
+    parser.add_argument("--shards", type=int, default=config.DB_SHARDS,
+                        help="Arquivos SQLite do backend particionado")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text) in COMMANDS.items():
+        sub.add_parser(name, help=help_text)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # Os comandos operam sobre os arquivos SQLite (um banco ou os shards)
+    config.STORAGE_BACKEND = args.backend
+    config.DB_PATH = args.db
+    config.DB_SHARDS = max(1, args.shards)
+
+    command, _ = COMMANDS[args.command]
+    try:
+        return command(args)
+    finally:
+        close_storage()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
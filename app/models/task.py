@@ -1,12 +1,21 @@
+# Status de uma tarefa criada sem status (mesmo DEFAULT da coluna tasks.status)
+DEFAULT_STATUS = "pendente"
+
 class Task:
     """Representa uma tarefa no sistema"""
     
-    def __init__(self, id=None, title=None, description=None, status="pendente", created_at=None):
+    # Sem __dict__ por instância: menos memória e acesso mais rápido aos atributos
+    __slots__ = ("id", "title", "description", "status", "created_at", "updated_at", "version")
+    
+    def __init__(self, id=None, title=None, description=None, status=DEFAULT_STATUS, created_at=None,
+                 updated_at=None, version=None):
         self.id = id
         self.title = title
         self.description = description
         self.status = status
         self.created_at = created_at
+        self.updated_at = updated_at
+        self.version = version
     
     def to_dict(self):
         """Converte a tarefa para dicionário"""
@@ -15,7 +24,9 @@ class Task:
             "title": self.title,
             "description": self.description,
             "status": self.status,
-            "created_at": self.created_at
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "version": self.version
         }
     
     @staticmethod
@@ -25,8 +36,11 @@ class Task:
             id=data.get("id"),
             title=data.get("title"),
             description=data.get("description"),
-            status=data.get("status", "pendente"),
-            created_at=data.get("created_at")
+            # Status nulo ou vazio na criação vale o padrão
+            status=data.get("status") or DEFAULT_STATUS,
+            created_at=data.get("created_at"),
+            updated_at=data.get("updated_at"),
+            version=data.get("version")
         )
     
     @staticmethod
@@ -39,7 +53,9 @@ class Task:
             title=row[1],
             description=row[2],
             status=row[3],
-            created_at=row[4]
+            created_at=row[4],
+            updated_at=row[5] if len(row) > 5 else None,
+            version=row[6] if len(row) > 6 else None
         )
     
     def __repr__(self):
@@ -1,51 +1,365 @@
-import re
+import inspect
+from urllib.parse import parse_qs
+from app import config
 from app.controllers.task_controller import TaskController
+from app.controllers.change_controller import ChangeController
+from app.controllers.status_controller import StatusController
+from app.controllers.metrics_controller import MetricsController
+from app.database.replica_repository import ReplicaUnavailable, get_replica
+from app.utils import metrics, profiler
+from app.utils.admission import admission_enabled, client_key, get_admission
 from app.utils.response import ResponseBuilder
+from app.validators.task_validator import MAX_TASK_ID
+
+# Dígitos de MAX_TASK_ID; segmentos maiores nem chegam ao int()
+_INT_PARAM_MAX_DIGITS = len(str(MAX_TASK_ID))
+
+def _int_param(value):
+    """
+    Segmento numérico (ASCII) convertido para int, ou None se não casar
+    (inclusive acima de MAX_TASK_ID, o maior INTEGER do SQLite)
+    """
+    if value.isascii() and value.isdigit() and len(value) <= _INT_PARAM_MAX_DIGITS:
+        number = int(value)
+        if number <= MAX_TASK_ID:
+            return number
+    return None
+
+def _str_param(value):
+    return value or None
+
+# Tipos aceitos nos parâmetros de rota: {nome:tipo}
+PARAM_TYPES = {
+    "int": _int_param,
+    "str": _str_param,
+}
+
+class Route:
+    """Rota compilada: endpoint e quais argumentos opcionais ele recebe"""
+    
+    __slots__ = ("method", "template", "endpoint", "wants_query", "wants_body")
+    
+    def __init__(self, method, template, endpoint):
+        self.method = method
+        self.template = template
+        self.endpoint = endpoint
+        parameters = inspect.signature(endpoint).parameters
+        self.wants_query = "query" in parameters
+        self.wants_body = "body" in parameters
+
+class _Node:
+    """Nó da árvore de rotas dinâmicas (um segmento do caminho)"""
+    
+    __slots__ = ("children", "param", "methods")
+    
+    def __init__(self):
+        self.children = {}
+        self.param = None
+        self.methods = None
+
+class RouteTable:
+    """
+    Tabela de rotas compilada uma única vez a partir de (método, template, endpoint).
+    
+    Rotas sem parâmetros ficam em um dict indexado pelo caminho (O(1)); as com
+    parâmetros ({nome:tipo}) ficam em uma árvore por segmento, em que segmentos
+    fixos têm prioridade sobre parâmetros. O resultado de match() é o dict
+    {método: Route} do caminho, usado também para montar o header Allow.
+    """
+    
+    def __init__(self, routes=()):
+        self._static = {}
+        self._root = _Node()
+        for method, template, endpoint in routes:
+            self.add(method, template, endpoint)
+    
+    def add(self, method, template, endpoint):
+        route = Route(method, template, endpoint)
+        if "{" not in template:
+            methods = self._static.setdefault(template, {})
+        else:
+            node = self._root
+            for segment in template.strip("/").split("/"):
+                if segment.startswith("{") and segment.endswith("}"):
+                    name, _, type_name = segment[1:-1].partition(":")
+                    converter = PARAM_TYPES[type_name or "str"]
+                    if node.param is None:
+                        node.param = (name, converter, _Node())
+                    elif node.param[:2] != (name, converter):
+                        raise ValueError(f"Parâmetro conflitante em {template}")
+                    node = node.param[2]
+                else:
+                    node = node.children.setdefault(segment, _Node())
+            if node.methods is None:
+                node.methods = {}
+            methods = node.methods
+        
+        if method in methods:
+            raise ValueError(f"Rota duplicada: {method} {template}")
+        methods[method] = route
+    
+    def match(self, path):
+        """
+        Retorna: ({método: Route}, {parâmetro: valor}) ou (None, None) se nenhuma rota casar
+        """
+        methods = self._static.get(path)
+        if methods is not None:
+            return methods, {}
+        
+        if not path.startswith("/"):
+            return None, None
+        params = {}
+        methods = self._walk(self._root, path[1:].split("/"), 0, params)
+        if methods is None:
+            return None, None
+        return methods, params
+    
+    def _walk(self, node, segments, index, params):
+        if index == len(segments):
+            return node.methods
+        
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None:
+            methods = self._walk(child, segments, index + 1, params)
+            if methods is not None:
+                return methods
+        
+        if node.param is not None:
+            name, converter, child = node.param
+            value = converter(segment)
+            if value is not None:
+                params[name] = value
+                methods = self._walk(child, segments, index + 1, params)
+                if methods is not None:
+                    return methods
+                del params[name]
+        return None
+    
+    @staticmethod
+    def allowed_methods(methods):
+        """Valor do header Allow: métodos da rota, HEAD (se houver GET) e OPTIONS"""
+        allowed = set(methods)
+        if "GET" in allowed:
+            allowed.add("HEAD")
+        allowed.add("OPTIONS")
+        return ", ".join(sorted(allowed))
+
+class _DiscardWriter:
+    """wfile de requisições HEAD: descarta o corpo da resposta"""
+    
+    def write(self, data):
+        return len(data)
+    
+    def flush(self):
+        pass
+
+class HeadRequest:
+    """
+    Envolve o handler de uma requisição HEAD: o endpoint GET roda normalmente
+    (mesmos cabeçalhos, incluindo Content-Length), mas o corpo é descartado
+    """
+    
+    def __init__(self, handler):
+        object.__setattr__(self, "_handler", handler)
+        object.__setattr__(self, "wfile", _DiscardWriter())
+    
+    def __getattr__(self, name):
+        return getattr(self._handler, name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._handler, name, value)
+
+class SnapshotRequest:
+    """
+    Envolve o handler de uma requisição atendida por uma réplica: acrescenta
+    os cabeçalhos do snapshot servido a qualquer resposta do endpoint
+    """
+    
+    def __init__(self, handler, headers):
+        object.__setattr__(self, "_handler", handler)
+        object.__setattr__(self, "_snapshot_headers", headers)
+    
+    def __getattr__(self, name):
+        return getattr(self._handler, name)
+    
+    def __setattr__(self, name, value):
+        setattr(self._handler, name, value)
+    
+    def end_headers(self):
+        for name, value in self._snapshot_headers.items():
+            self._handler.send_header(name, value)
+        self._handler.end_headers()
+
+def primary_url(handler):
+    """
+    Endereço do primário para as escritas recebidas por uma réplica:
+    REPLICA_PRIMARY_URL ou o host da requisição na porta SERVER_PORT
+    """
+    if config.REPLICA_PRIMARY_URL:
+        return config.REPLICA_PRIMARY_URL.rstrip("/")
+    host = handler.headers.get("Host") or config.SERVER_HOST
+    if host.startswith("["):
+        host = host[:host.index("]") + 1]
+    else:
+        host = host.partition(":")[0]
+    return f"http://{host}:{config.SERVER_PORT}"
+
+def list_tasks(handler, query):
+    """GET /tasks - listar (paginado); ?stream=1 exporta tudo em streaming"""
+    if query.get("stream", ["0"])[-1] in ("1", "true"):
+        return TaskController.export(handler, query)
+    return TaskController.list_all(handler, query)
+
+ROUTES = [
+    ("GET", "/tasks", list_tasks),
+    ("POST", "/tasks", TaskController.create),
+    ("GET", "/tasks/export", TaskController.export),
+    ("GET", "/tasks/search", TaskController.search),
+    ("GET", "/tasks/stats", TaskController.stats),
+    ("GET", "/tasks/changes", ChangeController.list),
+    ("GET", "/tasks/changes/stream", ChangeController.stream),
+    ("POST", "/tasks/batch", TaskController.create_batch),
+    ("PATCH", "/tasks/batch", TaskController.update_batch),
+    ("DELETE", "/tasks/batch", TaskController.delete_batch),
+    ("GET", "/tasks/{task_id:int}", TaskController.get_by_id),
+    ("PUT", "/tasks/{task_id:int}", TaskController.update),
+    ("DELETE", "/tasks/{task_id:int}", TaskController.delete),
+    ("GET", "/status", StatusController.show),
+    ("GET", "/metrics", MetricsController.show),
+]
+
+# Rotas de monitoramento não passam pelo controle de admissão
+ADMISSION_EXEMPT = frozenset({"/status", "/metrics"})
+
+# Rotas que ficam abertas esperando alterações: pagam o limite do cliente, mas
+# não ocupam vaga de execução (já são limitadas por CHANGES_MAX_BLOCKING_SUBSCRIBERS).
+# Valor: parâmetro de query que faz a rota esperar (None = sempre espera)
+ADMISSION_WAITING = {"/tasks/changes/stream": None, "/tasks/changes": "wait"}
+
+# Métodos atendidos pelas réplicas de leitura; os demais são redirecionados ao primário
+REPLICA_METHODS = frozenset({"GET", "HEAD"})
 
 class Router:
     """Gerenciador de rotas da API"""
     
+    table = RouteTable(ROUTES)
+    
     @staticmethod
-    def route_post(handler, path, body):
-        """Roteia requisições POST"""
-        if path == "/tasks":
-            return TaskController.create(handler, body)
-        else:
-            return ResponseBuilder.not_found(handler, "Rota não encontrada")
+    def dispatch(handler, method, path, body=None):
+        """
+        Encaminha a requisição para o endpoint da rota
+        Args:
+            handler: HTTPRequestHandler (ou objeto compatível)
+            method: método HTTP
+            path: caminho da requisição, com query string
+            body: corpo já decodificado (POST/PUT/PATCH/DELETE)
+        Com métricas habilitadas, registra status, latência, bytes e fases da requisição;
+        com amostragem de perfis, uma fração das requisições roda sob cProfile.
+        """
+        sample = profiler.sample_request() if config.PROFILE_SAMPLE_RATE > 0 else None
+        if sample is None:
+            return Router._measured_dispatch(handler, method, path, body)
+        try:
+            return Router._measured_dispatch(handler, method, path, body)
+        finally:
+            profiler.finish_request(sample, method, path)
+    
+    @staticmethod
+    def _measured_dispatch(handler, method, path, body):
+        if not config.METRICS_ENABLED:
+            return Router._dispatch(handler, method, path, body)
+        
+        timer = metrics.start_request(handler)
+        try:
+            return Router._dispatch(handler, method, path, body, timer)
+        finally:
+            metrics.finish_request(timer, handler, method)
     
     @staticmethod
-    def route_get(handler, path):
-        """Roteia requisições GET"""
-        # GET /tasks - listar todas
-        if path == "/tasks":
-            return TaskController.list_all(handler)
+    def _dispatch(handler, method, path, body, timer=None):
+        path, _, query_string = path.partition("?")
+        
+        if method == "OPTIONS" and path == "*":
+            return ResponseBuilder.options(handler, "DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT")
+        
+        methods, params = Router.table.match(path)
+        if methods is None:
+            return ResponseBuilder.not_found(handler, "Rota não encontrada")
         
-        # GET /tasks/<id> - buscar por ID
-        match = re.match(r"^/tasks/(\d+)$", path)
-        if match:
-            task_id = int(match.group(1))
-            return TaskController.get_by_id(handler, task_id)
+        route = methods.get(method)
+        if timer is not None:
+            # Todas as rotas de um caminho compartilham o template
+            timer.route = (route or next(iter(methods.values()))).template
+        
+        if method == "OPTIONS":
+            return ResponseBuilder.options(handler, RouteTable.allowed_methods(methods))
+        
+        if route is None and method == "HEAD":
+            route = methods.get("GET")
+            handler = HeadRequest(handler)
+        if route is None:
+            return ResponseBuilder.method_not_allowed(handler, RouteTable.allowed_methods(methods))
+        
+        replica = get_replica()
+        if replica is not None and method not in REPLICA_METHODS:
+            location = primary_url(handler) + path + ("?" + query_string if query_string else "")
+            return ResponseBuilder.temporary_redirect(
+                handler, location, "Réplica somente leitura: envie escritas ao primário"
+            )
+        
+        if route.wants_query:
+            params["query"] = parse_qs(query_string) if query_string else {}
+        if route.wants_body:
+            params["body"] = body
+        
+        if admission_enabled() and route.template not in ADMISSION_EXEMPT:
+            return Router._admit(handler, method, route, params)
+        return Router._call(handler, route, params)
+    
+    @staticmethod
+    def _call(handler, route, params):
+        """
+        Executa o endpoint; em uma réplica, preso a um snapshot do início ao fim
+        da requisição (503 se o snapshot passou do atraso máximo)
+        """
+        replica = get_replica()
+        if replica is None or route.template in ADMISSION_EXEMPT:
+            return route.endpoint(handler, **params)
         
-        return ResponseBuilder.not_found(handler, "Rota não encontrada")
+        try:
+            pin = replica.pin()
+        except ReplicaUnavailable as e:
+            print(f"Erro na réplica de leitura: {e}")
+            return ResponseBuilder.service_unavailable(
+                handler, config.ADMISSION_RETRY_AFTER, "Réplica desatualizada, tente novamente"
+            )
+        try:
+            return route.endpoint(SnapshotRequest(handler, pin.headers()), **params)
+        finally:
+            replica.unpin(pin)
     
     @staticmethod
-    def route_put(handler, path, body):
-        """Roteia requisições PUT"""
-        # PUT /tasks/<id> - atualizar
-        match = re.match(r"^/tasks/(\d+)$", path)
-        if match:
-            task_id = int(match.group(1))
-            return TaskController.update(handler, task_id, body)
+    def _admit(handler, method, route, params):
+        """Aplica o limite do cliente (429) e o de requisições simultâneas (503)"""
+        admission = get_admission()
+        retry_after = admission.check_rate(client_key(handler), method)
+        if retry_after is not None:
+            return ResponseBuilder.too_many_requests(handler, retry_after)
         
-        return ResponseBuilder.not_found(handler, "Rota não encontrada")
+        if Router._waits(route, params):
+            return Router._call(handler, route, params)
+        if not admission.enter():
+            return ResponseBuilder.service_unavailable(handler, config.ADMISSION_RETRY_AFTER)
+        try:
+            return Router._call(handler, route, params)
+        finally:
+            admission.leave()
     
     @staticmethod
-    def route_delete(handler, path):
-        """Roteia requisições DELETE"""
-        # DELETE /tasks/<id> - deletar
-        match = re.match(r"^/tasks/(\d+)$", path)
-        if match:
-            task_id = int(match.group(1))
-            return TaskController.delete(handler, task_id)
-        
-        return ResponseBuilder.not_found(handler, "Rota não encontrada")
\ No newline at end of file
+    def _waits(route, params):
+        """Indica se a requisição pode ficar bloqueada esperando alterações (SSE, long-poll)"""
+        if route.template not in ADMISSION_WAITING:
+            return False
+        param = ADMISSION_WAITING[route.template]
+        return param is None or param in params.get("query", ())
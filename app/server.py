@@ -0,0 +1,513 @@
+"""
+Ponto de entrada do servidor HTTP
+
+Modos disponíveis:
+    threaded  - um processo com pool limitado de threads (padrão)
+    asyncio   - um processo com event loop asyncio e executor limitado para o banco
+    prefork   - N processos filhos compartilhando o mesmo socket de escuta,
+                cada um executando o engine escolhido (threaded ou asyncio)
+
+No modo prefork, --replicas M cria também M processos de leitura em outra porta
+(--replica-port), que atendem GET/HEAD a partir de conexões somente leitura ou
+de snapshots do banco (ver app/database/replica_repository.py).
+
+Uso:
+    python -m app.server 8000
+    python -m app.server --mode asyncio --threads 16
+    python -m app.server --mode prefork --processes 4 --engine asyncio
+    python -m app.server --mode prefork --processes 1 --replicas 4 --max-staleness 0.5
+    python -m app.server --backend memory --snapshot tasks.snapshot
+    python -m app.server --backend sharded --shards 4 --db tasks.db
+"""
+import argparse
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from app import config
+from app.database.backend import STORAGE_BACKENDS, close_storage, init_storage
+from app.database.replica_repository import REPLICA_MODES, start_replica
+from app.routes import Router
+from app.utils.request import body_length, parse_json_body, read_body
+from app.utils.response import ResponseBuilder
+
+SERVER_MODES = ["threaded", "asyncio", "prefork"]
+SERVER_ENGINES = ["threaded", "asyncio"]
+
+
+class TaskRequestHandler(BaseHTTPRequestHandler):
+    """Traduz requisições HTTP em chamadas ao Router"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "TodoAPI/2.0"
+    # Cabeçalhos e corpo saem em um único write (flush ao fim de cada requisição)
+    # e sem Nagle, evitando a espera do ACK atrasado em conexões keep-alive
+    wbufsize = 64 * 1024
+    disable_nagle_algorithm = True
+    # Status da resposta em andamento (None = cabeçalhos ainda não enviados)
+    status_code = None
+
+    def setup(self):
+        # Timeout de leitura do socket = tempo máximo ocioso de uma conexão keep-alive
+        self.timeout = config.SERVER_KEEPALIVE_TIMEOUT
+        super().setup()
+
+    def handle(self):
+        # Mesmo laço de BaseHTTPRequestHandler.handle, marcando a conexão como
+        # ociosa enquanto espera a próxima requisição keep-alive, para que a
+        # drenagem possa fechá-la sem esperar o timeout
+        self.close_connection = True
+        first = True
+        while True:
+            if not self.server.mark_idle(self.connection) and not first:
+                break
+            first = False
+            self.handle_one_request()
+            if self.close_connection:
+                break
+        self.server.mark_busy(self.connection)
+
+    def parse_request(self):
+        self.server.mark_busy(self.connection)
+        # Reiniciado a cada requisição, com ou sem métricas: numa conexão
+        # keep-alive o valor anterior indicaria cabeçalhos já enviados
+        self.status_code = None
+        return super().parse_request()
+
+    def send_response(self, code, message=None):
+        # Guardado para as métricas da requisição (como em AsyncRequest)
+        self.status_code = code
+        super().send_response(code, message)
+
+    def end_headers(self):
+        # Durante o desligamento, encerra conexões keep-alive após a resposta atual
+        if getattr(self.server, "draining", False):
+            self.send_header("Connection", "close")
+            self.close_connection = True
+        super().end_headers()
+
+    def do_GET(self):
+        Router.dispatch(self, "GET", self.path)
+
+    def do_HEAD(self):
+        Router.dispatch(self, "HEAD", self.path)
+
+    def do_OPTIONS(self):
+        # Consome um eventual corpo para não corromper a conexão keep-alive
+        if self._read_body() is not None:
+            Router.dispatch(self, "OPTIONS", self.path)
+
+    def do_POST(self):
+        body = self._read_json_body()
+        if body is not None:
+            Router.dispatch(self, "POST", self.path, body)
+
+    def do_PUT(self):
+        body = self._read_json_body()
+        if body is not None:
+            Router.dispatch(self, "PUT", self.path, body)
+
+    def do_PATCH(self):
+        body = self._read_json_body()
+        if body is not None:
+            Router.dispatch(self, "PATCH", self.path, body)
+
+    def do_DELETE(self):
+        body = self._read_json_body()
+        if body is not None:
+            Router.dispatch(self, "DELETE", self.path, body)
+
+    def handle_expect_100(self):
+        # Só autoriza o envio do corpo (100 Continue) se ele for aceitável
+        _, status_code, error_msg = body_length(self.headers)
+        if error_msg:
+            self._reject_body(status_code, error_msg)
+            return False
+        return super().handle_expect_100()
+
+    def _read_body(self):
+        """
+        Lê o corpo bruto da requisição de acordo com o Content-Length, rejeitando
+        corpos acima do limite antes de ler qualquer byte
+        Retorna: bytes ou None se inválido (a resposta de erro já foi enviada)
+        """
+        length, status_code, error_msg = body_length(self.headers)
+        if error_msg:
+            self._reject_body(status_code, error_msg)
+            return None
+
+        body = read_body(self.rfile, length)
+        if body is None:
+            # Cliente encerrou a conexão antes de enviar o corpo inteiro
+            self.close_connection = True
+        return body
+
+    def _reject_body(self, status_code, error_msg):
+        # O corpo não foi lido, então a conexão não pode ser reaproveitada
+        self.close_connection = True
+        ResponseBuilder.error(self, error_msg, status_code, {"Connection": "close"})
+
+    def _read_json_body(self):
+        """
+        Lê e decodifica o corpo JSON da requisição
+        Retorna: dict/list ou None se inválido (a resposta 400 já foi enviada)
+        """
+        raw = self._read_body()
+        if raw is None:
+            return None
+
+        body, error_msg = parse_json_body(raw, self.headers.get("Content-Type"))
+        if error_msg:
+            ResponseBuilder.bad_request(self, error_msg)
+            return None
+        return body
+
+    def log_message(self, format, *args):
+        if config.SERVER_ACCESS_LOG:
+            super().log_message(format, *args)
+
+
+class PooledHTTPServer(HTTPServer):
+    """
+    HTTPServer com um pool fixo de threads de trabalho.
+
+    Conexões aceitas entram em uma fila limitada (`max_pending`); quando ela
+    enche, o loop de accept para e as novas conexões aguardam no backlog do
+    kernel (`backlog`), em vez de criar uma thread por conexão.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(self, server_address, handler_class, threads=16, max_pending=256,
+                 backlog=128, sock=None):
+        self.request_queue_size = backlog
+        self.draining = False
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._active = 0
+        self._active_cond = threading.Condition()
+        self._idle_connections = set()
+
+        if sock is None:
+            super().__init__(server_address, handler_class)
+        else:
+            # Socket já em escuta, herdado do processo pai (modo prefork)
+            super().__init__(server_address, handler_class, bind_and_activate=False)
+            self.socket.close()
+            self.socket = sock
+            self.server_address = sock.getsockname()
+
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"http-worker-{i}", daemon=True)
+            for i in range(threads)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def process_request(self, request, client_address):
+        # Bloqueia o loop de accept quando a fila está cheia (backpressure)
+        self._pending.put((request, client_address))
+
+    def _worker(self):
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            request, client_address = item
+            with self._active_cond:
+                self._active += 1
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+                with self._active_cond:
+                    self._active -= 1
+                    self._active_cond.notify_all()
+
+    def mark_idle(self, connection):
+        """
+        Registra uma conexão aguardando a próxima requisição
+        Retorna: False se o servidor está drenando e a conexão deve ser encerrada
+        """
+        with self._active_cond:
+            if self.draining:
+                return False
+            self._idle_connections.add(connection)
+            return True
+
+    def mark_busy(self, connection):
+        """Remove a conexão do conjunto de ociosas (requisição em andamento)"""
+        with self._active_cond:
+            self._idle_connections.discard(connection)
+
+    def drain(self, timeout):
+        """
+        Encerra as conexões keep-alive ociosas e aguarda as requisições em
+        andamento terminarem
+        Retorna: True se todas terminaram dentro do timeout
+        """
+        with self._active_cond:
+            self.draining = True
+            idle = list(self._idle_connections)
+            self._idle_connections.clear()
+        for connection in idle:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+        deadline = time.monotonic() + timeout
+        with self._active_cond:
+            while self._active or not self._pending.empty():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._active_cond.wait(min(remaining, 0.1))
+        return True
+
+    def server_close(self):
+        super().server_close()
+        for _ in self._workers:
+            try:
+                self._pending.put_nowait(None)
+            except queue.Full:
+                break
+
+
+def _build_server(sock=None, address=None):
+    return PooledHTTPServer(
+        address or (config.SERVER_HOST, config.SERVER_PORT),
+        TaskRequestHandler,
+        threads=config.SERVER_THREADS,
+        max_pending=config.SERVER_MAX_PENDING,
+        backlog=config.SERVER_BACKLOG,
+        sock=sock,
+    )
+
+
+def _serve(server):
+    """
+    Atende requisições até receber SIGTERM/SIGINT e então drena as conexões
+    em andamento antes de liberar os recursos do banco.
+    """
+    stop_requested = threading.Event()
+
+    def request_stop(signum, frame):
+        if not stop_requested.is_set():
+            stop_requested.set()
+            # shutdown() bloqueia até o loop parar, então não pode rodar na
+            # mesma thread de serve_forever
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+
+    try:
+        server.serve_forever()
+    finally:
+        if not server.drain(config.SERVER_DRAIN_TIMEOUT):
+            print(f"[{os.getpid()}] Tempo de drenagem esgotado, encerrando conexões restantes")
+        server.server_close()
+        close_storage()
+
+
+def run_threaded():
+    """Modo threaded: um processo com pool de threads"""
+    server = _build_server()
+    host, port = server.server_address[:2]
+    print(f"✓ Servidor (threaded, {config.SERVER_THREADS} threads) em http://{host}:{port}")
+    _serve(server)
+
+
+def _listen(port):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((config.SERVER_HOST, port))
+    sock.listen(config.SERVER_BACKLOG)
+    return sock
+
+
+def run_prefork():
+    """
+    Modo prefork: o processo pai abre o socket de escuta e cria N filhos que
+    aceitam conexões no mesmo socket. O pai apenas supervisiona: repassa sinais,
+    recria filhos que morrerem inesperadamente e aguarda a drenagem no desligamento.
+    Com SERVER_REPLICAS, abre também o socket das réplicas de leitura e cria os
+    filhos que o atendem.
+    """
+    if not hasattr(os, "fork"):
+        raise SystemExit("Modo prefork requer os.fork (indisponível nesta plataforma)")
+
+    sock = _listen(config.SERVER_PORT)
+    host, port = sock.getsockname()[:2]
+    replica_sock = None
+    if config.SERVER_REPLICAS > 0:
+        replica_sock = _listen(config.REPLICA_PORT or port + 1)
+
+    # pid -> (início, papel): "primary" ou "replica"
+    children = {}
+    stopping = False
+
+    def spawn(role):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            code = 0
+            try:
+                # Cada filho só aceita conexões no socket do seu papel
+                listener = sock
+                if role == "replica":
+                    sock.close()
+                    listener = replica_sock
+                    start_replica()
+                elif replica_sock is not None:
+                    replica_sock.close()
+                if config.SERVER_ENGINE == "asyncio":
+                    from app import aio_server
+                    aio_server.run(listener)
+                else:
+                    _serve(_build_server(sock=listener))
+            except Exception as e:
+                print(f"[{os.getpid()}] Erro no worker: {e}")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = (time.monotonic(), role)
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    for _ in range(config.SERVER_PROCESSES):
+        spawn("primary")
+    for _ in range(config.SERVER_REPLICAS):
+        spawn("replica")
+
+    signal.signal(signal.SIGTERM, request_stop)
+    signal.signal(signal.SIGINT, request_stop)
+    print(f"✓ Servidor (prefork, {config.SERVER_PROCESSES} processos {config.SERVER_ENGINE} x "
+          f"{config.SERVER_THREADS} threads) em http://{host}:{port}")
+    if replica_sock is not None:
+        staleness = "sem atraso"
+        if config.REPLICA_MODE == "snapshot":
+            staleness = f"atraso máximo {config.REPLICA_MAX_STALENESS}s"
+        print(f"✓ Réplicas de leitura ({config.SERVER_REPLICAS} processos, {config.REPLICA_MODE}, "
+              f"{staleness}) em http://{host}:{replica_sock.getsockname()[1]}")
+
+    deadline = None
+    while children:
+        if stopping and deadline is None:
+            deadline = time.monotonic() + config.SERVER_DRAIN_TIMEOUT + 5
+        if deadline is not None and time.monotonic() > deadline:
+            for pid in list(children):
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            time.sleep(0.2)
+            continue
+
+        child = children.pop(pid, None)
+        if child is None or stopping:
+            continue
+
+        started, role = child
+        print(f"Worker {pid} terminou inesperadamente (status {status}), recriando")
+        # Evita loop de recriação se o worker falha logo ao iniciar
+        if time.monotonic() - started < 1:
+            time.sleep(1)
+        spawn(role)
+
+    sock.close()
+    if replica_sock is not None:
+        replica_sock.close()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor HTTP da To-Do API")
+    parser.add_argument("port", nargs="?", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--mode", choices=SERVER_MODES, default=config.SERVER_MODE)
+    parser.add_argument("--engine", choices=SERVER_ENGINES, default=config.SERVER_ENGINE,
+                        help="Engine dos processos filhos no modo prefork")
+    parser.add_argument("--processes", type=int, default=config.SERVER_PROCESSES,
+                        help="Processos no modo prefork")
+    parser.add_argument("--threads", type=int, default=config.SERVER_THREADS,
+                        help="Threads de trabalho por processo")
+    parser.add_argument("--backlog", type=int, default=config.SERVER_BACKLOG,
+                        help="Tamanho da fila de conexões do socket (listen)")
+    parser.add_argument("--backend", choices=STORAGE_BACKENDS, default=config.STORAGE_BACKEND,
+                        help="Backend de armazenamento das tarefas")
+    parser.add_argument("--db", default=config.DB_PATH, help="Caminho do banco SQLite")
+    parser.add_argument("--shards", type=int, default=config.DB_SHARDS,
+                        help="Arquivos SQLite do backend particionado")
+    parser.add_argument("--snapshot", default=config.MEMORY_SNAPSHOT_PATH,
+                        help="Arquivo de snapshot do backend em memória (sem ele, nada é gravado em disco)")
+    parser.add_argument("--replicas", type=int, default=config.SERVER_REPLICAS,
+                        help="Processos de leitura (GET/HEAD) no modo prefork")
+    parser.add_argument("--replica-port", type=int, default=config.REPLICA_PORT,
+                        help="Porta das réplicas de leitura (0 = porta do servidor + 1)")
+    parser.add_argument("--replica-mode", choices=REPLICA_MODES, default=config.REPLICA_MODE,
+                        help="Leitura direta do banco (readonly) ou de cópias renovadas (snapshot)")
+    parser.add_argument("--max-staleness", type=float, default=config.REPLICA_MAX_STALENESS,
+                        help="Atraso máximo (s) dos snapshots das réplicas")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    config.SERVER_HOST = args.host
+    config.SERVER_PORT = args.port
+    config.SERVER_MODE = args.mode
+    config.SERVER_ENGINE = args.engine
+    config.SERVER_PROCESSES = max(1, args.processes)
+    config.SERVER_THREADS = max(1, args.threads)
+    config.SERVER_BACKLOG = args.backlog
+    config.STORAGE_BACKEND = args.backend
+    config.DB_PATH = args.db
+    config.DB_SHARDS = max(1, args.shards)
+    config.MEMORY_SNAPSHOT_PATH = args.snapshot
+    config.SERVER_REPLICAS = max(0, args.replicas)
+    config.REPLICA_PORT = args.replica_port
+    config.REPLICA_MODE = args.replica_mode
+    config.REPLICA_MAX_STALENESS = max(0.0, args.max_staleness)
+
+    if args.backend == "memory" and args.mode == "prefork":
+        raise SystemExit("O backend em memória guarda os dados no processo e não funciona no modo prefork")
+    if config.SERVER_REPLICAS and args.mode != "prefork":
+        raise SystemExit("Réplicas de leitura requerem --mode prefork (use --processes 1 para um único primário)")
+    if config.SERVER_REPLICAS and args.backend != "sqlite":
+        raise SystemExit("Réplicas de leitura só estão disponíveis no backend sqlite")
+
+    init_storage()
+
+    if args.mode == "prefork":
+        run_prefork()
+    elif args.mode == "asyncio":
+        from app import aio_server
+        aio_server.run()
+    else:
+        run_threaded()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
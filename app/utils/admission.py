@@ -0,0 +1,218 @@
+"""
+Controle de admissão das requisições (Router, antes dos controllers)
+
+- Limite por cliente: token bucket por chave (endereço do cliente ou, se
+  configurado, o valor de um header de API key), com orçamentos separados
+  para leituras (GET/HEAD) e escritas. Sem token, a resposta é 429 com
+  Retry-After igual ao tempo até o próximo token.
+- Limite global: no máximo ADMISSION_MAX_INFLIGHT requisições em execução no
+  processo. As excedentes esperam até ADMISSION_QUEUE_TIMEOUT segundos por uma
+  vaga e, depois disso, são descartadas com 503 e Retry-After. O stream SSE e
+  os long-polls com ?wait= não ocupam vaga: esperariam segurando-a.
+
+Os contadores de rejeição aparecem em GET /status e GET /metrics. Como o
+restante do estado em memória, os limites são por processo: em modo prefork
+o orçamento efetivo de um cliente é multiplicado pelo número de processos.
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from app import config
+from app.utils.metrics import get_registry
+
+READ_METHODS = frozenset({"GET", "HEAD"})
+
+
+class TokenBucket:
+    """Balde com capacidade `burst`, reabastecido a `rate` tokens por segundo"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def take(self, now):
+        """
+        Consome um token
+        Retorna: 0.0 se havia token, ou os segundos até o próximo
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1.0:
+            self.tokens -= 1.0
+            return 0.0
+        return (1.0 - self.tokens) / self.rate
+
+
+class RateLimiter:
+    """
+    Token buckets por chave, limitados a `max_keys` (os clientes inativos há
+    mais tempo são descartados primeiro; um balde recriado começa cheio)
+    """
+
+    def __init__(self, rate, burst, max_keys=10000):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate deve ser positivo e burst pelo menos 1")
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def take(self, key):
+        """Retorna: 0.0 se a requisição pode seguir, ou os segundos de espera"""
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(self.rate, self.burst, now)
+                if len(self._buckets) > self.max_keys:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+            return bucket.take(now)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._buckets)
+
+
+class AdmissionController:
+    """Limites por cliente e de requisições simultâneas do processo"""
+
+    def __init__(self, read_limiter=None, write_limiter=None, max_inflight=0, queue_timeout=1.0):
+        self.read_limiter = read_limiter
+        self.write_limiter = write_limiter
+        self.max_inflight = max_inflight
+        self.queue_timeout = queue_timeout
+        self._slots = threading.BoundedSemaphore(max_inflight) if max_inflight > 0 else None
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.admitted = 0
+        self.rejected = {"rate_limit_read": 0, "rate_limit_write": 0, "overload": 0}
+
+    def check_rate(self, key, method):
+        """
+        Aplica o orçamento de leitura ou escrita do cliente
+        Retorna: None se permitido, ou o Retry-After em segundos (inteiro)
+        """
+        write = method not in READ_METHODS
+        limiter = self.write_limiter if write else self.read_limiter
+        if limiter is None:
+            return None
+        wait = limiter.take(key)
+        if not wait:
+            return None
+        with self._lock:
+            self.rejected["rate_limit_write" if write else "rate_limit_read"] += 1
+        return max(1, math.ceil(wait))
+
+    def enter(self):
+        """
+        Ocupa uma vaga de execução, esperando até `queue_timeout`
+        Retorna: False se não houve vaga (a requisição deve ser descartada)
+        """
+        if self._slots is not None and not self._slots.acquire(timeout=self.queue_timeout):
+            with self._lock:
+                self.rejected["overload"] += 1
+            return False
+        with self._lock:
+            self.admitted += 1
+            self.in_flight += 1
+            if self.in_flight > self.peak_in_flight:
+                self.peak_in_flight = self.in_flight
+        return True
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_inflight": self.max_inflight or None,
+                "queue_timeout_seconds": self.queue_timeout,
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "tracked_clients": {
+                    "read": len(self.read_limiter) if self.read_limiter else None,
+                    "write": len(self.write_limiter) if self.write_limiter else None,
+                },
+            }
+
+    def prometheus_lines(self):
+        """Contadores de rejeição e requisições em execução, no formato do Prometheus"""
+        with self._lock:
+            rejected = dict(self.rejected)
+            in_flight = self.in_flight
+        lines = [
+            "# HELP todo_http_rejected_total Requisições recusadas pelo controle de admissão.",
+            "# TYPE todo_http_rejected_total counter",
+        ]
+        for reason, count in sorted(rejected.items()):
+            lines.append(f'todo_http_rejected_total{{reason="{reason}"}} {count}')
+        lines.append("# HELP todo_http_requests_in_flight Requisições admitidas em execução.")
+        lines.append("# TYPE todo_http_requests_in_flight gauge")
+        lines.append(f"todo_http_requests_in_flight {in_flight}")
+        return lines
+
+
+def client_key(handler):
+    """
+    Chave do cliente para o limite: o header de API key configurado, se
+    presente, ou o endereço IP da conexão
+    """
+    if config.RATE_LIMIT_KEY_HEADER:
+        api_key = handler.headers.get(config.RATE_LIMIT_KEY_HEADER)
+        if api_key:
+            return "key:" + api_key
+    address = handler.client_address
+    return "ip:" + (address[0] if address else "desconhecido")
+
+
+_admission = None
+_admission_lock = threading.Lock()
+
+
+def admission_enabled():
+    return config.RATE_LIMIT_ENABLED or config.ADMISSION_MAX_INFLIGHT > 0
+
+
+def get_admission():
+    """
+    Retorna o controle de admissão do processo, ou None se os limites
+    estiverem desabilitados
+    """
+    global _admission
+
+    if not admission_enabled():
+        return None
+    if _admission is None:
+        with _admission_lock:
+            if _admission is None:
+                read_limiter = write_limiter = None
+                if config.RATE_LIMIT_ENABLED:
+                    read_limiter = RateLimiter(
+                        config.RATE_LIMIT_READ_RATE, config.RATE_LIMIT_READ_BURST, config.RATE_LIMIT_MAX_CLIENTS
+                    )
+                    write_limiter = RateLimiter(
+                        config.RATE_LIMIT_WRITE_RATE, config.RATE_LIMIT_WRITE_BURST, config.RATE_LIMIT_MAX_CLIENTS
+                    )
+                _admission = AdmissionController(
+                    read_limiter,
+                    write_limiter,
+                    max_inflight=config.ADMISSION_MAX_INFLIGHT,
+                    queue_timeout=config.ADMISSION_QUEUE_TIMEOUT,
+                )
+                get_registry().add_collector(_admission.prometheus_lines)
+    return _admission
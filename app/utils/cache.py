@@ -0,0 +1,130 @@
+import threading
+import time
+from collections import OrderedDict
+
+from app import config
+
+class LRUCache:
+    """
+    Cache LRU limitado e thread-safe, com expiração opcional por TTL.
+
+    Para evitar que uma leitura lenta grave no cache um valor anterior a uma
+    escrita concorrente, quem preenche o cache pega um token com fill_token()
+    antes de ler a fonte e o passa para set(); se houve alguma invalidação
+    nesse intervalo, o valor é descartado.
+    """
+    
+    def __init__(self, max_size, ttl=None):
+        if max_size < 1:
+            raise ValueError("max_size deve ser maior que zero")
+        
+        self.max_size = max_size
+        self.ttl = ttl if ttl and ttl > 0 else None
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_fills = 0
+    
+    def get(self, key):
+        """Retorna o valor em cache ou None"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+    
+    def fill_token(self):
+        """Token a ser passado para set() ao preencher o cache após uma leitura"""
+        return self._generation
+    
+    def set(self, key, value, token=None):
+        """
+        Armazena um valor, removendo o menos usado se o cache estiver cheio
+        Retorna: False se o valor foi descartado por uma invalidação concorrente
+        """
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if token is not None and token != self._generation:
+                self.stale_fills += 1
+                return False
+            
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+            return True
+    
+    def invalidate(self, *keys):
+        """Remove as chaves do cache e invalida preenchimentos em andamento"""
+        with self._lock:
+            self._generation += 1
+            for key in keys:
+                if self._data.pop(key, None) is not None:
+                    self.invalidations += 1
+    
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._data.clear()
+    
+    def stats(self):
+        """Retorna contadores de uso do cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "stale_fills": self.stale_fills,
+            }
+
+_task_cache = None
+_task_cache_lock = threading.Lock()
+
+def get_task_cache():
+    """
+    Retorna o cache de tarefas do processo (JSON serializado por ID),
+    ou None se o cache estiver desabilitado
+    """
+    global _task_cache
+    
+    enabled = config.TASK_CACHE_ENABLED
+    if enabled is None:
+        enabled = config.SERVER_MODE != "prefork"
+    if not enabled:
+        return None
+    if _task_cache is None:
+        with _task_cache_lock:
+            if _task_cache is None:
+                _task_cache = LRUCache(config.TASK_CACHE_SIZE, config.TASK_CACHE_TTL)
+    return _task_cache
+
+def invalidate_tasks(*task_ids):
+    """Remove tarefas do cache após uma escrita confirmada"""
+    cache = get_task_cache()
+    if cache is not None:
+        cache.invalidate(*task_ids)
@@ -0,0 +1,300 @@
+"""
+Fan-out em memória do log de alterações (GET /tasks/changes e /tasks/changes/stream)
+
+As alterações são gravadas em task_changes pelos triggers, na mesma transação
+de cada escrita. O ChangeFeed do processo guarda as CHANGES_BUFFER_SIZE mais
+recentes, já serializadas em JSON, e é quem consulta o SQLite:
+
+- Depois de cada escrita confirmada, o TaskRepository chama notify_changes().
+  Se há assinantes esperando, uma única consulta (seq > última conhecida) traz
+  as novas linhas para o buffer e acorda todos de uma vez; sem assinantes, o
+  feed só é marcado como desatualizado e relido na próxima leitura.
+- Esperas (long-poll e SSE) não consultam o banco: leem o buffer quando são
+  acordadas. Só quem pede uma posição anterior ao buffer lê direto do log.
+- Escritas feitas por outros processos (modo prefork) não passam pelo
+  notify_changes() deste processo: o log é relido no máximo a cada
+  CHANGES_POLL_INTERVAL segundos enquanto houver leituras ou esperas.
+
+No modo threaded cada espera ocupa uma thread de trabalho e o número delas é
+limitado por CHANGES_MAX_BLOCKING_SUBSCRIBERS. No servidor asyncio as esperas
+são corrotinas no event loop (wait_async) e não ocupam o executor.
+"""
+import asyncio
+import json
+import threading
+import time
+from bisect import bisect_right
+
+from app import config
+
+CHANGE_FIELDS = ("seq", "task_id", "op", "version", "changed_at")
+
+
+class ChangesExpired(Exception):
+    """
+    A posição pedida não pode ser continuada: as alterações seguintes já foram
+    podadas do log, ou a posição é maior que a última do banco (outro banco ou
+    banco recriado). O cliente deve recarregar GET /tasks e recomeçar de last_seq.
+    """
+
+    def __init__(self, since, oldest_seq, last_seq):
+        super().__init__(f"Posição {since} indisponível no log de alterações")
+        self.since = since
+        self.oldest_seq = oldest_seq
+        self.last_seq = last_seq
+
+
+def _fragment(row):
+    """Alteração serializada uma única vez e compartilhada por todos os assinantes"""
+    return json.dumps(dict(zip(CHANGE_FIELDS, row)), ensure_ascii=False)
+
+
+def _resolve(future):
+    if not future.done():
+        future.set_result(None)
+
+
+class ChangeFeed:
+    """
+    Buffer das alterações mais recentes com notificação dos assinantes
+
+    O buffer contém todas as alterações com seq em (floor, last_seq], em ordem.
+    Leituras retornam (entradas, última seq, há mais), em que entradas é uma
+    lista de (seq, JSON da alteração).
+    """
+
+    def __init__(self, source, buffer_size=10000, poll_interval=1.0):
+        # source: objeto com find_changes(since, limit) e get_change_bounds()
+        self.source = source
+        self.buffer_size = max(1, buffer_size)
+        self.poll_interval = poll_interval
+        self._cond = threading.Condition()
+        self._seqs = []
+        self._fragments = []
+        self._floor = None
+        self._last_seq = None
+        self._stale = True
+        self._refresh_lock = threading.Lock()
+        self._refreshed_at = 0.0
+        self._waiting = 0
+        self._async_waiters = set()
+        self._subscribers = 0
+        self.peak_subscribers = 0
+        self.rejected_subscribers = 0
+        self.refreshes = 0
+        self.wakeups = 0
+        self.log_reads = 0
+
+    def notify(self):
+        """Chamado após uma escrita confirmada neste processo"""
+        self._stale = True
+        if self._waiting or self._async_waiters:
+            self.refresh()
+
+    def refresh(self):
+        """
+        Traz para o buffer as alterações novas (uma consulta) e acorda os
+        assinantes. Sem nada pendente (notify) e dentro do intervalo de polling,
+        não consulta o banco.
+        """
+        with self._refresh_lock:
+            if not self._refresh_due():
+                return
+            self._stale = False
+            self._refreshed_at = time.monotonic()
+            self.refreshes += 1
+            if self._last_seq is None:
+                _, last_seq = self.source.get_change_bounds()
+                with self._cond:
+                    self._floor = self._last_seq = last_seq
+                return
+            rows = self.source.find_changes(self._last_seq, self.buffer_size)
+            if len(rows) == self.buffer_size:
+                # Pode haver mais linhas além do limite da consulta
+                self._stale = True
+            if rows:
+                self._append(rows)
+
+    def _refresh_due(self):
+        return self._stale or time.monotonic() - self._refreshed_at >= self.poll_interval
+
+    def _append(self, rows):
+        fragments = [_fragment(row) for row in rows]
+        with self._cond:
+            self._seqs.extend(row[0] for row in rows)
+            self._fragments.extend(fragments)
+            excess = len(self._seqs) - self.buffer_size
+            if excess > 0:
+                self._floor = self._seqs[excess - 1]
+                del self._seqs[:excess]
+                del self._fragments[:excess]
+            self._last_seq = rows[-1][0]
+            self.wakeups += 1
+            self._cond.notify_all()
+            waiters, self._async_waiters = self._async_waiters, set()
+
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, future)
+            except RuntimeError:
+                # Event loop já encerrado
+                pass
+
+    def last_seq(self):
+        """Última seq conhecida pelo processo (posição inicial de quem não informa since)"""
+        self.refresh()
+        return self._last_seq
+
+    def read(self, since, limit):
+        """
+        Alterações com seq > since, sem esperar
+        Retorna: (entradas, última seq, há mais)
+        Lança: ChangesExpired
+        """
+        self.refresh()
+        if since > self._last_seq:
+            # A posição pode ter vindo de outro processo, ainda não relido
+            self._stale = True
+            self.refresh()
+            if since > self._last_seq:
+                oldest, last_seq = self.source.get_change_bounds()
+                if since > last_seq:
+                    raise ChangesExpired(since, oldest, last_seq)
+
+        result = self._read_buffer(since, limit)
+        if result is None:
+            result = self._read_log(since, limit)
+        return result
+
+    def _read_buffer(self, since, limit):
+        """Retorna: (entradas, última seq, há mais) ou None se since é anterior ao buffer"""
+        with self._cond:
+            if self._floor is None or since < self._floor:
+                return None
+            start = bisect_right(self._seqs, since)
+            end = start + limit
+            entries = list(zip(self._seqs[start:end], self._fragments[start:end]))
+            has_more = end < len(self._seqs)
+        return entries, entries[-1][0] if entries else since, has_more
+
+    def _read_log(self, since, limit):
+        """Leitura direta de task_changes para posições que já saíram do buffer"""
+        self.log_reads += 1
+        rows = self.source.find_changes(since, limit + 1)
+        if not rows or rows[0][0] > since + 1:
+            oldest, last_seq = self.source.get_change_bounds()
+            if oldest is None or since < oldest - 1:
+                raise ChangesExpired(since, oldest, last_seq)
+        entries = [(row[0], _fragment(row)) for row in rows[:limit]]
+        return entries, entries[-1][0] if entries else since, len(rows) > limit
+
+    def wait(self, since, limit, timeout):
+        """
+        Como read(), mas espera até `timeout` segundos por alterações novas
+        bloqueando a thread atual (modo threaded)
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            result = self.read(since, limit)
+            remaining = deadline - time.monotonic()
+            if result[0] or remaining <= 0:
+                return result
+            with self._cond:
+                if self._stale or self._last_seq > since:
+                    continue
+                self._waiting += 1
+                try:
+                    self._cond.wait(min(remaining, self.poll_interval))
+                finally:
+                    self._waiting -= 1
+
+    async def wait_async(self, since, limit, timeout):
+        """
+        Versão de wait() para o event loop: a espera é um future acordado pelo
+        refresh(); consultas ao banco, quando necessárias, rodam no executor padrão
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            result = None if self._refresh_due() else self._read_buffer(since, limit)
+            if result is None:
+                result = await loop.run_in_executor(None, self.read, since, limit)
+            remaining = deadline - loop.time()
+            if result[0] or remaining <= 0:
+                return result
+
+            future = loop.create_future()
+            waiter = (loop, future)
+            with self._cond:
+                if self._stale or self._last_seq > since:
+                    continue
+                self._async_waiters.add(waiter)
+            try:
+                await asyncio.wait_for(future, min(remaining, self.poll_interval))
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self._cond:
+                    self._async_waiters.discard(waiter)
+
+    def subscribe(self, blocking):
+        """
+        Reserva uma vaga de assinante (long-poll com espera ou SSE)
+        Args:
+            blocking: True se a espera ocupa uma thread (modo threaded)
+        Retorna: False se o limite de assinantes foi atingido
+        """
+        limit = config.CHANGES_MAX_BLOCKING_SUBSCRIBERS if blocking else config.CHANGES_MAX_SUBSCRIBERS
+        with self._cond:
+            if self._subscribers >= limit:
+                self.rejected_subscribers += 1
+                return False
+            self._subscribers += 1
+            if self._subscribers > self.peak_subscribers:
+                self.peak_subscribers = self._subscribers
+            return True
+
+    def unsubscribe(self):
+        with self._cond:
+            self._subscribers -= 1
+
+    def stats(self):
+        with self._cond:
+            return {
+                "last_seq": self._last_seq,
+                "buffered": len(self._seqs),
+                "buffer_size": self.buffer_size,
+                "subscribers": self._subscribers,
+                "peak_subscribers": self.peak_subscribers,
+                "rejected_subscribers": self.rejected_subscribers,
+                "refreshes": self.refreshes,
+                "wakeups": self.wakeups,
+                "log_reads": self.log_reads,
+            }
+
+
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_change_feed():
+    """Retorna o ChangeFeed do processo, criando-o com a configuração atual"""
+    global _feed
+
+    if _feed is None:
+        with _feed_lock:
+            if _feed is None:
+                # Import tardio: o repositório importa este módulo para notify_changes()
+                from app.database.task_repository import TaskRepository
+                _feed = ChangeFeed(
+                    TaskRepository,
+                    buffer_size=config.CHANGES_BUFFER_SIZE,
+                    poll_interval=config.CHANGES_POLL_INTERVAL,
+                )
+    return _feed
+
+
+def notify_changes():
+    """Acorda os assinantes após uma escrita confirmada (sem efeito se ninguém usa o feed)"""
+    if _feed is not None:
+        _feed.notify()
@@ -0,0 +1,84 @@
+import zlib
+from functools import lru_cache
+
+from app import config
+
+# Codificações suportadas, em ordem de preferência para q-values iguais.
+# "deflate" no HTTP é o formato zlib (RFC 1950), não o deflate cru.
+ENCODINGS = ("gzip", "deflate")
+
+_WBITS = {
+    "gzip": 16 + zlib.MAX_WBITS,
+    "deflate": zlib.MAX_WBITS,
+}
+
+_ALIASES = {"x-gzip": "gzip"}
+
+@lru_cache(maxsize=256)
+def _parse_accept_encoding(header):
+    """
+    Escolhe a codificação a partir do valor de Accept-Encoding (RFC 7231, 5.3.4)
+    Retorna: "gzip", "deflate" ou None (identity)
+    """
+    preferences = {}
+    for item in header.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        coding = _ALIASES.get(coding, coding)
+        preferences[coding] = max(quality, preferences.get(coding, 0.0))
+
+    wildcard = preferences.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in ENCODINGS:
+        quality = preferences.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+def negotiate_encoding(handler):
+    """
+    Codificação de conteúdo aceita pelo cliente para esta resposta
+    Retorna: "gzip", "deflate" ou None se a compressão estiver desabilitada
+    ou o cliente não enviar Accept-Encoding compatível
+    """
+    if not config.COMPRESSION_ENABLED:
+        return None
+    header = handler.headers.get("Accept-Encoding") if handler.headers else None
+    if not header:
+        return None
+    return _parse_accept_encoding(header)
+
+def compressor(encoding):
+    """Compressor zlib incremental para a codificação (usado no streaming)"""
+    return zlib.compressobj(config.COMPRESSION_LEVEL, zlib.DEFLATED, _WBITS[encoding])
+
+def compress(data, encoding):
+    """Comprime um corpo completo"""
+    engine = compressor(encoding)
+    return engine.compress(data) + engine.flush()
+
+def weak_etag(etag):
+    """
+    ETag de uma representação comprimida: a versão fraca do ETag original,
+    já que os bytes diferem entre codificações
+    """
+    return etag if etag.startswith("W/") else "W/" + etag
+
+def negotiated_etag(handler, etag):
+    """
+    ETag enviado ao cliente: a forma fraca sempre que ele aceita gzip/deflate,
+    mesmo que o corpo saia sem compressão por ser pequeno. Como depende só da
+    negociação e não do tamanho do corpo, a resposta 304 (que não monta o corpo)
+    envia o mesmo validador que a 200 enviaria.
+    """
+    return weak_etag(etag) if negotiate_encoding(handler) is not None else etag
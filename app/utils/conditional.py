@@ -0,0 +1,89 @@
+import email.utils
+import re
+from datetime import datetime, timezone
+
+# ETag de uma tarefa: "t<id>-v<versão>"; de uma listagem: "l<versão da tabela>"
+_TASK_ETAG_RE = re.compile(r'^"t(\d+)-v(\d+)"$')
+
+def task_etag(task):
+    """ETag forte de uma tarefa, derivado do id e da coluna version"""
+    return f'"t{task.id}-v{task.version}"'
+
+def list_etag(table_version):
+    """ETag forte das listagens, derivado do contador de alterações da tabela"""
+    return f'"l{table_version}"'
+
+def http_date(timestamp):
+    """
+    Converte um timestamp do SQLite (CURRENT_TIMESTAMP, UTC) para o formato
+    de data HTTP (RFC 7231)
+    Retorna: str ou None se ausente/inválido
+    """
+    if not timestamp:
+        return None
+    try:
+        parsed = datetime.strptime(str(timestamp)[:19], "%Y-%m-%d %H:%M:%S")
+    except ValueError:
+        return None
+    return email.utils.format_datetime(parsed.replace(tzinfo=timezone.utc), usegmt=True)
+
+def _split_etags(header):
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+def validator_headers(etag, last_modified=None):
+    """Cabeçalhos ETag/Last-Modified a incluir na resposta"""
+    headers = {"ETag": etag}
+    if last_modified:
+        headers["Last-Modified"] = last_modified
+    return headers
+
+def is_not_modified(handler, etag, last_modified=None):
+    """
+    Avalia If-None-Match e If-Modified-Since (RFC 7232, seção 6)
+    Retorna: True se a resposta deve ser 304 Not Modified
+    """
+    if_none_match = handler.headers.get("If-None-Match")
+    if if_none_match is not None:
+        # Comparação fraca: W/"x" equivale a "x"
+        tags = _split_etags(if_none_match)
+        if "*" in tags:
+            return True
+        return any(tag.removeprefix("W/") == etag for tag in tags)
+
+    if_modified_since = handler.headers.get("If-Modified-Since")
+    if if_modified_since and last_modified:
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+            modified = email.utils.parsedate_to_datetime(last_modified)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            return False
+        return modified <= since
+
+    return False
+
+def parse_if_match(handler, task_id):
+    """
+    Interpreta o If-Match de PUT/DELETE em /tasks/<id>
+    O ETag de uma tarefa só identifica a versão, então a forma fraca (W/"..."),
+    enviada quando a resposta do GET foi comprimida, também é aceita
+    Retorna: (presente, qualquer, versões)
+        presente: o cabeçalho foi enviado
+        qualquer: If-Match: * (basta a tarefa existir)
+        versões: set com as versões aceitas desta tarefa
+    """
+    if_match = handler.headers.get("If-Match")
+    if if_match is None:
+        return False, False, set()
+
+    tags = _split_etags(if_match)
+    if "*" in tags:
+        return True, True, set()
+
+    versions = set()
+    for tag in tags:
+        match = _TASK_ETAG_RE.match(tag.removeprefix("W/"))
+        if match and int(match.group(1)) == task_id:
+            versions.add(int(match.group(2)))
+    return True, False, versions
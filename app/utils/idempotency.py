@@ -0,0 +1,22 @@
+"""
+Idempotency-Key em POST /tasks
+
+Um cliente que repete a requisição (ex.: após um timeout) envia o mesmo valor
+no header Idempotency-Key. A primeira execução grava a resposta em
+idempotency_keys na mesma transação da escrita; as repetições recebem a
+resposta gravada (com Idempotent-Replayed: true) sem executar a escrita de novo.
+A chave vale para um corpo específico: reutilizá-la com outro corpo é rejeitado.
+"""
+import hashlib
+import json
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+
+def request_fingerprint(method, path, body):
+    """
+    Hash da requisição associado à chave: método, rota e corpo JSON em forma
+    canônica (ordem das chaves e espaços não alteram o resultado)
+    """
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(f"{method} {path}\n{canonical}".encode("utf-8")).hexdigest()
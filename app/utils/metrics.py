@@ -0,0 +1,295 @@
+"""
+Métricas das requisições no formato texto do Prometheus (GET /metrics)
+
+Router.dispatch abre um RequestTimer por requisição (guardado em uma variável
+local da thread) e, ao final, registra contagem por rota/método/status,
+histograma de latência, bytes escritos e o tempo gasto em cada fase:
+
+- validation: validadores (TaskValidator)
+- repository: blocos get_connection() e escritas via run_write(), incluindo a
+  espera pela conexão do pool ou pela thread escritora
+- serialization: montagem dos corpos JSON no ResponseBuilder
+- compression: gzip/deflate do corpo (quando negociado com o cliente)
+
+As fases são medidas com phase(nome) / @timed(nome); fora de uma requisição
+(ex.: na thread escritora ou em app.manage) não têm efeito. Fases aninhadas
+com o mesmo nome são contadas uma única vez.
+
+Os valores são do processo: em modo prefork cada filho mantém os seus.
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Limites (em segundos) dos buckets dos histogramas
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+PHASES = ("validation", "repository", "serialization", "compression")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+UNMATCHED_ROUTE = "unmatched"
+
+# Métodos com rótulo próprio; os demais são agrupados em OTHER_METHOD para que
+# o cliente não consiga criar séries novas à vontade
+HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+OTHER_METHOD = "other"
+
+_local = threading.local()
+
+
+class Histogram:
+    """Histograma de buckets fixos (o registro serializa o acesso)"""
+
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size):
+        # Um contador por bucket, mais o +Inf
+        self.counts = [0] * (size + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def copy(self):
+        histogram = Histogram(len(self.counts) - 1)
+        histogram.counts = self.counts[:]
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+
+class RequestTimer:
+    """Estado de medição de uma requisição em andamento"""
+
+    __slots__ = ("started", "route", "phases", "active", "writer")
+
+    def __init__(self, writer):
+        self.started = time.perf_counter()
+        self.route = UNMATCHED_ROUTE
+        self.phases = {}
+        self.active = set()
+        self.writer = writer
+
+
+class _CountingWriter:
+    """Envolve o wfile da requisição contando os bytes escritos (cabeçalhos e corpo)"""
+
+    __slots__ = ("_wfile", "written")
+
+    def __init__(self, wfile):
+        self._wfile = wfile
+        self.written = 0
+
+    def write(self, data):
+        self.written += len(data)
+        return self._wfile.write(data)
+
+    def flush(self):
+        return self._wfile.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._wfile, name)
+
+
+class _Phase:
+    """Context manager que soma a duração do bloco à fase da requisição atual"""
+
+    __slots__ = ("name", "timer", "started")
+
+    def __init__(self, name):
+        self.name = name
+        self.timer = None
+
+    def __enter__(self):
+        timer = getattr(_local, "timer", None)
+        if timer is None or self.name in timer.active:
+            self.timer = None
+            return self
+        timer.active.add(self.name)
+        self.timer = timer
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        timer = self.timer
+        if timer is not None:
+            elapsed = time.perf_counter() - self.started
+            timer.phases[self.name] = timer.phases.get(self.name, 0.0) + elapsed
+            timer.active.discard(self.name)
+            self.timer = None
+        return False
+
+
+def phase(name):
+    """
+    Mede um bloco como parte da fase `name` da requisição atual
+
+    Uso:
+        with phase("repository"):
+            ...
+    """
+    return _Phase(name)
+
+
+def timed(name):
+    """Decorador equivalente a envolver a função em phase(name)"""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Phase(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class MetricsRegistry:
+    """Contadores e histogramas do processo, protegidos por um único lock"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+        self._requests = {}   # (rota, método, status) -> contagem
+        self._latency = {}    # (rota, método) -> Histogram
+        self._bytes = {}      # (rota, método) -> bytes escritos
+        self._phases = {}     # (rota, método, fase) -> Histogram
+        self._collectors = []
+
+    def add_collector(self, collector):
+        """
+        Registra uma função sem argumentos que retorna linhas extras no formato
+        do Prometheus (ex.: contadores do controle de admissão)
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def _observe(self, histograms, key, value):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(len(self.buckets))
+        histogram.counts[bisect_left(self.buckets, value)] += 1
+        histogram.sum += value
+        histogram.count += 1
+
+    def observe_request(self, route, method, status, duration, written, phases):
+        """Registra uma requisição concluída"""
+        if method not in HTTP_METHODS:
+            method = OTHER_METHOD
+        key = (route, method)
+        with self._lock:
+            request_key = (route, method, status)
+            self._requests[request_key] = self._requests.get(request_key, 0) + 1
+            self._observe(self._latency, key, duration)
+            self._bytes[key] = self._bytes.get(key, 0) + written
+            for name, elapsed in phases.items():
+                self._observe(self._phases, (route, method, name), elapsed)
+
+    def snapshot(self):
+        """Cópia consistente dos valores, para formatar fora do lock"""
+        with self._lock:
+            return (
+                dict(self._requests),
+                {key: histogram.copy() for key, histogram in self._latency.items()},
+                dict(self._bytes),
+                {key: histogram.copy() for key, histogram in self._phases.items()},
+            )
+
+    def render(self):
+        """Retorna as métricas no formato texto do Prometheus (bytes UTF-8)"""
+        requests, latency, written, phases = self.snapshot()
+        lines = [
+            "# HELP todo_http_requests_total Requisições HTTP atendidas.",
+            "# TYPE todo_http_requests_total counter",
+        ]
+        for (route, method, status), count in sorted(requests.items()):
+            lines.append(
+                f'todo_http_requests_total{{route="{_escape(route)}",method="{_escape(method)}",status="{status}"}} {count}'
+            )
+
+        lines.append("# HELP todo_http_request_duration_seconds Latência das requisições no Router.")
+        lines.append("# TYPE todo_http_request_duration_seconds histogram")
+        for (route, method), histogram in sorted(latency.items()):
+            labels = f'route="{_escape(route)}",method="{_escape(method)}"'
+            self._render_histogram(lines, "todo_http_request_duration_seconds", labels, histogram)
+
+        lines.append("# HELP todo_http_response_bytes_total Bytes escritos nas respostas (cabeçalhos e corpo).")
+        lines.append("# TYPE todo_http_response_bytes_total counter")
+        for (route, method), count in sorted(written.items()):
+            lines.append(
+                f'todo_http_response_bytes_total{{route="{_escape(route)}",method="{_escape(method)}"}} {count}'
+            )
+
+        lines.append("# HELP todo_http_request_phase_seconds Tempo por fase: validation, repository, serialization, compression.")
+        lines.append("# TYPE todo_http_request_phase_seconds histogram")
+        for (route, method, name), histogram in sorted(phases.items()):
+            labels = f'route="{_escape(route)}",method="{_escape(method)}",phase="{name}"'
+            self._render_histogram(lines, "todo_http_request_phase_seconds", labels, histogram)
+
+        with self._lock:
+            collectors = list(self._collectors)
+        for collector in collectors:
+            lines.extend(collector())
+
+        lines.append("# HELP todo_process_start_time_seconds Início do processo (epoch).")
+        lines.append("# TYPE todo_process_start_time_seconds gauge")
+        lines.append(f"todo_process_start_time_seconds {self.started_at:.3f}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _render_histogram(self, lines, name, labels, histogram):
+        cumulative = 0
+        for bound, count in zip(self.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f"{name}_sum{{{labels}}} {histogram.sum:.6f}")
+        lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+    def reset(self):
+        with self._lock:
+            self._requests.clear()
+            self._latency.clear()
+            self._bytes.clear()
+            self._phases.clear()
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry():
+    """Retorna o registro de métricas do processo"""
+    return _registry
+
+
+def current_route():
+    """Template da rota da requisição em andamento nesta thread, ou None"""
+    timer = getattr(_local, "timer", None)
+    return timer.route if timer is not None else None
+
+
+def start_request(handler):
+    """
+    Inicia a medição de uma requisição: zera o status registrado pelo handler,
+    passa a contar os bytes de handler.wfile e torna o timer a requisição
+    atual da thread
+    """
+    writer = _CountingWriter(handler.wfile)
+    handler.wfile = writer
+    handler.status_code = None
+    timer = RequestTimer(writer)
+    _local.timer = timer
+    return timer
+
+
+def finish_request(timer, handler, method):
+    """Restaura o wfile do handler e registra a requisição no registro do processo"""
+    duration = time.perf_counter() - timer.started
+    _local.timer = None
+    handler.wfile = timer.writer._wfile
+
+    # Sem resposta enviada, o endpoint falhou com uma exceção não tratada
+    status = handler.status_code or 500
+    _registry.observe_request(timer.route, method, str(status), duration, timer.writer.written, timer.phases)
@@ -0,0 +1,128 @@
+"""
+Amostragem de requisições com cProfile (opt-in, TODO_PROFILE_SAMPLE_RATE)
+
+Uma fração das requisições roda sob cProfile. Das amostradas, o processo
+mantém em TODO_PROFILE_DIR os perfis das TODO_PROFILE_KEEP mais lentas
+(arquivos .prof, abertos com `python -m pstats` ou snakeviz); um perfil que
+deixa de estar entre as mais lentas tem o arquivo removido.
+
+O perfil cobre a thread que atende a requisição: o trabalho feito pela thread
+escritora aparece apenas como espera em run_write.
+"""
+import cProfile
+import heapq
+import os
+import random
+import re
+import threading
+import time
+
+from app import config
+
+_UNSAFE_CHARS_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+class RequestProfiler:
+    """Mantém os perfis das N requisições amostradas mais lentas do processo"""
+
+    def __init__(self, directory, keep=10):
+        self.directory = directory
+        self.keep = max(1, keep)
+        self._lock = threading.Lock()
+        self._slowest = []  # heap mínimo de (duração, caminho)
+        self._sequence = 0
+        self.sampled = 0
+        self.skipped = 0
+
+    def start(self):
+        """
+        Inicia o cProfile na thread atual
+        Retorna: (Profile, instante de início) ou None se outro perfil já está ativo
+        """
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Python 3.12+: um único profiler ativo por vez no processo
+            with self._lock:
+                self.skipped += 1
+            return None
+        return profile, time.perf_counter()
+
+    def finish(self, sample, method, path):
+        """Encerra o perfil e o grava em disco se estiver entre os N mais lentos"""
+        profile, started = sample
+        profile.disable()
+        duration = time.perf_counter() - started
+
+        with self._lock:
+            self.sampled += 1
+            if len(self._slowest) >= self.keep and duration <= self._slowest[0][0]:
+                return None
+            self._sequence += 1
+            sequence = self._sequence
+
+        name = _UNSAFE_CHARS_RE.sub("_", path.partition("?")[0]).strip("_") or "root"
+        filename = f"{duration * 1000:010.3f}ms-{method}-{name[:80]}-{os.getpid()}-{sequence}.prof"
+        target = os.path.join(self.directory, filename)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            profile.dump_stats(target)
+        except OSError as e:
+            print(f"Erro ao gravar perfil da requisição: {e}")
+            return None
+
+        with self._lock:
+            heapq.heappush(self._slowest, (duration, target))
+            evicted = heapq.heappop(self._slowest) if len(self._slowest) > self.keep else None
+        if evicted is not None:
+            try:
+                os.remove(evicted[1])
+            except OSError:
+                pass
+        return target
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sample_rate": config.PROFILE_SAMPLE_RATE,
+                "directory": self.directory,
+                "sampled": self.sampled,
+                "skipped": self.skipped,
+                "kept": [
+                    {"duration_ms": round(duration * 1000, 3), "path": path}
+                    for duration, path in sorted(self._slowest, reverse=True)
+                ],
+            }
+
+
+_profiler = None
+_profiler_lock = threading.Lock()
+
+
+def get_profiler():
+    """Retorna o RequestProfiler do processo, ou None se a amostragem estiver desabilitada"""
+    global _profiler
+
+    if config.PROFILE_SAMPLE_RATE <= 0:
+        return None
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = RequestProfiler(config.PROFILE_DIR, config.PROFILE_KEEP)
+    return _profiler
+
+
+def sample_request():
+    """
+    Sorteia se a requisição atual será perfilada
+    Retorna: amostra a ser passada para finish_request() ou None
+    """
+    profiler = get_profiler()
+    if profiler is None or random.random() >= config.PROFILE_SAMPLE_RATE:
+        return None
+    return profiler.start()
+
+
+def finish_request(sample, method, path):
+    return get_profiler().finish(sample, method, path)
@@ -0,0 +1,93 @@
+import json
+
+from app import config
+
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonlines")
+
+# Tamanho de cada leitura do corpo no socket
+BODY_READ_CHUNK_SIZE = 64 * 1024
+
+# Dígitos aceitos no Content-Length (cabe num inteiro de 64 bits)
+CONTENT_LENGTH_MAX_DIGITS = 19
+
+def body_length(headers):
+    """
+    Valida os cabeçalhos de corpo antes de qualquer leitura do socket
+    Args:
+        headers: cabeçalhos da requisição (http.client.HTTPMessage)
+    Retorna: (int, int, str) - (tamanho, status_erro, mensagem_erro)
+    """
+    if headers.get("Transfer-Encoding"):
+        return None, 411, "Content-Length obrigatório"
+    
+    value = headers.get("Content-Length")
+    if not value:
+        return 0, None, None
+    # Só dígitos ASCII: int() aceitaria "+17", "1_7" e dígitos Unicode
+    value = value.strip()
+    if not (value.isascii() and value.isdigit()) or len(value) > CONTENT_LENGTH_MAX_DIGITS:
+        return None, 400, "Header Content-Length inválido"
+    length = int(value)
+    
+    if length > config.SERVER_MAX_BODY_SIZE:
+        return None, 413, f"Corpo da requisição excede o limite de {config.SERVER_MAX_BODY_SIZE} bytes"
+    return length, None, None
+
+def read_body(rfile, length):
+    """
+    Lê exatamente `length` bytes em blocos de BODY_READ_CHUNK_SIZE, sem
+    reservar o corpo inteiro de uma vez
+    Retorna: bytes ou None se a conexão terminou antes do fim do corpo
+    """
+    if not length:
+        return b""
+    buffer = bytearray()
+    while len(buffer) < length:
+        chunk = rfile.read(min(BODY_READ_CHUNK_SIZE, length - len(buffer)))
+        if not chunk:
+            return None
+        buffer += chunk
+    return bytes(buffer)
+
+def _reject_constant(name):
+    raise ValueError(f"Valor não suportado: {name}")
+
+def is_ndjson(content_type):
+    """Verifica se o Content-Type indica um corpo NDJSON (um JSON por linha)"""
+    if not content_type:
+        return False
+    return content_type.split(";", 1)[0].strip().lower() in NDJSON_CONTENT_TYPES
+
+def parse_json_body(raw, content_type=None):
+    """
+    Decodifica o corpo JSON (ou NDJSON) de uma requisição
+    Args:
+        raw: bytes lidos do socket
+        content_type: header Content-Type; NDJSON vira uma lista de objetos
+    Retorna: (dict/list, str) - (dados, mensagem_erro)
+    """
+    if not raw or not raw.strip():
+        return {}, None
+    
+    try:
+        text = raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return None, "Corpo da requisição não é UTF-8 válido"
+    
+    if is_ndjson(content_type):
+        items = []
+        for line_number, line in enumerate(text.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line, parse_constant=_reject_constant))
+            except (ValueError, RecursionError):
+                return None, f"JSON inválido na linha {line_number}"
+        return items, None
+    
+    # ValueError cobre JSONDecodeError, NaN/Infinity e inteiros grandes demais;
+    # RecursionError, aninhamento excessivo
+    try:
+        return json.loads(text, parse_constant=_reject_constant), None
+    except (ValueError, RecursionError):
+        return None, "JSON inválido"
@@ -1,61 +1,305 @@
 import json
 
+from app import config
+from app.utils.compression import compress, compressor, negotiate_encoding, negotiated_etag
+from app.utils.metrics import phase, timed
+
+class StreamAborted(Exception):
+    """Falha após os cabeçalhos já terem sido enviados em uma resposta em streaming"""
+
 class ResponseBuilder:
     """Construtor de respostas HTTP padronizadas"""
     
     @staticmethod
-    def success(handler, data, status_code=200):
+    def success(handler, data, status_code=200, headers=None):
         """
         Envia resposta de sucesso
         Args:
             handler: HTTPRequestHandler
             data: dados a retornar (dict, list ou None)
             status_code: código HTTP (200, 201, 204, etc)
+            headers: dict com cabeçalhos extras (ex.: ETag)
+        """
+        response_body = b""
+        if data is not None and status_code != 204:
+            response_body = ResponseBuilder.encode(data)
+        
+        ResponseBuilder.send_json_bytes(handler, response_body, status_code, headers)
+    
+    @staticmethod
+    @timed("serialization")
+    def encode(data):
+        """Serializa dados para o corpo JSON (bytes UTF-8)"""
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+    
+    @staticmethod
+    @timed("serialization")
+    def encode_fragments(key, fragments, **fields):
+        """
+        Monta {"key": [f1, f2, ...], campo: valor, ...} a partir de objetos JSON
+        já serializados (ex.: gerados pelo SQLite com json_object), sem criar
+        objetos intermediários por item
+        Args:
+            key: nome do campo com a lista
+            fragments: lista de str, cada uma um objeto JSON válido
+            fields: demais campos do documento, serializados com json.dumps
+        """
+        body = "{" + json.dumps(key) + ": [" + ", ".join(fragments) + "]"
+        for name, value in fields.items():
+            body += ", " + json.dumps(name) + ": " + json.dumps(value, ensure_ascii=False)
+        return (body + "}").encode("utf-8")
+    
+    @staticmethod
+    def send_json_bytes(handler, response_body, status_code=200, headers=None):
+        """
+        Envia um corpo JSON já serializado (ex.: vindo do cache),
+        sem passar novamente pelo json.dumps
+        """
+        ResponseBuilder.send_bytes(
+            handler, response_body, "application/json; charset=utf-8", status_code, headers
+        )
+    
+    @staticmethod
+    def send_bytes(handler, response_body, content_type, status_code=200, headers=None):
+        """
+        Envia um corpo já codificado, comprimido com gzip/deflate quando o cliente
+        aceita (Accept-Encoding) e o corpo tem ao menos COMPRESSION_MIN_SIZE bytes
+        Args:
+            handler: HTTPRequestHandler
+            response_body: bytes
+            content_type: valor do header Content-Type
+            status_code: código HTTP
+            headers: dict com cabeçalhos extras (ex.: ETag)
         """
+        # A resposta depende do Accept-Encoding só quando o corpo é grande o
+        # bastante para ser comprimido
+        encoding = None
+        compressible = (
+            config.COMPRESSION_ENABLED
+            and status_code != 204
+            and len(response_body) >= config.COMPRESSION_MIN_SIZE
+        )
+        if compressible:
+            encoding = negotiate_encoding(handler)
+            if encoding is not None:
+                with phase("compression"):
+                    response_body = compress(response_body, encoding)
+        
         handler.send_response(status_code)
-        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Type", content_type)
+        if status_code != 204:
+            handler.send_header("Content-Length", str(len(response_body)))
+        # Com compressão habilitada o ETag depende do Accept-Encoding mesmo
+        # quando o corpo é pequeno demais para ser comprimido
+        if compressible or (config.COMPRESSION_ENABLED and headers and "ETag" in headers):
+            handler.send_header("Vary", "Accept-Encoding")
+        if encoding is not None:
+            handler.send_header("Content-Encoding", encoding)
+        for name, value in (headers or {}).items():
+            if name == "ETag":
+                value = negotiated_etag(handler, value)
+            handler.send_header(name, value)
         handler.end_headers()
         
-        if data is not None and status_code != 204:
-            response_body = json.dumps(data, ensure_ascii=False)
-            handler.wfile.write(response_body.encode("utf-8"))
+        if response_body and status_code != 204:
+            handler.wfile.write(response_body)
+    
+    @staticmethod
+    def text(handler, body, content_type, status_code=200):
+        """
+        Envia um corpo não-JSON já codificado (ex.: métricas do Prometheus)
+        Args:
+            handler: HTTPRequestHandler
+            body: bytes
+            content_type: valor do header Content-Type
+            status_code: código HTTP
+        """
+        ResponseBuilder.send_bytes(handler, body, content_type, status_code)
+    
+    @staticmethod
+    def stream(handler, chunks, content_type="application/json; charset=utf-8", status_code=200):
+        """
+        Envia resposta em streaming, escrevendo cada pedaço assim que produzido
+        Args:
+            handler: HTTPRequestHandler
+            chunks: iterável de bytes
+            content_type: valor do header Content-Type
+            status_code: código HTTP
+        Com HTTP/1.1 usa Transfer-Encoding: chunked; com HTTP/1.0 escreve o corpo
+        direto e encerra a conexão ao final. Se o cliente aceitar gzip/deflate, os
+        pedaços passam por um compressor incremental antes de ir para o socket.
+        """
+        chunked, encoding = ResponseBuilder.start_stream(handler, content_type, status_code)
+        if encoding is not None:
+            chunks = ResponseBuilder._compress_chunks(chunks, encoding)
+        
+        try:
+            for chunk in chunks:
+                ResponseBuilder.write_chunk(handler, chunk, chunked)
+        except Exception as e:
+            # Cabeçalhos já enviados: a única forma de sinalizar o erro
+            # é encerrar a conexão sem o chunk final
+            handler.close_connection = True
+            raise StreamAborted(str(e)) from e
+        
+        ResponseBuilder.end_stream(handler, chunked)
     
     @staticmethod
-    def error(handler, message, status_code=400):
+    def start_stream(handler, content_type, status_code=200, compress=True, headers=None):
+        """
+        Envia os cabeçalhos de uma resposta em streaming
+        Args:
+            compress: False para respostas que precisam chegar pedaço a pedaço
+                      (ex.: eventos SSE), que o compressor agruparia
+            headers: dict com cabeçalhos extras
+        Retorna: (chunked, codificação negociada ou None)
+        """
+        chunked = ResponseBuilder._supports_chunked(handler)
+        encoding = negotiate_encoding(handler) if compress else None
+        
+        handler.send_response(status_code)
+        handler.send_header("Content-Type", content_type)
+        if compress and config.COMPRESSION_ENABLED:
+            handler.send_header("Vary", "Accept-Encoding")
+        if encoding is not None:
+            handler.send_header("Content-Encoding", encoding)
+        for name, value in (headers or {}).items():
+            handler.send_header(name, value)
+        if chunked:
+            handler.send_header("Transfer-Encoding", "chunked")
+        else:
+            handler.send_header("Connection", "close")
+            handler.close_connection = True
+        handler.end_headers()
+        return chunked, encoding
+    
+    @staticmethod
+    def write_chunk(handler, chunk, chunked):
+        """Escreve um pedaço do corpo de uma resposta iniciada com start_stream()"""
+        if not chunk:
+            return
+        if chunked:
+            handler.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        else:
+            handler.wfile.write(chunk)
+    
+    @staticmethod
+    def end_stream(handler, chunked):
+        """Encerra o corpo de uma resposta em streaming"""
+        if chunked:
+            handler.wfile.write(b"0\r\n\r\n")
+    
+    @staticmethod
+    def _compress_chunks(chunks, encoding):
+        """
+        Comprime os pedaços de forma incremental. O compressor só devolve dados
+        quando acumula um bloco, então pedaços pequenos são agrupados em vez de
+        virarem um chunk HTTP cada
+        """
+        engine = compressor(encoding)
+        for chunk in chunks:
+            with phase("compression"):
+                data = engine.compress(chunk)
+            if data:
+                yield data
+        yield engine.flush()
+    
+    @staticmethod
+    def _supports_chunked(handler):
+        """Chunked só é válido quando cliente e servidor falam HTTP/1.1"""
+        return (
+            getattr(handler, "protocol_version", "HTTP/1.0") >= "HTTP/1.1"
+            and getattr(handler, "request_version", "HTTP/1.0") >= "HTTP/1.1"
+        )
+    
+    @staticmethod
+    def error(handler, message, status_code=400, headers=None):
         """
         Envia resposta de erro
         Args:
             handler: HTTPRequestHandler
             message: mensagem de erro
             status_code: código HTTP (400, 404, 500, etc)
+            headers: dict com cabeçalhos extras (ex.: Allow)
         """
-        handler.send_response(status_code)
-        handler.send_header("Content-Type", "application/json; charset=utf-8")
-        handler.end_headers()
-        
-        error_data = {"error": message}
-        response_body = json.dumps(error_data, ensure_ascii=False)
-        handler.wfile.write(response_body.encode("utf-8"))
+        response_body = ResponseBuilder.encode({"error": message})
+        ResponseBuilder.send_json_bytes(handler, response_body, status_code, headers)
     
     @staticmethod
     def not_found(handler, message="Recurso não encontrado"):
         """Envia resposta 404"""
         ResponseBuilder.error(handler, message, 404)
     
+    @staticmethod
+    def method_not_allowed(handler, allowed):
+        """Envia resposta 405 com o header Allow"""
+        ResponseBuilder.error(handler, "Método não permitido", 405, {"Allow": allowed})
+    
+    @staticmethod
+    def options(handler, allowed):
+        """Responde OPTIONS: 204 com os métodos aceitos pela rota"""
+        ResponseBuilder.no_content(handler, {"Allow": allowed})
+    
     @staticmethod
     def bad_request(handler, message="Requisição inválida"):
         """Envia resposta 400"""
         ResponseBuilder.error(handler, message, 400)
     
     @staticmethod
-    def created(handler, data):
+    def too_many_requests(handler, retry_after):
+        """Envia resposta 429 (limite do cliente excedido) com Retry-After"""
+        ResponseBuilder.error(
+            handler, "Limite de requisições excedido", 429, {"Retry-After": str(retry_after)}
+        )
+    
+    @staticmethod
+    def service_unavailable(handler, retry_after, message="Servidor sobrecarregado, tente novamente"):
+        """Envia resposta 503 (carga descartada) com Retry-After"""
+        ResponseBuilder.error(handler, message, 503, {"Retry-After": str(retry_after)})
+    
+    @staticmethod
+    def temporary_redirect(handler, location, message):
+        """Envia resposta 307: o cliente repete a requisição (mesmo método e corpo) em `location`"""
+        ResponseBuilder.error(handler, message, 307, {"Location": location})
+    
+    @staticmethod
+    def created(handler, data, headers=None):
         """Envia resposta 201 (Created)"""
-        ResponseBuilder.success(handler, data, 201)
+        ResponseBuilder.success(handler, data, 201, headers)
+    
+    @staticmethod
+    def not_modified(handler, headers):
+        """
+        Envia resposta 304 (Not Modified), sem corpo
+        Args:
+            handler: HTTPRequestHandler
+            headers: dict com ETag/Last-Modified da representação atual
+        """
+        handler.send_response(304)
+        if config.COMPRESSION_ENABLED:
+            handler.send_header("Vary", "Accept-Encoding")
+        for name, value in headers.items():
+            # Mesmo validador da resposta 200 para esta negociação
+            if name == "ETag":
+                value = negotiated_etag(handler, value)
+            handler.send_header(name, value)
+        handler.end_headers()
+    
+    @staticmethod
+    def gone(handler, message, data=None):
+        """Envia resposta 410 (Gone), com campos extras no corpo"""
+        response_body = ResponseBuilder.encode({"error": message, **(data or {})})
+        ResponseBuilder.send_json_bytes(handler, response_body, 410)
+    
+    @staticmethod
+    def precondition_failed(handler, message="A tarefa foi alterada por outra requisição"):
+        """Envia resposta 412 (Precondition Failed)"""
+        ResponseBuilder.error(handler, message, 412)
     
     @staticmethod
-    def no_content(handler):
+    def no_content(handler, headers=None):
         """Envia resposta 204 (No Content)"""
-        ResponseBuilder.success(handler, None, 204)
+        ResponseBuilder.success(handler, None, 204, headers)
     
     @staticmethod
     def internal_error(handler, message="Erro interno do servidor"):
@@ -1,82 +1,434 @@
+from datetime import datetime, timezone
+
+from app import config
+from app.utils.metrics import timed
+
 VALID_STATUSES = ["pendente", "em_andamento", "completo", "cancelado"]
+EXPORT_FORMATS = ["json", "ndjson"]
+TITLE_MAX_LENGTH = 200
+DESCRIPTION_MAX_LENGTH = 1000
+# Maior valor de um INTEGER do SQLite (64 bits com sinal)
+MAX_TASK_ID = 2**63 - 1
+
+def _single_param(query, name):
+    values = query.get(name)
+    if not values:
+        return None
+    return values[-1]
+
+def _is_utf8(value):
+    # JSON aceita surrogates isolados ("\ud800"), que o SQLite não consegue gravar
+    try:
+        value.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+def _check_title(value, partial):
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return "Campo 'title' não pode estar vazio"
+    if not isinstance(value, str):
+        return "Campo 'title' deve ser texto"
+    if len(value) > TITLE_MAX_LENGTH:
+        return f"Campo 'title' deve ter no máximo {TITLE_MAX_LENGTH} caracteres"
+    if not _is_utf8(value):
+        return "Campo 'title' contém caracteres inválidos"
+    return None
+
+def _check_description(value, partial):
+    if value is None:
+        return None
+    if not isinstance(value, str):
+        return "Campo 'description' deve ser texto ou null"
+    if len(value) > DESCRIPTION_MAX_LENGTH:
+        return f"Campo 'description' deve ter no máximo {DESCRIPTION_MAX_LENGTH} caracteres"
+    if not _is_utf8(value):
+        return "Campo 'description' contém caracteres inválidos"
+    return None
+
+def _check_status(value, partial):
+    # Na criação, status vazio/nulo é aceito e gravado como o padrão
+    # ("pendente", ver Task.from_dict)
+    if not partial and (value is None or value == ""):
+        return None
+    if not isinstance(value, str) or value not in VALID_STATUSES:
+        return f"Status inválido. Use: {', '.join(VALID_STATUSES)}"
+    return None
+
+# Verificação de cada campo aceito no corpo de criação/atualização
+_FIELD_CHECKS = {
+    "title": _check_title,
+    "description": _check_description,
+    "status": _check_status,
+}
+
+def _parse_timestamp(value):
+    """
+    Normaliza datas ISO 8601 para o formato de CURRENT_TIMESTAMP do SQLite (UTC)
+    Retorna: str ou None se inválida
+    """
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.strftime("%Y-%m-%d %H:%M:%S")
+
+def _parse_uint(value):
+    """
+    Converte um parâmetro de query em inteiro não negativo (só dígitos ASCII)
+    Retorna: int ou None se inválido ou acima de MAX_TASK_ID
+    """
+    # Mais dígitos que MAX_TASK_ID já está fora do intervalo (e evita o limite
+    # de dígitos do int())
+    if not (value.isascii() and value.isdigit()) or len(value) > len(str(MAX_TASK_ID)):
+        return None
+    number = int(value)
+    return number if number <= MAX_TASK_ID else None
 
 class TaskValidator:
     """Validador de dados de tarefas"""
     
     @staticmethod
+    @timed("validation")
     def validate_create(data):
         """
         Valida dados para criação de tarefa
         Retorna: (bool, str) - (válido, mensagem_erro)
         """
+        if not isinstance(data, dict):
+            return False, "Corpo da requisição deve ser um objeto JSON"
         if not data:
             return False, "Corpo da requisição vazio"
         
-        # Validar título
         if "title" not in data:
             return False, "Campo 'title' é obrigatório"
         
-        if not data["title"] or not data["title"].strip():
-            return False, "Campo 'title' não pode estar vazio"
-        
-        if len(data["title"]) > 200:
-            return False, "Campo 'title' deve ter no máximo 200 caracteres"
-        
-        # Validar descrição (opcional)
-        if "description" in data and data["description"]:
-            if len(data["description"]) > 1000:
-                return False, "Campo 'description' deve ter no máximo 1000 caracteres"
-        
-        # Validar status (opcional)
-        if "status" in data and data["status"]:
-            if data["status"] not in VALID_STATUSES:
-                return False, f"Status inválido. Use: {', '.join(VALID_STATUSES)}"
-        
-        return True, None
+        return TaskValidator._validate_fields(data, partial=False)
     
     @staticmethod
+    @timed("validation")
     def validate_update(data):
         """
         Valida dados para atualização de tarefa
         Retorna: (bool, str) - (válido, mensagem_erro)
         """
+        if not isinstance(data, dict):
+            return False, "Corpo da requisição deve ser um objeto JSON"
         if not data:
             return False, "Corpo da requisição vazio"
         
-        # Pelo menos um campo deve ser fornecido
-        allowed_fields = {"title", "description", "status"}
-        has_field = any(field in data for field in allowed_fields)
+        return TaskValidator._validate_fields(data, partial=True)
+    
+    @staticmethod
+    def _validate_fields(data, partial):
+        """
+        Valida tipo e tamanho de title, description e status em uma única
+        passada pelo corpo; campos desconhecidos são ignorados
+        Args:
+            data: dict do corpo
+            partial: True na atualização (ao menos um campo conhecido é exigido
+                     e status nulo não é aceito)
+        Retorna: (bool, str) - (válido, mensagem_erro)
+        """
+        has_field = False
+        for field, value in data.items():
+            check = _FIELD_CHECKS.get(field)
+            if check is None:
+                continue
+            has_field = True
+            error_msg = check(value, partial)
+            if error_msg:
+                return False, error_msg
         
         if not has_field:
             return False, "Nenhum campo válido para atualizar (title, description, status)"
         
-        # Validar título (se fornecido)
-        if "title" in data:
-            if not data["title"] or not data["title"].strip():
-                return False, "Campo 'title' não pode estar vazio"
-            
-            if len(data["title"]) > 200:
-                return False, "Campo 'title' deve ter no máximo 200 caracteres"
-        
-        # Validar descrição (se fornecido)
-        if "description" in data and data["description"]:
-            if len(data["description"]) > 1000:
-                return False, "Campo 'description' deve ter no máximo 1000 caracteres"
-        
-        # Validar status (se fornecido)
-        if "status" in data:
-            if data["status"] not in VALID_STATUSES:
-                return False, f"Status inválido. Use: {', '.join(VALID_STATUSES)}"
-        
         return True, None
     
     @staticmethod
+    @timed("validation")
     def validate_id(task_id):
         """
         Valida ID da tarefa
         Retorna: (bool, str) - (válido, mensagem_erro)
         """
-        if not isinstance(task_id, int) or task_id <= 0:
+        if not isinstance(task_id, int) or isinstance(task_id, bool) or not 0 < task_id <= MAX_TASK_ID:
             return False, "ID inválido"
         
-        return True, None
\ No newline at end of file
+        return True, None
+    
+    @staticmethod
+    @timed("validation")
+    def validate_idempotency_key(key):
+        """
+        Valida o header Idempotency-Key: texto ASCII visível (sem espaços nas
+        pontas) de até IDEMPOTENCY_KEY_MAX_LENGTH caracteres
+        Retorna: (bool, str) - (válido, mensagem_erro)
+        """
+        if not key or not 1 <= len(key) <= config.IDEMPOTENCY_KEY_MAX_LENGTH:
+            return False, f"Header 'Idempotency-Key' deve ter entre 1 e {config.IDEMPOTENCY_KEY_MAX_LENGTH} caracteres"
+        if not all(" " <= char <= "~" for char in key) or key != key.strip():
+            return False, "Header 'Idempotency-Key' deve conter apenas caracteres ASCII visíveis"
+        
+        return True, None
+    
+    @staticmethod
+    @timed("validation")
+    def parse_list_params(query):
+        """
+        Valida e converte os parâmetros de listagem (query string)
+        Args:
+            query: dict no formato de urllib.parse.parse_qs
+        Retorna: (dict, str) - (filtros, mensagem_erro)
+        """
+        query = query or {}
+        filters = {
+            "limit": config.TASKS_PAGE_DEFAULT_LIMIT,
+            "after_id": None,
+            "status": None,
+            "created_from": None,
+            "created_to": None,
+        }
+        
+        # Validar limit
+        limit = _single_param(query, "limit")
+        if limit is not None:
+            limit = _parse_uint(limit)
+            if limit is None or not 1 <= limit <= config.TASKS_PAGE_MAX_LIMIT:
+                return None, f"Parâmetro 'limit' deve ser um inteiro entre 1 e {config.TASKS_PAGE_MAX_LIMIT}"
+            filters["limit"] = limit
+        
+        # Validar cursor
+        after_id = _single_param(query, "after_id")
+        if after_id is not None:
+            # O next_cursor do backend particionado traz uma posição por shard
+            # ("120.57.33"); ele vira uma tupla, conferida pelo backend
+            positions = [_parse_uint(part) for part in after_id.split(".")]
+            if None in positions:
+                return None, f"Parâmetro 'after_id' deve ser um inteiro entre 0 e {MAX_TASK_ID} ou um next_cursor da listagem"
+            filters["after_id"] = positions[0] if len(positions) == 1 else tuple(positions)
+        
+        # Validar status
+        status = _single_param(query, "status")
+        if status is not None:
+            if status not in VALID_STATUSES:
+                return None, f"Status inválido. Use: {', '.join(VALID_STATUSES)}"
+            filters["status"] = status
+        
+        # Validar intervalo de criação
+        for name in ("created_from", "created_to"):
+            value = _single_param(query, name)
+            if value is not None:
+                timestamp = _parse_timestamp(value)
+                if timestamp is None:
+                    return None, f"Parâmetro '{name}' deve ser uma data ISO 8601 (ex.: 2024-01-31 ou 2024-01-31T12:00:00)"
+                filters[name] = timestamp
+        
+        return filters, None
+    
+    @staticmethod
+    @timed("validation")
+    def parse_search_params(query):
+        """
+        Valida os parâmetros da busca textual (q, limit, offset, status)
+        Retorna: (dict, str) - (filtros, mensagem_erro)
+        """
+        query = query or {}
+        
+        text = _single_param(query, "q")
+        if text is None or not text.strip():
+            return None, "Parâmetro 'q' é obrigatório"
+        if len(text) > config.SEARCH_QUERY_MAX_LENGTH:
+            return None, f"Parâmetro 'q' deve ter no máximo {config.SEARCH_QUERY_MAX_LENGTH} caracteres"
+        
+        filters = {
+            "text": text,
+            "limit": config.SEARCH_PAGE_DEFAULT_LIMIT,
+            "offset": 0,
+            "status": None,
+        }
+        
+        limit = _single_param(query, "limit")
+        if limit is not None:
+            limit = _parse_uint(limit)
+            if limit is None or not 1 <= limit <= config.SEARCH_PAGE_MAX_LIMIT:
+                return None, f"Parâmetro 'limit' deve ser um inteiro entre 1 e {config.SEARCH_PAGE_MAX_LIMIT}"
+            filters["limit"] = limit
+        
+        offset = _single_param(query, "offset")
+        if offset is not None:
+            # offset + limit (+1 para saber se há mais resultados) também vai
+            # para o LIMIT do SQLite e precisa caber em 64 bits
+            max_offset = MAX_TASK_ID - config.SEARCH_PAGE_MAX_LIMIT - 1
+            offset = _parse_uint(offset)
+            if offset is None or offset > max_offset:
+                return None, f"Parâmetro 'offset' deve ser um inteiro entre 0 e {max_offset}"
+            filters["offset"] = offset
+        
+        status = _single_param(query, "status")
+        if status is not None:
+            if status not in VALID_STATUSES:
+                return None, f"Status inválido. Use: {', '.join(VALID_STATUSES)}"
+            filters["status"] = status
+        
+        return filters, None
+    
+    @staticmethod
+    @timed("validation")
+    def parse_stats_params(query):
+        """
+        Valida os parâmetros das estatísticas (days)
+        Retorna: (dict, str) - (filtros, mensagem_erro)
+        """
+        query = query or {}
+        filters = {"days": config.STATS_DEFAULT_DAYS}
+        
+        days = _single_param(query, "days")
+        if days is not None:
+            days = _parse_uint(days)
+            if days is None or not 1 <= days <= config.STATS_MAX_DAYS:
+                return None, f"Parâmetro 'days' deve ser um inteiro entre 1 e {config.STATS_MAX_DAYS}"
+            filters["days"] = days
+        
+        return filters, None
+    
+    @staticmethod
+    @timed("validation")
+    def parse_export_params(query):
+        """
+        Valida os parâmetros de exportação: mesmos filtros da listagem
+        (exceto limit) e o formato de saída
+        Retorna: (dict, str) - (filtros, mensagem_erro)
+        """
+        query = query or {}
+        filters, error_msg = TaskValidator.parse_list_params(
+            {k: v for k, v in query.items() if k != "limit"}
+        )
+        if error_msg:
+            return None, error_msg
+        
+        del filters["limit"]
+        
+        export_format = _single_param(query, "format") or "json"
+        if export_format not in EXPORT_FORMATS:
+            return None, f"Formato inválido. Use: {', '.join(EXPORT_FORMATS)}"
+        filters["format"] = export_format
+        
+        return filters, None
+    
+    @staticmethod
+    @timed("validation")
+    def parse_changes_params(query, last_event_id=None):
+        """
+        Valida os parâmetros do feed de alterações (since, wait, limit)
+        Args:
+            query: query string já decodificada
+            last_event_id: header Last-Event-ID (reconexão SSE), usado quando
+                           since não é informado
+        Retorna: (dict, str) - (parâmetros, mensagem_erro); since None = a partir de agora
+        """
+        query = query or {}
+        params = {
+            "since": None,
+            "wait": 0.0,
+            "limit": config.CHANGES_PAGE_DEFAULT_LIMIT,
+        }
+        
+        since = _single_param(query, "since")
+        if since is None:
+            since = last_event_id.strip() if last_event_id else None
+        if since is not None:
+            since = _parse_uint(since)
+            if since is None:
+                return None, f"Parâmetro 'since' deve ser um inteiro entre 0 e {MAX_TASK_ID}"
+            params["since"] = since
+        
+        wait = _single_param(query, "wait")
+        if wait is not None:
+            try:
+                seconds = float(wait)
+            except ValueError:
+                seconds = -1.0
+            # NaN falha na comparação
+            if not 0 <= seconds <= config.CHANGES_MAX_WAIT:
+                return None, f"Parâmetro 'wait' deve ser um número de segundos entre 0 e {config.CHANGES_MAX_WAIT:g}"
+            params["wait"] = seconds
+        
+        limit = _single_param(query, "limit")
+        if limit is not None:
+            limit = _parse_uint(limit)
+            if limit is None or not 1 <= limit <= config.CHANGES_PAGE_MAX_LIMIT:
+                return None, f"Parâmetro 'limit' deve ser um inteiro entre 1 e {config.CHANGES_PAGE_MAX_LIMIT}"
+            params["limit"] = limit
+        
+        return params, None
+    
+    @staticmethod
+    @timed("validation")
+    def extract_batch(data, key):
+        """
+        Extrai a lista de itens de um corpo de operação em lote.
+        Aceita uma lista (JSON ou NDJSON) ou um objeto {key: [...]}
+        Retorna: (list, str) - (itens, mensagem_erro)
+        """
+        items = data.get(key) if isinstance(data, dict) else data
+        
+        if not isinstance(items, list) or not items:
+            return None, f"Envie uma lista não vazia de itens (ou {{\"{key}\": [...]}})"
+        
+        return items, None
+    
+    @staticmethod
+    @timed("validation")
+    def validate_batch(items, validate_item):
+        """
+        Valida todos os itens de um lote em uma única passada
+        Args:
+            items: lista de itens
+            validate_item: função de validação de um item, retornando (bool, str)
+        Retorna: lista com a mensagem de erro de cada item (None = válido)
+        """
+        errors = []
+        for item in items:
+            if not isinstance(item, dict):
+                errors.append("Item deve ser um objeto JSON")
+                continue
+            try:
+                is_valid, error_msg = validate_item(item)
+            except (TypeError, AttributeError):
+                is_valid, error_msg = False, "Tipo de campo inválido"
+            errors.append(None if is_valid else error_msg)
+        return errors
+    
+    @staticmethod
+    @timed("validation")
+    def validate_batch_update(data):
+        """
+        Valida um item de atualização em lote: {"id": ..., campos a atualizar}
+        Retorna: (bool, str) - (válido, mensagem_erro)
+        """
+        is_valid, error_msg = TaskValidator.validate_id(data.get("id"))
+        if not is_valid:
+            return False, error_msg
+        
+        # "id" não é um campo atualizável e é ignorado pela validação dos campos
+        return TaskValidator.validate_update(data)
+    
+    @staticmethod
+    @timed("validation")
+    def parse_batch_id(item):
+        """
+        Extrai o ID de um item de remoção em lote: 5 ou {"id": 5}
+        Retorna: (int, str) - (id, mensagem_erro)
+        """
+        task_id = item.get("id") if isinstance(item, dict) else item
+        
+        if isinstance(task_id, bool):
+            return None, "ID inválido"
+        is_valid, error_msg = TaskValidator.validate_id(task_id)
+        if not is_valid:
+            return None, error_msg
+        
+        return task_id, None
@@ -0,0 +1,6 @@
+"""
+Benchmarks da To-Do API
+
+Scripts executáveis com `python -m bench.<nome>`; todos usam um banco
+temporário e imprimem o resultado em JSON.
+"""
@@ -0,0 +1,210 @@
+"""
+Micro-benchmark do roteamento: compara o Router original (cadeias de if por
+método e re.match sem pré-compilação a cada requisição) com a tabela de rotas
+compilada (dict para caminhos fixos e árvore por segmento para parâmetros).
+
+Os endpoints são substituídos por funções vazias, então o tempo medido é só o
+de roteamento: separar a query string, casar o caminho, converter parâmetros
+e chamar o endpoint. A tabela compilada é medida com e sem a instrumentação
+de métricas (TODO_METRICS_ENABLED) para estimar o custo dela por requisição.
+
+Uso:
+    python -m bench.dispatch --iterations 200000
+"""
+import argparse
+import inspect
+import json
+import re
+import time
+from urllib.parse import urlsplit, parse_qs
+
+from app import config, routes
+from app.routes import ROUTES, Router, RouteTable
+
+# Mistura de requisições usada nas duas implementações
+REQUESTS = [
+    ("GET", "/tasks?limit=50&status=pendente", None),
+    ("GET", "/tasks/123", None),
+    ("GET", "/tasks/123", None),
+    ("PUT", "/tasks/123", {}),
+    ("POST", "/tasks", {}),
+    ("DELETE", "/tasks/123", None),
+    ("GET", "/tasks/search?q=relatorio", None),
+    ("PATCH", "/tasks/batch", []),
+    ("GET", "/status", None),
+    ("GET", "/nao-existe", None),
+]
+
+
+def _noop(handler, *args, **kwargs):
+    return None
+
+
+class _Stub:
+    """Substitui os controllers e o ResponseBuilder por chamadas vazias"""
+
+    def __getattr__(self, name):
+        return _noop
+
+
+Stub = _Stub()
+
+
+class _StubHandler:
+    """Handler mínimo: as métricas envolvem o wfile e leem o status_code"""
+
+    def __init__(self):
+        self.wfile = None
+        self.status_code = None
+
+
+class LegacyRouter:
+    """Reprodução do Router original"""
+
+    @staticmethod
+    def dispatch(handler, method, path, body=None):
+        if method == "GET":
+            return LegacyRouter.route_get(handler, path)
+
+        path = urlsplit(path).path
+        if method == "POST":
+            return LegacyRouter.route_post(handler, path, body)
+        if method == "PUT":
+            return LegacyRouter.route_put(handler, path, body)
+        if method == "PATCH":
+            return LegacyRouter.route_patch(handler, path, body)
+        if method == "DELETE":
+            return LegacyRouter.route_delete(handler, path, body)
+
+        return Stub.error(handler, "Método não permitido", 405)
+
+    @staticmethod
+    def route_post(handler, path, body):
+        if path == "/tasks":
+            return Stub.create(handler, body)
+        elif path == "/tasks/batch":
+            return Stub.create_batch(handler, body)
+        else:
+            return Stub.not_found(handler, "Rota não encontrada")
+
+    @staticmethod
+    def route_get(handler, path):
+        url = urlsplit(path)
+        path = url.path
+        query = parse_qs(url.query)
+
+        if path == "/tasks":
+            if query.get("stream", ["0"])[-1] in ("1", "true"):
+                return Stub.export(handler, query)
+            return Stub.list_all(handler, query)
+        if path == "/tasks/export":
+            return Stub.export(handler, query)
+        if path == "/tasks/stats":
+            return Stub.stats(handler, query)
+        if path == "/tasks/search":
+            return Stub.search(handler, query)
+        if path == "/status":
+            return Stub.show(handler)
+
+        match = re.match(r"^/tasks/(\d+)$", path)
+        if match:
+            task_id = int(match.group(1))
+            return Stub.get_by_id(handler, task_id)
+
+        return Stub.not_found(handler, "Rota não encontrada")
+
+    @staticmethod
+    def route_put(handler, path, body):
+        match = re.match(r"^/tasks/(\d+)$", path)
+        if match:
+            task_id = int(match.group(1))
+            return Stub.update(handler, task_id, body)
+        return Stub.not_found(handler, "Rota não encontrada")
+
+    @staticmethod
+    def route_patch(handler, path, body):
+        if path == "/tasks/batch":
+            return Stub.update_batch(handler, body)
+        return Stub.not_found(handler, "Rota não encontrada")
+
+    @staticmethod
+    def route_delete(handler, path, body=None):
+        if path == "/tasks/batch":
+            return Stub.delete_batch(handler, body)
+        match = re.match(r"^/tasks/(\d+)$", path)
+        if match:
+            task_id = int(match.group(1))
+            return Stub.delete(handler, task_id)
+        return Stub.not_found(handler, "Rota não encontrada")
+
+
+def _stub_endpoint(endpoint):
+    """Endpoint vazio com a mesma assinatura (query/body) do original"""
+    parameters = inspect.signature(endpoint).parameters
+
+    def with_query(handler, query, **params):
+        return None
+
+    def with_body(handler, body, **params):
+        return None
+
+    def handler_only(handler, **params):
+        return None
+
+    if "query" in parameters:
+        return with_query
+    if "body" in parameters:
+        return with_body
+    return handler_only
+
+
+def _measure(dispatch, iterations):
+    handler = _StubHandler()
+    started = time.perf_counter()
+    for i in range(iterations):
+        method, path, body = REQUESTS[i % len(REQUESTS)]
+        dispatch(handler, method, path, body)
+    elapsed = time.perf_counter() - started
+    return {
+        "dispatches": iterations,
+        "elapsed_seconds": round(elapsed, 3),
+        "ns_per_dispatch": round(elapsed / iterations * 1e9, 1),
+        "dispatches_per_second": round(iterations / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200000)
+    args = parser.parse_args()
+
+    # Mesma tabela de rotas da aplicação, com endpoints vazios
+    original_table = Router.table
+    Router.table = RouteTable(
+        (method, template, _stub_endpoint(endpoint)) for method, template, endpoint in ROUTES
+    )
+    original_builder = routes.ResponseBuilder
+    original_metrics = config.METRICS_ENABLED
+    routes.ResponseBuilder = Stub
+    try:
+        config.METRICS_ENABLED = False
+        current = _measure(Router.dispatch, args.iterations)
+        config.METRICS_ENABLED = True
+        with_metrics = _measure(Router.dispatch, args.iterations)
+    finally:
+        Router.table = original_table
+        routes.ResponseBuilder = original_builder
+        config.METRICS_ENABLED = original_metrics
+
+    baseline = _measure(LegacyRouter.dispatch, args.iterations)
+
+    print(json.dumps({
+        "requests_mix": [f"{method} {path}" for method, path, _ in REQUESTS],
+        "baseline": baseline,
+        "current": current,
+        "current_with_metrics": with_metrics,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
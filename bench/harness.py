@@ -0,0 +1,202 @@
+"""
+Utilitários compartilhados pelos benchmarks: sobe o servidor em um
+subprocesso com banco temporário, popula tarefas e mede latências.
+"""
+import http.client
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values, fraction):
+    """Percentil por interpolação linear de uma lista já ordenada"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    weight = position - lower
+    return sorted_values[lower] * (1 - weight) + sorted_values[upper] * weight
+
+
+def summarize(latencies, elapsed):
+    """Resumo de throughput e latências (em milissegundos)"""
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(len(ordered) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 3) if ordered else None,
+        "p95_ms": round(percentile(ordered, 0.95) * 1000, 3) if ordered else None,
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3) if ordered else None,
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else None,
+    }
+
+
+class ServerProcess:
+    """
+    Sobe `python -m app.server` em um subprocesso com banco temporário
+
+    Uso:
+        with ServerProcess(["--mode", "asyncio"]) as server:
+            conn = server.connection()
+    """
+
+    def __init__(self, args=None, env=None, startup_timeout=15.0):
+        self.args = list(args or [])
+        self.env = env or {}
+        self.startup_timeout = startup_timeout
+        self.port = free_port()
+        self.tmpdir = None
+        self.process = None
+
+    @property
+    def db_path(self):
+        return os.path.join(self.tmpdir, "bench.db")
+
+    def __enter__(self):
+        self.tmpdir = tempfile.mkdtemp(prefix="todo-bench-")
+        env = dict(os.environ)
+        env.update({"PYTHONPATH": ROOT, "TODO_SERVER_ACCESS_LOG": "false"})
+        env.update(self.env)
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "app.server", str(self.port), "--db", self.db_path] + self.args,
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        )
+        self._wait_ready()
+        return self
+
+    def _wait_ready(self):
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(
+                    f"Servidor terminou na inicialização: {self.process.stderr.read().decode()}"
+                )
+            try:
+                conn = self.connection(timeout=1)
+                conn.request("GET", "/tasks?limit=1")
+                conn.getresponse().read()
+                conn.close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise RuntimeError("Servidor não respondeu a tempo")
+
+    def connection(self, timeout=30):
+        return http.client.HTTPConnection("127.0.0.1", self.port, timeout=timeout)
+
+    def __exit__(self, *exc):
+        if self.process and self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+            try:
+                self.process.wait(timeout=20)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        if self.tmpdir:
+            shutil.rmtree(self.tmpdir, ignore_errors=True)
+
+
+def request(conn, method, path, body=None, headers=None):
+    """Executa uma requisição e retorna (status, corpo)"""
+    payload = json.dumps(body) if body is not None else None
+    all_headers = {"Content-Type": "application/json"}
+    all_headers.update(headers or {})
+    conn.request(method, path, body=payload, headers=all_headers)
+    response = conn.getresponse()
+    return response.status, response.read()
+
+
+def seed_task(i):
+    """Tarefa sintética usada para popular o banco"""
+    return {
+        "title": f"Tarefa {i}",
+        "description": f"Descrição da tarefa {i}",
+        "status": ["pendente", "em_andamento", "completo"][i % 3],
+    }
+
+
+def seed(server, count, batch=None):
+    """
+    Cria `count` tarefas e retorna seus ids
+    Args:
+        batch: se informado, usa POST /tasks/batch com até `batch` tarefas por
+               requisição; caso contrário, um POST /tasks por tarefa
+    """
+    conn = server.connection()
+    ids = []
+    if batch:
+        for start in range(0, count, batch):
+            items = [seed_task(i) for i in range(start, min(start + batch, count))]
+            status, data = request(conn, "POST", "/tasks/batch", items)
+            if status != 201:
+                raise RuntimeError(f"Falha ao popular: HTTP {status} {data[:200]!r}")
+            ids.extend(result["task"]["id"] for result in json.loads(data)["results"])
+    else:
+        for i in range(count):
+            status, data = request(conn, "POST", "/tasks", seed_task(i))
+            if status != 201:
+                raise RuntimeError(f"Falha ao popular: HTTP {status} {data[:200]!r}")
+            ids.append(json.loads(data)["id"])
+    conn.close()
+    return ids
+
+
+def run_clients(server, workers, duration, make_request):
+    """
+    Dispara `workers` clientes concorrentes, cada um com sua conexão keep-alive,
+    por `duration` segundos
+    Args:
+        make_request: função (conn, worker_index, iteration) -> status HTTP
+    Retorna: (latências em segundos, erros, tempo total)
+    """
+    latencies = [[] for _ in range(workers)]
+    errors = [0] * workers
+    stop_at = time.perf_counter() + duration
+    barrier = threading.Barrier(workers + 1)
+
+    def client(index):
+        conn = server.connection()
+        local = latencies[index]
+        iteration = 0
+        barrier.wait()
+        while time.perf_counter() < stop_at:
+            started = time.perf_counter()
+            try:
+                status = make_request(conn, index, iteration)
+                if status >= 500:
+                    errors[index] += 1
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                conn.close()
+                conn = server.connection()
+            local.append(time.perf_counter() - started)
+            iteration += 1
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    started = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return [value for values in latencies for value in values], sum(errors), elapsed
@@ -0,0 +1,330 @@
+"""
+Teste de carga da API: sobe o servidor com banco temporário, popula N tarefas
+e executa misturas de operações (workloads) com vários clientes concorrentes,
+cada um com sua conexão keep-alive. Cada combinação de modo do servidor,
+backend de armazenamento, perfil do SQLite e workload é uma execução separada;
+o perfil só se aplica aos backends em SQLite (sqlite e sharded) e o backend memory
+não roda em prefork.
+
+O relatório em JSON traz throughput e p50/p95/p99 por execução e por operação.
+Com --compare, as execuções são comparadas com um relatório anterior e o
+processo termina com código 1 se houver regressão acima do limite.
+
+Uso:
+    python -m bench.load --workloads read-heavy write-heavy --duration 10
+    python -m bench.load --modes threaded asyncio --profiles balanced fast --output atual.json
+    python -m bench.load --backends sqlite memory sharded --workloads read-heavy write-heavy mixed
+    python -m bench.load --compare anterior.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import time
+from collections import Counter
+
+from bench.harness import ServerProcess, request, run_clients, seed, seed_task, summarize
+
+MODES = {
+    "threaded": ["--mode", "threaded"],
+    "asyncio": ["--mode", "asyncio"],
+    "prefork": ["--mode", "prefork"],
+}
+
+PROFILES = ["safe", "balanced", "fast", "legacy"]
+
+BACKENDS = ["sqlite", "memory", "sharded"]
+
+# Operações e pesos de cada workload
+WORKLOADS = {
+    "read-heavy": [("get", 80), ("list", 15), ("stats", 5)],
+    "write-heavy": [("create", 40), ("update", 40), ("delete", 10), ("get", 10)],
+    "paginate": [("paginate", 100)],
+    "batch": [("batch_create", 40), ("batch_update", 40), ("batch_delete", 20)],
+    "mixed": [("get", 50), ("list", 10), ("search", 5), ("create", 15), ("update", 15), ("delete", 5)],
+}
+
+STATUSES = ["pendente", "em_andamento", "completo", "cancelado"]
+
+
+class Worker:
+    """Estado de um cliente: conexão, gerador aleatório e tarefas criadas por ele"""
+
+    def __init__(self, index, ids, args):
+        self.index = index
+        self.ids = ids
+        self.page_size = args.page_size
+        self.batch_size = args.batch_size
+        self.rng = random.Random(args.random_seed + index)
+        self.created = []
+        self.cursor = None
+        self.latencies = {}
+        self.statuses = Counter()
+
+    def random_id(self):
+        return self.ids[self.rng.randrange(len(self.ids))]
+
+    def new_task(self):
+        return seed_task(self.rng.randrange(1_000_000))
+
+
+def op_get(conn, worker):
+    return request(conn, "GET", f"/tasks/{worker.random_id()}")[0]
+
+
+def op_list(conn, worker):
+    status = worker.rng.choice(STATUSES)
+    return request(conn, "GET", f"/tasks?limit={worker.page_size}&status={status}")[0]
+
+
+def op_paginate(conn, worker):
+    """Percorre a listagem página a página, voltando ao início no fim"""
+    path = f"/tasks?limit={worker.page_size}"
+    if worker.cursor is not None:
+        path += f"&after_id={worker.cursor}"
+    status, data = request(conn, "GET", path)
+    worker.cursor = json.loads(data)["next_cursor"] if status == 200 else None
+    return status
+
+
+def op_search(conn, worker):
+    return request(conn, "GET", f"/tasks/search?q=tarefa+{worker.rng.randrange(1000)}*")[0]
+
+
+def op_stats(conn, worker):
+    return request(conn, "GET", "/tasks/stats?days=7")[0]
+
+
+def op_create(conn, worker):
+    status, data = request(conn, "POST", "/tasks", worker.new_task())
+    if status == 201:
+        worker.created.append(json.loads(data)["id"])
+    return status
+
+
+def op_update(conn, worker):
+    return request(conn, "PUT", f"/tasks/{worker.random_id()}", {
+        "status": worker.rng.choice(STATUSES),
+    })[0]
+
+
+def op_delete(conn, worker):
+    """Remove uma tarefa criada pelo próprio cliente (ou cria uma, se não houver)"""
+    if not worker.created:
+        return op_create(conn, worker)
+    return request(conn, "DELETE", f"/tasks/{worker.created.pop()}")[0]
+
+
+def op_batch_create(conn, worker):
+    items = [worker.new_task() for _ in range(worker.batch_size)]
+    status, data = request(conn, "POST", "/tasks/batch", items)
+    if status == 201:
+        worker.created.extend(result["task"]["id"] for result in json.loads(data)["results"])
+    return status
+
+
+def op_batch_update(conn, worker):
+    items = [
+        {"id": worker.random_id(), "status": worker.rng.choice(STATUSES)}
+        for _ in range(worker.batch_size)
+    ]
+    return request(conn, "PATCH", "/tasks/batch", items)[0]
+
+
+def op_batch_delete(conn, worker):
+    if len(worker.created) < worker.batch_size:
+        return op_batch_create(conn, worker)
+    ids = worker.created[-worker.batch_size:]
+    del worker.created[-worker.batch_size:]
+    return request(conn, "DELETE", "/tasks/batch", ids)[0]
+
+
+OPERATIONS = {
+    "get": op_get,
+    "list": op_list,
+    "paginate": op_paginate,
+    "search": op_search,
+    "stats": op_stats,
+    "create": op_create,
+    "update": op_update,
+    "delete": op_delete,
+    "batch_create": op_batch_create,
+    "batch_update": op_batch_update,
+    "batch_delete": op_batch_delete,
+}
+
+
+def run_workload(mode, backend, profile, workload, args):
+    server_args = MODES[mode] + ["--threads", str(args.threads), "--backend", backend]
+    if mode == "prefork":
+        server_args += ["--processes", str(args.processes)]
+    env = {"TODO_DB_STORAGE_PROFILE": profile} if profile else {}
+
+    names = [name for name, _ in WORKLOADS[workload]]
+    weights = [weight for _, weight in WORKLOADS[workload]]
+
+    with ServerProcess(server_args, env=env) as server:
+        ids = seed(server, args.seed, batch=500)
+        workers = [Worker(i, ids, args) for i in range(args.workers)]
+
+        def make_request(conn, index, iteration, record=True):
+            worker = workers[index]
+            name = worker.rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            status = OPERATIONS[name](conn, worker)
+            if record:
+                worker.latencies.setdefault(name, []).append(time.perf_counter() - started)
+                worker.statuses[status] += 1
+            return status
+
+        if args.warmup > 0:
+            run_clients(server, args.workers, args.warmup,
+                        lambda conn, index, iteration: make_request(conn, index, iteration, False))
+        latencies, errors, elapsed = run_clients(server, args.workers, args.duration, make_request)
+
+    operations = {}
+    for name in names:
+        values = [value for worker in workers for value in worker.latencies.get(name, [])]
+        if values:
+            operations[name] = summarize(values, elapsed)
+
+    statuses = Counter()
+    for worker in workers:
+        statuses.update(worker.statuses)
+
+    result = summarize(latencies, elapsed)
+    result["errors"] = errors
+    return {
+        "mode": mode,
+        "backend": backend,
+        "profile": profile,
+        "workload": workload,
+        "summary": result,
+        "operations": operations,
+        "status_codes": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+def run_key(run):
+    # Relatórios anteriores aos backends só têm execuções com sqlite
+    return (run["mode"], run.get("backend", "sqlite"), run["profile"], run["workload"])
+
+
+def combinations(args):
+    """(modo, backend, perfil, workload) de cada execução"""
+    for mode in args.modes:
+        for backend in args.backends:
+            if backend == "memory" and mode == "prefork":
+                print("Ignorando memory em prefork: os dados ficam em cada processo", file=sys.stderr)
+                continue
+            for profile in (args.profiles if backend != "memory" else [None]):
+                for workload in args.workloads:
+                    yield mode, backend, profile, workload
+
+
+def compare(report, baseline, threshold):
+    """
+    Compara cada execução com a de mesma chave (modo, backend, perfil, workload) do
+    relatório anterior. É regressão quando o throughput cai ou o p99 sobe
+    mais que `threshold` (fração)
+    Retorna: (lista de comparações, houve regressão)
+    """
+    previous = {run_key(run): run for run in baseline.get("runs", [])}
+    comparisons = []
+    regressed = False
+    for run in report["runs"]:
+        before = previous.get(run_key(run))
+        if before is None:
+            continue
+        old, new = before["summary"], run["summary"]
+        throughput_change = _change(old["throughput_rps"], new["throughput_rps"])
+        p99_change = _change(old["p99_ms"], new["p99_ms"])
+        regression = (
+            (throughput_change is not None and throughput_change < -threshold)
+            or (p99_change is not None and p99_change > threshold)
+        )
+        regressed = regressed or regression
+        comparisons.append({
+            "mode": run["mode"],
+            "backend": run["backend"],
+            "profile": run["profile"],
+            "workload": run["workload"],
+            "throughput_change": throughput_change,
+            "p99_change": p99_change,
+            "regression": regression,
+        })
+    return comparisons, regressed
+
+
+def _change(old, new):
+    if not old or new is None:
+        return None
+    return round((new - old) / old, 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workloads", nargs="+", choices=sorted(WORKLOADS), default=["mixed"])
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=["threaded"])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=["sqlite"])
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=["balanced"],
+                        help="Perfis de armazenamento dos backends em SQLite")
+    parser.add_argument("--workers", type=int, default=16, help="Clientes concorrentes")
+    parser.add_argument("--duration", type=float, default=5.0, help="Segundos medidos por execução")
+    parser.add_argument("--warmup", type=float, default=1.0, help="Segundos de aquecimento (descartados)")
+    parser.add_argument("--seed", type=int, default=2000, help="Tarefas criadas antes da medição")
+    parser.add_argument("--threads", type=int, default=16, help="Threads do servidor")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="Processos no modo prefork")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--random-seed", type=int, default=42)
+    parser.add_argument("--output", help="Grava o relatório neste arquivo além de imprimi-lo")
+    parser.add_argument("--compare", help="Relatório anterior para detectar regressões")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Variação tolerada de throughput/p99 no --compare (fração)")
+    args = parser.parse_args()
+
+    report = {
+        "environment": {
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        },
+        "config": {
+            "workers": args.workers,
+            "duration_seconds": args.duration,
+            "warmup_seconds": args.warmup,
+            "seeded_tasks": args.seed,
+            "server_threads": args.threads,
+            "prefork_processes": args.processes,
+            "page_size": args.page_size,
+            "batch_size": args.batch_size,
+        },
+        "runs": [
+            run_workload(mode, backend, profile, workload, args)
+            for mode, backend, profile, workload in combinations(args)
+        ],
+    }
+
+    regressed = False
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["comparison"], regressed = compare(report, baseline, args.threshold)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""
+Micro-benchmark das escritas do TaskRepository: compara a implementação
+original (uma conexão nova por chamada, find_by_id antes e depois do UPDATE
+e antes do DELETE) com a atual (um único statement com RETURNING/rowcount,
+na mesma conexão e transação).
+
+Conta os statements de dados executados por operação (ignorando PRAGMA e
+controle de transação) e mede a latência de POST/PUT/DELETE no repositório.
+
+Uso:
+    python -m bench.repository_roundtrips --iterations 2000
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+from app import config
+from app.database import connection
+from app.database.task_repository import TaskRepository, SUPPORTS_RETURNING
+from app.models.task import Task
+from bench.harness import summarize
+
+CONTROL_PREFIXES = ("PRAGMA", "BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE")
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, statement):
+        if not statement.lstrip().upper().startswith(CONTROL_PREFIXES):
+            self.count += 1
+
+
+class BaselineRepository:
+    """Reprodução da implementação original, com uma conexão por chamada"""
+
+    def __init__(self, db_path, counter):
+        self.db_path = db_path
+        self.counter = counter
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.set_trace_callback(self.counter)
+        return conn
+
+    def find_by_id(self, task_id):
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT id, title, description, status, created_at FROM tasks WHERE id = ?",
+                (task_id,)
+            ).fetchone()
+            return Task.from_db_row(row)
+        finally:
+            conn.close()
+
+    def create(self, task):
+        conn = self._connect()
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                "INSERT INTO tasks (title, description, status) VALUES (?, ?, ?)",
+                (task.title, task.description, task.status)
+            )
+            cur.execute(
+                "SELECT id, title, description, status, created_at FROM tasks WHERE id = ?",
+                (cur.lastrowid,)
+            )
+            row = cur.fetchone()
+            conn.commit()
+            return Task.from_db_row(row)
+        finally:
+            conn.close()
+
+    def update(self, task_id, updates):
+        if not self.find_by_id(task_id):
+            return None
+        conn = self._connect()
+        try:
+            set_clause = ", ".join(f"{field} = ?" for field in updates)
+            conn.execute(f"UPDATE tasks SET {set_clause} WHERE id = ?", list(updates.values()) + [task_id])
+            conn.commit()
+        finally:
+            conn.close()
+        return self.find_by_id(task_id)
+
+    def delete(self, task_id):
+        if not self.find_by_id(task_id):
+            return False
+        conn = self._connect()
+        try:
+            conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
+            conn.commit()
+        finally:
+            conn.close()
+        return True
+
+
+def _measure(repository, counter, iterations):
+    results = {}
+    ids = []
+
+    operations = [
+        ("create", lambda i: ids.append(repository.create(Task(title=f"Tarefa {i}")).id)),
+        ("update", lambda i: repository.update(ids[i], {"status": "completo"})),
+        ("delete", lambda i: repository.delete(ids[i])),
+    ]
+    for name, operation in operations:
+        counter.count = 0
+        latencies = []
+        started = time.perf_counter()
+        for i in range(iterations):
+            op_started = time.perf_counter()
+            operation(i)
+            latencies.append(time.perf_counter() - op_started)
+        elapsed = time.perf_counter() - started
+
+        result = summarize(latencies, elapsed)
+        result["statements_per_op"] = round(counter.count / iterations, 2)
+        results[name] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="todo-bench-")
+    try:
+        config.DB_PATH = os.path.join(tmpdir, "bench.db")
+        with contextlib.redirect_stdout(sys.stderr):
+            connection.init_database()
+
+        baseline_counter = StatementCounter()
+        baseline = _measure(BaselineRepository(config.DB_PATH, baseline_counter), baseline_counter, args.iterations)
+
+        # Conta os statements das conexões do pool e da thread escritora
+        current_counter = StatementCounter()
+        configure_pool, configure_writer = connection.configure_connection, connection.configure_writer_connection
+
+        def traced(configure):
+            def wrapper(conn):
+                configure(conn)
+                conn.set_trace_callback(current_counter)
+            return wrapper
+
+        connection.configure_connection = traced(configure_pool)
+        connection.configure_writer_connection = traced(configure_writer)
+        try:
+            current = _measure(TaskRepository, current_counter, args.iterations)
+        finally:
+            connection.configure_connection = configure_pool
+            connection.configure_writer_connection = configure_writer
+            connection.close_writer()
+            connection.close_pool()
+
+        print(json.dumps({
+            "iterations": args.iterations,
+            "sqlite_version": sqlite3.sqlite_version,
+            "returning": SUPPORTS_RETURNING,
+            "storage_profile": config.DB_STORAGE_PROFILE,
+            "baseline": baseline,
+            "current": current,
+        }, indent=2))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
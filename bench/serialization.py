@@ -0,0 +1,183 @@
+"""
+Micro-benchmark da serialização das listagens: compara o caminho original
+(Task com __dict__ por linha, to_dict e json.dumps) com o atual (JSON montado
+pelo SQLite com json_object e apenas concatenado no Python).
+
+Mede, para uma página de GET /tasks e para a exportação completa, o tempo
+por operação, o throughput em linhas/s e o pico de memória alocada
+(tracemalloc), além do tamanho de um Task com e sem __slots__.
+
+Uso:
+    python -m bench.serialization --rows 20000 --page-size 1000 --iterations 50
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from app import config
+from app.database import connection
+from app.database.task_repository import TaskRepository, SUPPORTS_JSON, TASK_COLUMNS
+from app.models.task import Task
+from app.utils.response import ResponseBuilder
+from bench.harness import summarize
+
+
+class DictTask:
+    """Reprodução do Task original, com __dict__ por instância"""
+
+    def __init__(self, id=None, title=None, description=None, status="pendente", created_at=None,
+                 updated_at=None, version=None):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.status = status
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.version = version
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "status": self.status,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "version": self.version
+        }
+
+
+def baseline_page(limit):
+    with connection.get_connection() as conn:
+        rows = conn.execute(
+            f"SELECT {TASK_COLUMNS} FROM tasks ORDER BY id LIMIT ?", (limit + 1,)
+        ).fetchall()
+    tasks = [DictTask(*row) for row in rows[:limit]]
+    return ResponseBuilder.encode({
+        "tasks": [task.to_dict() for task in tasks],
+        "next_cursor": tasks[-1].id if len(rows) > limit else None,
+        "limit": limit,
+    })
+
+
+def current_page(limit):
+    tasks_json, next_cursor = TaskRepository.find_page_json(limit)
+    return ResponseBuilder.encode_fragments("tasks", tasks_json, next_cursor=next_cursor, limit=limit)
+
+
+def baseline_export(batch_size):
+    for rows in TaskRepository.iter_rows(batch_size):
+        yield ", ".join(
+            json.dumps(DictTask(*row).to_dict(), ensure_ascii=False) for row in rows
+        ).encode("utf-8")
+
+
+def current_export(batch_size):
+    for items in TaskRepository.iter_json(batch_size):
+        yield ", ".join(items).encode("utf-8")
+
+
+def _drain(chunks):
+    """Consome a exportação como o servidor faria, sem acumular o corpo"""
+    return sum(len(chunk) for chunk in chunks)
+
+
+def _measure(operation, iterations, rows_per_op):
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        op_started = time.perf_counter()
+        operation()
+        latencies.append(time.perf_counter() - op_started)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = summarize(latencies, elapsed)
+    result["rows_per_second"] = round(rows_per_op * iterations / elapsed, 1) if elapsed else None
+    result["peak_memory_kib"] = round(peak / 1024, 1)
+    return result
+
+
+def _object_size(cls, count):
+    """Memória alocada por instância ao criar `count` tarefas"""
+    tracemalloc.start()
+    objects = [cls(i, f"Tarefa {i}", None, "pendente", None, None, 1) for i in range(count)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return round(current / count, 1)
+
+
+def _seed(rows):
+    conn = sqlite3.connect(config.DB_PATH)
+    conn.executemany(
+        "INSERT INTO tasks (title, description, status) VALUES (?, ?, ?)",
+        [
+            (f"Tarefa número {i}", f'Descrição "{i}" com acentuação' if i % 3 else None, "pendente")
+            for i in range(rows)
+        ]
+    )
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+
+    tmpdir = tempfile.mkdtemp(prefix="todo-bench-")
+    try:
+        config.DB_PATH = os.path.join(tmpdir, "bench.db")
+        with contextlib.redirect_stdout(sys.stderr):
+            connection.init_database()
+        _seed(args.rows)
+
+        page_size = min(args.page_size, args.rows)
+        batch_size = config.EXPORT_BATCH_SIZE
+
+        # Os dois caminhos devem produzir o mesmo documento
+        assert json.loads(baseline_page(page_size)) == json.loads(current_page(page_size))
+        assert json.loads(b"[" + b", ".join(baseline_export(batch_size)) + b"]") == \
+            json.loads(b"[" + b", ".join(current_export(batch_size)) + b"]")
+
+        results = {
+            "rows": args.rows,
+            "page_size": page_size,
+            "iterations": args.iterations,
+            "sqlite_version": sqlite3.sqlite_version,
+            "sqlite_json": SUPPORTS_JSON,
+            "task_bytes": {
+                "dict": _object_size(DictTask, 10000),
+                "slots": _object_size(Task, 10000),
+            },
+            "page": {
+                "baseline": _measure(lambda: baseline_page(page_size), args.iterations, page_size),
+                "current": _measure(lambda: current_page(page_size), args.iterations, page_size),
+            },
+            "export": {
+                "baseline": _measure(lambda: _drain(baseline_export(batch_size)), max(1, args.iterations // 10), args.rows),
+                "current": _measure(lambda: _drain(current_export(batch_size)), max(1, args.iterations // 10), args.rows),
+            },
+        }
+        connection.close_pool()
+        print(json.dumps(results, indent=2))
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
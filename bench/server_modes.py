@@ -0,0 +1,67 @@
+"""
+Compara os engines do servidor (threaded x asyncio) com o mesmo workload:
+clientes ativos fazendo GET /tasks/<id> e GET /tasks?limit=20 enquanto um
+número de conexões keep-alive fica aberto e ocioso.
+
+Uso:
+    python -m bench.server_modes --workers 16 --idle 64 --duration 5
+"""
+import argparse
+import json
+import socket
+
+from bench.harness import ServerProcess, request, run_clients, seed, summarize
+
+MODES = {
+    "threaded": ["--mode", "threaded"],
+    "asyncio": ["--mode", "asyncio"],
+}
+
+
+def bench_mode(name, args):
+    with ServerProcess(MODES[name] + ["--threads", str(args.threads)]) as server:
+        ids = seed(server, args.seed)
+        idle = [socket.create_connection(("127.0.0.1", server.port)) for _ in range(args.idle)]
+
+        def make_request(conn, worker, iteration):
+            if iteration % 5 == 0:
+                status, _ = request(conn, "GET", "/tasks?limit=20")
+            else:
+                task_id = ids[(worker * 7919 + iteration) % len(ids)]
+                status, _ = request(conn, "GET", f"/tasks/{task_id}")
+            return status
+
+        latencies, errors, elapsed = run_clients(server, args.workers, args.duration, make_request)
+        for sock in idle:
+            sock.close()
+
+    result = summarize(latencies, elapsed)
+    result["errors"] = errors
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", nargs="+", choices=sorted(MODES), default=sorted(MODES))
+    parser.add_argument("--workers", type=int, default=16, help="Clientes ativos")
+    parser.add_argument("--idle", type=int, default=0, help="Conexões keep-alive ociosas")
+    parser.add_argument("--threads", type=int, default=16, help="Threads do servidor")
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--seed", type=int, default=500)
+    args = parser.parse_args()
+
+    report = {
+        "workload": {
+            "workers": args.workers,
+            "idle_connections": args.idle,
+            "server_threads": args.threads,
+            "duration_seconds": args.duration,
+            "seeded_tasks": args.seed,
+        },
+        "results": {name: bench_mode(name, args) for name in args.modes},
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,7 +14,21 @@ def create_task(args):
     print_response(r)
 
 def list_tasks(args):
-    r = requests.get(f"{args.url}/tasks")
+    params = {}
+    if args.limit: params["limit"] = args.limit
+    if args.after_id: params["after_id"] = args.after_id
+    if args.status: params["status"] = args.status
+    if args.created_from: params["created_from"] = args.created_from
+    if args.created_to: params["created_to"] = args.created_to
+    r = requests.get(f"{args.url}/tasks", params=params)
+    print_response(r)
+
+def search_tasks(args):
+    params = {"q": args.query}
+    if args.limit: params["limit"] = args.limit
+    if args.offset: params["offset"] = args.offset
+    if args.status: params["status"] = args.status
+    r = requests.get(f"{args.url}/tasks/search", params=params)
     print_response(r)
 
 def get_task(args):
@@ -49,8 +63,20 @@ def main():
     sub = parser.add_subparsers(dest="cmd")
 
     p_list = sub.add_parser("list")
+    p_list.add_argument("--limit", type=int, default=None)
+    p_list.add_argument("--after-id", default=None, help="next_cursor of the previous page")
+    p_list.add_argument("--status", "-s", default=None)
+    p_list.add_argument("--created-from", default=None)
+    p_list.add_argument("--created-to", default=None)
     p_list.set_defaults(func=list_tasks)
 
+    p_search = sub.add_parser("search")
+    p_search.add_argument("query")
+    p_search.add_argument("--limit", type=int, default=None)
+    p_search.add_argument("--offset", type=int, default=None)
+    p_search.add_argument("--status", "-s", default=None)
+    p_search.set_defaults(func=search_tasks)
+
     p_create = sub.add_parser("create")
     p_create.add_argument("title")
     p_create.add_argument("--description", "-d", default=None)
@@ -3,5 +3,113 @@ CREATE TABLE IF NOT EXISTS tasks (
     title TEXT NOT NULL,
     description TEXT,
     status TEXT NOT NULL DEFAULT 'pendente',
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-);
\ No newline at end of file
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    version INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE INDEX IF NOT EXISTS idx_tasks_status_id ON tasks (status, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at);
+
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT OR IGNORE INTO table_versions (name, version) VALUES ('tasks', 0);
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    title,
+    description,
+    content='tasks',
+    content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF title, description ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, title, description)
+    VALUES ('delete', old.id, old.title, old.description);
+    INSERT INTO tasks_fts (rowid, title, description)
+    VALUES (new.id, new.title, new.description);
+END;
+
+CREATE TABLE IF NOT EXISTS task_status_counts (
+    status TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS task_daily_counts (
+    day TEXT PRIMARY KEY,
+    created INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_stats_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO task_status_counts (status, count) VALUES (new.status, 1)
+    ON CONFLICT (status) DO UPDATE SET count = count + 1;
+    INSERT INTO task_daily_counts (day, created, completed)
+    VALUES (date(new.created_at), 1, new.status = 'completo')
+    ON CONFLICT (day) DO UPDATE SET
+        created = created + 1,
+        completed = completed + excluded.completed;
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_stats_delete AFTER DELETE ON tasks BEGIN
+    UPDATE task_status_counts SET count = count - 1 WHERE status = old.status;
+    UPDATE task_daily_counts SET
+        created = created - 1,
+        completed = completed - (old.status = 'completo')
+    WHERE day = date(old.created_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_stats_update AFTER UPDATE OF status ON tasks
+WHEN old.status IS NOT new.status BEGIN
+    UPDATE task_status_counts SET count = count - 1 WHERE status = old.status;
+    INSERT INTO task_status_counts (status, count) VALUES (new.status, 1)
+    ON CONFLICT (status) DO UPDATE SET count = count + 1;
+    UPDATE task_daily_counts SET
+        completed = completed - (old.status = 'completo') + (new.status = 'completo')
+    WHERE day = date(old.created_at);
+END;
+
+CREATE TABLE IF NOT EXISTS task_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    task_id INTEGER NOT NULL,
+    op TEXT NOT NULL,
+    version INTEGER,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_changes_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO task_changes (task_id, op, version) VALUES (new.id, 'create', new.version);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_changes_update AFTER UPDATE ON tasks BEGIN
+    INSERT INTO task_changes (task_id, op, version) VALUES (new.id, 'update', new.version);
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_changes_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO task_changes (task_id, op, version) VALUES (old.id, 'delete', old.version);
+END;
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key TEXT PRIMARY KEY,
+    fingerprint TEXT NOT NULL,
+    status INTEGER,
+    headers TEXT,
+    body BLOB,
+    created_at REAL NOT NULL,
+    expires_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys (expires_at);
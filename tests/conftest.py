@@ -0,0 +1,69 @@
+"""
+Fixtures compartilhadas pelos testes
+
+Os testes de API sobem o servidor real em um subprocesso com banco temporário
+(bench.harness.ServerProcess), então cada módulo começa com o estado do
+processo limpo: pool, thread escritora, cache e backend.
+"""
+import json
+
+import pytest
+
+from bench.harness import ServerProcess
+
+
+class Api:
+    """Cliente HTTP mínimo sobre uma conexão keep-alive com o servidor de teste"""
+
+    def __init__(self, server):
+        self.server = server
+        self.conn = server.connection()
+
+    def request(self, method, path, body=None, headers=None):
+        """
+        Executa uma requisição
+        Retorna: (status, corpo decodificado de JSON ou None, cabeçalhos)
+        """
+        payload = body if isinstance(body, (bytes, str)) or body is None else json.dumps(body)
+        all_headers = {"Content-Type": "application/json"}
+        all_headers.update(headers or {})
+        self.conn.request(method, path, body=payload, headers=all_headers)
+        response = self.conn.getresponse()
+        data = response.read()
+        try:
+            decoded = json.loads(data) if data else None
+        except ValueError:
+            decoded = None
+        return response.status, decoded, response.headers
+
+    def get(self, path, headers=None):
+        return self.request("GET", path, headers=headers)
+
+    def post(self, path, body=None, headers=None):
+        return self.request("POST", path, body, headers)
+
+    def put(self, path, body=None, headers=None):
+        return self.request("PUT", path, body, headers)
+
+    def patch(self, path, body=None, headers=None):
+        return self.request("PATCH", path, body, headers)
+
+    def delete(self, path, body=None, headers=None):
+        return self.request("DELETE", path, body, headers)
+
+    def close(self):
+        self.conn.close()
+
+
+@pytest.fixture(scope="module", params=[[], ["--mode", "asyncio"]], ids=["threaded", "asyncio"])
+def server(request):
+    """Servidor com o backend SQLite padrão, no modo threaded e no asyncio"""
+    with ServerProcess(request.param) as process:
+        yield process
+
+
+@pytest.fixture
+def api(server):
+    client = Api(server)
+    yield client
+    client.close()
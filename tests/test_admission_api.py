@@ -0,0 +1,100 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from bench.harness import ServerProcess
+from tests.conftest import Api
+
+
+@pytest.fixture(scope="module")
+def limited_server():
+    """Orçamentos pequenos e quase sem reposição, por header de API key"""
+    env = {
+        "TODO_RATE_LIMIT_ENABLED": "true",
+        "TODO_RATE_LIMIT_KEY_HEADER": "X-Api-Key",
+        "TODO_RATE_LIMIT_READ_RATE": "0.01",
+        "TODO_RATE_LIMIT_READ_BURST": "5",
+        "TODO_RATE_LIMIT_WRITE_RATE": "0.01",
+        "TODO_RATE_LIMIT_WRITE_BURST": "3",
+    }
+    with ServerProcess(env=env) as process:
+        yield process
+
+
+@pytest.fixture
+def limited_api(limited_server):
+    client = Api(limited_server)
+    yield client
+    client.close()
+
+
+def test_write_burst_is_limited_with_retry_after(limited_api):
+    key = {"X-Api-Key": "burst"}
+    for _ in range(3):
+        status, _, _ = limited_api.post("/tasks", {"title": "rajada"}, headers=key)
+        assert status == 201
+
+    status, body, headers = limited_api.post("/tasks", {"title": "rajada"}, headers=key)
+    assert status == 429
+    assert "error" in body
+    assert int(headers["Retry-After"]) >= 1
+
+    # O orçamento é por chave
+    status, _, _ = limited_api.post("/tasks", {"title": "outra"}, headers={"X-Api-Key": "other"})
+    assert status == 201
+
+
+def test_read_and_write_budgets_are_separate(limited_api):
+    key = {"X-Api-Key": "budgets"}
+    for _ in range(3):
+        assert limited_api.post("/tasks", {"title": "x"}, headers=key)[0] == 201
+    assert limited_api.post("/tasks", {"title": "x"}, headers=key)[0] == 429
+
+    # Escritas esgotadas não consomem as leituras
+    for _ in range(5):
+        assert limited_api.get("/tasks?limit=1", headers=key)[0] == 200
+    status, _, headers = limited_api.get("/tasks?limit=1", headers=key)
+    assert status == 429
+    assert "Retry-After" in headers
+
+
+def test_status_and_metrics_are_exempt(limited_api):
+    key = {"X-Api-Key": "monitor"}
+    for _ in range(5):
+        limited_api.get("/tasks?limit=1", headers=key)
+    assert limited_api.get("/tasks?limit=1", headers=key)[0] == 429
+
+    for _ in range(10):
+        assert limited_api.get("/status", headers=key)[0] == 200
+        assert limited_api.get("/metrics", headers=key)[0] == 200
+
+    _, body, _ = limited_api.get("/status", headers=key)
+    rejected = body["admission"]["rejected"]
+    assert rejected["rate_limit_read"] >= 1
+    assert rejected["rate_limit_write"] >= 1
+
+
+def test_full_inflight_cap_returns_503():
+    env = {"TODO_ADMISSION_MAX_INFLIGHT": "1", "TODO_ADMISSION_QUEUE_TIMEOUT": "0.2"}
+    with ServerProcess(env=env) as server:
+        # Uma trava de escrita externa prende a única vaga na criação abaixo
+        lock = sqlite3.connect(server.db_path, isolation_level=None)
+        lock.execute("BEGIN IMMEDIATE")
+        statuses = []
+        writer = threading.Thread(
+            target=lambda: statuses.append(Api(server).post("/tasks", {"title": "presa"})[0])
+        )
+        writer.start()
+        try:
+            time.sleep(0.5)
+            status, _, headers = Api(server).get("/tasks")
+            assert status == 503
+            assert "Retry-After" in headers
+            assert Api(server).get("/status")[0] == 200
+        finally:
+            lock.execute("ROLLBACK")
+            lock.close()
+            writer.join(10)
+        assert statuses == [201]
@@ -0,0 +1,77 @@
+"""
+O backend em memória deve se comportar como o SQLite: os mesmos cenários são
+executados nos dois e as respostas comparadas, ignorando os horários
+"""
+import re
+
+import pytest
+
+from app.database.memory_repository import MemoryTaskRepository
+from app.database.task_repository import SQLiteTaskRepository
+from app.models.task import Task
+from bench.harness import ServerProcess
+from tests.conftest import Api
+
+_TIMESTAMP_RE = re.compile(r"\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}")
+
+
+@pytest.fixture(params=["sqlite", "memory"])
+def repository(request, tmp_path):
+    if request.param == "sqlite":
+        backend = SQLiteTaskRepository(str(tmp_path / "parity.db"))
+    else:
+        backend = MemoryTaskRepository()
+    backend.init()
+    yield backend
+    backend.close()
+
+
+@pytest.mark.parametrize("status", [None, ""])
+def test_create_without_status_uses_default(repository, status):
+    created = repository.create(Task(title="sem status", status=status))
+    assert created.status == "pendente"
+    assert repository.find_by_id(created.id).status == "pendente"
+
+    batch = repository.create_many([Task(title="a", status=status), Task(title="b", status="completo")])
+    assert [task.status for task in batch] == ["pendente", "completo"]
+
+    by_status, _ = repository.get_stats(1)
+    assert by_status == {"pendente": 2, "completo": 1}
+
+
+def _scenario(api):
+    """Sequência de requisições; retorna as respostas sem os horários"""
+    requests = [
+        ("POST", "/tasks", {"title": "Comprar pão", "description": "padaria"}),
+        ("POST", "/tasks", {"title": "nulo", "status": None}),
+        ("POST", "/tasks", {"title": "vazio", "status": ""}),
+        ("POST", "/tasks", {"title": "inválido", "status": "feito"}),
+        ("POST", "/tasks/batch", [{"title": "ok"}, {"title": "x", "status": None}, {"title": 1}]),
+        ("PATCH", "/tasks/batch", [{"id": 1, "status": "completo"}, {"id": 2, "status": None}, {"id": 2**70}]),
+        ("PUT", "/tasks/3", {"status": ""}),
+        ("DELETE", "/tasks/batch", {"ids": [4, 2**70, 999]}),
+        ("GET", "/tasks", None),
+        ("GET", "/tasks?status=pendente&limit=2", None),
+        ("GET", f"/tasks?after_id={2**64}", None),
+        ("GET", "/tasks/search?q=p%C3%A3o", None),
+        ("GET", "/tasks/stats?days=1", None),
+        ("GET", "/tasks/changes?since=0", None),
+        ("GET", "/tasks/999", None),
+    ]
+    responses = []
+    for method, path, body in requests:
+        code, data, headers = api.request(method, path, body)
+        responses.append((method, path, code, _TIMESTAMP_RE.sub("T", repr(data)), headers.get("ETag")))
+    return responses
+
+
+def test_http_responses_match_between_backends():
+    results = {}
+    for backend in ("sqlite", "memory"):
+        with ServerProcess(["--backend", backend]) as server:
+            api = Api(server)
+            results[backend] = _scenario(api)
+            api.close()
+
+    for sqlite_response, memory_response in zip(results["sqlite"], results["memory"]):
+        assert sqlite_response == memory_response
@@ -0,0 +1,96 @@
+import json
+import threading
+
+from bench.harness import ServerProcess
+from tests.conftest import Api
+
+
+def _statuses(body):
+    return [result["status"] for result in body["results"]]
+
+
+def test_create_batch_partial_failure(api):
+    items = [
+        {"title": "ok"},
+        {"title": "sem status", "status": None},
+        {"title": "status inválido", "status": "feito"},
+        {"title": 5},
+        "não é objeto",
+        {"title": "surrogate \ud800"},
+    ]
+    code, body, _ = api.post("/tasks/batch", json.dumps(items, ensure_ascii=True))
+    assert code == 207
+    assert _statuses(body) == [201, 201, 400, 400, 400, 400]
+    assert body["results"][1]["task"]["status"] == "pendente"
+    assert body["succeeded"] == 2
+    assert body["failed"] == 4
+
+    created = [body["results"][0]["task"]["id"], body["results"][1]["task"]["id"]]
+    for task_id in created:
+        code, _, _ = api.get(f"/tasks/{task_id}")
+        assert code == 200
+
+
+def test_create_batch_returns_ids_in_order(api):
+    code, body, _ = api.post("/tasks/batch", [{"title": f"t{i}"} for i in range(20)])
+    assert code == 201
+    tasks = [result["task"] for result in body["results"]]
+    assert [task["title"] for task in tasks] == [f"t{i}" for i in range(20)]
+    ids = [task["id"] for task in tasks]
+    assert ids == sorted(ids) and len(set(ids)) == 20
+
+
+def test_update_batch_partial_failure(api):
+    _, body, _ = api.post("/tasks", {"title": "alvo"})
+    task_id = body["id"]
+
+    items = [
+        {"id": task_id, "status": "completo"},
+        {"id": 2**70, "status": "completo"},
+        {"id": task_id, "status": None},
+        {"id": 999999, "title": "x"},
+    ]
+    code, body, _ = api.patch("/tasks/batch", items)
+    assert code == 207
+    assert _statuses(body) == [200, 400, 400, 404]
+    assert body["results"][0]["task"]["status"] == "completo"
+
+
+def test_delete_batch_partial_failure(api):
+    _, body, _ = api.post("/tasks", {"title": "remover"})
+    task_id = body["id"]
+
+    code, body, _ = api.delete("/tasks/batch", {"ids": [task_id, 2**70, 999999, True]})
+    assert code == 207
+    assert _statuses(body) == [204, 400, 404, 400]
+    code, _, _ = api.get(f"/tasks/{task_id}")
+    assert code == 404
+
+
+def test_concurrent_batches_without_writer_thread():
+    # Sem a thread escritora cada lote roda na própria conexão; os ids
+    # devolvidos precisam ser os das linhas que o próprio lote inseriu
+    with ServerProcess(env={"TODO_DB_WRITER_ENABLED": "false"}) as server:
+        results = {}
+
+        def create(worker):
+            client = Api(server)
+            titles = [f"w{worker}-{i}" for i in range(25)]
+            code, body, _ = client.post("/tasks/batch", [{"title": title} for title in titles])
+            results[worker] = (code, titles, body)
+            client.close()
+
+        threads = [threading.Thread(target=create, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        client = Api(server)
+        for code, titles, body in results.values():
+            assert code == 201
+            for title, result in zip(titles, body["results"]):
+                assert result["task"]["title"] == title
+                _, stored, _ = client.get(f"/tasks/{result['task']['id']}")
+                assert stored["title"] == title
+        client.close()
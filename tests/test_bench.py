@@ -0,0 +1,64 @@
+from argparse import Namespace
+
+import pytest
+
+from bench.harness import percentile, summarize
+from bench.load import WORKLOADS, combinations, compare, run_workload
+
+
+def test_percentile_interpolates():
+    values = [1.0, 2.0, 3.0, 4.0]
+    assert percentile(values, 0.0) == 1.0
+    assert percentile(values, 0.5) == 2.5
+    assert percentile(values, 1.0) == 4.0
+    assert percentile([], 0.5) is None
+
+
+def test_summarize_reports_milliseconds():
+    summary = summarize([0.001, 0.002, 0.003, 0.004], elapsed=2.0)
+    assert summary["requests"] == 4
+    assert summary["throughput_rps"] == 2.0
+    assert summary["p50_ms"] == 2.5
+    assert summary["max_ms"] == 4.0
+
+
+def test_combinations_skip_memory_in_prefork_and_its_profiles():
+    args = Namespace(modes=["threaded", "prefork"], backends=["sqlite", "memory"],
+                     profiles=["safe", "fast"], workloads=["mixed"])
+    assert list(combinations(args)) == [
+        ("threaded", "sqlite", "safe", "mixed"),
+        ("threaded", "sqlite", "fast", "mixed"),
+        ("threaded", "memory", None, "mixed"),
+        ("prefork", "sqlite", "safe", "mixed"),
+        ("prefork", "sqlite", "fast", "mixed"),
+    ]
+
+
+def _run(throughput, p99, workload="mixed"):
+    return {"mode": "threaded", "backend": "sqlite", "profile": "balanced", "workload": workload,
+            "summary": {"throughput_rps": throughput, "p99_ms": p99}}
+
+
+def test_compare_flags_throughput_and_p99_regressions():
+    baseline = {"runs": [_run(1000, 10), _run(500, 5, "batch")]}
+    report = {"runs": [_run(850, 10), _run(500, 5.2, "batch"), _run(100, 1, "paginate")]}
+
+    comparisons, regressed = compare(report, baseline, threshold=0.10)
+    assert regressed
+    assert [(c["workload"], c["regression"]) for c in comparisons] == [("mixed", True), ("batch", False)]
+    assert comparisons[0]["throughput_change"] == -0.15
+
+    _, regressed = compare({"runs": [_run(1000, 10.5)]}, baseline, threshold=0.10)
+    assert not regressed
+
+
+@pytest.mark.parametrize("workload", sorted(WORKLOADS))
+def test_workloads_run_without_errors(workload):
+    args = Namespace(threads=4, processes=1, seed=50, workers=2, page_size=10, batch_size=5,
+                     random_seed=1, warmup=0, duration=0.3)
+    run = run_workload("threaded", "sqlite", "balanced", workload, args)
+
+    assert run["summary"]["requests"] > 0
+    assert run["summary"]["errors"] == 0
+    assert all(int(code) < 400 for code in run["status_codes"])
+    assert set(run["operations"]) <= {name for name, _ in WORKLOADS[workload]}
@@ -0,0 +1,149 @@
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from app import config
+from app.controllers import change_controller
+from app.server import PooledHTTPServer, TaskRequestHandler
+from bench.harness import ServerProcess
+from tests.conftest import Api
+
+
+class _BrokenFeed:
+    def last_seq(self):
+        raise RuntimeError("leitura do log falhou")
+
+
+@pytest.fixture
+def inprocess_server(monkeypatch):
+    """Servidor threaded no próprio processo, com o feed de alterações quebrado e sem métricas"""
+    monkeypatch.setattr(config, "METRICS_ENABLED", False)
+    monkeypatch.setattr(config, "SERVER_ACCESS_LOG", False)
+    monkeypatch.setattr(change_controller, "get_change_feed", lambda: _BrokenFeed())
+    server = PooledHTTPServer(("127.0.0.1", 0), TaskRequestHandler, threads=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _get(conn, path):
+    conn.request("GET", path)
+    response = conn.getresponse()
+    response.read()
+    return response.status
+
+
+def test_stream_error_before_headers_is_a_500_without_metrics(inprocess_server):
+    conn = http.client.HTTPConnection(*inprocess_server.server_address[:2], timeout=5)
+    assert _get(conn, "/tasks/changes/stream") == 500
+
+    # Na mesma conexão keep-alive, depois de uma resposta com outro status
+    assert _get(conn, "/nao-existe") == 404
+    assert _get(conn, "/tasks/changes/stream") == 500
+    conn.close()
+
+
+@pytest.fixture(scope="module")
+def single_slot_server():
+    """Servidor com uma única vaga de execução (ADMISSION_MAX_INFLIGHT=1)"""
+    env = {"TODO_ADMISSION_MAX_INFLIGHT": "1", "TODO_ADMISSION_QUEUE_TIMEOUT": "0.2"}
+    with ServerProcess(env=env) as process:
+        yield process
+
+
+def test_long_poll_does_not_hold_an_admission_slot(single_slot_server):
+    statuses = []
+    waiting = threading.Thread(
+        target=lambda: statuses.append(_get(single_slot_server.connection(), "/tasks/changes?wait=2"))
+    )
+    waiting.start()
+    time.sleep(0.3)
+
+    conn = single_slot_server.connection()
+    assert _get(conn, "/tasks") == 200
+    conn.close()
+    waiting.join(5)
+    assert statuses == [200]
+
+
+def test_stream_does_not_hold_an_admission_slot(single_slot_server):
+    stream = single_slot_server.connection()
+    stream.request("GET", "/tasks/changes/stream")
+    response = stream.getresponse()
+    assert response.status == 200
+
+    conn = single_slot_server.connection()
+    assert _get(conn, "/tasks") == 200
+    conn.close()
+    stream.close()
+
+
+def test_long_poll_returns_a_change_made_while_waiting(server, api):
+    _, body, _ = api.get("/tasks/changes")
+    since = body["last_seq"]
+
+    result = {}
+
+    def wait():
+        client = Api(server)
+        started = time.monotonic()
+        result["response"] = client.get(f"/tasks/changes?since={since}&wait=5")
+        result["elapsed"] = time.monotonic() - started
+        client.close()
+
+    waiting = threading.Thread(target=wait)
+    waiting.start()
+    time.sleep(0.3)
+    _, task, _ = api.post("/tasks", {"title": "esperada"})
+    waiting.join(10)
+
+    status, body, _ = result["response"]
+    assert status == 200
+    assert [(change["task_id"], change["op"]) for change in body["changes"]] == [(task["id"], "create")]
+    assert body["last_seq"] == since + 1
+    assert result["elapsed"] < 4
+
+
+def _read_event(response):
+    fields = {}
+    while True:
+        line = response.readline().decode("utf-8").rstrip("\n")
+        if not line:
+            if fields:
+                return fields
+            continue
+        if line.startswith(":"):
+            continue
+        name, _, value = line.partition(": ")
+        fields[name] = value
+
+
+def test_stream_sends_changes_and_resumes_from_last_event_id(server, api):
+    _, body, _ = api.get("/tasks/changes")
+    since = body["last_seq"]
+
+    stream = server.connection(timeout=5)
+    stream.request("GET", f"/tasks/changes/stream?since={since}")
+    response = stream.getresponse()
+    assert response.headers["Content-Type"].startswith("text/event-stream")
+
+    _, first, _ = api.post("/tasks", {"title": "primeira"})
+    api.put(f"/tasks/{first['id']}", {"status": "completo"})
+    event = _read_event(response)
+    assert event["event"] == "change"
+    assert event["id"] == str(since + 1)
+    assert json.loads(event["data"])["task_id"] == first["id"]
+    stream.close()
+
+    # Reconexão: o Last-Event-ID substitui since
+    stream = server.connection(timeout=5)
+    stream.request("GET", "/tasks/changes/stream", headers={"Last-Event-ID": str(since + 1)})
+    event = _read_event(stream.getresponse())
+    assert event["id"] == str(since + 2)
+    assert json.loads(event["data"])["op"] == "update"
+    stream.close()
@@ -0,0 +1,60 @@
+import json
+import zlib
+
+import pytest
+
+from app.utils.compression import _parse_accept_encoding
+from tests.conftest import Api
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip", "gzip"),
+    ("deflate", "deflate"),
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0.5, deflate", "deflate"),
+    ("x-gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "gzip"),
+    ("*;q=0.1, gzip;q=0", "deflate"),
+    ("br", None),
+    ("identity", None),
+])
+def test_accept_encoding_negotiation(header, expected):
+    assert _parse_accept_encoding(header) == expected
+
+
+@pytest.fixture(scope="module")
+def large_page(server):
+    client = Api(server)
+    client.post("/tasks/batch", [{"title": f"tarefa {i}", "description": "x" * 100} for i in range(50)])
+    client.close()
+    return "/tasks?limit=50"
+
+
+def _raw_get(api, path, headers):
+    api.conn.request("GET", path, headers=headers)
+    response = api.conn.getresponse()
+    return response, response.read()
+
+
+@pytest.mark.parametrize("encoding, wbits", [("gzip", 16 + zlib.MAX_WBITS), ("deflate", zlib.MAX_WBITS)])
+def test_compressed_body_matches_identity(api, large_page, encoding, wbits):
+    _, identity = _raw_get(api, large_page, {})
+    response, body = _raw_get(api, large_page, {"Accept-Encoding": encoding})
+
+    assert response.headers["Content-Encoding"] == encoding
+    assert int(response.headers["Content-Length"]) == len(body) < len(identity)
+    assert json.loads(zlib.decompress(body, wbits)) == json.loads(identity)
+
+
+def test_small_bodies_are_not_compressed(api):
+    _, task, _ = api.post("/tasks", {"title": "pequena"})
+    response, _ = _raw_get(api, f"/tasks/{task['id']}", {"Accept-Encoding": "gzip"})
+    assert response.headers.get("Content-Encoding") is None
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+
+def test_streamed_export_is_compressed(api, large_page):
+    response, body = _raw_get(api, "/tasks/export", {"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert len(json.loads(zlib.decompress(body, 16 + zlib.MAX_WBITS))["tasks"]) >= 50
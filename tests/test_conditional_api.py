@@ -0,0 +1,90 @@
+import pytest
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+@pytest.fixture
+def task_path(api):
+    _, task, _ = api.post("/tasks", {"title": "pequena"})
+    return f"/tasks/{task['id']}"
+
+
+@pytest.fixture
+def list_path(api):
+    # Página grande o bastante para passar de COMPRESSION_MIN_SIZE
+    api.post("/tasks/batch", [{"title": f"tarefa {i}", "description": "x" * 100} for i in range(50)])
+    return "/tasks?limit=50"
+
+
+def test_if_match_guards_updates_and_deletes(api, task_path):
+    _, _, headers = api.get(task_path)
+    etag = headers["ETag"]
+
+    code, _, _ = api.get(task_path, headers={"If-None-Match": etag})
+    assert code == 304
+
+    code, body, _ = api.put(task_path, {"status": "completo"}, headers={"If-Match": etag})
+    assert code == 200
+    assert body["status"] == "completo"
+
+    # A versão mudou, então o ETag antigo não vale mais
+    code, _, _ = api.put(task_path, {"title": "x"}, headers={"If-Match": etag})
+    assert code == 412
+    code, _, _ = api.delete(task_path, headers={"If-Match": etag})
+    assert code == 412
+
+    _, _, headers = api.get(task_path)
+    code, _, _ = api.delete(task_path, headers={"If-Match": headers["ETag"]})
+    assert code == 204
+
+
+def test_list_etag_changes_after_a_write(api, list_path):
+    _, _, headers = api.get(list_path)
+    etag = headers["ETag"]
+    code, _, _ = api.get(list_path, headers={"If-None-Match": etag})
+    assert code == 304
+
+    api.post("/tasks", {"title": "nova"})
+    code, _, headers = api.get(list_path, headers={"If-None-Match": etag})
+    assert code == 200
+    assert headers["ETag"] != etag
+
+
+def test_if_modified_since_uses_last_modified(api, task_path):
+    _, _, headers = api.get(task_path)
+    last_modified = headers["Last-Modified"]
+
+    code, _, _ = api.get(task_path, headers={"If-Modified-Since": last_modified})
+    assert code == 304
+    code, _, _ = api.get(task_path, headers={"If-Modified-Since": "Mon, 01 Jan 2001 00:00:00 GMT"})
+    assert code == 200
+
+
+@pytest.mark.parametrize("path_fixture", ["task_path", "list_path"])
+@pytest.mark.parametrize("request_headers", [{}, GZIP])
+def test_304_repeats_the_etag_of_the_200(api, request, path_fixture, request_headers):
+    path = request.getfixturevalue(path_fixture)
+
+    code, _, headers = api.get(path, headers=request_headers)
+    assert code == 200
+    etag = headers["ETag"]
+    assert etag.startswith("W/") == bool(request_headers)
+
+    code, _, headers = api.get(path, headers={**request_headers, "If-None-Match": etag})
+    assert code == 304
+    assert headers["ETag"] == etag
+
+
+def test_compressed_list_uses_weak_etag(api, list_path):
+    code, _, headers = api.get(list_path, headers=GZIP)
+    assert code == 200
+    assert headers["Content-Encoding"] == "gzip"
+    assert headers["ETag"].startswith("W/")
+    assert headers["Vary"] == "Accept-Encoding"
+
+
+def test_weak_etag_is_accepted_by_if_match(api, task_path):
+    _, _, headers = api.get(task_path, headers=GZIP)
+    code, body, _ = api.put(task_path, {"status": "completo"}, headers={"If-Match": headers["ETag"]})
+    assert code == 200
+    assert body["status"] == "completo"
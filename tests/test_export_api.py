@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from bench.harness import ServerProcess
+from tests.conftest import Api
+
+
+@pytest.fixture(scope="module")
+def export_server():
+    """Lotes de exportação pequenos, para a resposta juntar vários lotes"""
+    with ServerProcess(env={"TODO_EXPORT_BATCH_SIZE": "3"}) as process:
+        client = Api(process)
+        status, _, _ = client.post("/tasks/batch", [{"title": f"export {i}"} for i in range(10)])
+        assert status == 201
+        client.close()
+        yield process
+
+
+@pytest.fixture
+def export_api(export_server):
+    client = Api(export_server)
+    yield client
+    client.close()
+
+
+def test_json_export_is_streamed_as_one_document(export_api):
+    status, body, headers = export_api.get("/tasks/export")
+    assert status == 200
+    assert headers["Transfer-Encoding"] == "chunked"
+    titles = [task["title"] for task in body["tasks"]]
+    assert titles == [f"export {i}" for i in range(10)]
+
+
+def test_ndjson_export_has_one_task_per_line(export_api):
+    export_api.conn.request("GET", "/tasks/export?format=ndjson")
+    response = export_api.conn.getresponse()
+    lines = response.read().decode("utf-8").splitlines()
+    assert response.status == 200
+    assert response.headers["Content-Type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["title"] for line in lines] == [f"export {i}" for i in range(10)]
+
+
+def test_export_applies_the_listing_filters(export_api):
+    _, page, _ = export_api.get("/tasks?limit=4")
+    cursor = page["tasks"][-1]["id"]
+
+    status, body, _ = export_api.get(f"/tasks/export?after_id={cursor}&status=pendente")
+    assert status == 200
+    assert [task["title"] for task in body["tasks"]] == [f"export {i}" for i in range(4, 10)]
+
+    status, body, _ = export_api.get("/tasks/export?format=csv")
+    assert status == 400
+    assert "error" in body
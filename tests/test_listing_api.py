@@ -0,0 +1,40 @@
+def _create(api, count, **fields):
+    ids = []
+    for i in range(count):
+        status, body, _ = api.post("/tasks", {"title": f"tarefa {i}", **fields})
+        assert status == 201
+        ids.append(body["id"])
+    return ids
+
+
+def test_pages_follow_the_cursor_without_gaps(api):
+    ids = _create(api, 7)
+
+    seen, cursor = [], None
+    while True:
+        path = "/tasks?limit=3" + (f"&after_id={cursor}" if cursor is not None else "")
+        status, page, _ = api.get(path)
+        assert status == 200
+        assert page["limit"] == 3
+        assert len(page["tasks"]) <= 3
+        seen += [task["id"] for task in page["tasks"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == sorted(seen)
+    assert set(ids) <= set(seen)
+
+
+def test_status_filter(api):
+    done = _create(api, 2, status="completo")
+    _create(api, 2, status="pendente")
+
+    status, page, _ = api.get("/tasks?status=completo&limit=100")
+    assert status == 200
+    assert {task["status"] for task in page["tasks"]} == {"completo"}
+    assert set(done) <= {task["id"] for task in page["tasks"]}
+
+    status, body, _ = api.get("/tasks?status=feito")
+    assert status == 400
+    assert "error" in body
@@ -0,0 +1,56 @@
+from app.utils.metrics import MetricsRegistry
+
+
+def test_unknown_methods_share_the_other_label():
+    registry = MetricsRegistry()
+    for method in ("GET", "BREW", 'X"}\nfake_metric{a="1', "PROPFIND"):
+        registry.observe_request("/tasks", method, "200", 0.001, 10, {"validation": 0.0001})
+
+    text = registry.render().decode()
+    methods = {
+        line.split('method="', 1)[1].split('"', 1)[0]
+        for line in text.splitlines()
+        if line.startswith("todo_http_requests_total{")
+    }
+    assert methods == {"GET", "other"}
+    assert 'todo_http_requests_total{route="/tasks",method="other",status="200"} 3' in text
+    assert "fake_metric" not in text
+
+
+def test_labels_are_escaped():
+    registry = MetricsRegistry()
+    registry.observe_request('/a"b', "GET", "200", 0.001, 10, {})
+    assert 'route="/a\\"b"' in registry.render().decode()
+
+
+def _samples(text, name):
+    return {
+        line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1])
+        for line in text.splitlines()
+        if line.startswith(name + "{")
+    }
+
+
+def test_metrics_endpoint_counts_requests_by_route_template(api):
+    _, task, _ = api.post("/tasks", {"title": "medida"})
+    api.get(f"/tasks/{task['id']}")
+    api.get(f"/tasks/{task['id']}")
+    api.get("/nao-existe")
+
+    api.conn.request("GET", "/metrics")
+    response = api.conn.getresponse()
+    text = response.read().decode()
+    assert response.status == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+
+    totals = _samples(text, "todo_http_requests_total")
+    assert totals['todo_http_requests_total{route="/tasks/{task_id:int}",method="GET",status="200"}'] == 2
+    assert totals['todo_http_requests_total{route="unmatched",method="GET",status="404"}'] == 1
+    assert not any(f"/tasks/{task['id']}" in key for key in totals)
+
+    buckets = [
+        value for key, value in _samples(text, "todo_http_request_duration_seconds_bucket").items()
+        if 'route="/tasks/{task_id:int}",method="GET"' in key
+    ]
+    assert buckets == sorted(buckets)
+    assert buckets[-1] == 2
@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from app.database.pool import ConnectionPool, PoolClosed, PoolTimeout
+
+
+@pytest.fixture
+def pool(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=2, timeout=0.2)
+    yield pool
+    pool.close()
+
+
+def test_connections_are_reused_lifo(pool):
+    first = pool.acquire()
+    second = pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    assert pool.acquire() is second
+    stats = pool.stats()
+    assert stats["created"] == 2
+    assert stats["checkouts"] == 3
+
+
+def test_acquire_times_out_when_exhausted(pool):
+    held = [pool.acquire(), pool.acquire()]
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+    for conn in held:
+        pool.release(conn)
+
+
+def test_waiter_gets_released_connection(pool):
+    held = [pool.acquire(), pool.acquire()]
+    got = []
+    waiter = threading.Thread(target=lambda: got.append(pool.acquire()))
+    waiter.start()
+    pool.release(held[0])
+    waiter.join(1)
+
+    assert got == [held[0]]
+    assert pool.stats()["waits"] == 1
+    pool.release(got[0])
+    pool.release(held[1])
+
+
+def test_release_rolls_back_open_transaction(pool):
+    conn = pool.acquire()
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+    conn.commit()
+    conn.execute("INSERT INTO items DEFAULT VALUES")
+    assert conn.in_transaction
+    pool.release(conn)
+
+    conn = pool.acquire()
+    assert not conn.in_transaction
+    assert conn.execute("SELECT COUNT(*) FROM items").fetchone()[0] == 0
+    pool.release(conn)
+
+
+def test_discarded_connection_frees_its_slot(pool):
+    pool.release(pool.acquire(), discard=True)
+    stats = pool.stats()
+    assert stats["size"] == 0
+    assert stats["discarded"] == 1
+
+
+def test_unhealthy_idle_connection_is_replaced(tmp_path):
+    pool = ConnectionPool(str(tmp_path / "pool.db"), max_size=1, health_check_interval=0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+
+    replacement = pool.acquire()
+    assert replacement is not conn
+    assert replacement.execute("SELECT 1").fetchone() == (1,)
+    assert pool.stats()["health_check_failures"] == 1
+    pool.release(replacement)
+    pool.close()
+
+
+def test_closed_pool_rejects_checkouts(pool):
+    pool.close()
+    with pytest.raises(PoolClosed):
+        pool.acquire()
@@ -0,0 +1,71 @@
+import cProfile
+import json
+import os
+import sqlite3
+import time
+
+import pytest
+
+from app.database import query_log
+from app.database.query_log import ProfiledConnection, QueryLog, normalize_sql, params_shape
+from app.utils.profiler import RequestProfiler
+
+
+def test_normalize_sql_collapses_whitespace_and_in_lists():
+    sql = "SELECT id\n  FROM tasks WHERE id IN (?, ?,?) AND status IN (?)"
+    assert normalize_sql(sql) == "SELECT id FROM tasks WHERE id IN (?, ...) AND status IN (?)"
+
+
+def test_params_shape_keeps_types_not_values():
+    assert params_shape((1, "segredo", None)) == ["int", "str", "NoneType"]
+    assert params_shape({"id": 1}) == {"id": "int"}
+    assert params_shape([(1, "a"), (2, "b")], many=True) == {"rows": 2, "types": ["int", "str"]}
+
+
+@pytest.fixture
+def log(monkeypatch, tmp_path):
+    """QueryLog do processo substituído por um que considera tudo lento"""
+    log = QueryLog(slow_threshold_ms=0, log_path=str(tmp_path / "slow.log"))
+    monkeypatch.setattr(query_log, "_query_log", log)
+    return log
+
+
+def test_profiled_connection_records_statements(log, tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "profiled.db"), factory=ProfiledConnection)
+    try:
+        conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT)")
+        conn.executemany("INSERT INTO items (value) VALUES (?)", [("a",), ("b",)])
+        for value in ("a", "b"):
+            conn.execute("SELECT id FROM items WHERE value = ?", (value,)).fetchall()
+    finally:
+        conn.close()
+
+    stats = log.stats()
+    assert stats["statements"] == 4
+    assert stats["slow_statements"] == 4
+    counts = {entry["sql"]: entry["count"] for entry in stats["top"]}
+    assert counts["SELECT id FROM items WHERE value = ?"] == 2
+
+    with open(log.log_path, encoding="utf-8") as f:
+        entries = [json.loads(line) for line in f]
+    select = [entry for entry in entries if entry["sql"].startswith("SELECT")][0]
+    assert select["params"] == ["str"]
+    assert select["plan"] and all(isinstance(step, str) for step in select["plan"])
+
+
+def _sample(duration):
+    return cProfile.Profile(), time.perf_counter() - duration
+
+
+def test_profiler_keeps_only_the_slowest_requests(tmp_path):
+    profiler = RequestProfiler(str(tmp_path / "profiles"), keep=2)
+    paths = [profiler.finish(_sample(duration), "GET", "/tasks/1?x=1") for duration in (0.1, 0.3, 0.2)]
+    assert profiler.finish(_sample(0.05), "GET", "/tasks") is None
+
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1]) and os.path.exists(paths[2])
+    assert os.path.basename(paths[1]).split("-")[1:3] == ["GET", "tasks_1"]
+
+    stats = profiler.stats()
+    assert stats["sampled"] == 4
+    assert [entry["path"] for entry in stats["kept"]] == [paths[1], paths[2]]
@@ -0,0 +1,92 @@
+import http.client
+import time
+
+import pytest
+
+from bench.harness import ServerProcess, free_port
+from tests.conftest import Api
+
+MAX_STALENESS = 0.5
+
+
+class _ReplicaApi(Api):
+    """Api apontada para a porta das réplicas do servidor prefork"""
+
+    def __init__(self, server, port):
+        self.server = server
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+
+
+def _wait_replica(port, timeout=15):
+    deadline = time.monotonic() + timeout
+    while True:
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+        try:
+            conn.request("GET", "/tasks?limit=1")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+        finally:
+            conn.close()
+        time.sleep(0.1)
+
+
+@pytest.fixture(scope="module", params=["readonly", "snapshot"])
+def replicated(request):
+    """Primário prefork com duas réplicas de leitura no modo do parâmetro"""
+    replica_port = free_port()
+    args = [
+        "--mode", "prefork", "--processes", "1", "--replicas", "2",
+        "--replica-port", str(replica_port), "--replica-mode", request.param,
+        "--max-staleness", str(MAX_STALENESS),
+    ]
+    with ServerProcess(args) as server:
+        _wait_replica(replica_port)
+        yield server, replica_port
+
+
+@pytest.fixture
+def primary(replicated):
+    client = Api(replicated[0])
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def replica(replicated):
+    client = _ReplicaApi(*replicated)
+    yield client
+    client.close()
+
+
+def test_write_to_replica_is_redirected_to_primary(replicated, replica):
+    server, _ = replicated
+    for method, path in (("POST", "/tasks"), ("PUT", "/tasks/1"), ("DELETE", "/tasks/1")):
+        status, _, headers = replica.request(method, path, {"title": "x"})
+        assert status == 307
+        assert headers["Location"] == f"http://127.0.0.1:{server.port}{path}"
+
+
+def test_reads_carry_snapshot_headers(replica):
+    status, _, headers = replica.get("/tasks")
+    assert status == 200
+    assert int(headers["X-Snapshot-Version"]) >= 0
+    assert 0.0 <= float(headers["X-Snapshot-Age"]) <= MAX_STALENESS
+
+
+def test_primary_write_is_visible_within_max_staleness(primary, replica):
+    status, body, _ = primary.post("/tasks", {"title": "replicada"})
+    assert status == 201
+    task_id = body["id"]
+
+    # Folga curta para as próprias requisições de consulta
+    deadline = time.monotonic() + MAX_STALENESS + 0.25
+    while True:
+        status, body, _ = replica.get(f"/tasks/{task_id}")
+        if status == 200 or time.monotonic() > deadline:
+            break
+        time.sleep(0.05)
+    assert status == 200
+    assert body["title"] == "replicada"
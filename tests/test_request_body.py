@@ -0,0 +1,78 @@
+import pytest
+
+from app import config
+
+
+@pytest.mark.parametrize("value", ["+2", "2_0", "-2", "0x2", "1" * 20])
+def test_content_length_must_be_ascii_digits(server, value):
+    conn = server.connection()
+    try:
+        conn.putrequest("POST", "/tasks", skip_accept_encoding=True)
+        conn.putheader("Content-Type", "application/json")
+        conn.putheader("Content-Length", value)
+        conn.endheaders(b"{}")
+        response = conn.getresponse()
+        response.read()
+        assert response.status == 400
+    finally:
+        conn.close()
+
+
+def test_content_length_with_leading_zeros_is_accepted(server):
+    conn = server.connection()
+    try:
+        body = b'{"title": "zeros"}'
+        conn.putrequest("POST", "/tasks", skip_accept_encoding=True)
+        conn.putheader("Content-Type", "application/json")
+        conn.putheader("Content-Length", "00" + str(len(body)))
+        conn.endheaders(body)
+        response = conn.getresponse()
+        response.read()
+        assert response.status == 201
+    finally:
+        conn.close()
+
+
+@pytest.mark.parametrize("raw", [b"{nope", b'{"title": NaN}', b'{"title": "\xff"}', b"[" * 100000])
+def test_invalid_json_body(api, raw):
+    status, body, _ = api.post("/tasks", raw)
+    assert status == 400
+    assert "error" in body
+
+
+def _send_headers(server, headers):
+    conn = server.connection()
+    try:
+        conn.putrequest("POST", "/tasks", skip_accept_encoding=True)
+        for name, value in headers.items():
+            conn.putheader(name, value)
+        # Nenhum byte do corpo é enviado: a resposta vem só dos cabeçalhos
+        conn.endheaders()
+        response = conn.getresponse()
+        response.read()
+        return response
+    finally:
+        conn.close()
+
+
+def test_oversized_body_is_rejected_before_reading(server):
+    response = _send_headers(server, {"Content-Length": str(config.SERVER_MAX_BODY_SIZE + 1)})
+    assert response.status == 413
+    assert response.headers["Connection"] == "close"
+
+
+def test_chunked_body_requires_content_length(server):
+    response = _send_headers(server, {"Transfer-Encoding": "chunked"})
+    assert response.status == 411
+
+
+def test_ndjson_batch_body(api):
+    raw = b'{"title": "linha 1"}\n\n{"title": "linha 2"}\n'
+    status, body, _ = api.post("/tasks/batch", raw, headers={"Content-Type": "application/x-ndjson"})
+    assert status == 201
+    assert [result["task"]["title"] for result in body["results"]] == ["linha 1", "linha 2"]
+
+    status, body, _ = api.post("/tasks/batch", b'{"title": "ok"}\n{nope\n',
+                               headers={"Content-Type": "application/x-ndjson"})
+    assert status == 400
+    assert "linha 2" in body["error"]
@@ -0,0 +1,83 @@
+import pytest
+
+from app.routes import RouteTable, _int_param
+from app.validators.task_validator import MAX_TASK_ID
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1", 1),
+    ("007", 7),
+    (str(MAX_TASK_ID), MAX_TASK_ID),
+    (str(MAX_TASK_ID + 1), None),
+    (str(2**70), None),
+    ("9" * 5000, None),
+    ("²", None),
+    ("-1", None),
+    ("abc", None),
+])
+def test_int_param(value, expected):
+    assert _int_param(value) == expected
+
+
+def _endpoint(name):
+    def endpoint(handler, task_id=None, name=None, query=None, body=None):
+        pass
+    endpoint.__name__ = name
+    return endpoint
+
+
+@pytest.fixture
+def table():
+    return RouteTable([
+        (method, template, _endpoint(name)) for method, template, name in (
+            ("GET", "/tasks", "list"),
+            ("POST", "/tasks", "create"),
+            ("GET", "/tasks/stats", "stats"),
+            ("GET", "/tasks/{task_id:int}", "get"),
+            ("DELETE", "/tasks/{task_id:int}", "delete"),
+            ("GET", "/tasks/{task_id:int}/notes/{name}", "note"),
+        )
+    ])
+
+
+def _endpoints(methods):
+    return {method: route.endpoint.__name__ for method, route in methods.items()}
+
+
+def test_static_paths_and_params(table):
+    methods, params = table.match("/tasks")
+    assert _endpoints(methods) == {"GET": "list", "POST": "create"}
+    assert params == {}
+
+    methods, params = table.match("/tasks/42/notes/a")
+    assert _endpoints(methods) == {"GET": "note"}
+    assert params == {"task_id": 42, "name": "a"}
+
+
+def test_fixed_segment_wins_over_param(table):
+    methods, params = table.match("/tasks/stats")
+    assert _endpoints(methods) == {"GET": "stats"}
+    assert params == {}
+
+
+@pytest.mark.parametrize("path", ["/tasks/abc", "/tasks/-1", f"/tasks/{2**64}", "/tasks/1/", "/outra", "tasks"])
+def test_unmatched_paths(table, path):
+    assert table.match(path) == (None, None)
+
+
+def test_allowed_methods_include_head_and_options(table):
+    methods, _ = table.match("/tasks/1")
+    assert RouteTable.allowed_methods(methods) == "DELETE, GET, HEAD, OPTIONS"
+
+
+def test_duplicate_and_conflicting_routes_are_rejected(table):
+    with pytest.raises(ValueError):
+        table.add("GET", "/tasks", _endpoint("again"))
+    with pytest.raises(ValueError):
+        table.add("PUT", "/tasks/{other:int}", _endpoint("update"))
+
+
+def test_api_answers_405_with_allow(api):
+    status, _, headers = api.request("PATCH", "/tasks/1", {})
+    assert status == 405
+    assert headers["Allow"] == "DELETE, GET, HEAD, OPTIONS, PUT"
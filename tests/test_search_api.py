@@ -0,0 +1,76 @@
+from urllib.parse import quote
+
+import pytest
+
+from app.database.task_repository import build_match_query
+from tests.conftest import Api
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("python sqlite", '"python" "sqlite"'),
+    ("pyth*", '"pyth"*'),
+    ('"banco de dados"', '"banco de dados"'),
+    ("title:x OR (y)", '"title:x" "OR" "(y)"'),
+    ('aspas"soltas', '"aspas""soltas"'),
+    ("   ", None),
+])
+def test_match_query_hides_fts5_syntax(text, expected):
+    assert build_match_query(text) == expected
+
+
+@pytest.fixture(scope="module")
+def indexed(server):
+    client = Api(server)
+    ids = {}
+    for title, description, status in (
+        ("Estudar SQLite", "índices e FTS5", "pendente"),
+        ("Comprar pão", "padaria da esquina", "completo"),
+        ("Ler sobre bancos", "SQLite em produção", "pendente"),
+    ):
+        _, task, _ = client.post("/tasks", {"title": title, "description": description, "status": status})
+        ids[title] = task["id"]
+    client.close()
+    return ids
+
+
+def _search(api, query):
+    status, body, _ = api.get("/tasks/search?" + query)
+    assert status == 200, body
+    return body
+
+
+def test_title_matches_rank_above_description_matches(api, indexed):
+    body = _search(api, "q=sqlite")
+    assert [task["title"] for task in body["tasks"]] == ["Estudar SQLite", "Ler sobre bancos"]
+    assert body["tasks"][0]["highlight"]["title"] == "Estudar <mark>SQLite</mark>"
+    assert body["tasks"][0]["score"] > body["tasks"][1]["score"]
+
+
+def test_prefix_accents_and_status_filter(api, indexed):
+    assert [task["title"] for task in _search(api, "q=padar*")["tasks"]] == ["Comprar pão"]
+    assert [task["title"] for task in _search(api, "q=" + quote("pão"))["tasks"]] == ["Comprar pão"]
+    assert _search(api, "q=sqlite&status=completo")["tasks"] == []
+
+
+def test_index_follows_updates_and_deletes(api, indexed):
+    task_id = indexed["Comprar pão"]
+    api.put(f"/tasks/{task_id}", {"title": "Comprar leite"})
+    assert _search(api, "q=leite")["tasks"][0]["id"] == task_id
+    assert _search(api, "q=" + quote("pão"))["tasks"] == []
+
+    api.delete(f"/tasks/{task_id}")
+    assert _search(api, "q=leite")["tasks"] == []
+
+
+def test_search_pages_by_offset(api, indexed):
+    body = _search(api, "q=sqlite&limit=1")
+    assert len(body["tasks"]) == 1
+    assert body["next_offset"] == 1
+    body = _search(api, "q=sqlite&limit=1&offset=1")
+    assert body["next_offset"] is None
+
+
+def test_missing_query_is_rejected(api):
+    status, body, _ = api.get("/tasks/search")
+    assert status == 400
+    assert "q" in body["error"]
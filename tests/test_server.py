@@ -0,0 +1,90 @@
+import http.client
+import signal
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import config
+from app.server import PooledHTTPServer, TaskRequestHandler
+from bench.harness import ServerProcess
+from tests.conftest import Api
+
+
+@pytest.fixture
+def pooled_server(monkeypatch, tmp_path):
+    """Servidor threaded no próprio processo com só duas threads de trabalho"""
+    monkeypatch.setattr(config, "SERVER_ACCESS_LOG", False)
+    server = PooledHTTPServer(("127.0.0.1", 0), TaskRequestHandler, threads=2, max_pending=4)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _get_status(address, path, requests=1):
+    conn = http.client.HTTPConnection(*address[:2], timeout=10)
+    try:
+        statuses = []
+        for _ in range(requests):
+            conn.request("GET", path)
+            response = conn.getresponse()
+            response.read()
+            statuses.append(response.status)
+        return statuses
+    finally:
+        conn.close()
+
+
+def test_keep_alive_connection_serves_several_requests(pooled_server):
+    assert _get_status(pooled_server.server_address, "/nao-existe", requests=5) == [404] * 5
+
+
+def test_more_connections_than_threads_are_queued(pooled_server):
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(
+            lambda _: _get_status(pooled_server.server_address, "/nao-existe"), range(16)
+        ))
+    assert results == [[404]] * 16
+
+
+def test_sigterm_drains_requests_in_progress():
+    with ServerProcess() as server:
+        # Uma trava de escrita externa segura a criação em andamento
+        lock = sqlite3.connect(server.db_path, isolation_level=None)
+        lock.execute("BEGIN IMMEDIATE")
+        statuses = []
+        writer = threading.Thread(
+            target=lambda: statuses.append(Api(server).post("/tasks", {"title": "drenada"})[0])
+        )
+        writer.start()
+        time.sleep(0.3)
+        server.process.send_signal(signal.SIGTERM)
+        time.sleep(0.3)
+        lock.execute("ROLLBACK")
+        lock.close()
+
+        writer.join(10)
+        assert statuses == [201]
+        assert server.process.wait(timeout=10) == 0
+
+
+def test_prefork_workers_share_the_database():
+    with ServerProcess(["--mode", "prefork", "--processes", "2"]) as server:
+        def create(i):
+            client = Api(server)
+            try:
+                return client.post("/tasks", {"title": f"prefork {i}"})[0]
+            finally:
+                client.close()
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            assert set(executor.map(create, range(12))) == {201}
+
+        client = Api(server)
+        _, page, _ = client.get("/tasks?limit=100")
+        client.close()
+        assert sorted(task["title"] for task in page["tasks"]) == sorted(f"prefork {i}" for i in range(12))
@@ -0,0 +1,110 @@
+import zlib
+
+import pytest
+
+from bench.harness import ServerProcess
+from tests.conftest import Api
+
+SHARDS = 3
+
+
+@pytest.fixture(scope="module")
+def sharded_server():
+    with ServerProcess(["--backend", "sharded", "--shards", str(SHARDS)]) as process:
+        yield process
+
+
+@pytest.fixture
+def sharded(sharded_server):
+    client = Api(sharded_server)
+    yield client
+    client.close()
+
+
+def _keys_for_shard(index, count):
+    """Idempotency-Keys que caem no shard `index` (mesmo hash do backend)"""
+    keys = []
+    candidate = 0
+    while len(keys) < count:
+        key = f"chave-{candidate}"
+        if zlib.crc32(key.encode("utf-8")) % SHARDS == index:
+            keys.append(key)
+        candidate += 1
+    return keys
+
+
+def _all_ids(api):
+    code, body, _ = api.get("/tasks/export")
+    assert code == 200
+    return {task["id"] for task in body["tasks"]}
+
+
+def test_pagination_does_not_skip_tasks_created_during_the_scan(sharded):
+    # Um shard bem à frente dos outros: seus ids passam dos que os demais ainda vão gerar
+    for key in _keys_for_shard(0, 20):
+        code, _, _ = sharded.post("/tasks", {"title": "shard 0"}, headers={"Idempotency-Key": key})
+        assert code == 201
+
+    seen = []
+    code, page, _ = sharded.get("/tasks?limit=10")
+    assert code == 200
+    seen.extend(task["id"] for task in page["tasks"])
+    assert isinstance(page["next_cursor"], str)
+
+    # Criadas em rodízio durante a paginação, com ids menores que o cursor do shard 0
+    for i in range(6):
+        sharded.post("/tasks", {"title": f"nova {i}"})
+
+    while page["next_cursor"] is not None:
+        code, page, _ = sharded.get(f"/tasks?limit=10&after_id={page['next_cursor']}")
+        assert code == 200
+        seen.extend(task["id"] for task in page["tasks"])
+
+    assert len(seen) == len(set(seen))
+    assert set(seen) == _all_ids(sharded)
+
+
+def test_export_accepts_the_composite_cursor(sharded):
+    code, page, _ = sharded.get("/tasks?limit=3")
+    cursor = page["next_cursor"]
+    first = {task["id"] for task in page["tasks"]}
+
+    code, body, _ = sharded.get(f"/tasks/export?after_id={cursor}")
+    assert code == 200
+    rest = {task["id"] for task in body["tasks"]}
+    assert not first & rest
+    assert first | rest == _all_ids(sharded)
+
+
+@pytest.mark.parametrize("cursor", ["1.2", "1.2.3.4"])
+def test_cursor_with_wrong_shard_count_is_rejected(sharded, cursor):
+    code, body, _ = sharded.get(f"/tasks?after_id={cursor}")
+    assert code == 400
+    assert "after_id" in body["error"]
+
+
+def test_change_feed_delivers_each_change_once_in_task_order(sharded):
+    _, start, _ = sharded.get("/tasks/changes")
+    since = start["last_seq"]
+
+    _, body, _ = sharded.post("/tasks/batch", [{"title": f"feed {i}"} for i in range(9)])
+    ids = [result["task"]["id"] for result in body["results"]]
+    for task_id in ids:
+        sharded.put(f"/tasks/{task_id}", {"status": "completo"})
+    sharded.delete("/tasks/batch", {"ids": ids[:3]})
+
+    changes = []
+    while True:
+        code, page, _ = sharded.get(f"/tasks/changes?since={since}&limit=4")
+        assert code == 200
+        if not page["changes"]:
+            break
+        changes.extend(page["changes"])
+        since = page["last_seq"]
+
+    seqs = [change["seq"] for change in changes]
+    assert seqs == sorted(set(seqs))
+    for task_id in ids:
+        ops = [change["op"] for change in changes if change["task_id"] == task_id]
+        expected = ["create", "update", "delete"] if task_id in ids[:3] else ["create", "update"]
+        assert ops == expected
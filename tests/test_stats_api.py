@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+
+def test_counters_follow_creates_updates_and_deletes(api):
+    ids = []
+    for status in ("pendente", "pendente", "em_andamento", "completo"):
+        _, task, _ = api.post("/tasks", {"title": status, "status": status})
+        ids.append(task["id"])
+    api.put(f"/tasks/{ids[0]}", {"status": "completo"})
+    api.delete(f"/tasks/{ids[2]}")
+    api.patch("/tasks/batch", [{"id": ids[1], "status": "cancelado"}])
+
+    status, stats, _ = api.get("/tasks/stats")
+    assert status == 200
+    assert stats["by_status"] == {"pendente": 0, "em_andamento": 0, "completo": 2, "cancelado": 1}
+    assert stats["total"] == 3
+    assert stats["completion_rate"] == round(2 / 3, 4)
+
+
+def test_histogram_covers_every_requested_day(api):
+    status, stats, _ = api.get("/tasks/stats?days=5")
+    assert status == 200
+    histogram = stats["created_per_day"]
+    assert stats["days"] == len(histogram) == 5
+    assert [day["date"] for day in histogram] == sorted(day["date"] for day in histogram)
+
+    today = histogram[-1]
+    assert today["date"] == datetime.now(timezone.utc).date().isoformat()
+    # O histograma conta as tarefas existentes: a removida no teste anterior sai
+    assert (today["created"], today["completed"]) == (3, 2)
+    assert today["completion_rate"] == round(2 / 3, 4)
+    assert all(day["created"] == 0 and day["completion_rate"] is None for day in histogram[:-1])
+
+
+def test_stats_have_a_conditional_etag(api):
+    _, _, headers = api.get("/tasks/stats")
+    status, _, _ = api.get("/tasks/stats", headers={"If-None-Match": headers["ETag"]})
+    assert status == 304
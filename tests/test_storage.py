@@ -0,0 +1,44 @@
+import sqlite3
+
+import pytest
+
+from app import config
+from app.database.storage import apply_storage_profile, resolve_profile
+
+
+@pytest.fixture
+def profile_config(monkeypatch):
+    for name in ("DB_JOURNAL_MODE", "DB_SYNCHRONOUS", "DB_MMAP_SIZE", "DB_CACHE_SIZE", "DB_BUSY_TIMEOUT"):
+        monkeypatch.setattr(config, name, None)
+    monkeypatch.setattr(config, "DB_STORAGE_PROFILE", "balanced")
+    return monkeypatch
+
+
+def test_overrides_replace_profile_values(profile_config):
+    profile_config.setattr(config, "DB_SYNCHRONOUS", "full")
+    profile = resolve_profile()
+    assert profile["journal_mode"] == "WAL"
+    assert profile["synchronous"] == "FULL"
+
+
+@pytest.mark.parametrize("name, value", [
+    ("DB_STORAGE_PROFILE", "turbo"),
+    ("DB_JOURNAL_MODE", "wal2"),
+    ("DB_SYNCHRONOUS", "sometimes"),
+])
+def test_invalid_profile_values_are_rejected(profile_config, name, value):
+    profile_config.setattr(config, name, value)
+    with pytest.raises(ValueError):
+        resolve_profile()
+
+
+def test_profile_is_applied_to_the_connection(profile_config, tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "storage.db"))
+    try:
+        apply_storage_profile(conn, include_journal_mode=True)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        # NORMAL = 1
+        assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+    finally:
+        conn.close()
@@ -0,0 +1,49 @@
+import pytest
+
+from app import config
+from app.utils import cache
+from bench.harness import ServerProcess
+from tests.conftest import Api
+
+
+@pytest.fixture
+def fresh_cache(monkeypatch):
+    # get_task_cache cria o cache do processo; o monkeypatch o descarta ao final
+    monkeypatch.setattr(cache, "_task_cache", None)
+
+
+@pytest.mark.parametrize("mode, enabled, expected", [
+    ("threaded", None, True),
+    ("asyncio", None, True),
+    ("prefork", None, False),
+    ("prefork", True, True),
+    ("threaded", False, False),
+])
+def test_cache_default_depends_on_server_mode(monkeypatch, fresh_cache, mode, enabled, expected):
+    monkeypatch.setattr(config, "SERVER_MODE", mode)
+    monkeypatch.setattr(config, "TASK_CACHE_ENABLED", enabled)
+    assert (cache.get_task_cache() is not None) == expected
+
+
+def test_prefork_reads_see_writes_from_other_workers():
+    with ServerProcess(["--mode", "prefork", "--processes", "3"]) as server:
+        client = Api(server)
+        _, task, _ = client.post("/tasks", {"title": "antes"})
+        client.close()
+        path = f"/tasks/{task['id']}"
+
+        # Conexões novas caem em workers diferentes e aquecem o cache de cada um
+        for _ in range(12):
+            reader = Api(server)
+            assert reader.get(path)[1]["title"] == "antes"
+            reader.close()
+
+        writer = Api(server)
+        code, _, _ = writer.put(path, {"title": "depois"})
+        assert code == 200
+        writer.close()
+
+        for _ in range(12):
+            reader = Api(server)
+            assert reader.get(path)[1]["title"] == "depois"
+            reader.close()
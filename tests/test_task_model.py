@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+from app.database import task_repository
+from app.database.task_repository import SQLiteTaskRepository
+from app.models.task import Task
+
+
+def test_task_has_no_instance_dict():
+    task = Task(title="compacta")
+    assert not hasattr(task, "__dict__")
+    with pytest.raises(AttributeError):
+        task.extra = 1
+
+
+def test_db_row_round_trip():
+    row = (1, "título", None, "completo", "2024-01-01 00:00:00", "2024-01-02 00:00:00", 3)
+    task = Task.from_db_row(row)
+    assert tuple(task.to_dict().values()) == row
+    assert Task.from_db_row(None) is None
+
+
+@pytest.mark.parametrize("supports_json", [True, False], ids=["json_object", "python"])
+def test_page_json_matches_to_dict(monkeypatch, tmp_path, supports_json):
+    # As duas serializações (SQLite e Python) devem produzir o mesmo objeto
+    monkeypatch.setattr(task_repository, "SUPPORTS_JSON", supports_json)
+    repository = SQLiteTaskRepository(str(tmp_path / "model.db"))
+    repository.init()
+    try:
+        titles = ['aspas "duplas" e \\ barra', "acentuação ç ü 🙂", "controle \t\n\x01"]
+        created = [repository.create(Task(title=title, description=None)) for title in titles]
+        created.append(repository.create(Task(title="com descrição", description="texto")))
+
+        fragments, next_cursor = repository.find_page_json(limit=10)
+        assert next_cursor is None
+        assert [json.loads(fragment) for fragment in fragments] == [
+            repository.find_by_id(task.id).to_dict() for task in created
+        ]
+    finally:
+        repository.close()
@@ -0,0 +1,43 @@
+import pytest
+
+from app.database import task_repository
+from app.database.task_repository import PreconditionFailed, SQLiteTaskRepository
+from app.models.task import Task
+
+
+@pytest.fixture(params=[True, False], ids=["returning", "select"])
+def repository(request, monkeypatch, tmp_path):
+    """Com UPDATE ... RETURNING e com o SELECT de fallback (SQLite < 3.35)"""
+    monkeypatch.setattr(task_repository, "SUPPORTS_RETURNING", request.param)
+    backend = SQLiteTaskRepository(str(tmp_path / "repository.db"))
+    backend.init()
+    yield backend
+    backend.close()
+
+
+def test_update_returns_the_new_row(repository):
+    task = repository.create(Task(title="antes"))
+
+    updated = repository.update(task.id, {"title": "depois", "status": "completo"})
+    assert (updated.title, updated.status, updated.version) == ("depois", "completo", task.version + 1)
+    assert repository.find_by_id(task.id).title == "depois"
+
+    assert repository.update(task.id + 1000, {"title": "x"}) is None
+
+
+def test_update_checks_the_expected_version(repository):
+    task = repository.create(Task(title="versão"))
+
+    with pytest.raises(PreconditionFailed):
+        repository.update(task.id, {"title": "x"}, expected_version=task.version + 1)
+    assert repository.update(task.id, {"title": "x"}, expected_version=task.version).version == task.version + 1
+
+
+def test_delete_reports_missing_and_stale_tasks(repository):
+    task = repository.create(Task(title="remover"))
+
+    with pytest.raises(PreconditionFailed):
+        repository.delete(task.id, expected_version=task.version + 1)
+    assert repository.delete(task.id, expected_version=task.version) is True
+    assert repository.delete(task.id) is False
+    assert repository.find_by_id(task.id) is None
@@ -0,0 +1,104 @@
+import pytest
+
+from app import config
+from app.models.task import Task
+from app.validators.task_validator import MAX_TASK_ID, TaskValidator
+
+
+@pytest.mark.parametrize("status", [None, ""])
+def test_create_accepts_null_or_empty_status(status):
+    assert TaskValidator.validate_create({"title": "x", "status": status}) == (True, None)
+    assert Task.from_dict({"title": "x", "status": status}).status == "pendente"
+
+
+@pytest.mark.parametrize("status", [None, "", "feito", 1])
+def test_update_rejects_invalid_status(status):
+    is_valid, error_msg = TaskValidator.validate_update({"status": status})
+    assert not is_valid
+    assert "Status inválido" in error_msg
+
+
+@pytest.mark.parametrize("task_id", [1, MAX_TASK_ID])
+def test_validate_id_accepts_sqlite_range(task_id):
+    assert TaskValidator.validate_id(task_id) == (True, None)
+
+
+@pytest.mark.parametrize("task_id", [0, -1, MAX_TASK_ID + 1, 2**70, True, "1", 1.0, None])
+def test_validate_id_rejects_out_of_range(task_id):
+    assert TaskValidator.validate_id(task_id) == (False, "ID inválido")
+
+
+@pytest.mark.parametrize("value", ["²", "٣", "-1", "", "1.", ".5", "1.²", str(MAX_TASK_ID + 1), str(2**70), "9" * 5000])
+def test_list_after_id_rejects_non_ascii_and_out_of_range(value):
+    filters, error_msg = TaskValidator.parse_list_params({"after_id": [value]})
+    assert filters is None
+    assert "after_id" in error_msg
+
+
+@pytest.mark.parametrize("value", ["²", "0", str(2**70)])
+def test_list_limit_rejects_non_ascii_and_out_of_range(value):
+    filters, error_msg = TaskValidator.parse_list_params({"limit": [value]})
+    assert filters is None
+    assert "limit" in error_msg
+
+
+def test_list_after_id_accepts_composite_cursor():
+    filters, error_msg = TaskValidator.parse_list_params({"after_id": ["120.0.57"]})
+    assert error_msg is None
+    assert filters["after_id"] == (120, 0, 57)
+
+
+def test_list_params_accept_bounds():
+    filters, error_msg = TaskValidator.parse_list_params({"limit": ["1"], "after_id": [str(MAX_TASK_ID)]})
+    assert error_msg is None
+    assert filters["limit"] == 1
+    assert filters["after_id"] == MAX_TASK_ID
+
+
+@pytest.mark.parametrize("name, value", [
+    ("limit", "²"),
+    ("limit", str(2**70)),
+    ("offset", "²"),
+    ("offset", "-1"),
+    ("offset", str(MAX_TASK_ID)),
+    ("offset", str(2**70)),
+])
+def test_search_params_reject_non_ascii_and_out_of_range(name, value):
+    filters, error_msg = TaskValidator.parse_search_params({"q": ["python"], name: [value]})
+    assert filters is None
+    assert name in error_msg
+
+
+def test_search_offset_plus_page_fits_in_64_bits():
+    filters, error_msg = TaskValidator.parse_search_params({
+        "q": ["python"],
+        "limit": [str(config.SEARCH_PAGE_MAX_LIMIT)],
+        "offset": [str(MAX_TASK_ID - config.SEARCH_PAGE_MAX_LIMIT - 1)],
+    })
+    assert error_msg is None
+    assert filters["offset"] + filters["limit"] + 1 <= MAX_TASK_ID
+
+
+@pytest.mark.parametrize("value", ["²", "٣", "0", str(2**70)])
+def test_stats_days_rejects_non_ascii_and_out_of_range(value):
+    filters, error_msg = TaskValidator.parse_stats_params({"days": [value]})
+    assert filters is None
+    assert "days" in error_msg
+
+
+@pytest.mark.parametrize("name, value", [
+    ("limit", "²"),
+    ("limit", str(2**70)),
+    ("since", "²"),
+    ("since", str(MAX_TASK_ID + 1)),
+])
+def test_changes_params_reject_non_ascii_and_out_of_range(name, value):
+    params, error_msg = TaskValidator.parse_changes_params({name: [value]})
+    assert params is None
+    assert name in error_msg
+
+
+def test_changes_last_event_id_is_validated_like_since():
+    params, error_msg = TaskValidator.parse_changes_params({}, last_event_id=str(2**64))
+    assert params is None
+    assert "since" in error_msg
@@ -0,0 +1,130 @@
+import threading
+
+from tests.conftest import Api
+
+
+def test_create_get_update_delete(api):
+    status, body, _ = api.post("/tasks", {"title": "Estudar", "description": "SQLite"})
+    assert status == 201
+    task_id = body["id"]
+    assert body["status"] == "pendente"
+
+    status, body, _ = api.get(f"/tasks/{task_id}")
+    assert status == 200
+    assert body["title"] == "Estudar"
+
+    status, body, _ = api.put(f"/tasks/{task_id}", {"status": "completo"})
+    assert status == 200
+    assert body["status"] == "completo"
+
+    status, _, _ = api.delete(f"/tasks/{task_id}")
+    assert status == 204
+    status, _, _ = api.get(f"/tasks/{task_id}")
+    assert status == 404
+
+
+def test_null_or_empty_status_defaults_to_pending(api):
+    for status in (None, ""):
+        code, body, _ = api.post("/tasks", {"title": "sem status", "status": status})
+        assert code == 201
+        assert body["status"] == "pendente"
+
+    code, body, _ = api.get("/tasks/stats")
+    assert code == 200
+    assert "" not in body["by_status"]
+
+
+def test_id_above_sqlite_range(api):
+    # O segmento não casa com {id:int}, então a rota não existe
+    for path in (f"/tasks/{2**63}", f"/tasks/{'9' * 5000}"):
+        code, _, _ = api.get(path)
+        assert code == 404
+        code, _, _ = api.put(path, {"title": "x"})
+        assert code == 404
+
+
+def test_list_params_out_of_range_are_rejected(api):
+    for query in ("limit=%C2%B2", "after_id=%C2%B2", f"after_id={2**64}"):
+        code, body, _ = api.get(f"/tasks?{query}")
+        assert code == 400, query
+        assert "error" in body
+    code, _, _ = api.get(f"/tasks/export?after_id={2**64}")
+    assert code == 400
+
+
+def test_search_params_out_of_range_are_rejected(api):
+    for query in ("limit=%C2%B2", "offset=%C2%B2", f"offset={2**63}"):
+        code, body, _ = api.get(f"/tasks/search?q=python&{query}")
+        assert code == 400, query
+        assert "error" in body
+
+
+def test_stats_days_non_ascii_digit_is_rejected(api):
+    code, body, _ = api.get("/tasks/stats?days=%C2%B2")
+    assert code == 400
+    assert "days" in body["error"]
+
+
+def test_changes_params_are_validated(api):
+    for query in ("limit=%C2%B2", "since=%C2%B2", f"since={2**64}"):
+        code, body, _ = api.get(f"/tasks/changes?{query}")
+        assert code == 400, query
+        assert "error" in body
+
+    # Cursor válido mas além do log: resposta do feed, não erro interno
+    code, body, _ = api.get(f"/tasks/changes?since={2**63 - 1}&limit=5")
+    assert code == 410
+    assert "error" in body
+
+
+def test_composite_cursor_is_rejected_without_shards(api):
+    for path in ("/tasks?after_id=1.5", "/tasks/export?after_id=1.5"):
+        code, body, _ = api.get(path)
+        assert code == 400, path
+        assert "after_id" in body["error"]
+
+
+def test_idempotent_create_is_replayed(api):
+    headers = {"Idempotency-Key": "pedido-1"}
+    code, first, first_headers = api.post("/tasks", {"title": "uma vez"}, headers)
+    assert code == 201
+    assert first_headers.get("Idempotent-Replayed") is None
+
+    code, again, again_headers = api.post("/tasks", {"title": "uma vez"}, headers)
+    assert code == 201
+    assert again == first
+    assert again_headers["Idempotent-Replayed"] == "true"
+
+    code, _, _ = api.post("/tasks", {"title": "outro corpo"}, headers)
+    assert code == 422
+
+    code, page, _ = api.get("/tasks?limit=1000")
+    assert [task["title"] for task in page["tasks"]].count("uma vez") == 1
+
+
+def test_concurrent_requests_with_same_idempotency_key(server):
+    headers = {"Idempotency-Key": "pedido-concorrente"}
+    barrier = threading.Barrier(2)
+    responses = []
+
+    def create():
+        client = Api(server)
+        barrier.wait(5)
+        code, body, _ = client.post("/tasks", {"title": "concorrente"}, headers)
+        responses.append((code, body))
+        client.close()
+
+    threads = [threading.Thread(target=create) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+
+    assert len(responses) == 2
+    assert responses[0] == responses[1]
+    assert responses[0][0] == 201
+
+    client = Api(server)
+    _, page, _ = client.get("/tasks?limit=1000")
+    client.close()
+    assert [task["title"] for task in page["tasks"]].count("concorrente") == 1
@@ -0,0 +1,118 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from app.database.writer import WriteQueue, WriterClosed
+
+
+@pytest.fixture
+def writer(tmp_path):
+    path = str(tmp_path / "writer.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, value TEXT NOT NULL)")
+    conn.close()
+
+    queue = WriteQueue(path)
+    yield queue
+    queue.close(timeout=5)
+
+
+def _count(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_execute_returns_job_result(writer):
+    def insert(conn):
+        return conn.execute("INSERT INTO items (value) VALUES ('a')").lastrowid
+
+    assert writer.execute(insert, timeout=5) == 1
+    assert _count(writer.db_path) == 1
+
+
+def test_failed_job_does_not_undo_the_rest_of_the_batch(writer):
+    # Bloqueia a thread escritora para que os três jobs caiam no mesmo lote
+    release = threading.Event()
+    blocker = writer.submit(lambda conn: release.wait(5))
+
+    ok_before = writer.submit(lambda conn: conn.execute("INSERT INTO items (value) VALUES ('a')"))
+    failing = writer.submit(lambda conn: conn.execute("INSERT INTO items (value) VALUES (NULL)"))
+    ok_after = writer.submit(lambda conn: conn.execute("INSERT INTO items (value) VALUES ('b')"))
+    release.set()
+
+    blocker.result(5)
+    ok_before.result(5)
+    ok_after.result(5)
+    with pytest.raises(sqlite3.IntegrityError):
+        failing.result(5)
+
+    assert _count(writer.db_path) == 2
+    stats = writer.stats()
+    assert stats["failed_jobs"] == 1
+    assert stats["largest_batch"] >= 3
+
+
+def test_closed_writer_rejects_new_jobs(writer):
+    writer.close(timeout=5)
+    with pytest.raises(WriterClosed):
+        writer.submit(lambda conn: None)
+
+
+def test_timed_out_job_still_queued_is_cancelled(writer):
+    started = threading.Event()
+    release = threading.Event()
+    blocker = writer.submit(lambda conn: (started.set(), release.wait(5)))
+    # O próximo job só pode cair num lote posterior ao do bloqueador
+    assert started.wait(5)
+
+    with pytest.raises(TimeoutError):
+        writer.execute(lambda conn: conn.execute("INSERT INTO items (value) VALUES ('a')"), timeout=0.1)
+    release.set()
+    blocker.result(5)
+
+    # O job cancelado nunca é aplicado: repetir a escrita não a duplica
+    writer.execute(lambda conn: None, timeout=5)
+    assert _count(writer.db_path) == 0
+
+
+def test_timed_out_job_already_running_waits_for_the_commit(writer):
+    def slow_insert(conn):
+        time.sleep(0.3)
+        return conn.execute("INSERT INTO items (value) VALUES ('a')").lastrowid
+
+    assert writer.execute(slow_insert, timeout=0.05) == 1
+    assert _count(writer.db_path) == 1
+
+
+class _SavepointFails:
+    """Conexão que falha no próximo SAVEPOINT e delega o resto"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.armed = True
+
+    def execute(self, sql, *args):
+        if self.armed and sql.startswith("SAVEPOINT"):
+            self.armed = False
+            raise sqlite3.OperationalError("disk I/O error")
+        return self._conn.execute(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+def test_savepoint_error_fails_the_batch_not_the_thread(writer):
+    writer.execute(lambda conn: None, timeout=5)
+    writer._conn = _SavepointFails(writer._conn)
+
+    with pytest.raises(sqlite3.OperationalError):
+        writer.execute(lambda conn: conn.execute("INSERT INTO items (value) VALUES ('a')"), timeout=5)
+
+    # A thread escritora continua atendendo
+    writer.execute(lambda conn: conn.execute("INSERT INTO items (value) VALUES ('b')"), timeout=5)
+    assert _count(writer.db_path) == 1